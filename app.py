@@ -8,7 +8,7 @@ load_dotenv(override=True)
 from routers import main_blueprint, api_blueprint
 from database import models
 from database import initialize_database, repair_orphaned_image_tags
-from services.priority_service import check_and_apply_priority_changes
+from services.priority_service import check_and_apply_priority_changes, start_priority_reapply
 from services.health_service import startup_health_check
 from utils.logging_config import setup_logging, get_logger
 
@@ -52,6 +52,7 @@ def create_app():
     app.config['SECRET_KEY'] = config.SECRET_KEY
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=4)
     app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max request size
+    app.config['MAX_FORM_MEMORY_SIZE'] = 16 * 1024 * 1024  # Bulk download posts its path list as a form field
 
     # Add before_request handler to redirect to startup if not ready
     @app.before_request
@@ -151,6 +152,13 @@ def create_app():
             await asyncio.sleep(0)
             # This is the heavy step - run in thread
             await asyncio.to_thread(models.load_data_from_db, verbose=False)
+
+            # Re-tag for a changed BOORU_PRIORITY while serving
+            start_priority_reapply()
+
+            if config.UPSCALER_ENABLED:
+                from services import upscale_queue_service
+                upscale_queue_service.start_upscale_queue()
             
             # Mark app as ready
             _init_progress = 100
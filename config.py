@@ -76,6 +76,8 @@ DUPLICATE_REVIEW_CALIBRATION_LOG = _get_setting(
     'DUPLICATE_REVIEW_CALIBRATION_LOG',
     "./data/duplicate_review_calibration.jsonl",
 )
+# Normalized per-image preview arrays reused across duplicate suggestion runs
+DUPLICATE_PREVIEW_CACHE_DIR = _get_setting('DUPLICATE_PREVIEW_CACHE_DIR', "./data/duplicate_previews")
 
 # ==================== API KEYS ====================
 
@@ -86,6 +88,16 @@ SAUCENAO_API_KEY = os.environ.get('SAUCENAO_API_KEY', '')
 GELBOORU_API_KEY = os.environ.get('GELBOORU_API_KEY', '')
 GELBOORU_USER_ID = os.environ.get('GELBOORU_USER_ID', '')
 
+# Booru API base URLs (override to point at a mirror or a local stand-in server)
+DANBOORU_API_URL = _get_setting('DANBOORU_API_URL', 'https://danbooru.donmai.us')
+E621_API_URL = _get_setting('E621_API_URL', 'https://e621.net')
+
+# MD5 lookup cache: how long found / not-found results are reused (seconds)
+METADATA_LOOKUP_CACHE_TTL = int(_get_setting('METADATA_LOOKUP_CACHE_TTL', 7 * 24 * 3600))
+METADATA_LOOKUP_NEGATIVE_TTL = int(_get_setting('METADATA_LOOKUP_NEGATIVE_TTL', 24 * 3600))
+# Hashes per booru search request when looking up many images at once
+METADATA_LOOKUP_BATCH_SIZE = int(_get_setting('METADATA_LOOKUP_BATCH_SIZE', 40))
+
 # System control API secret (for administrative operations)
 SYSTEM_API_SECRET = os.environ.get('SYSTEM_API_SECRET', 'change-this-secret')
 
@@ -148,6 +160,10 @@ DB_CACHE_SIZE_MB = int(_get_setting('DB_CACHE_SIZE_MB', 64))
 # Allows SQLite to map database file to memory for faster reads
 DB_MMAP_SIZE_MB = int(_get_setting('DB_MMAP_SIZE_MB', 256))
 
+# Memory budget for the image details cache in MB (default 64MB, per worker process)
+# Entries are stored compactly and evicted least-recently-used first
+IMAGE_DETAILS_CACHE_MB = int(_get_setting('IMAGE_DETAILS_CACHE_MB', 64))
+
 # Batch size for database operations (default 100)
 # Higher values = fewer commits = faster but longer locks
 DB_BATCH_SIZE = int(_get_setting('DB_BATCH_SIZE', 100))
@@ -161,6 +177,18 @@ DB_WAL_AUTOCHECKPOINT = int(_get_setting('DB_WAL_AUTOCHECKPOINT', 1000))
 # Parallel processing
 MAX_WORKERS = int(_get_setting('MAX_WORKERS', 2))  # Reduced for memory efficiency - each worker adds ~200-400MB due to SQLite memory mapping
 
+# Pipelined ingest (monitor scans): each stage runs on its own threads with
+# bounded queues in between. Tagging uses MAX_WORKERS threads.
+INGEST_HASH_WORKERS = int(_get_setting('INGEST_HASH_WORKERS', 2))
+INGEST_METADATA_WORKERS = int(_get_setting('INGEST_METADATA_WORKERS', 4))  # Network-bound lookups
+INGEST_FINALIZE_WORKERS = int(_get_setting('INGEST_FINALIZE_WORKERS', 2))
+# Capacity of each inter-stage queue; a full queue blocks the stage feeding it
+INGEST_QUEUE_SIZE = int(_get_setting('INGEST_QUEUE_SIZE', 16))
+# Images inserted per database transaction
+INGEST_PERSIST_BATCH_SIZE = int(_get_setting('INGEST_PERSIST_BATCH_SIZE', 25))
+# Seconds the persist stage waits to fill a batch before committing a partial one
+INGEST_PERSIST_MAX_WAIT = float(_get_setting('INGEST_PERSIST_MAX_WAIT', 0.5))
+
 # Weight loading mode for multiprocessing
 # Options: 'shared' (use shared memory), 'lazy' (query database on-demand), 'full' (load all into each worker)
 WEIGHT_LOADING_MODE = str(_get_setting('WEIGHT_LOADING_MODE', 'shared')).lower()
@@ -346,6 +374,21 @@ TAG_SIMILARITY_WEIGHT = float(_get_setting('TAG_SIMILARITY_WEIGHT', 0.7))
 PHASH_SIZE = int(_get_setting('PHASH_SIZE', 16))
 PHASH_BITS = PHASH_SIZE ** 2  # derived: 64 for size 8, 256 for size 16
 
+# Decode JPEGs at a reduced size (DCT scaling) when hashing/embedding/thumbnailing
+# in one pass. The draft is never smaller than the largest artifact needs.
+# Hashes may differ by a few bits from a full-resolution decode.
+analysis_draft = _get_setting('ANALYSIS_JPEG_DRAFT', True)
+ANALYSIS_JPEG_DRAFT = analysis_draft if isinstance(analysis_draft, bool) else str(analysis_draft).lower() in ('true', '1', 'yes')
+
+# Hash/embedding backfill queue (backfill_tasks table). A failed artifact is
+# retried after RETRY_BASE * 2^attempts seconds (capped at RETRY_MAX) and
+# marked failed after MAX_ATTEMPTS. The semantic index is rebuilt at the end
+# of a run, or every INDEX_REFRESH_SECONDS while it runs (0 = end only).
+BACKFILL_MAX_ATTEMPTS = max(1, int(_get_setting('BACKFILL_MAX_ATTEMPTS', 5)))
+BACKFILL_RETRY_BASE_SECONDS = float(_get_setting('BACKFILL_RETRY_BASE_SECONDS', 60))
+BACKFILL_RETRY_MAX_SECONDS = float(_get_setting('BACKFILL_RETRY_MAX_SECONDS', 86400))
+BACKFILL_INDEX_REFRESH_SECONDS = float(_get_setting('BACKFILL_INDEX_REFRESH_SECONDS', 600))
+
 # Hamming distance threshold for considering images similar
 # Lower = stricter matching (scale depends on PHASH_SIZE: 0-64 for 8, 0-256 for 16)
 # For hash_size 16: 0-20 near identical, 21-40 very similar, 41-60 somewhat similar
@@ -411,6 +454,9 @@ SUPPORTED_ANIMATION_EXTENSIONS = ('.gif', '.webp', '.apng')
 NON_UPSCALABLE_EXTENSIONS = ('.gif', '.apng') + SUPPORTED_VIDEO_EXTENSIONS
 SUPPORTED_MEDIA_EXTENSIONS = SUPPORTED_IMAGE_EXTENSIONS + SUPPORTED_VIDEO_EXTENSIONS + SUPPORTED_ZIP_EXTENSIONS
 
+# Frames of a zip animation copied to disk at ingest; the rest are read from the zip on demand
+ZIP_ANIMATION_PREEXTRACT_FRAMES = max(0, int(_get_setting('ZIP_ANIMATION_PREEXTRACT_FRAMES', 1)))
+
 # ==================== UPSCALER (AI IMAGE UPSCALING) ====================
 
 # Enable upscaling feature (disabled by default - set UPSCALER_ENABLED=true in .env)
@@ -432,6 +478,9 @@ UPSCALER_TILE_PAD = int(_get_setting('UPSCALER_TILE_PAD', 32))
 # Minimum tile size allowed when retrying after runtime failures
 UPSCALER_MIN_TILE_SIZE = int(_get_setting('UPSCALER_MIN_TILE_SIZE', 64))
 
+# Tiles sent through the model per forward pass (halved on out-of-memory retries)
+UPSCALER_TILE_BATCH_SIZE = max(1, int(_get_setting('UPSCALER_TILE_BATCH_SIZE', 4)))
+
 # Fallback to CPU when accelerator backend repeatedly fails during inference
 _upscaler_cpu_fallback = _get_setting('UPSCALER_ALLOW_CPU_FALLBACK', True)
 UPSCALER_ALLOW_CPU_FALLBACK = _upscaler_cpu_fallback if isinstance(_upscaler_cpu_fallback, bool) else str(_upscaler_cpu_fallback).lower() in ('true', '1', 'yes')
@@ -451,6 +500,19 @@ UPSCALER_CONVERT_MAX_IMAGE_PIXELS = int(_get_setting('UPSCALER_CONVERT_MAX_IMAGE
 # Directory to store upscaled images (separate from originals)
 UPSCALED_IMAGES_DIR = str(_get_setting('UPSCALED_IMAGES_DIR', './static/upscaled'))
 
+# Upscale jobs run concurrently across all app processes (the ML worker is shared)
+UPSCALER_QUEUE_SLOTS = max(1, int(_get_setting('UPSCALER_QUEUE_SLOTS', 1)))
+
+# How long POST /api/upscale waits for its job before returning it as queued
+UPSCALER_WAIT_TIMEOUT_SECONDS = max(1.0, float(_get_setting('UPSCALER_WAIT_TIMEOUT_SECONDS', 120)))
+
+# Failed upscales are retried after base * 2^(attempt - 1) seconds, capped at max
+UPSCALER_RETRY_BASE_SECONDS = float(_get_setting('UPSCALER_RETRY_BASE_SECONDS', 30))
+UPSCALER_RETRY_MAX_SECONDS = float(_get_setting('UPSCALER_RETRY_MAX_SECONDS', 900))
+
+# Finished tile strips of in-progress upscales, so a restart resumes mid-image
+UPSCALE_CHECKPOINT_DIR = str(_get_setting('UPSCALE_CHECKPOINT_DIR', './data/upscale_checkpoints'))
+
 # Bulk upscale maintenance thresholds
 # Images matching ANY enabled threshold are selected
 _um_use_filesize = _get_setting('UPSCALE_MAINTENANCE_USE_FILESIZE_KB', True)
@@ -489,6 +551,18 @@ ML_WORKER_BACKEND = str(_get_setting('ML_WORKER_BACKEND', 'auto'))
 # ML worker socket path (Unix domain socket for IPC)
 ML_WORKER_SOCKET = str(_get_setting('ML_WORKER_SOCKET', '/tmp/chibibooru_ml_worker.sock'))
 
+# ML worker scheduler lanes
+# Interactive lane: thumbnails, single-image tagging, similarity, animation extraction
+# Bulk lane: upscaling, video tagging, cache rebuilds, rating training/inference
+# *_WORKERS: requests a lane runs concurrently
+# *_THREADS: intra-op thread budget per lane, 0 = split cores evenly. ONNX
+#   sessions get their lane's count; torch's thread count is process-wide, so
+#   the bulk budget caps torch CPU work for the whole worker
+ML_WORKER_INTERACTIVE_WORKERS = int(_get_setting('ML_WORKER_INTERACTIVE_WORKERS', 2))
+ML_WORKER_BULK_WORKERS = int(_get_setting('ML_WORKER_BULK_WORKERS', 1))
+ML_WORKER_INTERACTIVE_THREADS = int(_get_setting('ML_WORKER_INTERACTIVE_THREADS', 0))
+ML_WORKER_BULK_THREADS = int(_get_setting('ML_WORKER_BULK_THREADS', 0))
+
 # Tag ID optimization is always enabled
 # All tag storage uses int32 IDs for memory efficiency (~200-500 MB savings)
 
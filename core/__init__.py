@@ -13,7 +13,9 @@ from .cache_manager import (
     load_data_from_db_async,
     trigger_cache_reload_async,
     reload_single_image,
+    reload_images,
     remove_image_from_cache,
+    remove_images_from_cache,
     get_image_data,
     get_tag_counts,
 )
@@ -27,7 +29,9 @@ __all__ = [
     'load_data_from_db_async',
     'trigger_cache_reload_async',
     'reload_single_image',
+    'reload_images',
     'remove_image_from_cache',
+    'remove_images_from_cache',
     'get_image_data',
     'get_tag_counts',
 ]
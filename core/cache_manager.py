@@ -67,7 +67,8 @@ def _load_data_from_db_impl(verbose=True):
             return False
 
         # Load tag counts using tag IDs as keys for memory efficiency
-        tag_counts_query = "SELECT id, COUNT(DISTINCT image_id) as count FROM tags JOIN image_tags ON tags.id = image_tags.tag_id GROUP BY id"
+        # (tags.usage_count is maintained by triggers on image_tags)
+        tag_counts_query = "SELECT id, usage_count as count FROM tags WHERE usage_count > 0"
         for row in conn.execute(tag_counts_query).fetchall():
             temp_tag_counts[row['id']] = row['count']
 
@@ -133,6 +134,13 @@ def _load_data_from_db_impl(verbose=True):
         _loading_in_progress = False
 
     logger.info(f"Loaded {len(image_data)} images, {len(tag_counts)} unique tags, {len(post_id_to_md5)} cross-source post_ids.")
+
+    # Rebuild the autocomplete index against the fresh tags and counts
+    try:
+        from core.tag_index import rebuild_tag_index
+        rebuild_tag_index()
+    except Exception as e:
+        logger.error(f"Failed to rebuild tag index: {e}")
     return True
 
 
@@ -197,22 +205,36 @@ def is_loading():
 
 def reload_single_image(filepath):
     """Reload a single image's data in the in-memory cache without full reload."""
+    reload_images([filepath])
+
+
+def reload_images(filepaths):
+    """
+    Reload several images' tag IDs in the in-memory cache in one pass.
+
+    Images missing from the cache are appended; images no longer in the
+    database are left untouched.
+    """
     global image_data
-    with data_lock:
-        with get_db_connection() as conn:
+    filepaths = list(dict.fromkeys(filepaths))
+    if not filepaths:
+        return
+    fresh = {}
+    with get_db_connection() as conn:
+        for start in range(0, len(filepaths), 500):
+            chunk = filepaths[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
             # Load image data using tag IDs
-            query = """
+            query = f"""
             SELECT i.filepath,
                    COALESCE(GROUP_CONCAT(t.id, ','), '') as tag_ids
             FROM images i
             LEFT JOIN image_tags it ON i.id = it.image_id
             LEFT JOIN tags t ON it.tag_id = t.id
-            WHERE i.filepath = ?
+            WHERE i.filepath IN ({placeholders})
             GROUP BY i.id
             """
-            result = conn.execute(query, (filepath,)).fetchone()
-
-            if result:
+            for result in conn.execute(query, chunk).fetchall():
                 new_entry = dict(result)
                 # Parse comma-separated IDs into array
                 if new_entry['tag_ids']:
@@ -220,17 +242,46 @@ def reload_single_image(filepath):
                     new_entry['tag_ids'] = array('i', ids)
                 else:
                     new_entry['tag_ids'] = array('i')
-                # Remove old entry if exists
-                image_data[:] = [img for img in image_data if img['filepath'] != filepath]
-                # Add new entry
-                image_data.append(new_entry)
+                fresh[new_entry['filepath']] = new_entry
+    if not fresh:
+        return
+    with data_lock:
+        # Replace old entries in place, then add any that were not cached yet
+        pending = dict(fresh)
+        for index, img in enumerate(image_data):
+            entry = pending.pop(img['filepath'], None)
+            if entry is not None:
+                image_data[index] = entry
+        image_data.extend(pending.values())
 
 
 def remove_image_from_cache(filepath):
     """Remove a single image from the in-memory cache."""
+    remove_images_from_cache([filepath])
+
+
+def remove_images_from_cache(filepaths, md5s=(), image_ids=()):
+    """
+    Remove many images from the in-memory caches in a single pass.
+
+    Args:
+        filepaths: Paths of the removed images
+        md5s: Their MD5s, if known
+        image_ids: Their IDs, if known (lets the homepage pool drop them directly)
+    """
     global image_data
+    from events.cache_events import trigger_image_invalidation
+    from services import homepage_cache
+    removed = set(filepaths)
+    if not removed:
+        return
     with data_lock:
-        image_data[:] = [img for img in image_data if img['filepath'] != filepath]
+        image_data[:] = [img for img in image_data if img['filepath'] not in removed]
+    trigger_image_invalidation(filepaths=list(removed), md5s=list(md5s))
+    if image_ids:
+        homepage_cache.remove_image_ids(image_ids)
+    else:
+        homepage_cache.invalidate_images(removed)
 
 
 def get_image_data():
@@ -250,10 +301,13 @@ def reload_tag_counts():
     global tag_counts
     with data_lock:
         with get_db_connection() as conn:
-            tag_counts_query = "SELECT id, COUNT(DISTINCT image_id) as count FROM tags JOIN image_tags ON tags.id = image_tags.tag_id GROUP BY id"
+            tag_counts_query = "SELECT id, usage_count as count FROM tags WHERE usage_count > 0"
             tag_counts.clear()
             tag_counts.update({row['id']: row['count'] for row in conn.execute(tag_counts_query).fetchall()})
 
+    from core.tag_index import update_tag_index_counts
+    update_tag_index_counts(tag_counts)
+
 
 # ============================================================================
 # Tag ID Cache Helper Functions (Memory Optimization - Phase 3)
@@ -325,16 +379,21 @@ def invalidate_image_cache(filepath: str = None):
         filepath: If provided, invalidate only for this image.
                   If None, invalidate all image caches.
     """
-    from repositories.data_access import get_image_details
-    from services.homepage_cache import invalidate as invalidate_homepage_cache
+    from events.cache_events import trigger_image_invalidation
+    from repositories.data_access import clear_image_details_cache
+    from services import homepage_cache
     from services.query.stats import get_enhanced_stats
     
     if filepath:
         reload_single_image(filepath)
     reload_tag_counts()
-    get_image_details.cache_clear()
     get_enhanced_stats.cache_clear()
-    invalidate_homepage_cache()
+    if filepath:
+        trigger_image_invalidation(filepaths=[filepath])
+        homepage_cache.invalidate_images([filepath])
+    else:
+        clear_image_details_cache()
+        homepage_cache.invalidate()
 
 
 def invalidate_tag_cache():
@@ -343,18 +402,21 @@ def invalidate_tag_cache():
     from core.tag_id_cache import reload_tag_id_cache
     from services.query.stats import get_enhanced_stats
     
+    from core.tag_index import sync_tag_index
+    
     reload_tag_id_cache()
+    sync_tag_index()
     reload_tag_counts()
     get_enhanced_stats.cache_clear()
 
 
 def invalidate_all_caches():
     """Invalidate all application caches."""
-    from repositories.data_access import get_image_details
+    from repositories.data_access import clear_image_details_cache
     from services.homepage_cache import invalidate as invalidate_homepage_cache
     from services.query.stats import get_enhanced_stats
     
     load_data_from_db()
-    get_image_details.cache_clear()
+    clear_image_details_cache()
     get_enhanced_stats.cache_clear()
     invalidate_homepage_cache()
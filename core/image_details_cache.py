@@ -0,0 +1,148 @@
+"""
+Image Details Cache - Byte-bounded LRU cache for get_image_details()
+
+Replaces an lru_cache(maxsize=10000) that held fully parsed raw_metadata for
+every entry. Entries are stored compactly:
+
+- column names are shared between entries, values are kept as a tuple
+- raw_metadata stays a JSON string (zlib-compressed above a small size)
+  and is only parsed when the entry is read
+
+The cache is bounded by estimated bytes (IMAGE_DETAILS_CACHE_MB) and evicts
+least recently used entries. Entries are invalidated per filepath or MD5 via
+events.cache_events, so editing one image leaves the rest of the cache intact.
+A full clear happens only on global invalidation (database reload).
+"""
+
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# raw_metadata JSON longer than this is compressed
+_COMPRESS_THRESHOLD = 1024
+
+# Per-entry bookkeeping (OrderedDict node, md5 index slot, key string)
+_ENTRY_OVERHEAD = 200
+
+
+class ImageDetailsCache:
+    """LRU cache of image detail rows keyed by filepath, bounded by bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # filepath -> (columns, values, raw, compressed, md5, size)
+        self._by_md5: Dict[str, str] = {}
+        self._columns: Dict[tuple, tuple] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, filepath: str) -> Optional[dict]:
+        """
+        Return a fresh copy of the cached row (raw_metadata as a JSON string),
+        or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(filepath)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(filepath)
+            self.hits += 1
+        columns, values, raw, compressed, _, _ = entry
+        row = dict(zip(columns, values))
+        if raw is not None:
+            row['raw_metadata'] = (zlib.decompress(raw) if compressed else raw).decode('utf-8')
+        else:
+            row['raw_metadata'] = None
+        return row
+
+    def put(self, filepath: str, row: dict):
+        """
+        Cache a details row.
+
+        Args:
+            filepath: Cache key
+            row: Column dict with raw_metadata as a JSON string (or None)
+        """
+        row = dict(row)
+        raw = row.pop('raw_metadata', None)
+        compressed = False
+        if raw is not None:
+            raw = raw.encode('utf-8')
+            if len(raw) > _COMPRESS_THRESHOLD:
+                raw = zlib.compress(raw, 1)
+                compressed = True
+
+        columns = tuple(row)
+        values = tuple(row.values())
+        size = (
+            _ENTRY_OVERHEAD
+            + sys.getsizeof(filepath)
+            + sys.getsizeof(values)
+            + sum(sys.getsizeof(v) for v in values)
+            + (len(raw) if raw is not None else 0)
+        )
+        if size > self.max_bytes:
+            return
+        md5 = row.get('md5')
+
+        with self._lock:
+            columns = self._columns.setdefault(columns, columns)
+            self._discard(filepath)
+            self._entries[filepath] = (columns, values, raw, compressed, md5, size)
+            if md5:
+                self._by_md5[md5] = filepath
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, filepath) -> bool:
+        entry = self._entries.pop(filepath, None)
+        if entry is None:
+            return False
+        md5 = entry[4]
+        if md5 and self._by_md5.get(md5) == filepath:
+            del self._by_md5[md5]
+        self._bytes -= entry[5]
+        return True
+
+    def invalidate(self, filepaths=(), md5s=()) -> int:
+        """Drop entries by filepath and/or MD5. Returns the number removed."""
+        removed = 0
+        with self._lock:
+            for filepath in filepaths:
+                removed += self._discard(filepath)
+            for md5 in md5s:
+                filepath = self._by_md5.get(md5)
+                if filepath is not None:
+                    removed += self._discard(filepath)
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_md5.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
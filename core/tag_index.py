@@ -0,0 +1,385 @@
+"""
+Tag Name Index - In-memory prefix/substring index for autocomplete and tag search
+
+Replaces per-keystroke ``LIKE '%token%'`` scans plus ``COUNT(DISTINCT ...)``
+aggregates over image_tags with:
+
+- a sorted list of lowercased names (prefix matches via bisect)
+- bigram/trigram posting lists (substring candidates)
+- post counts taken from the cache_manager tag counts
+
+Every tag gets a slot; slots are assigned by post count at build time (slot 0
+is the most used tag) and posting lists hold slots in ascending order, so a
+substring scan sees popular tags first and can stop once it has enough
+matches. Tags added later get new slots at the end. Counts are kept live, so
+the final ordering is always by current count.
+
+Updates are incremental: sync_tags() diffs the tags table against the index
+(new, renamed, recategorized and deleted tags) and update_counts() refreshes
+post counts. Both are called from the cache_manager invalidation helpers.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from database import get_db_connection
+
+logger = logging.getLogger('chibibooru.TagIndex')
+
+# Substring scans collect this many times the requested matches before
+# ranking by live count (posting order reflects build-time counts)
+_OVERSCAN = 3
+
+
+def _grams(name: str):
+    """Distinct bigrams and trigrams of a lowercased name."""
+    grams = set()
+    for n in (2, 3):
+        for i in range(len(name) - n + 1):
+            grams.add(name[i:i + n])
+    return grams
+
+
+class TagNameIndex:
+    """Prefix and n-gram index over tag names."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        # Per-slot columns
+        self._ids: List[int] = []
+        self._names: List[str] = []
+        self._lower: List[str] = []
+        self._categories: List[Optional[str]] = []
+        self._alive: List[bool] = []
+        self._counts: List[int] = []
+        self._slot_by_id: Dict[int, int] = {}
+        self._max_id = 0
+        # Sorted (lowercased name, slot) for prefix lookups
+        self._sorted_names: List[str] = []
+        self._sorted_slots: List[int] = []
+        # n-gram -> ascending slots
+        self._postings: Dict[str, array] = {}
+        # tag id -> implied tag ids (active implications)
+        self._implies: Dict[int, List[int]] = {}
+
+    # ------------------------------------------------------------------
+    # Building and incremental updates
+    # ------------------------------------------------------------------
+
+    def build(self, rows, counts: Dict[int, int]):
+        """
+        Build the index from scratch.
+
+        Args:
+            rows: Iterable of (id, name, category)
+            counts: tag id -> post count
+        """
+        rows = sorted(rows, key=lambda r: (-counts.get(r[0], 0), r[1]))
+        with self._lock:
+            self._clear()
+            for tag_id, name, category in rows:
+                self._append(tag_id, name, category, counts.get(tag_id, 0))
+            order = sorted(range(len(self._lower)), key=self._lower.__getitem__)
+            self._sorted_names = [self._lower[s] for s in order]
+            self._sorted_slots = order
+
+    def _append(self, tag_id, name, category, count):
+        slot = len(self._ids)
+        lower = name.lower()
+        self._ids.append(tag_id)
+        self._names.append(name)
+        self._lower.append(lower)
+        self._categories.append(category)
+        self._alive.append(True)
+        self._counts.append(count)
+        self._slot_by_id[tag_id] = slot
+        self._max_id = max(self._max_id, tag_id)
+        for gram in _grams(lower):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('i')
+            posting.append(slot)
+        return slot
+
+    def _remove_slot(self, slot):
+        self._alive[slot] = False
+        self._slot_by_id.pop(self._ids[slot], None)
+        lower = self._lower[slot]
+        i = bisect.bisect_left(self._sorted_names, lower)
+        while i < len(self._sorted_names) and self._sorted_names[i] == lower:
+            if self._sorted_slots[i] == slot:
+                del self._sorted_names[i]
+                del self._sorted_slots[i]
+                break
+            i += 1
+
+    def add_tag(self, tag_id: int, name: str, category: Optional[str], count: int = 0):
+        """Add a tag, or re-add it if its name changed."""
+        with self._lock:
+            old = self._slot_by_id.get(tag_id)
+            if old is not None:
+                if self._names[old] == name:
+                    self._categories[old] = category
+                    return
+                self._remove_slot(old)
+            slot = self._append(tag_id, name, category, count)
+            i = bisect.bisect_left(self._sorted_names, self._lower[slot])
+            self._sorted_names.insert(i, self._lower[slot])
+            self._sorted_slots.insert(i, slot)
+
+    def remove_tag(self, tag_id: int):
+        with self._lock:
+            slot = self._slot_by_id.get(tag_id)
+            if slot is not None:
+                self._remove_slot(slot)
+
+    def sync_tags(self, rows):
+        """
+        Apply the differences between the tags table and the index.
+
+        Args:
+            rows: Iterable of (id, name, category) for every tag
+        """
+        with self._lock:
+            seen = set()
+            added = removed = changed = 0
+            for tag_id, name, category in rows:
+                seen.add(tag_id)
+                slot = self._slot_by_id.get(tag_id)
+                if slot is None:
+                    self.add_tag(tag_id, name, category)
+                    added += 1
+                elif self._names[slot] != name or self._categories[slot] != category:
+                    self.add_tag(tag_id, name, category, self._counts[slot])
+                    changed += 1
+            for tag_id in [t for t in self._slot_by_id if t not in seen]:
+                self.remove_tag(tag_id)
+                removed += 1
+        if added or removed or changed:
+            logger.debug(f"Tag index sync: +{added} -{removed} ~{changed}")
+
+    def update_counts(self, counts: Dict[int, int]):
+        """Replace post counts (tag id -> count); tags absent from counts get 0."""
+        with self._lock:
+            for slot, tag_id in enumerate(self._ids):
+                self._counts[slot] = counts.get(tag_id, 0)
+
+    def set_implications(self, pairs):
+        """
+        Replace implication hints.
+
+        Args:
+            pairs: Iterable of (source_tag_id, implied_tag_id)
+        """
+        implies: Dict[int, List[int]] = {}
+        for source_id, implied_id in pairs:
+            implies.setdefault(source_id, []).append(implied_id)
+        with self._lock:
+            self._implies = implies
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _matches(self, slot, category, min_count):
+        return (
+            self._alive[slot]
+            and (category is None or self._categories[slot] == category)
+            and self._counts[slot] >= min_count
+        )
+
+    def _prefix_slots(self, token):
+        lo = bisect.bisect_left(self._sorted_names, token)
+        # Highest code point: astral characters (emoji) sort above U+FFFF
+        hi = bisect.bisect_left(self._sorted_names, token + chr(0x10FFFF), lo)
+        return self._sorted_slots[lo:hi]
+
+    def _substring_slots(self, token, category, min_count, exclude, limit=None):
+        """Slots whose name contains token, in posting (popularity) order."""
+        if len(token) < 2:
+            candidates = range(len(self._ids))
+        else:
+            n = 3 if len(token) >= 3 else 2
+            postings = [self._postings.get(token[i:i + n]) for i in range(len(token) - n + 1)]
+            if any(p is None for p in postings):
+                return []
+            candidates = min(postings, key=len)
+        found = []
+        lower = self._lower
+        for slot in candidates:
+            if slot in exclude or token not in lower[slot]:
+                continue
+            if not self._matches(slot, category, min_count):
+                continue
+            found.append(slot)
+            if limit is not None and len(found) >= limit:
+                break
+        return found
+
+    def _entry(self, slot, token):
+        implied = [
+            self._names[s] for s in (self._slot_by_id.get(t) for t in self._implies.get(self._ids[slot], ()))
+            if s is not None
+        ]
+        return {
+            'name': self._names[slot],
+            'category': self._categories[slot],
+            'count': self._counts[slot],
+            'is_prefix': self._lower[slot].startswith(token),
+            'implies': implied,
+        }
+
+    def search(self, token: str, limit: int = 20, category: Optional[str] = None,
+               exclude_prefix: Optional[str] = None, min_count: int = 0) -> List[dict]:
+        """
+        Ranked prefix and substring matches.
+
+        Prefix matches come first, then substring matches; each group is
+        ordered by post count (descending), then name.
+
+        Args:
+            token: Search text (case-insensitive)
+            limit: Maximum results
+            category: Only tags in this category (None for all)
+            exclude_prefix: Skip tags whose name starts with this
+            min_count: Skip tags used on fewer images
+
+        Returns:
+            List of dicts with name, category, count, is_prefix, implies
+        """
+        token = token.lower()
+        if not token or limit <= 0:
+            return []
+
+        with self._lock:
+            def keep(slot):
+                return self._matches(slot, category, min_count) and not (
+                    exclude_prefix and self._lower[slot].startswith(exclude_prefix)
+                )
+
+            def rank(slot):
+                return (-self._counts[slot], self._lower[slot])
+
+            prefix = heapq.nsmallest(limit, filter(keep, self._prefix_slots(token)), key=rank)
+            results = prefix
+            if len(prefix) < limit:
+                exclude = set(prefix)
+                if exclude_prefix:
+                    exclude.update(self._prefix_slots(exclude_prefix))
+                # Prefix matches not kept above are also excluded from the substring pass
+                exclude.update(self._prefix_slots(token))
+                wanted = limit - len(prefix)
+                substring = self._substring_slots(token, category, min_count, exclude, wanted * _OVERSCAN)
+                results = prefix + heapq.nsmallest(wanted, substring, key=rank)
+            return [self._entry(slot, token) for slot in results]
+
+    def list_tags(self, query: str = '', category: Optional[str] = None,
+                  limit: int = 100, offset: int = 0, min_count: int = 0):
+        """
+        All tags containing query (or all tags), ordered by name, paginated.
+
+        Returns:
+            Tuple (list of {name, category, count}, total)
+        """
+        query = (query or '').lower()
+        with self._lock:
+            if query:
+                slots = self._substring_slots(query, category, min_count, set())
+                slots.sort(key=self._lower.__getitem__)
+            elif category is None and min_count <= 0:
+                # _sorted_slots only holds live tags
+                slots = self._sorted_slots
+            else:
+                slots = [s for s in self._sorted_slots if self._matches(s, category, min_count)]
+            page = slots[offset:offset + limit]
+            tags = [
+                {'name': self._names[s], 'category': self._categories[s], 'count': self._counts[s]}
+                for s in page
+            ]
+            return tags, len(slots)
+
+    def size(self) -> int:
+        return len(self._slot_by_id)
+
+    def max_tag_id(self) -> int:
+        return self._max_id
+
+
+# Global instance
+_tag_index: Optional[TagNameIndex] = None
+_tag_index_lock = threading.Lock()
+
+
+def _fetch_tag_rows():
+    with get_db_connection() as conn:
+        return [(row['id'], row['name'], row['category'])
+                for row in conn.execute("SELECT id, name, category FROM tags")]
+
+
+def _fetch_implications():
+    with get_db_connection() as conn:
+        return [(row['source_tag_id'], row['implied_tag_id']) for row in conn.execute(
+            "SELECT source_tag_id, implied_tag_id FROM tag_implications WHERE status = 'active'"
+        )]
+
+
+def _current_counts() -> Dict[int, int]:
+    from core.cache_manager import get_tag_counts
+    return dict(get_tag_counts())
+
+
+def get_tag_index() -> TagNameIndex:
+    """Get the global tag index, building it on first use."""
+    global _tag_index
+    if _tag_index is None:
+        with _tag_index_lock:
+            if _tag_index is None:
+                index = TagNameIndex()
+                index.build(_fetch_tag_rows(), _current_counts())
+                index.set_implications(_fetch_implications())
+                logger.info(f"Built tag index: {index.size()} tags")
+                _tag_index = index
+    return _tag_index
+
+
+def rebuild_tag_index():
+    """Rebuild the index from the database (after a full cache reload)."""
+    global _tag_index
+    index = TagNameIndex()
+    index.build(_fetch_tag_rows(), _current_counts())
+    index.set_implications(_fetch_implications())
+    with _tag_index_lock:
+        _tag_index = index
+
+
+def sync_tag_index():
+    """Apply tag additions, renames, category changes and deletions."""
+    if _tag_index is None:
+        return
+    _tag_index.sync_tags(_fetch_tag_rows())
+    _tag_index.set_implications(_fetch_implications())
+
+
+def update_tag_index_counts(counts: Dict[int, int]):
+    """
+    Push fresh post counts (tag id -> count) into the index.
+
+    Tags created since the last sync (e.g. by a tag edit) are added first;
+    only rows above the highest indexed ID are read.
+    """
+    if _tag_index is None:
+        return
+    with get_db_connection() as conn:
+        new_rows = [(row['id'], row['name'], row['category']) for row in conn.execute(
+            "SELECT id, name, category FROM tags WHERE id > ?", (_tag_index.max_tag_id(),)
+        )]
+    for tag_id, name, category in new_rows:
+        _tag_index.add_tag(tag_id, name, category)
+    _tag_index.update_counts(counts)
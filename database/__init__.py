@@ -3,5 +3,8 @@ from .core import (
     initialize_database,
     repair_orphaned_image_tags,
     populate_fts_table,
+    rebuild_fts_index,
+    recount_tag_usage,
+    rebuild_tag_category_counts,
     DB_FILE
 )
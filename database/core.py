@@ -176,6 +176,39 @@ def get_db_connection_direct():
     """
     return _create_db_connection()
 
+# Columns indexed by images_fts, all read straight from the images table
+FTS_COLUMNS = (
+    'filepath',
+    'tags_character',
+    'tags_copyright',
+    'tags_artist',
+    'tags_species',
+    'tags_meta',
+    'tags_general',
+)
+
+
+def _migrate_fts_to_external_content(cur):
+    """
+    Drop the legacy standalone images_fts table and its triggers.
+
+    The old table kept its own copy of every tag string plus a redundant
+    tags_all column and was keyed by filepath. initialize_database() recreates
+    it as an external-content table keyed by images.id and rebuilds it.
+    """
+    cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='images_fts'")
+    row = cur.fetchone()
+    if not row or "content='images'" in row['sql']:
+        return False
+
+    logger.info("Migrating images_fts to an external-content FTS5 table...")
+    cur.execute("DROP TRIGGER IF EXISTS images_fts_insert")
+    cur.execute("DROP TRIGGER IF EXISTS images_fts_update")
+    cur.execute("DROP TRIGGER IF EXISTS images_fts_delete")
+    cur.execute("DROP TABLE images_fts")
+    return True
+
+
 def initialize_database():
     """Create the database and tables if they don't exist."""
     with get_db_connection() as conn:
@@ -210,6 +243,8 @@ def initialize_database():
             'image_height': 'INTEGER',  # Original image height in pixels
             'upscaled_width': 'INTEGER',  # Upscaled image width in pixels
             'upscaled_height': 'INTEGER',  # Upscaled image height in pixels
+            'file_size': 'INTEGER',  # File size when md5 was last verified
+            'file_mtime_ns': 'INTEGER',  # File mtime when md5 was last verified
         }
 
         cur.execute("PRAGMA table_info(images);")
@@ -247,6 +282,27 @@ def initialize_database():
             logger.debug("Adding 'extended_category' column to 'tags' table...")
             cur.execute("ALTER TABLE tags ADD COLUMN extended_category TEXT")
 
+        # Number of images carrying the tag, kept current by the image_tags
+        # triggers below; backfilled once when the column is added
+        usage_count_added = 'usage_count' not in tag_columns
+        if usage_count_added:
+            logger.debug("Adding 'usage_count' column to 'tags' table...")
+            cur.execute("ALTER TABLE tags ADD COLUMN usage_count INTEGER NOT NULL DEFAULT 0")
+
+        # Tag counts per categorization group for the categorization
+        # workbench stats, kept current by the tags triggers below
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tag_category_counts'")
+        tag_category_counts_added = cur.fetchone() is None
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS tag_category_counts (
+            extended_category TEXT NOT NULL,
+            status TEXT NOT NULL,
+            used INTEGER NOT NULL,
+            tag_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (extended_category, status, used)
+        ) WITHOUT ROWID
+        """)
+
         # Image-to-Tag mapping table
         cur.execute("""
         CREATE TABLE IF NOT EXISTS image_tags (
@@ -292,7 +348,7 @@ def initialize_database():
                 cur.execute("ALTER TABLE image_tags_new RENAME TO image_tags")
                 # Recreate indexes
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_image_id ON image_tags(image_id)")
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_tag_id ON image_tags(tag_id)")
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_tag_id ON image_tags(tag_id, image_id)")
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_source ON image_tags(source)")
                 logger.debug("Migration complete.")
 
@@ -512,12 +568,36 @@ def initialize_database():
             distance INTEGER NOT NULL,
             threshold INTEGER NOT NULL,
             computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            reviewed INTEGER NOT NULL DEFAULT 0,
             UNIQUE(image_id_a, image_id_b),
             FOREIGN KEY (image_id_a) REFERENCES images(id) ON DELETE CASCADE,
             FOREIGN KEY (image_id_b) REFERENCES images(id) ON DELETE CASCADE
         )
         """)
 
+        # Add reviewed flag to duplicate_pairs if it doesn't exist.  It mirrors
+        # "any image_relations row links these two images" and is maintained
+        # by the triggers below, so the review queue never has to probe
+        # image_relations per candidate row.
+        cur.execute("PRAGMA table_info(duplicate_pairs);")
+        dup_pair_columns = [row['name'] for row in cur.fetchall()]
+
+        if 'reviewed' not in dup_pair_columns:
+            logger.debug("Adding 'reviewed' column to 'duplicate_pairs' table...")
+            cur.execute("ALTER TABLE duplicate_pairs ADD COLUMN reviewed INTEGER NOT NULL DEFAULT 0")
+            cur.execute("""
+                UPDATE duplicate_pairs SET reviewed = 1
+                WHERE EXISTS (
+                    SELECT 1 FROM image_relations ir
+                    WHERE ir.image_id_a = duplicate_pairs.image_id_a
+                      AND ir.image_id_b = duplicate_pairs.image_id_b
+                ) OR EXISTS (
+                    SELECT 1 FROM image_relations ir
+                    WHERE ir.image_id_a = duplicate_pairs.image_id_b
+                      AND ir.image_id_b = duplicate_pairs.image_id_a
+                )
+            """)
+
         # ===================================================================
         # Pre-computed Duplicate Pair Suggestion Scores
         # ===================================================================
@@ -562,6 +642,121 @@ def initialize_database():
         )
         """)
 
+        # ===================================================================
+        # Duplicate Review Queue Counts
+        # ===================================================================
+        # Cached unreviewed-pair totals keyed by queue mode/threshold/bounds.
+        # Any write to duplicate_pairs, duplicate_pair_suggestions or
+        # image_relations clears it (see triggers below).
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS duplicate_queue_counts (
+            cache_key TEXT PRIMARY KEY,
+            total INTEGER NOT NULL
+        )
+        """)
+
+        # ===================================================================
+        # Upscale Job Queue
+        # ===================================================================
+        # One row per (md5, model); survives restarts. Times are epoch seconds
+        # so ETA math and heartbeat staleness checks stay in SQL/Python floats.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS upscale_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            md5 TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            filepath TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            force INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            tiles_done INTEGER NOT NULL DEFAULT 0,
+            tiles_total INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            error TEXT,
+            result TEXT,
+            worker_id TEXT,
+            enqueued_at REAL NOT NULL,
+            started_at REAL,
+            heartbeat_at REAL,
+            finished_at REAL,
+            processing_time REAL,
+            UNIQUE(md5, model_name)
+        )
+        """)
+
+        cur.execute("PRAGMA table_info(upscale_jobs);")
+        if 'next_attempt_at' not in [row['name'] for row in cur.fetchall()]:
+            cur.execute("ALTER TABLE upscale_jobs ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+
+        # ===================================================================
+        # Backfill Work Queue
+        # ===================================================================
+        # Per-image, per-artifact state for the hash/embedding/thumbnail
+        # backfill (services.backfill_queue). next_attempt_at is epoch seconds;
+        # failures back off exponentially until BACKFILL_MAX_ATTEMPTS.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS backfill_tasks (
+            image_id INTEGER NOT NULL,
+            artifact TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            worker_id TEXT,
+            claimed_at REAL,
+            updated_at REAL,
+            PRIMARY KEY (image_id, artifact),
+            FOREIGN KEY (image_id) REFERENCES images(id) ON DELETE CASCADE
+        )
+        """)
+
+        # ===================================================================
+        # Categorized Tag Dirty Set
+        # ===================================================================
+        # Images whose tags_* columns are stale after a tag category change.
+        # Drained in batches by rebuild_dirty_categorized_tags().
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS categorized_tags_dirty (
+            image_id INTEGER PRIMARY KEY,
+            marked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (image_id) REFERENCES images(id) ON DELETE CASCADE
+        )
+        """)
+
+        # ===================================================================
+        # Metadata Lookup Cache
+        # ===================================================================
+        # Booru MD5 lookup outcomes: post JSON when found, NULL for a
+        # confirmed miss. fetched_at is epoch seconds; TTLs come from config.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS metadata_lookup_cache (
+            source TEXT NOT NULL,
+            md5 TEXT NOT NULL,
+            found INTEGER NOT NULL,
+            data TEXT,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (source, md5)
+        )
+        """)
+
+        # ===================================================================
+        # Scan Manifest
+        # ===================================================================
+        # MD5 of files under IMAGE_DIRECTORY that are not (yet) in images,
+        # keyed by relative path. A file whose size, mtime and inode still
+        # match is not re-read by the monitor scan.
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS scan_manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            md5 TEXT NOT NULL
+        )
+        """)
+
         # ===================================================================
         # Indexes
         # ===================================================================
@@ -583,11 +778,21 @@ def initialize_database():
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tags_category ON tags(category)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tags_extended_category ON tags(extended_category)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_image_id ON image_tags(image_id)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_tag_id ON image_tags(tag_id)")
+        # (tag_id, image_id): a tag's images come back in id order, so
+        # "first N images of a tag" reads an N-row prefix. Older databases
+        # have it on tag_id alone.
+        cur.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_image_tags_tag_id'")
+        tag_index = cur.fetchone()
+        if tag_index and 'image_id' not in tag_index['sql']:
+            logger.debug("Rebuilding idx_image_tags_tag_id on (tag_id, image_id)...")
+            cur.execute("DROP INDEX idx_image_tags_tag_id")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_tag_id ON image_tags(tag_id, image_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_image_tags_source ON image_tags(source)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_image_sources_image_id ON image_sources(image_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_image_sources_source_id ON image_sources(source_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_raw_metadata_image_id ON raw_metadata(image_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_pool_images_image_id ON pool_images(image_id)")  # Cascading image deletes
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_pool_images_order ON pool_images(pool_id, sort_order, image_id)")  # Ordered/keyset pool listing
 
         # Local tagger predictions indexes
         cur.execute("CREATE INDEX IF NOT EXISTS idx_ltp_image_id ON local_tagger_predictions(image_id)")
@@ -612,82 +817,221 @@ def initialize_database():
         cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_pairs_threshold ON duplicate_pairs(threshold, distance)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_pairs_image_a ON duplicate_pairs(image_id_a)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_pairs_image_b ON duplicate_pairs(image_id_b)")
+        # Covers the review queue: unreviewed pairs in keyset order
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_pairs_queue ON duplicate_pairs(reviewed, distance, image_id_a, image_id_b)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_suggestions_signal ON duplicate_pair_suggestions(signal)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_suggestions_computed_at ON duplicate_pair_suggestions(computed_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_dup_suggestions_image_b ON duplicate_pair_suggestions(image_id_b)")
+
+        # Upscale queue: claim order and per-status counts
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_upscale_jobs_claim ON upscale_jobs(status, priority DESC, enqueued_at, id)")
+
+        # Backfill queue: due pending tasks in claim order
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_backfill_tasks_claim ON backfill_tasks(status, next_attempt_at, image_id DESC)")
+
+        # Tag categorization workbench: the uncategorized queue by usage (the
+        # stats come from tag_category_counts)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tags_uncategorized_usage ON tags(usage_count DESC)
+            WHERE extended_category IS NULL AND category IN ('general', 'meta')
+        """)
+        cur.execute("DROP INDEX IF EXISTS idx_tags_categorization")
 
         # Similarity cache indexes
         cur.execute("CREATE INDEX IF NOT EXISTS idx_similar_lookup ON similar_images_cache(source_image_id, similarity_type, rank)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_similar_similar_id ON similar_images_cache(similar_image_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_computed_at ON similar_images_cache(computed_at)")
 
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='images_fts'")
-        fts_exists = cur.fetchone()
+        # ===================================================================
+        # Duplicate Review Triggers
+        # ===================================================================
+        # duplicate_pairs stores (min_id, max_id); parent_child relations keep
+        # their direction, so both orderings map onto the same pair row.
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS image_relations_mark_reviewed AFTER INSERT ON image_relations
+        BEGIN
+            UPDATE duplicate_pairs SET reviewed = 1
+            WHERE image_id_a = MIN(new.image_id_a, new.image_id_b)
+              AND image_id_b = MAX(new.image_id_a, new.image_id_b)
+              AND reviewed = 0;
+            DELETE FROM duplicate_queue_counts;
+        END
+        """)
 
-        if not fts_exists:
-            cur.execute("""
-            CREATE VIRTUAL TABLE images_fts USING fts5(
-                filepath,
-                tags_all,
-                tags_character,
-                tags_copyright,
-                tags_artist,
-                tags_species,
-                tags_meta,
-                tags_general
-            )
-            """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS image_relations_unmark_reviewed AFTER DELETE ON image_relations
+        BEGIN
+            UPDATE duplicate_pairs SET reviewed = 0
+            WHERE image_id_a = MIN(old.image_id_a, old.image_id_b)
+              AND image_id_b = MAX(old.image_id_a, old.image_id_b)
+              AND NOT EXISTS (
+                  SELECT 1 FROM image_relations ir
+                  WHERE ir.image_id_a = old.image_id_a AND ir.image_id_b = old.image_id_b
+              )
+              AND NOT EXISTS (
+                  SELECT 1 FROM image_relations ir
+                  WHERE ir.image_id_a = old.image_id_b AND ir.image_id_b = old.image_id_a
+              );
+            DELETE FROM duplicate_queue_counts;
+        END
+        """)
 
+        # Pairs are only ever inserted by a scan; flag ones already reviewed
         cur.execute("""
-        CREATE TRIGGER IF NOT EXISTS images_fts_insert AFTER INSERT ON images
+        CREATE TRIGGER IF NOT EXISTS duplicate_pairs_insert AFTER INSERT ON duplicate_pairs
         BEGIN
-            INSERT INTO images_fts(filepath, tags_all, tags_character, tags_copyright, tags_artist, tags_species, tags_meta, tags_general)
-            VALUES (
-                new.filepath,
-                COALESCE(new.tags_character, '') || ' ' ||
-                COALESCE(new.tags_copyright, '') || ' ' ||
-                COALESCE(new.tags_artist, '') || ' ' ||
-                COALESCE(new.tags_species, '') || ' ' ||
-                COALESCE(new.tags_meta, '') || ' ' ||
-                COALESCE(new.tags_general, ''),
-                COALESCE(new.tags_character, ''),
-                COALESCE(new.tags_copyright, ''),
-                COALESCE(new.tags_artist, ''),
-                COALESCE(new.tags_species, ''),
-                COALESCE(new.tags_meta, ''),
-                COALESCE(new.tags_general, '')
-            );
+            UPDATE duplicate_pairs SET reviewed = 1
+            WHERE id = new.id
+              AND (
+                  EXISTS (
+                      SELECT 1 FROM image_relations ir
+                      WHERE ir.image_id_a = new.image_id_a AND ir.image_id_b = new.image_id_b
+                  ) OR EXISTS (
+                      SELECT 1 FROM image_relations ir
+                      WHERE ir.image_id_a = new.image_id_b AND ir.image_id_b = new.image_id_a
+                  )
+              );
+            DELETE FROM duplicate_queue_counts;
+        END
+        """)
+
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS duplicate_pairs_delete AFTER DELETE ON duplicate_pairs
+        BEGIN
+            DELETE FROM duplicate_queue_counts;
         END
         """)
 
         cur.execute("""
-        CREATE TRIGGER IF NOT EXISTS images_fts_update AFTER UPDATE ON images
+        CREATE TRIGGER IF NOT EXISTS duplicate_pair_suggestions_insert AFTER INSERT ON duplicate_pair_suggestions
         BEGIN
-            DELETE FROM images_fts WHERE filepath = old.filepath;
-            INSERT INTO images_fts(filepath, tags_all, tags_character, tags_copyright, tags_artist, tags_species, tags_meta, tags_general)
-            VALUES (
-                new.filepath,
-                COALESCE(new.tags_character, '') || ' ' ||
-                COALESCE(new.tags_copyright, '') || ' ' ||
-                COALESCE(new.tags_artist, '') || ' ' ||
-                COALESCE(new.tags_species, '') || ' ' ||
-                COALESCE(new.tags_meta, '') || ' ' ||
-                COALESCE(new.tags_general, ''),
-                COALESCE(new.tags_character, ''),
-                COALESCE(new.tags_copyright, ''),
-                COALESCE(new.tags_artist, ''),
-                COALESCE(new.tags_species, ''),
-                COALESCE(new.tags_meta, ''),
-                COALESCE(new.tags_general, '')
-            );
+            DELETE FROM duplicate_queue_counts;
         END
         """)
 
         cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS duplicate_pair_suggestions_delete AFTER DELETE ON duplicate_pair_suggestions
+        BEGIN
+            DELETE FROM duplicate_queue_counts;
+        END
+        """)
+
+        # ===================================================================
+        # Tag Usage Count Triggers
+        # ===================================================================
+        # image_tags has one row per (image, tag), so usage_count is its row
+        # count per tag. Write image_tags with INSERT OR IGNORE or an upsert:
+        # the row INSERT OR REPLACE removes does not fire the delete trigger.
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS image_tags_usage_insert AFTER INSERT ON image_tags
+        BEGIN
+            UPDATE tags SET usage_count = usage_count + 1 WHERE id = new.tag_id;
+        END
+        """)
+
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS image_tags_usage_delete AFTER DELETE ON image_tags
+        BEGIN
+            UPDATE tags SET usage_count = usage_count - 1 WHERE id = old.tag_id;
+        END
+        """)
+
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS image_tags_usage_update AFTER UPDATE OF tag_id ON image_tags
+        WHEN old.tag_id IS NOT new.tag_id
+        BEGIN
+            UPDATE tags SET usage_count = usage_count - 1 WHERE id = old.tag_id;
+            UPDATE tags SET usage_count = usage_count + 1 WHERE id = new.tag_id;
+        END
+        """)
+
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tags_category_counts_insert AFTER INSERT ON tags
+        BEGIN
+            INSERT INTO tag_category_counts (extended_category, status, used, tag_count)
+            VALUES ({_tag_category_group('new')}, 1)
+            ON CONFLICT(extended_category, status, used) DO UPDATE SET tag_count = tag_count + 1;
+        END
+        """)
+
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tags_category_counts_delete AFTER DELETE ON tags
+        BEGIN
+            UPDATE tag_category_counts SET tag_count = tag_count - 1
+            WHERE (extended_category, status, used) = ({_tag_category_group('old')});
+        END
+        """)
+
+        # usage_count changes with every image_tags write; only a 0 <-> non-zero
+        # change (or a category change) moves the tag to another group
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS tags_category_counts_update
+        AFTER UPDATE OF category, extended_category, usage_count ON tags
+        WHEN ({_tag_category_group('old')}) != ({_tag_category_group('new')})
+        BEGIN
+            UPDATE tag_category_counts SET tag_count = tag_count - 1
+            WHERE (extended_category, status, used) = ({_tag_category_group('old')});
+            INSERT INTO tag_category_counts (extended_category, status, used, tag_count)
+            VALUES ({_tag_category_group('new')}, 1)
+            ON CONFLICT(extended_category, status, used) DO UPDATE SET tag_count = tag_count + 1;
+        END
+        """)
+
+        if usage_count_added:
+            recount_tag_usage(conn)
+        if tag_category_counts_added or usage_count_added:
+            rebuild_tag_category_counts(conn)
+
+        fts_migrated = _migrate_fts_to_external_content(cur)
+
+        cur.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5(
+            {', '.join(FTS_COLUMNS)},
+            content='images',
+            content_rowid='id'
+        )
+        """)
+
+        # External-content FTS: the index stores no copy of the text, so the
+        # triggers must hand FTS5 the exact old values to remove.
+        fts_columns = ', '.join(FTS_COLUMNS)
+        new_values = ', '.join(f"new.{col}" for col in FTS_COLUMNS)
+        old_values = ', '.join(f"old.{col}" for col in FTS_COLUMNS)
+        changed = ' OR '.join(f"old.{col} IS NOT new.{col}" for col in FTS_COLUMNS)
+
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS images_fts_insert AFTER INSERT ON images
+        BEGIN
+            INSERT INTO images_fts(rowid, {fts_columns})
+            VALUES (new.id, {new_values});
+        END
+        """)
+
+        # Only fire for tag/filepath changes - score, phash, dimension and
+        # other metadata updates leave the index alone
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS images_fts_update AFTER UPDATE OF {fts_columns} ON images
+        WHEN {changed}
+        BEGIN
+            INSERT INTO images_fts(images_fts, rowid, {fts_columns})
+            VALUES ('delete', old.id, {old_values});
+            INSERT INTO images_fts(rowid, {fts_columns})
+            VALUES (new.id, {new_values});
+        END
+        """)
+
+        cur.execute(f"""
         CREATE TRIGGER IF NOT EXISTS images_fts_delete AFTER DELETE ON images
         BEGIN
-            DELETE FROM images_fts WHERE filepath = old.filepath;
+            INSERT INTO images_fts(images_fts, rowid, {fts_columns})
+            VALUES ('delete', old.id, {old_values});
         END
         """)
 
+        if fts_migrated:
+            rebuild_fts_index(conn)
+            logger.info("images_fts migration complete.")
+
         conn.commit()
         logger.info("Database initialized successfully.")
 
@@ -783,13 +1127,94 @@ def repair_orphaned_image_tags():
         return len(orphaned_images)
 
 
+def recount_tag_usage(conn=None):
+    """
+    Recompute tags.usage_count from image_tags.
+
+    The triggers keep the counts current; this is for the initial backfill
+    and for repairing drift.
+
+    Returns:
+        Number of tags whose count changed
+    """
+    count = "(SELECT COUNT(*) FROM image_tags WHERE image_tags.tag_id = tags.id)"
+    sql = f"UPDATE tags SET usage_count = {count} WHERE usage_count != {count}"
+    if conn is not None:
+        return conn.execute(sql).rowcount
+
+    with get_db_connection() as conn:
+        changed = conn.execute(sql).rowcount
+        conn.commit()
+    return changed
+
+
+def _tag_category_group(alias):
+    """
+    The tag_category_counts key of a tags row: extended category ('' when
+    unset), whether it still needs an extended category ('uncategorized',
+    'categorized', or 'none' for a tag without a base category) and whether
+    any image uses it.
+    """
+    return (
+        f"COALESCE({alias}.extended_category, ''), "
+        f"CASE WHEN {alias}.extended_category IS NOT NULL THEN 'categorized' "
+        f"WHEN {alias}.category IN ('general', 'meta') THEN 'uncategorized' "
+        f"WHEN {alias}.category IS NOT NULL THEN 'categorized' "
+        f"ELSE 'none' END, "
+        f"{alias}.usage_count > 0"
+    )
+
+
+def rebuild_tag_category_counts(conn=None):
+    """
+    Recompute tag_category_counts from the tags table.
+
+    The tags triggers keep it current; this is for the initial backfill and
+    for repairing drift.
+
+    Returns:
+        Number of groups
+    """
+    def rebuild(conn):
+        conn.execute("DELETE FROM tag_category_counts")
+        return conn.execute(f"""
+            INSERT INTO tag_category_counts (extended_category, status, used, tag_count)
+            SELECT {_tag_category_group('tags')}, COUNT(*) FROM tags GROUP BY 1, 2, 3
+        """).rowcount
+
+    if conn is not None:
+        return rebuild(conn)
+
+    with get_db_connection() as conn:
+        groups = rebuild(conn)
+        conn.commit()
+    return groups
+
+
+def rebuild_fts_index(conn=None):
+    """
+    Rebuild images_fts from the images table.
+
+    images_fts is an external-content table, so this re-tokenizes the current
+    images rows rather than copying any stored text.
+    """
+    if conn is not None:
+        conn.execute("INSERT INTO images_fts(images_fts) VALUES('rebuild')")
+        return
+
+    with get_db_connection() as conn:
+        conn.execute("INSERT INTO images_fts(images_fts) VALUES('rebuild')")
+        conn.commit()
+
+
 def populate_fts_table():
-    """Populate the FTS table with existing data from images table."""
+    """Populate the FTS index for existing images if it is empty or out of sync."""
     with get_db_connection() as conn:
         cur = conn.cursor()
 
-        # Check if FTS table is empty
-        cur.execute("SELECT COUNT(*) as cnt FROM images_fts")
+        # COUNT(*) on an external-content table reads the content table, so
+        # count the docsize shadow table to see what is actually indexed
+        cur.execute("SELECT COUNT(*) as cnt FROM images_fts_docsize")
         fts_count = cur.fetchone()['cnt']
 
         cur.execute("SELECT COUNT(*) as cnt FROM images")
@@ -797,24 +1222,7 @@ def populate_fts_table():
 
         if fts_count == 0 and images_count > 0:
             logger.debug(f"Populating FTS table with {images_count} images...")
-            cur.execute("""
-                INSERT INTO images_fts(filepath, tags_all, tags_character, tags_copyright, tags_artist, tags_species, tags_meta, tags_general)
-                SELECT
-                    filepath,
-                    COALESCE(tags_character, '') || ' ' ||
-                    COALESCE(tags_copyright, '') || ' ' ||
-                    COALESCE(tags_artist, '') || ' ' ||
-                    COALESCE(tags_species, '') || ' ' ||
-                    COALESCE(tags_meta, '') || ' ' ||
-                    COALESCE(tags_general, ''),
-                    COALESCE(tags_character, ''),
-                    COALESCE(tags_copyright, ''),
-                    COALESCE(tags_artist, ''),
-                    COALESCE(tags_species, ''),
-                    COALESCE(tags_meta, ''),
-                    COALESCE(tags_general, '')
-                FROM images
-            """)
+            rebuild_fts_index(conn)
             conn.commit()
             logger.debug(f"FTS table populated with {images_count} entries.")
         elif fts_count != images_count:
@@ -823,5 +1231,10 @@ def populate_fts_table():
             logger.debug(f"FTS table already populated ({fts_count} entries).")
 
 if __name__ == "__main__":
+    import sys
+
     initialize_database()
-    populate_fts_table()
+    if 'rebuild-fts' in sys.argv[1:]:
+        rebuild_fts_index()
+    else:
+        populate_fts_table()
@@ -33,6 +33,10 @@ from repositories.tag_repository import (
     get_all_tags_sorted,
     recategorize_misplaced_tags,
     rebuild_categorized_tags_from_relations,
+    rebuild_categorized_tags_for_images,
+    rebuild_categorized_tags_in_transaction,
+    mark_categorized_tags_dirty,
+    rebuild_dirty_categorized_tags,
     update_image_tags,
     update_image_tags_categorized,
     add_implication,
@@ -49,9 +53,16 @@ from repositories.data_access import (
     get_category_counts,
     get_saucenao_lookup_count,
     get_all_images_with_tags,
+    get_all_image_ids,
+    get_images_with_tags_by_ids,
+    get_image_ids_for_filepaths,
     get_all_filepaths,
     get_image_details,
+    invalidate_image_details,
+    clear_image_details_cache,
+    get_image_details_cache_stats,
     delete_image,
+    delete_images_by_filepaths,
     search_images_by_tags,
     search_images_by_source,
     search_images_by_multiple_sources,
@@ -62,6 +73,101 @@ from repositories.data_access import (
     update_image_upscale_info
 )
 
+def select_primary_source(available_sources):
+    """
+    Pick the source whose tags an image uses: the first of BOORU_PRIORITY that
+    is available, otherwise the first source recorded.
+
+    Returns:
+        tuple: (source_name, source_data), (None, None) if there are no sources
+    """
+    import config
+
+    for src in config.BOORU_PRIORITY:
+        if src in available_sources:
+            return src, available_sources[src]
+    if available_sources:
+        return next(iter(available_sources.items()))
+    return None, None
+
+
+def _write_primary_source(cur, image_id, primary_source_data, source_name):
+    """Write an image's post fields and its tags from its primary source (no commit)."""
+    from repositories.tag_repository import normalize_tag_name, get_tag_category
+
+    parent_id = primary_source_data.get('parent_id')
+    if source_name == 'e621':
+        parent_id = primary_source_data.get('relationships', {}).get('parent_id')
+
+    cur.execute("""
+        UPDATE images
+        SET post_id = ?, parent_id = ?, has_children = ?, active_source = ?
+        WHERE id = ?
+    """, (
+        primary_source_data.get("id"),
+        parent_id,
+        primary_source_data.get("has_children", False),
+        source_name,
+        image_id
+    ))
+
+    # Extract tags from primary source using centralized utility
+    extracted_tags = extract_tags_from_source(primary_source_data, source_name)
+
+    # Convert to list format expected by this function
+    categorized_tags = {
+        'character': extracted_tags['tags_character'].split(),
+        'copyright': extracted_tags['tags_copyright'].split(),
+        'artist': extracted_tags['tags_artist'].split(),
+        'species': extracted_tags['tags_species'].split(),
+        'meta': extracted_tags['tags_meta'].split(),
+        'general': extracted_tags['tags_general'].split()
+    }
+
+    for category, tags_list in categorized_tags.items():
+        for tag_name in tags_list:
+            if not tag_name: continue
+
+            # Normalize tag name (e.g., rating_explicit -> rating:explicit)
+            normalized_tag_name = normalize_tag_name(tag_name)
+
+            # Determine correct category (rating tags override category)
+            final_category = get_tag_category(normalized_tag_name) or category
+
+            cur.execute("INSERT INTO tags (name, category) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET category=excluded.category", (normalized_tag_name, final_category))
+            cur.execute("SELECT id FROM tags WHERE name = ?", (normalized_tag_name,))
+            tag_id = cur.fetchone()['id']
+            cur.execute("INSERT OR IGNORE INTO image_tags (image_id, tag_id) VALUES (?, ?)", (image_id, tag_id))
+
+    # Extract and insert rating using centralized utility
+    rating_tag, rating_source = extract_rating_from_source(primary_source_data, source_name)
+
+    if rating_tag and rating_source:
+        # Insert rating tag
+        cur.execute("INSERT INTO tags (name, category) VALUES (?, 'meta') ON CONFLICT(name) DO UPDATE SET category='meta'", (rating_tag,))
+        cur.execute("SELECT id FROM tags WHERE name = ?", (rating_tag,))
+        tag_id = cur.fetchone()['id']
+        cur.execute(
+            "INSERT INTO image_tags (image_id, tag_id, source) VALUES (?, ?, ?) "
+            "ON CONFLICT(image_id, tag_id) DO UPDATE SET source = excluded.source",
+            (image_id, tag_id, rating_source)
+        )
+
+
+def retag_image_from_source(cur, image_id, md5, source_name, source_data):
+    """
+    Replace one image's tags with those of the given source, keep its manual
+    tag deltas and refresh its categorized columns, all on the caller's
+    cursor without committing.
+
+    Readers keep seeing the image's previous tags until the caller commits.
+    """
+    cur.execute("DELETE FROM image_tags WHERE image_id = ?", (image_id,))
+    _write_primary_source(cur, image_id, source_data, source_name)
+    replay_image_deltas(cur, image_id, md5)
+    rebuild_categorized_tags_in_transaction(cur, [image_id])
+
+
 def repopulate_from_database():
     """Rebuilds the tag and source relationships by reading from the raw_metadata table.
 
@@ -121,82 +227,15 @@ def repopulate_from_database():
                 continue
 
             # Original single-source logic
-            primary_source_data = None
-            source_name = None
-
-            for src in config.BOORU_PRIORITY:
-                if src in available_sources:
-                    primary_source_data = available_sources[src]
-                    source_name = src
-                    break
-
-            # Fallback if no priority source is found
-            if not source_name and available_sources:
-                source_name = next(iter(available_sources.keys()), None)
-                primary_source_data = next(iter(available_sources.values()), {})
-
-
+            source_name, primary_source_data = select_primary_source(available_sources)
             if not primary_source_data:
                 continue
 
-            parent_id = primary_source_data.get('parent_id')
-            if source_name == 'e621':
-                parent_id = primary_source_data.get('relationships', {}).get('parent_id')
-
-            cur.execute("""
-                UPDATE images
-                SET post_id = ?, parent_id = ?, has_children = ?, active_source = ?
-                WHERE id = ?
-            """, (
-                primary_source_data.get("id"),
-                parent_id,
-                primary_source_data.get("has_children", False),
-                source_name,
-                image_id
-            ))
-
             for src in metadata.get('sources', {}).keys():
                 if src in source_map:
                     cur.execute("INSERT OR IGNORE INTO image_sources (image_id, source_id) VALUES (?, ?)", (image_id, source_map[src]))
 
-            # Extract tags from primary source using centralized utility
-            extracted_tags = extract_tags_from_source(primary_source_data, source_name)
-
-            # Convert to list format expected by this function
-            categorized_tags = {
-                'character': extracted_tags['tags_character'].split(),
-                'copyright': extracted_tags['tags_copyright'].split(),
-                'artist': extracted_tags['tags_artist'].split(),
-                'species': extracted_tags['tags_species'].split(),
-                'meta': extracted_tags['tags_meta'].split(),
-                'general': extracted_tags['tags_general'].split()
-            }
-
-            for category, tags_list in categorized_tags.items():
-                for tag_name in tags_list:
-                    if not tag_name: continue
-
-                    # Normalize tag name (e.g., rating_explicit -> rating:explicit)
-                    from repositories.tag_repository import normalize_tag_name, get_tag_category
-                    normalized_tag_name = normalize_tag_name(tag_name)
-
-                    # Determine correct category (rating tags override category)
-                    final_category = get_tag_category(normalized_tag_name) or category
-
-                    cur.execute("INSERT INTO tags (name, category) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET category=excluded.category", (normalized_tag_name, final_category))
-                    cur.execute("SELECT id FROM tags WHERE name = ?", (normalized_tag_name,))
-                    tag_id = cur.fetchone()['id']
-                    cur.execute("INSERT OR IGNORE INTO image_tags (image_id, tag_id) VALUES (?, ?)", (image_id, tag_id))
-
-            # Extract and insert rating using centralized utility
-            rating_tag, rating_source = extract_rating_from_source(primary_source_data, source_name)
-
-            if rating_tag and rating_source:
-                # Insert rating tag
-                cur.execute("INSERT INTO tags (name, category) VALUES (?, 'meta') ON CONFLICT(name) DO UPDATE SET category='meta'", (rating_tag,))
-                cur.execute("SELECT id FROM tags WHERE name = ?", (rating_tag,))
-                tag_id = cur.fetchone()['id']
-                cur.execute("INSERT OR REPLACE INTO image_tags (image_id, tag_id, source) VALUES (?, ?, ?)", (image_id, tag_id, rating_source))
+            _write_primary_source(cur, image_id, primary_source_data, source_name)
 
             # Commit in batches to reduce lock time
             batch_count += 1
@@ -233,12 +272,17 @@ def get_related_images(post_id, parent_id):
 from repositories.pool_repository import (
     create_pool,
     get_all_pools,
+    get_pool,
     get_pool_details,
+    get_pool_images_page,
     add_image_to_pool,
+    add_images_to_pool,
     remove_image_from_pool,
     delete_pool,
     update_pool,
     reorder_pool_images,
+    move_pool_images,
+    renormalize_pool_order,
     search_pools,
     get_pools_for_image,
     search_images_by_pool,
@@ -249,6 +293,7 @@ from repositories.delta_tracker import (
     record_tag_delta,
     compute_tag_deltas,
     apply_tag_deltas,
+    replay_image_deltas,
     get_image_deltas,
     clear_all_deltas,
     clear_deltas_for_image,
@@ -4,10 +4,14 @@
 
 from .cache_events import (
     register_cache_invalidation_callback,
-    trigger_cache_invalidation
+    trigger_cache_invalidation,
+    register_image_invalidation_callback,
+    trigger_image_invalidation,
 )
 
 __all__ = [
     'register_cache_invalidation_callback',
-    'trigger_cache_invalidation'
+    'trigger_cache_invalidation',
+    'register_image_invalidation_callback',
+    'trigger_image_invalidation',
 ]
@@ -15,11 +15,19 @@ Usage:
     # In models.py:
     from events.cache_events import trigger_cache_invalidation
     trigger_cache_invalidation()  # All registered callbacks will be called
+
+Per-image invalidation works the same way for caches keyed by image:
+
+    register_image_invalidation_callback(my_callback)   # my_callback(filepaths, md5s)
+    trigger_image_invalidation(filepaths=['folder/a.jpg'])
 """
 
 # Global list of cache invalidation callbacks
 _cache_invalidation_callbacks = []
 
+# Callbacks for single-image invalidation: callback(filepaths, md5s)
+_image_invalidation_callbacks = []
+
 
 def register_cache_invalidation_callback(callback):
     """
@@ -57,9 +65,42 @@ def trigger_cache_invalidation():
             print(f"Warning: Cache invalidation callback failed: {e}")
 
 
+def register_image_invalidation_callback(callback):
+    """
+    Register a callback for changes to specific images.
+
+    Args:
+        callback: A callable taking (filepaths, md5s), both lists. Either may
+                  be empty.
+    """
+    if callback not in _image_invalidation_callbacks:
+        _image_invalidation_callbacks.append(callback)
+
+
+def trigger_image_invalidation(filepaths=(), md5s=()):
+    """
+    Notify per-image caches that the given images changed (tags, rating,
+    source, relations) or were deleted.
+
+    Args:
+        filepaths: Image paths relative to the images directory
+        md5s: Image MD5 hashes
+    """
+    filepaths = [f for f in filepaths if f]
+    md5s = [m for m in md5s if m]
+    if not filepaths and not md5s:
+        return
+    for callback in _image_invalidation_callbacks:
+        try:
+            callback(filepaths, md5s)
+        except Exception as e:
+            print(f"Warning: Image invalidation callback failed: {e}")
+
+
 def clear_all_callbacks():
     """
     Clear all registered callbacks. Primarily for testing purposes.
     """
-    global _cache_invalidation_callbacks
+    global _cache_invalidation_callbacks, _image_invalidation_callbacks
     _cache_invalidation_callbacks = []
+    _image_invalidation_callbacks = []
@@ -5,6 +5,7 @@ Client API for communicating with the ML worker subprocess.
 Handles process spawning, connection management, and request routing.
 """
 
+import base64
 import os
 import sys
 import socket
@@ -179,6 +180,10 @@ class MLWorkerClient:
         env['ML_WORKER_BACKEND'] = config.ML_WORKER_BACKEND
         env['ML_WORKER_SOCKET'] = config.ML_WORKER_SOCKET
         env['ML_WORKER_IDLE_TIMEOUT'] = str(config.ML_WORKER_IDLE_TIMEOUT)
+        env['ML_WORKER_INTERACTIVE_WORKERS'] = str(config.ML_WORKER_INTERACTIVE_WORKERS)
+        env['ML_WORKER_BULK_WORKERS'] = str(config.ML_WORKER_BULK_WORKERS)
+        env['ML_WORKER_INTERACTIVE_THREADS'] = str(config.ML_WORKER_INTERACTIVE_THREADS)
+        env['ML_WORKER_BULK_THREADS'] = str(config.ML_WORKER_BULK_THREADS)
 
         # Start worker process
         try:
@@ -441,6 +446,8 @@ class MLWorkerClient:
                      allow_cpu_fallback: bool = True,
                      output_format: str = 'png',
                      output_quality: int = 95,
+                     tile_batch_size: int = 4,
+                     checkpoint_dir: Optional[str] = None,
                      progress_callback=None) -> Dict[str, Any]:
         """
         Upscale an image using RealESRGAN.
@@ -456,6 +463,9 @@ class MLWorkerClient:
             allow_cpu_fallback: If True, fallback to CPU after repeated backend failures
             output_format: Image format for output ('png' or 'webp')
             output_quality: Quality level for lossy formats (1-100)
+            tile_batch_size: Tiles sent through the model per forward pass
+            checkpoint_dir: Optional directory for finished tile strips, so an
+                interrupted upscale resumes instead of starting over
             progress_callback: Optional function(current, total, message)
 
         Returns:
@@ -482,6 +492,8 @@ class MLWorkerClient:
             allow_cpu_fallback,
             output_format,
             output_quality,
+            tile_batch_size,
+            checkpoint_dir,
         )
 
         return self._send_request(request, progress_callback=progress_callback)
@@ -490,7 +502,8 @@ class MLWorkerClient:
                           model_path: str,
                           model_type: str = 'siglip',
                           image_size: int = 384,
-                          embedding_dim: int = 1152) -> Dict[str, Any]:
+                          embedding_dim: int = 1152,
+                          pixels: Optional[bytes] = None) -> Dict[str, Any]:
         """
         Compute semantic similarity embedding for an image.
 
@@ -500,6 +513,8 @@ class MLWorkerClient:
             model_type: Model type ('siglip' or 'tagger')
             image_size: Input image size (384 for SigLIP, 448 for tagger)
             embedding_dim: Expected embedding dimension (1152 for SigLIP, 1024 for tagger)
+            pixels: Optional RGB bytes already resized to image_size x image_size
+                    (bicubic); skips decoding the file in the worker
 
         Returns:
             Dict with:
@@ -516,7 +531,8 @@ class MLWorkerClient:
             model_path,
             model_type,
             image_size,
-            embedding_dim
+            embedding_dim,
+            pixels=base64.b64encode(pixels).decode('ascii') if pixels is not None else None
         )
 
         return self._send_request(request)
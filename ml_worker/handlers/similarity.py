@@ -6,11 +6,12 @@ Supports multiple model types:
 - 'tagger': Legacy WD tagger backbone (448x448, ImageNet normalization, 1024-d)
 """
 import os
+import base64
 import logging
 import numpy as np
 from typing import Dict, Any
 
-from ml_worker import models
+from ml_worker import models, scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -53,18 +54,20 @@ def handle_compute_similarity(request_data: Dict[str, Any]) -> Dict[str, Any]:
     # Lazy load ONNX and torch
     import onnxruntime as ort
     import torchvision.transforms as transforms
-    from PIL import Image
 
-    # Load model if not already loaded or if model path changed
-    if models.similarity_model is None or _current_model_path != model_path:
-        logger.info(f"Loading similarity model from {model_path}")
+    # Load model if not already loaded or if model path changed. Keep a local
+    # reference so a concurrent model swap cannot change it mid-request.
+    with models.model_load_lock('similarity'):
+        if models.similarity_model is None or _current_model_path != model_path:
+            logger.info(f"Loading similarity model from {model_path}")
 
-        # Dynamic providers based on backend
-        providers = models.get_onnx_providers()
-        sess_options = models.get_onnx_session_options()
-        models.similarity_model = ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
-        _current_model_path = model_path
-        logger.info(f"Similarity model loaded ({model_type})")
+            # Dynamic providers based on backend
+            providers = models.get_onnx_providers()
+            sess_options = models.get_onnx_session_options(scheduler.lane_threads(scheduler.INTERACTIVE))
+            models.similarity_model = ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
+            _current_model_path = model_path
+            logger.info(f"Similarity model loaded ({model_type})")
+        session = models.similarity_model
 
     # Build transform based on model type
     if model_type == 'siglip':
@@ -81,6 +84,68 @@ def handle_compute_similarity(request_data: Dict[str, Any]) -> Dict[str, Any]:
             transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
         ])
 
+    pixels = request_data.get('pixels')
+    if pixels is not None:
+        # Caller already decoded and resized (bicubic) the image: the tensor is
+        # what the transform above would produce from the same bitmap
+        img_numpy = _tensor_from_pixels(pixels, image_size, model_type)
+    else:
+        img_numpy = _load_image_tensor(image_path, transform, model_type)
+
+    # Run inference
+    input_name = session.get_inputs()[0].name
+    raw_outputs = session.run(None, {input_name: img_numpy})
+    
+    # Find the embedding output matching expected dimension
+    embedding = None
+    for out in raw_outputs:
+        flat = out.flatten() if len(out.shape) > 2 else out[0] if len(out.shape) == 2 else out
+        if hasattr(flat, '__len__') and len(flat) == embedding_dim:
+            embedding = flat.astype(np.float32)
+            break
+    
+    # If exact match not found, try to find any reasonable embedding
+    if embedding is None:
+        for out in raw_outputs:
+            flat = out.flatten() if len(out.shape) > 2 else out[0] if len(out.shape) == 2 else out
+            # Accept embeddings in typical range (512-2048)
+            if hasattr(flat, '__len__') and 512 <= len(flat) <= 2048:
+                embedding = flat.astype(np.float32)
+                logger.warning(f"Expected {embedding_dim}-d, found {len(flat)}-d embedding")
+                break
+            
+    if embedding is None:
+        shapes = [o.shape for o in raw_outputs]
+        logger.error(f"Could not find {embedding_dim}-d embedding. Output shapes: {shapes}")
+        raise ValueError(f"Model did not produce valid embedding. Expected {embedding_dim}-d, found shapes: {shapes}")
+
+    # Normalize embedding for cosine similarity
+    norm = np.linalg.norm(embedding)
+    if norm > 0:
+        embedding = embedding / norm
+
+    return {
+        "embedding": embedding.tolist()
+    }
+
+
+def _tensor_from_pixels(pixels: str, image_size: int, model_type: str):
+    """Model input from base64 RGB bytes of an image_size x image_size bitmap."""
+    arr = np.frombuffer(base64.b64decode(pixels), dtype=np.uint8)
+    arr = arr.reshape(image_size, image_size, 3).astype(np.float32) / 255.0
+    if model_type == 'siglip':
+        # NCHW, [0, 1] range (matches ToTensor)
+        return arr.transpose(2, 0, 1)[np.newaxis]
+    # Tagger: ImageNet normalization, NHWC
+    mean = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    std = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+    return ((arr - mean) / std)[np.newaxis]
+
+
+def _load_image_tensor(image_path: str, transform, model_type: str):
+    """Decode image_path (or the first frame of a video) into model input."""
+    from PIL import Image
+
     try:
         # Handle Video files by extracting a frame
         temp_frame_path = None
@@ -165,39 +230,4 @@ def handle_compute_similarity(request_data: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f"Error processing image {image_path}: {e}")
         raise ValueError(f"Failed to process image: {e}")
 
-    # Run inference
-    input_name = models.similarity_model.get_inputs()[0].name
-    raw_outputs = models.similarity_model.run(None, {input_name: img_numpy})
-    
-    # Find the embedding output matching expected dimension
-    embedding = None
-    for out in raw_outputs:
-        flat = out.flatten() if len(out.shape) > 2 else out[0] if len(out.shape) == 2 else out
-        if hasattr(flat, '__len__') and len(flat) == embedding_dim:
-            embedding = flat.astype(np.float32)
-            break
-    
-    # If exact match not found, try to find any reasonable embedding
-    if embedding is None:
-        for out in raw_outputs:
-            flat = out.flatten() if len(out.shape) > 2 else out[0] if len(out.shape) == 2 else out
-            # Accept embeddings in typical range (512-2048)
-            if hasattr(flat, '__len__') and 512 <= len(flat) <= 2048:
-                embedding = flat.astype(np.float32)
-                logger.warning(f"Expected {embedding_dim}-d, found {len(flat)}-d embedding")
-                break
-            
-    if embedding is None:
-        shapes = [o.shape for o in raw_outputs]
-        logger.error(f"Could not find {embedding_dim}-d embedding. Output shapes: {shapes}")
-        raise ValueError(f"Model did not produce valid embedding. Expected {embedding_dim}-d, found shapes: {shapes}")
-
-    # Normalize embedding for cosine similarity
-    norm = np.linalg.norm(embedding)
-    if norm > 0:
-        embedding = embedding / norm
-
-    return {
-        "embedding": embedding.tolist()
-    }
-
+    return img_numpy
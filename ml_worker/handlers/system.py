@@ -6,6 +6,7 @@ import logging
 from pathlib import Path
 from typing import Dict, Any
 
+from ml_worker import scheduler
 from ml_worker.jobs import start_job, get_active_jobs_count
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,8 @@ def handle_health_check(request_data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "status": "ok",
         "cuda_available": torch.cuda.is_available(),
-        "active_jobs": get_active_jobs_count()
+        "active_jobs": get_active_jobs_count(),
+        "scheduler": scheduler.get_stats()
     }
 
 
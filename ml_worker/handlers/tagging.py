@@ -10,7 +10,7 @@ import tempfile
 import numpy as np
 from typing import Dict, Any
 
-from ml_worker import models
+from ml_worker import models, scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -47,24 +47,27 @@ def handle_tag_image(request_data: Dict[str, Any]) -> Dict[str, Any]:
     import torchvision.transforms as transforms
     from PIL import Image
 
-    # Load model if not already loaded
+    # Load model if not already loaded (requests run concurrently, so check again under the lock)
     if models.tagger_session is None:
-        logger.info(f"Loading tagger model from {model_path}")
+        with models.model_load_lock('tagger'):
+            if models.tagger_session is None:
+                logger.info(f"Loading tagger model from {model_path}")
 
-        try:
-            with open(metadata_path, 'r') as f:
-                models.tagger_metadata = json.load(f)
-        except Exception:
-            logger.warning(f"Could not load metadata from {metadata_path}, using defaults/empty")
-            models.tagger_metadata = {'dataset_info': {'total_tags': 0, 'tag_mapping': {'idx_to_tag': {}, 'tag_to_category': {}}}, 'model_info': {'img_size': 448}}
+                try:
+                    with open(metadata_path, 'r') as f:
+                        models.tagger_metadata = json.load(f)
+                except Exception:
+                    logger.warning(f"Could not load metadata from {metadata_path}, using defaults/empty")
+                    models.tagger_metadata = {'dataset_info': {'total_tags': 0, 'tag_mapping': {'idx_to_tag': {}, 'tag_to_category': {}}}, 'model_info': {'img_size': 448}}
             
-        # Dynamic providers based on backend
-        providers = models.get_onnx_providers()
-        sess_options = models.get_onnx_session_options()
-        models.tagger_session = ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
-
-        dataset_info = models.tagger_metadata.get('dataset_info', {})
-        logger.info(f"Tagger model loaded. Found {dataset_info.get('total_tags', 'unknown')} tags.")
+                # Dynamic providers based on backend. The session is shared with
+                # tag_video but sized for the interactive lane it mostly serves.
+                providers = models.get_onnx_providers()
+                sess_options = models.get_onnx_session_options(scheduler.lane_threads(scheduler.INTERACTIVE))
+                models.tagger_session = ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
+
+                dataset_info = models.tagger_metadata.get('dataset_info', {})
+                logger.info(f"Tagger model loaded. Found {dataset_info.get('total_tags', 'unknown')} tags.")
 
     # Preprocess image
     image_size = models.tagger_metadata.get('model_info', {}).get('img_size', 512)
@@ -3,16 +3,19 @@ Upscaling handler
 """
 import os
 import sys
+import json
+import shutil
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from ml_worker import models
+from ml_worker import models, scheduler
 from ml_worker.backends import get_torch_device
 
 logger = logging.getLogger(__name__)
 
 WEBP_MAX_DIMENSION = 16383
+UPSCALE_FACTOR = 4
 
 
 def _is_recoverable_inference_error(error: RuntimeError) -> bool:
@@ -50,12 +53,121 @@ def _clamp_size_to_max_dimension(width: int, height: int, max_dimension: int) ->
     clamped_height = max(1, int(round(height * scale)))
     return clamped_width, clamped_height
 
+def _strip_checkpoint_path(checkpoint_dir: str, row: int) -> str:
+    return os.path.join(checkpoint_dir, f"strip_{row:05d}.npy")
+
+
+def _open_strip_checkpoint(checkpoint_dir: str, manifest: Dict[str, Any]) -> int:
+    """
+    Prepare a strip checkpoint directory and return the first tile row to run.
+
+    Strips saved under a different manifest (other image size, tile geometry
+    or model) are discarded.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r') as f:
+            existing = json.load(f)
+    except (OSError, ValueError):
+        existing = None
+
+    if existing != manifest:
+        for name in os.listdir(checkpoint_dir):
+            try:
+                os.remove(os.path.join(checkpoint_dir, name))
+            except OSError:
+                pass
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        return 0
+
+    row = 0
+    while os.path.exists(_strip_checkpoint_path(checkpoint_dir, row)):
+        row += 1
+    return row
+
+
+def _checkpointed_strips(checkpoint_dir: str, start_row: int, strips):
+    """Replay saved strips, then persist and pass through newly computed ones."""
+    import numpy as np
+
+    for row in range(start_row):
+        yield np.load(_strip_checkpoint_path(checkpoint_dir, row))
+
+    for row, strip in enumerate(strips, start_row):
+        path = _strip_checkpoint_path(checkpoint_dir, row)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, strip)
+        os.replace(tmp_path, path)
+        yield strip
+
+
+def _upscale_to_output(img_np, partial_path: str, output_format: str, tile_size: int,
+                       tile_pad: int, batch_size: int, device, progress_callback=None,
+                       checkpoint_dir: Optional[str] = None, model_name: str = ''):
+    """
+    Run tiled inference over a uint8 HWC image and collect the output rows.
+
+    PNG output is encoded strip by strip into ``partial_path`` and None is
+    returned; any other format gets the rows assembled into one uint8 array.
+    With ``checkpoint_dir`` every finished strip is also saved there, and a
+    later call with the same geometry resumes after the last saved strip.
+    """
+    import numpy as np
+    from ml_worker.utils import tiled_inference, PNGStripWriter
+
+    height, width, channels = img_np.shape
+
+    start_row = 0
+    if checkpoint_dir:
+        start_row = _open_strip_checkpoint(checkpoint_dir, {
+            'width': width,
+            'height': height,
+            'tile_size': tile_size,
+            'tile_pad': tile_pad,
+            'model_name': model_name,
+        })
+        if start_row:
+            logger.info(f"Resuming upscale from tile row {start_row} ({checkpoint_dir})")
+
+    strips = tiled_inference(
+        models.upscaler_model,
+        img_np,
+        tile_size=tile_size,
+        tile_pad=tile_pad,
+        scale=UPSCALE_FACTOR,
+        device=device,
+        batch_size=batch_size,
+        progress_callback=progress_callback,
+        start_row=start_row,
+    )
+    if checkpoint_dir:
+        strips = _checkpointed_strips(checkpoint_dir, start_row, strips)
+
+    if output_format != 'webp':
+        with PNGStripWriter(partial_path, width * UPSCALE_FACTOR, height * UPSCALE_FACTOR, channels) as writer:
+            for strip in strips:
+                writer.write(strip)
+        return None
+
+    output = np.empty((height * UPSCALE_FACTOR, width * UPSCALE_FACTOR, channels), dtype=np.uint8)
+    row = 0
+    for strip in strips:
+        output[row:row + strip.shape[0]] = strip
+        row += strip.shape[0]
+    return output
+
+
 def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -> Dict[str, Any]:
     """
     Handle upscale_image request.
 
     Args:
-        request_data: {image_path, model_name, output_path, device}
+        request_data: {image_path, model_name, output_path, device, tile_size,
+            tile_pad, min_tile_size, tile_batch_size, allow_cpu_fallback,
+            output_format, output_quality, checkpoint_dir}
 
     Returns:
         Dict with success status and output path
@@ -73,6 +185,8 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
     tile_size = max(32, int(request_data.get('tile_size', 256)))
     tile_pad = max(0, int(request_data.get('tile_pad', 32)))
     min_tile_size = max(32, int(request_data.get('min_tile_size', 64)))
+    tile_batch_size = max(1, int(request_data.get('tile_batch_size', 4)))
+    checkpoint_dir = request_data.get('checkpoint_dir')
     allow_cpu_fallback = bool(request_data.get('allow_cpu_fallback', True))
 
     logger.info(f"Upscaling image: {os.path.basename(image_path)}")
@@ -126,59 +240,70 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
         logger.error(f"CRITICAL FAILURE: Backend is configured as '{backend}' but torch detected device as '{device}'.")
         raise RuntimeError(f"Strict Mode Violation: Refusing to run on CPU when {backend} is requested.")
         
-    models.upscaler_device = device
-
-    # Load model if not already loaded
-    if models.upscaler_model is None:
-        logger.info(f"Loading upscaler model: {model_name} on {device}")
-
-        model_config = MODEL_CONFIGS.get(model_name, MODEL_CONFIGS['RealESRGAN_x4plus'])
-        model_dir = Path('./models/Upscaler')
-        model_path = model_dir / f"{model_name}.pth"
-
-        if not model_path.exists():
-            # Try fallback to non-anime if anime requested but missing, or vice versa?
-            if 'anime' in model_name:
-                alt_model = 'RealESRGAN_x4plus'
-                alt_path = model_dir / f"{alt_model}.pth"
-                if alt_path.exists():
-                    logger.warning(f"Model {model_name} not found. Falling back to {alt_model}")
-                    model_path = alt_path
-                    model_config = MODEL_CONFIGS[alt_model]
-                else:
-                    raise FileNotFoundError(f"Upscaler model not found: {model_path}")
-            else:
-                 raise FileNotFoundError(f"Upscaler model not found: {model_path}")
-
-        models.upscaler_model = RRDBNet(
-            num_in_ch=3, num_out_ch=3,
-            num_feat=model_config['num_feat'],
-            num_block=model_config['num_block'],
-            num_grow_ch=model_config['num_grow_ch'],
-            scale=4
-        )
+    # Load and place the model under its load lock: concurrent bulk requests
+    # must not build the network twice or move it while another moves it
+    with models.model_load_lock('upscaler'):
+        models.upscaler_device = device
 
-        loadnet = torch.load(str(model_path), map_location=torch.device('cpu'), weights_only=True)
+        # Load model if not already loaded
+        if models.upscaler_model is None:
+            logger.info(f"Loading upscaler model: {model_name} on {device}")
+
+            model_config = MODEL_CONFIGS.get(model_name, MODEL_CONFIGS['RealESRGAN_x4plus'])
+            model_dir = Path('./models/Upscaler')
+            model_path = model_dir / f"{model_name}.pth"
+
+            if not model_path.exists():
+                # Try fallback to non-anime if anime requested but missing, or vice versa?
+                if 'anime' in model_name:
+                    alt_model = 'RealESRGAN_x4plus'
+                    alt_path = model_dir / f"{alt_model}.pth"
+                    if alt_path.exists():
+                        logger.warning(f"Model {model_name} not found. Falling back to {alt_model}")
+                        model_path = alt_path
+                        model_config = MODEL_CONFIGS[alt_model]
+                    else:
+                        raise FileNotFoundError(f"Upscaler model not found: {model_path}")
+                else:
+                     raise FileNotFoundError(f"Upscaler model not found: {model_path}")
+
+            models.upscaler_model = RRDBNet(
+                num_in_ch=3, num_out_ch=3,
+                num_feat=model_config['num_feat'],
+                num_block=model_config['num_block'],
+                num_grow_ch=model_config['num_grow_ch'],
+                scale=4
+            )
 
-        if 'params_ema' in loadnet:
-            keyname = 'params_ema'
-        elif 'params' in loadnet:
-            keyname = 'params'
-        else:
-            keyname = None
+            loadnet = torch.load(str(model_path), map_location=torch.device('cpu'), weights_only=True)
 
-        if keyname:
-            models.upscaler_model.load_state_dict(loadnet[keyname], strict=True)
-        else:
-            models.upscaler_model.load_state_dict(loadnet, strict=True)
+            if 'params_ema' in loadnet:
+                keyname = 'params_ema'
+            elif 'params' in loadnet:
+                keyname = 'params'
+            else:
+                keyname = None
 
-        models.upscaler_model.eval()
-        models.upscaler_model.to(device)
-        models.upscaler_device = device
-    elif models.upscaler_device != device:
-        logger.info(f"Moving upscaler model from {models.upscaler_device} to {device}")
-        models.upscaler_model.to(device)
-        models.upscaler_device = device
+            if keyname:
+                models.upscaler_model.load_state_dict(loadnet[keyname], strict=True)
+            else:
+                models.upscaler_model.load_state_dict(loadnet, strict=True)
+
+            models.upscaler_model.eval()
+            models.upscaler_model.to(device)
+            models.upscaler_device = device
+        elif models.upscaler_device != device:
+            logger.info(f"Moving upscaler model from {models.upscaler_device} to {device}")
+            models.upscaler_model.to(device)
+            models.upscaler_device = device
+
+    # torch.set_num_threads is process-wide, not per lane: it caps torch's
+    # intra-op pool for the whole worker at the bulk budget. Interactive
+    # requests run on ONNX sessions with their own thread counts, so they
+    # still get the cores this leaves free.
+    budget = scheduler.current_thread_budget()
+    if budget and device == 'cpu' and torch.get_num_threads() != budget:
+        torch.set_num_threads(budget)
 
     # 1. Load image
     try:
@@ -190,10 +315,8 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
             elif img.mode == 'RGBA':
                 img = img.convert('RGB')  # RealESRGAN usually expects RGB
                 
-            # Convert to tensor
-            img_np = np.array(img).transpose(2, 0, 1) # HWC -> CHW
-            img_np = img_np / 255.
-            img_tensor_cpu = torch.from_numpy(img_np).float().unsqueeze(0)
+            # Kept as uint8 HWC; tiles are converted to float one row at a time
+            img_np = np.array(img)
     except OSError as e:
         # Handle truncated or corrupted images by allowing PIL to load partial data
         if 'truncated' in str(e).lower() or 'corrupted' in str(e).lower():
@@ -210,10 +333,8 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
                     elif img.mode == 'RGBA':
                         img = img.convert('RGB')  # RealESRGAN usually expects RGB
                         
-                    # Convert to tensor
-                    img_np = np.array(img).transpose(2, 0, 1) # HWC -> CHW
-                    img_np = img_np / 255.
-                    img_tensor_cpu = torch.from_numpy(img_np).float().unsqueeze(0)
+                    # Kept as uint8 HWC; tiles are converted to float one row at a time
+                    img_np = np.array(img)
                 
                 logger.info(f"Successfully recovered upscaled image from truncated source: {image_path}")
             except Exception as recovery_error:
@@ -224,12 +345,18 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
         else:
             raise
 
-    # 2. Run Inference
-    from ml_worker.utils import tiled_inference
+    # 2. Run Inference, streaming finished rows straight into the output
+    output_format = request_data.get('output_format', 'png').lower().strip()
+    output_quality = max(1, min(100, int(request_data.get('output_quality', 95))))
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    partial_path = f"{output_path}.partial"
 
     current_device = device
     current_tile_size = max(tile_size, min_tile_size)
+    current_batch_size = tile_batch_size
     output = None
+    done = False
     last_error = None
 
     while current_tile_size >= min_tile_size:
@@ -239,16 +366,19 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
                 models.upscaler_model.to(current_device)
                 models.upscaler_device = current_device
 
-            img_tensor = img_tensor_cpu.to(current_device)
-            output = tiled_inference(
-                models.upscaler_model,
-                img_tensor,
+            output = _upscale_to_output(
+                img_np,
+                partial_path,
+                output_format,
                 tile_size=current_tile_size,
                 tile_pad=tile_pad,
-                scale=4,
+                batch_size=current_batch_size,
                 device=current_device,
                 progress_callback=progress_callback,
+                checkpoint_dir=checkpoint_dir,
+                model_name=model_name,
             )
+            done = True
             break
         except RuntimeError as e:
             last_error = e
@@ -257,6 +387,16 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
 
             _clear_device_cache(torch, current_device)
 
+            # Shrink the batch before the tile: it frees memory without
+            # adding seams or per-tile overhead
+            if current_batch_size > 1:
+                current_batch_size //= 2
+                logger.warning(
+                    f"Inference failed on {current_device} with {current_tile_size}px tiles: {e}. "
+                    f"Retrying with batch size {current_batch_size}."
+                )
+                continue
+
             if current_tile_size == min_tile_size:
                 break
 
@@ -267,13 +407,14 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
             )
             current_tile_size = next_tile_size
 
-    if output is None and allow_cpu_fallback and current_device != 'cpu' and last_error is not None and _is_recoverable_inference_error(last_error):
+    if not done and allow_cpu_fallback and current_device != 'cpu' and last_error is not None and _is_recoverable_inference_error(last_error):
         logger.warning(
             f"Recoverable inference failure on backend {current_device} after tile retries. "
             "Falling back to CPU for this request."
         )
         current_device = 'cpu'
         current_tile_size = max(min_tile_size, min(tile_size, 256))
+        current_batch_size = tile_batch_size
 
         while current_tile_size >= min_tile_size:
             try:
@@ -281,48 +422,46 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
                     models.upscaler_model.to(current_device)
                     models.upscaler_device = current_device
 
-                img_tensor = img_tensor_cpu.to(current_device)
-                output = tiled_inference(
-                    models.upscaler_model,
-                    img_tensor,
+                output = _upscale_to_output(
+                    img_np,
+                    partial_path,
+                    output_format,
                     tile_size=current_tile_size,
                     tile_pad=tile_pad,
-                    scale=4,
+                    batch_size=current_batch_size,
                     device=current_device,
                     progress_callback=progress_callback,
+                    checkpoint_dir=checkpoint_dir,
+                    model_name=model_name,
                 )
+                done = True
                 break
             except RuntimeError as e:
                 last_error = e
-                if not _is_recoverable_inference_error(e) or current_tile_size == min_tile_size:
+                if not _is_recoverable_inference_error(e):
+                    break
+                if current_batch_size > 1:
+                    current_batch_size //= 2
+                    continue
+                if current_tile_size == min_tile_size:
                     break
                 current_tile_size = max(min_tile_size, current_tile_size // 2)
 
-    if output is None:
+    if not done:
         raise last_error if last_error is not None else RuntimeError("Upscaler inference failed")
 
-    # 3. Post-process
-    output = output.data.squeeze().float().cpu().clamp_(0, 1).numpy()
-    
-    # CHW -> HWC
-    output = np.transpose(output, (1, 2, 0))
-    
-    output_img = (output * 255.0).round().astype(np.uint8)
-    output_pil = Image.fromarray(output_img)
-    
     # Get upscaled dimensions before output-format constraints
-    upscaled_width, upscaled_height = output_pil.size
-    
-    # Ensure dir
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # Save with configured format
-    output_format = request_data.get('output_format', 'png').lower().strip()
-    output_quality = max(1, min(100, int(request_data.get('output_quality', 95))))
-    
+    upscaled_width, upscaled_height = original_width * UPSCALE_FACTOR, original_height * UPSCALE_FACTOR
+
+    # 3. Save with configured format
     warning = None
 
     if output_format == 'webp':
+        # libwebp has no incremental encoder, so WebP output is assembled as
+        # a single uint8 buffer first
+        output_pil = Image.fromarray(output)
+        del output
+
         clamped_width, clamped_height = _clamp_size_to_max_dimension(
             upscaled_width,
             upscaled_height,
@@ -348,9 +487,12 @@ def handle_upscale_image(request_data: Dict[str, Any], progress_callback=None) -
         output_pil.save(output_path, format='WEBP', quality=output_quality, method=4)
         logger.info(f"Saved upscaled image as WebP (quality={output_quality}): {os.path.basename(output_path)}")
     else:
-        output_pil.save(output_path, format='PNG')
+        os.replace(partial_path, output_path)
         logger.info(f"Saved upscaled image as PNG: {os.path.basename(output_path)}")
-    
+
+    if checkpoint_dir:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
     return {
         "success": True, 
         "output_path": output_path,
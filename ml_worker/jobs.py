@@ -25,31 +25,12 @@ class JobRunner(threading.Thread):
         
     def run(self):
         try:
-            _job_store[self.job_id]['status'] = 'running'
-            
-            def progress_callback(percent, message):
-                _job_store[self.job_id]['progress'] = percent
-                _job_store[self.job_id]['message'] = message
-            
-            # Smartly inject progress_callback using inspection
-            import inspect
-            
-            sig = inspect.signature(self.target)
-            params = sig.parameters
-            
-            # If target accepts 'progress_callback' or **kwargs, pass it
-            accepts_callback = 'progress_callback' in params or \
-                               any(p.kind == p.VAR_KEYWORD for p in params.values())
-            
-            if accepts_callback:
-                # Avoid passing it twice if it's already in kwargs
-                if 'progress_callback' not in self.kwargs:
-                     result = self.target(progress_callback=progress_callback, *self.args, **self.kwargs)
-                else:
-                     result = self.target(*self.args, **self.kwargs)
-            else:
-                result = self.target(*self.args, **self.kwargs)
-            
+            # Background jobs are bulk work: hold a bulk lane slot while running
+            # so they cannot crowd out interactive requests
+            from ml_worker import scheduler
+            label = f"job:{getattr(self.target, '__name__', 'job')}"
+            result = scheduler.run_in_lane(scheduler.BULK, label, self._execute)['result']
+
             _job_store[self.job_id]['status'] = 'completed'
             _job_store[self.job_id]['progress'] = 100
             _job_store[self.job_id]['result'] = result
@@ -60,6 +41,34 @@ class JobRunner(threading.Thread):
             _job_store[self.job_id]['status'] = 'failed'
             _job_store[self.job_id]['error'] = str(e)
 
+    def _execute(self):
+        _job_store[self.job_id]['status'] = 'running'
+        
+        def progress_callback(percent, message):
+            _job_store[self.job_id]['progress'] = percent
+            _job_store[self.job_id]['message'] = message
+        
+        # Smartly inject progress_callback using inspection
+        import inspect
+        
+        sig = inspect.signature(self.target)
+        params = sig.parameters
+        
+        # If target accepts 'progress_callback' or **kwargs, pass it
+        accepts_callback = 'progress_callback' in params or \
+                           any(p.kind == p.VAR_KEYWORD for p in params.values())
+        
+        if accepts_callback:
+            # Avoid passing it twice if it's already in kwargs
+            if 'progress_callback' not in self.kwargs:
+                 result = self.target(progress_callback=progress_callback, *self.args, **self.kwargs)
+            else:
+                 result = self.target(*self.args, **self.kwargs)
+        else:
+            result = self.target(*self.args, **self.kwargs)
+
+        return result
+
 
 def start_job(target, *args, **kwargs) -> str:
     """Start a background job and return its ID"""
@@ -5,6 +5,7 @@ import os
 import sys
 import logging
 import json
+import threading
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,20 @@ upscaler_model = None
 upscaler_device = None
 similarity_model = None
 
+# One lock per model so concurrent requests never load the same model twice
+_load_locks = {}
+_load_locks_guard = threading.Lock()
+
+
+def model_load_lock(name: str) -> threading.Lock:
+    """Return the lock serializing lazy loads of the named model."""
+    with _load_locks_guard:
+        lock = _load_locks.get(name)
+        if lock is None:
+            lock = _load_locks[name] = threading.Lock()
+        return lock
+
+
 def check_dependencies() -> bool:
     """
     Check that all required ML dependencies are installed.
@@ -102,17 +117,20 @@ def get_onnx_providers() -> list:
     return providers if providers else ['CPUExecutionProvider']
 
 
-def get_onnx_session_options():
+def get_onnx_session_options(num_threads: int = None):
     """
     Get ONNX Runtime SessionOptions configured for CPU parallelism.
     Uses intra_op_num_threads for parallel execution of operations within inference.
+
+    Args:
+        num_threads: Intra-op thread budget (default: all cores, capped at 16)
     """
     import onnxruntime as ort
     
     sess_options = ort.SessionOptions()
     
     # Get number of CPU cores, cap at 16 to avoid excessive threading overhead
-    num_cores = min(os.cpu_count() or 4, 16)
+    num_cores = num_threads or min(os.cpu_count() or 4, 16)
     
     # intra_op_num_threads: parallelizes operations within a single inference run
     # (matrix ops, convolutions, etc.) - this is what we want for single-job multithreading
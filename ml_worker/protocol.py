@@ -145,7 +145,9 @@ class Request:
                      output_path: str, device: str = "auto",
                      tile_size: int = 256, tile_pad: int = 32,
                      min_tile_size: int = 64, allow_cpu_fallback: bool = True,
-                     output_format: str = 'png', output_quality: int = 95) -> Dict[str, Any]:
+                     output_format: str = 'png', output_quality: int = 95,
+                     tile_batch_size: int = 4,
+                     checkpoint_dir: Optional[str] = None) -> Dict[str, Any]:
         """Create an upscale_image request"""
         return Request.create(
             RequestType.UPSCALE_IMAGE,
@@ -158,6 +160,8 @@ class Request:
                 "tile_size": tile_size,
                 "tile_pad": tile_pad,
                 "min_tile_size": min_tile_size,
+                "tile_batch_size": tile_batch_size,
+                "checkpoint_dir": checkpoint_dir,
                 "allow_cpu_fallback": allow_cpu_fallback,
                 "output_format": output_format,
                 "output_quality": output_quality,
@@ -167,19 +171,23 @@ class Request:
     @staticmethod
     def compute_similarity(request_id: str, image_path: str,
                           model_path: str, model_type: str = 'siglip',
-                          image_size: int = 384, embedding_dim: int = 1152) -> Dict[str, Any]:
-        """Create a compute_similarity request"""
-        return Request.create(
-            RequestType.COMPUTE_SIMILARITY,
-            request_id,
-            {
-                "image_path": image_path,
-                "model_path": model_path,
-                "model_type": model_type,
-                "image_size": image_size,
-                "embedding_dim": embedding_dim
-            }
-        )
+                          image_size: int = 384, embedding_dim: int = 1152,
+                          pixels: Optional[str] = None) -> Dict[str, Any]:
+        """Create a compute_similarity request
+
+        pixels: optional base64 RGB bytes already resized to image_size x
+        image_size; the worker then skips decoding image_path.
+        """
+        data = {
+            "image_path": image_path,
+            "model_path": model_path,
+            "model_type": model_type,
+            "image_size": image_size,
+            "embedding_dim": embedding_dim
+        }
+        if pixels is not None:
+            data["pixels"] = pixels
+        return Request.create(RequestType.COMPUTE_SIMILARITY, request_id, data)
 
     @staticmethod
     def health_check(request_id: str) -> Dict[str, Any]:
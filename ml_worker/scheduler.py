@@ -0,0 +1,268 @@
+"""
+Request scheduler for ML worker
+
+Client connections no longer run requests on their own threads. Every
+request is routed to a lane with a fixed pool of executor threads:
+
+- interactive: thumbnails, single-image tagging, similarity embeddings,
+  animation extraction
+- bulk: upscaling, video tagging, cache rebuilds, rating training/inference
+
+A long upscale or video job can only ever occupy bulk slots, so interactive
+requests never queue behind it. Each lane also carries an intra-op thread
+budget so bulk inference cannot starve interactive inference of CPU cores.
+Control requests (health check, job status, shutdown) bypass the lanes and
+run inline on the connection thread.
+"""
+import os
+import queue
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from ml_worker.protocol import RequestType
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+LANE_BY_REQUEST_TYPE = {
+    RequestType.TAG_IMAGE.value: INTERACTIVE,
+    RequestType.COMPUTE_SIMILARITY.value: INTERACTIVE,
+    RequestType.GENERATE_THUMBNAIL.value: INTERACTIVE,
+    RequestType.EXTRACT_ANIMATION.value: INTERACTIVE,
+    RequestType.UPSCALE_IMAGE.value: BULK,
+    RequestType.TAG_VIDEO.value: BULK,
+    RequestType.REBUILD_CACHE.value: BULK,
+    RequestType.TRAIN_RATING_MODEL.value: BULK,
+    RequestType.INFER_RATINGS.value: BULK,
+}
+
+# Lane executor threads record which lane they belong to here
+_thread_state = threading.local()
+
+
+class _Task:
+    """A unit of work waiting for (or running on) a lane executor"""
+
+    def __init__(self, label: str, fn: Callable[[], Any]):
+        self.label = label
+        self.fn = fn
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+    def run(self):
+        self.started_at = time.monotonic()
+        try:
+            self.result = self.fn()
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.finished_at = time.monotonic()
+            self.done.set()
+
+
+class Lane:
+    """FIFO queue drained by a fixed number of executor threads"""
+
+    def __init__(self, name: str, workers: int, threads: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.threads = max(1, threads)
+        self._queue: "queue.Queue[_Task]" = queue.Queue()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._executors = []
+
+    def start(self):
+        for i in range(self.workers):
+            executor = threading.Thread(
+                target=self._executor_loop,
+                name=f"ml-{self.name}-{i}",
+                daemon=True
+            )
+            executor.start()
+            self._executors.append(executor)
+        logger.info(f"Lane '{self.name}': {self.workers} executor(s), {self.threads} intra-op thread(s)")
+
+    def _executor_loop(self):
+        _thread_state.lane = self
+        while True:
+            task = self._queue.get()
+            with self._lock:
+                self._running += 1
+            try:
+                task.run()
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
+
+    def submit(self, task: _Task):
+        self._queue.put(task)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+
+_lanes: Dict[str, Lane] = {}
+_lanes_lock = threading.Lock()
+
+# Per request type: count, errors, wait/exec totals and maxima (seconds)
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _default_thread_budgets() -> Dict[str, int]:
+    """Split the CPU cores between lanes, interactive first."""
+    cores = min(os.cpu_count() or 4, 16)
+    interactive = max(1, cores // 2)
+    bulk = max(1, cores - interactive)
+    return {INTERACTIVE: interactive, BULK: bulk}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def start_lanes():
+    """Create and start the lane executors from environment settings."""
+    budgets = _default_thread_budgets()
+    with _lanes_lock:
+        if _lanes:
+            return
+        _lanes[INTERACTIVE] = Lane(
+            INTERACTIVE,
+            workers=_env_int('ML_WORKER_INTERACTIVE_WORKERS', 2),
+            threads=_env_int('ML_WORKER_INTERACTIVE_THREADS', budgets[INTERACTIVE])
+        )
+        _lanes[BULK] = Lane(
+            BULK,
+            workers=_env_int('ML_WORKER_BULK_WORKERS', 1),
+            threads=_env_int('ML_WORKER_BULK_THREADS', budgets[BULK])
+        )
+        for lane in _lanes.values():
+            lane.start()
+
+
+def _get_lane(name: str) -> Lane:
+    if name not in _lanes:
+        start_lanes()
+    return _lanes[name]
+
+
+def lane_threads(name: str) -> int:
+    """Intra-op thread budget of a lane."""
+    if name in _lanes:
+        return _lanes[name].threads
+    return _env_int(f'ML_WORKER_{name.upper()}_THREADS', _default_thread_budgets()[name])
+
+
+def current_thread_budget() -> Optional[int]:
+    """Intra-op thread budget of the lane running the calling thread, if any."""
+    lane = getattr(_thread_state, 'lane', None)
+    return lane.threads if lane else None
+
+
+def _record(label: str, task: _Task):
+    wait = (task.started_at or task.enqueued_at) - task.enqueued_at
+    run = (task.finished_at or time.monotonic()) - (task.started_at or task.enqueued_at)
+    with _stats_lock:
+        entry = _stats.setdefault(label, {
+            'count': 0, 'errors': 0,
+            'wait_total': 0.0, 'wait_max': 0.0,
+            'exec_total': 0.0, 'exec_max': 0.0
+        })
+        entry['count'] += 1
+        if task.error is not None:
+            entry['errors'] += 1
+        entry['wait_total'] += wait
+        entry['wait_max'] = max(entry['wait_max'], wait)
+        entry['exec_total'] += run
+        entry['exec_max'] = max(entry['exec_max'], run)
+
+
+def run_in_lane(lane_name: Optional[str], label: str, fn: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Run fn on a lane executor and block until it finishes.
+
+    Args:
+        lane_name: Lane to run on, or None to run inline on the calling thread
+        label: Stats key, normally the request type
+        fn: Zero-argument callable doing the work
+
+    Returns:
+        Dict with 'result', 'lane', 'queue_ms' and 'exec_ms'
+
+    Raises:
+        Whatever fn raised
+    """
+    task = _Task(label, fn)
+    if lane_name is None or getattr(_thread_state, 'lane', None) is not None:
+        # Inline for control requests, and for work nested inside a lane
+        # (waiting on another executor from an executor could deadlock)
+        task.run()
+    else:
+        _get_lane(lane_name).submit(task)
+        task.done.wait()
+
+    _record(label, task)
+    timing = {
+        'lane': lane_name,
+        'queue_ms': round((task.started_at - task.enqueued_at) * 1000, 1),
+        'exec_ms': round((task.finished_at - task.started_at) * 1000, 1),
+    }
+    if task.error is not None:
+        raise task.error
+    return {'result': task.result, **timing}
+
+
+def run_request(request_type: str, fn: Callable[[], Any]) -> Dict[str, Any]:
+    """Run a request handler on the lane its request type belongs to."""
+    return run_in_lane(LANE_BY_REQUEST_TYPE.get(request_type), request_type, fn)
+
+
+def pending_count() -> int:
+    """Number of queued plus running lane tasks."""
+    return sum(lane.queued + lane.running for lane in list(_lanes.values()))
+
+
+def get_stats() -> Dict[str, Any]:
+    """Lane occupancy plus per-request-type queue wait and execution times."""
+    with _stats_lock:
+        requests = {
+            label: {
+                'count': int(entry['count']),
+                'errors': int(entry['errors']),
+                'avg_wait_ms': round(entry['wait_total'] / entry['count'] * 1000, 1),
+                'max_wait_ms': round(entry['wait_max'] * 1000, 1),
+                'avg_exec_ms': round(entry['exec_total'] / entry['count'] * 1000, 1),
+                'max_exec_ms': round(entry['exec_max'] * 1000, 1),
+            }
+            for label, entry in _stats.items()
+        }
+    lanes = {
+        name: {
+            'workers': lane.workers,
+            'threads': lane.threads,
+            'queued': lane.queued,
+            'running': lane.running,
+        }
+        for name, lane in list(_lanes.items())
+    }
+    return {'lanes': lanes, 'requests': requests}
@@ -34,7 +34,7 @@ from ml_worker.protocol import (
     Message, Request, Response, RequestType, validate_request
 )
 from ml_worker.backends import ensure_backend_ready
-from ml_worker import models
+from ml_worker import models, scheduler
 from ml_worker.jobs import handle_get_job_status
 from ml_worker.handlers import (
     handle_extract_animation,
@@ -63,6 +63,8 @@ _last_request_time = time.time()
 _shutdown_requested = False
 _idle_timeout = 300  # 5 minute default (matches env var default)
 _socket_path = '/tmp/chibibooru_ml_worker.sock'
+_active_clients = 0
+_active_clients_lock = threading.Lock()
 
 
 def update_activity():
@@ -92,14 +94,12 @@ def should_shutdown() -> bool:
         update_activity()
         return False
         
-    # 3. Check for active client connections
-    # Each client handler runs in a separate thread.
-    # MainThread + IdleMonitor thread = 2 threads minimum.
-    # If active_count > 2, we have clients connected.
-    active_threads = threading.active_count()
-    if active_threads > 2:
-        # Update activity to keep alive
-        # update_activity() # Optional, but good practice
+    # 3. Check for queued or running lane work and connected clients
+    if scheduler.pending_count() > 0:
+        update_activity()
+        return False
+
+    if _active_clients > 0:
         return False
 
     return is_idle
@@ -114,13 +114,22 @@ class LocalSemanticBackend(similarity_service.SemanticBackend):
     def is_available(self) -> bool:
         return True
         
-    def get_embedding(self, image_path: str, model_path: str) -> Optional[np.ndarray]:
+    def get_embedding(self, image_path: str, model_path: str, pixels: Optional[bytes] = None) -> Optional[np.ndarray]:
         try:
             # Call handler directly
-            result = handle_compute_similarity({
+            request = {
                 'image_path': image_path,
                 'model_path': model_path
-            })
+            }
+            if pixels is not None:
+                import base64
+                import config
+                request.update(
+                    pixels=base64.b64encode(pixels).decode('ascii'),
+                    model_type=config.SEMANTIC_MODEL_TYPE,
+                    image_size=config.SEMANTIC_IMAGE_SIZE,
+                )
+            result = handle_compute_similarity(request)
             embedding = result['embedding']
             return np.array(embedding, dtype=np.float32)
         except Exception as e:
@@ -137,10 +146,31 @@ class LocalSemanticBackend(similarity_service.SemanticBackend):
         return []
 
 
+# Request handlers: fn(request_data, progress_callback) -> result dict
+_REQUEST_HANDLERS = {
+    RequestType.TAG_IMAGE.value: lambda data, progress: handle_tag_image(data),
+    RequestType.UPSCALE_IMAGE.value: lambda data, progress: handle_upscale_image(data, progress_callback=progress),
+    RequestType.COMPUTE_SIMILARITY.value: lambda data, progress: handle_compute_similarity(data),
+    RequestType.HEALTH_CHECK.value: lambda data, progress: handle_health_check(data),
+    RequestType.TRAIN_RATING_MODEL.value: lambda data, progress: handle_train_rating_model(data),
+    RequestType.INFER_RATINGS.value: lambda data, progress: handle_infer_ratings(data),
+    RequestType.GET_JOB_STATUS.value: lambda data, progress: handle_get_job_status(data),
+    RequestType.REBUILD_CACHE.value: lambda data, progress: handle_rebuild_cache(data),
+    RequestType.EXTRACT_ANIMATION.value: lambda data, progress: handle_extract_animation(data),
+    RequestType.TAG_VIDEO.value: lambda data, progress: handle_tag_video(data),
+    RequestType.GENERATE_THUMBNAIL.value: lambda data, progress: handle_generate_thumbnail(data),
+}
+
+
 def handle_request(request: Dict[str, Any], progress_callback=None) -> Dict[str, Any]:
     """
     Handle a request message.
 
+    The handler runs on the scheduler lane for its request type (see
+    ml_worker.scheduler); the calling connection thread blocks until it is
+    done. Queue wait and execution time are logged, attached to the response
+    as 'timing' and aggregated per request type in the health check.
+
     Args:
         request: Request message dict
         progress_callback: Optional function(current, total, message)
@@ -156,62 +186,34 @@ def handle_request(request: Dict[str, Any], progress_callback=None) -> Dict[str,
 
     logger.info(f"Handling request {request_id}: {request_type}")
 
-    result = None
     try:
-        if request_type == RequestType.TAG_IMAGE.value:
-            result = handle_tag_image(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.UPSCALE_IMAGE.value:
-            # Pass progress callback to upscaler
-            result = handle_upscale_image(request_data, progress_callback=progress_callback)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.COMPUTE_SIMILARITY.value:
-            result = handle_compute_similarity(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.HEALTH_CHECK.value:
-            result = handle_health_check(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.TRAIN_RATING_MODEL.value:
-            result = handle_train_rating_model(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.INFER_RATINGS.value:
-            result = handle_infer_ratings(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.GET_JOB_STATUS.value:
-            result = handle_get_job_status(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.REBUILD_CACHE.value:
-            result = handle_rebuild_cache(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.EXTRACT_ANIMATION.value:
-            result = handle_extract_animation(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.TAG_VIDEO.value:
-            result = handle_tag_video(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.GENERATE_THUMBNAIL.value:
-            result = handle_generate_thumbnail(request_data)
-            return Response.success(request_id, result)
-
-        elif request_type == RequestType.SHUTDOWN.value:
+        if request_type == RequestType.SHUTDOWN.value:
             logger.info("Shutdown requested")
             global _shutdown_requested
             _shutdown_requested = True
             return Response.success(request_id, {"message": "Shutting down"})
 
-        else:
+        handler = _REQUEST_HANDLERS.get(request_type)
+        if handler is None:
             return Response.error(request_id, f"Unknown request type: {request_type}")
 
+        outcome = scheduler.run_request(
+            request_type,
+            lambda: handler(request_data, progress_callback)
+        )
+        logger.info(
+            f"Finished request {request_id} ({request_type}) on {outcome['lane'] or 'inline'} lane: "
+            f"waited {outcome['queue_ms']:.0f} ms, ran {outcome['exec_ms']:.0f} ms"
+        )
+
+        response = Response.success(request_id, outcome['result'])
+        response['timing'] = {
+            'lane': outcome['lane'],
+            'queue_ms': outcome['queue_ms'],
+            'exec_ms': outcome['exec_ms']
+        }
+        return response
+
     except Exception as e:
         logger.error(f"Error handling request {request_id}: {e}", exc_info=True)
         return Response.from_exception(request_id, e)
@@ -222,6 +224,9 @@ def handle_request(request: Dict[str, Any], progress_callback=None) -> Dict[str,
 
 def handle_client(client_socket: socket.socket):
     """Handle a client connection"""
+    global _active_clients
+    with _active_clients_lock:
+        _active_clients += 1
     try:
         while True:
             # Receive request
@@ -256,6 +261,8 @@ def handle_client(client_socket: socket.socket):
     except Exception as e:
         logger.error(f"Error in client handler: {e}", exc_info=True)
     finally:
+        with _active_clients_lock:
+            _active_clients -= 1
         try:
             client_socket.close()
         except:
@@ -311,6 +318,9 @@ def run_server():
         logger.error(f"Failed to set up backend: {e}")
         return 1
 
+    # Start scheduler lanes before accepting requests
+    scheduler.start_lanes()
+
     # Clean up old socket
     cleanup_socket()
 
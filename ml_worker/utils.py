@@ -1,11 +1,17 @@
 """
 Shared utilities for ML worker
 """
+import os
 import re
+import sys
 import math
+import time
+import zlib
+import struct
 import torch
 import logging
-from typing import List
+import numpy as np
+from typing import Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -26,84 +32,219 @@ def is_valid_frame(filename: str) -> bool:
     return filename.lower().endswith(FRAME_EXTENSIONS)
 
 
-def tiled_inference(model, img, tile_size=512, tile_pad=32, scale=4, device='cpu', progress_callback=None):
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: no resource module, psutil exposes the peak working set
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def tiled_inference(model, img, tile_size=512, tile_pad=32, scale=4, device='cpu',
+                    batch_size=4, progress_callback=None, start_row=0) -> Iterator[np.ndarray]:
     """
-    Run inference using seamless tiling.
-    img: Tensor (1, C, H, W)
+    Run seamless tiled inference, yielding finished output rows as they complete.
+
+    Every tile has the same padded shape (edge tiles are shifted inward and the
+    image border is reflect-padded), so up to ``batch_size`` tiles of a tile row
+    go through the model in one forward pass. Only the current tile row is held
+    as float; finished rows are converted to uint8 and handed to the caller, so
+    peak memory does not grow with the output size.
+
+    Args:
+        model: Upscaling network taking (N, C, H, W) float input in [0, 1]
+        img: uint8 array (H, W, C)
+        tile_size: Input-space tile edge length
+        tile_pad: Context pixels added around each tile and cropped afterwards
+        scale: Model upscale factor
+        device: Torch device to run on
+        batch_size: Tiles per forward pass
+        progress_callback: Optional function(current, total, message)
+        start_row: First tile row to run; earlier rows are counted as done
+            (used to resume from checkpointed strips)
+
+    Yields:
+        uint8 arrays (rows * scale, W * scale, C), top to bottom, starting
+        at ``start_row``
     """
-    batch, channel, height, width = img.shape
-    output_height = height * scale
-    output_width = width * scale
-    output_shape = (batch, channel, output_height, output_width)
-
-    # Initialize output tensor
-    output = torch.zeros(output_shape, device=device)
+    height, width, channels = img.shape
+    tile_w = min(tile_size, width)
+    tile_h = min(tile_size, height)
+    batch_size = max(1, int(batch_size))
 
-    # Number of tiles
-    tiles_x = math.ceil(width / tile_size)
-    tiles_y = math.ceil(height / tile_size)
+    tiles_x = math.ceil(width / tile_w)
+    tiles_y = math.ceil(height / tile_h)
     total_tiles = tiles_x * tiles_y
 
-    logger.info(f"Tiling: {tiles_x}x{tiles_y} tiles (Input tile: {tile_size}px, Pad: {tile_pad}px)")
+    logger.info(
+        f"Tiling: {tiles_x}x{tiles_y} tiles (Input tile: {tile_size}px, Pad: {tile_pad}px, "
+        f"Batch: {batch_size})"
+    )
+
+    started = time.monotonic()
+    start_row = max(0, min(int(start_row), tiles_y))
+    resumed_tiles = tile_idx = start_row * tiles_x
+    if progress_callback:
+        progress_callback(tile_idx, total_tiles, f"Upscaling tile {tile_idx + 1}/{total_tiles}")
+
+    for y in range(start_row, tiles_y):
+        # Core rows this tile row is responsible for, and the (possibly
+        # shifted) full-size source window they are cut from
+        core_start_y = y * tile_h
+        core_end_y = min(core_start_y + tile_h, height)
+        src_y = min(core_start_y, height - tile_h)
+
+        # Input strip with tile_pad of context on every side; beyond the image
+        # border the context is mirrored so all tiles share one shape
+        strip_start_y = max(src_y - tile_pad, 0)
+        strip_end_y = min(src_y + tile_h + tile_pad, height)
+        strip = np.pad(
+            img[strip_start_y:strip_end_y],
+            (
+                (tile_pad - (src_y - strip_start_y), src_y + tile_h + tile_pad - strip_end_y),
+                (tile_pad, tile_pad),
+                (0, 0),
+            ),
+            mode='reflect' if min(height, width) > 1 else 'edge',
+        )
+        strip_tensor = torch.from_numpy(strip).to(device).permute(2, 0, 1).float().div_(255.)
+
+        output_strip = np.empty(
+            ((core_end_y - core_start_y) * scale, width * scale, channels), dtype=np.uint8
+        )
+
+        for batch_start in range(0, tiles_x, batch_size):
+            xs = range(batch_start, min(batch_start + batch_size, tiles_x))
+            src_xs = [min(x * tile_w, width - tile_w) for x in xs]
+            input_batch = torch.stack([
+                strip_tensor[:, :, src_x:src_x + tile_w + 2 * tile_pad] for src_x in src_xs
+            ])
 
-    tile_idx = 0
-    for y in range(tiles_y):
-        for x in range(tiles_x):
-            # Report progress
-            if progress_callback:
-                progress_callback(tile_idx, total_tiles, f"Upscaling tile {tile_idx+1}/{total_tiles}")
-            
-            # 1. Determine Input Crop Coordinates (Input Space)
-            # Core crop (without padding)
-            ofs_x = x * tile_size
-            ofs_y = y * tile_size
-            
-            # Input Pad limits (don't go out of bounds)
-            input_start_x = max(ofs_x - tile_pad, 0)
-            input_end_x = min(ofs_x + tile_size + tile_pad, width)
-            input_start_y = max(ofs_y - tile_pad, 0)
-            input_end_y = min(ofs_y + tile_size + tile_pad, height)
-
-            # Input padding offsets (how much we actually padded relative to the core crop)
-            pad_left = ofs_x - input_start_x
-            pad_top = ofs_y - input_start_y
-            
-            # Crop Input
-            input_tile = img[:, :, input_start_y:input_end_y, input_start_x:input_end_x]
-
-            # 2. Run Inference
             with torch.no_grad():
                 try:
-                    output_tile = model(input_tile)
+                    output_batch = model(input_batch)
                 except RuntimeError as e:
-                    logger.error(f"Error processing tile ({x},{y}): {e}")
+                    logger.error(f"Error processing tiles {xs.start}-{xs.stop - 1} of row {y}: {e}")
                     raise e
 
-            # 3. Determine Output Crop Coordinates (Output Space)
-            # The output tensor includes the padding, so we need to crop the VALID center area.
-            
-            # Corresponding valid output area in the final image
-            output_start_x = ofs_x * scale
-            output_end_x = min(ofs_x + tile_size, width) * scale
-            output_start_y = ofs_y * scale
-            output_end_y = min(ofs_y + tile_size, height) * scale
-
-            # Crop offsets within the output_tile
-            # We skip the 'pad_left * scale' pixels that correspond to the left padding
-            tile_crop_start_x = pad_left * scale
-            tile_crop_end_x = tile_crop_start_x + (output_end_x - output_start_x)
-            
-            tile_crop_start_y = pad_top * scale
-            tile_crop_end_y = tile_crop_start_y + (output_end_y - output_start_y)
-
-            # Place into final output
-            output[:, :, output_start_y:output_end_y, output_start_x:output_end_x] = \
-                output_tile[:, :, tile_crop_start_y:tile_crop_end_y, tile_crop_start_x:tile_crop_end_x]
-            
-            tile_idx += 1
-            
+            # Drop the padded context and quantize on the device
+            output_batch = output_batch[
+                :, :,
+                tile_pad * scale:(tile_pad + tile_h) * scale,
+                tile_pad * scale:(tile_pad + tile_w) * scale,
+            ]
+            output_batch = (
+                output_batch.clamp_(0, 1).mul_(255.).round_()
+                .to(torch.uint8).permute(0, 2, 3, 1).cpu().numpy()
+            )
+
+            for output_tile, x, src_x in zip(output_batch, xs, src_xs):
+                core_start_x = x * tile_w
+                core_end_x = min(core_start_x + tile_w, width)
+                output_strip[:, core_start_x * scale:core_end_x * scale] = output_tile[
+                    (core_start_y - src_y) * scale:(core_end_y - src_y) * scale,
+                    (core_start_x - src_x) * scale:(core_end_x - src_x) * scale,
+                ]
+
+            tile_idx += len(xs)
+            if progress_callback:
+                elapsed = max(time.monotonic() - started, 1e-6)
+                peak_rss = peak_rss_mb()
+                rss_note = f", peak RSS {peak_rss:.0f} MB" if peak_rss is not None else ""
+                progress_callback(
+                    tile_idx,
+                    total_tiles,
+                    f"Upscaling tile {tile_idx}/{total_tiles} "
+                    f"({(tile_idx - resumed_tiles) / elapsed:.2f} tiles/s{rss_note})",
+                )
+
+        del strip_tensor
+        yield output_strip
+
     # Final progress
     if progress_callback:
         progress_callback(total_tiles, total_tiles, "Finalizing...")
 
-    return output
+
+class PNGStripWriter:
+    """
+    Incremental PNG encoder fed with uint8 row strips.
+
+    Rows are Sub-filtered and deflated as they arrive, so only the current
+    strip and the zlib window are ever held in memory. Writes go to
+    ``path``; on an exception inside the ``with`` block the partial file is
+    removed.
+    """
+
+    _COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+    def __init__(self, path: str, width: int, height: int, channels: int = 3,
+                 compress_level: int = 6):
+        if channels not in self._COLOR_TYPES:
+            raise ValueError(f"Unsupported channel count for PNG: {channels}")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(path, 'wb')
+        self._file.write(b'\x89PNG\r\n\x1a\n')
+        self._write_chunk(
+            b'IHDR',
+            struct.pack('>IIBBBBB', width, height, 8, self._COLOR_TYPES[channels], 0, 0, 0),
+        )
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF))
+
+    def write(self, strip: np.ndarray) -> None:
+        """Append a (rows, width, channels) uint8 strip."""
+        rows = strip.reshape(strip.shape[0], self.width * self.channels)
+        if self.rows_written + rows.shape[0] > self.height:
+            raise ValueError("PNG strip exceeds declared image height")
+
+        # Filter type 1 (Sub): each byte minus the same channel of the pixel to its left
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:self.channels + 1] = rows[:, :self.channels]
+        np.subtract(rows[:, self.channels:], rows[:, :-self.channels], out=filtered[:, self.channels + 1:])
+
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._write_chunk(b'IDAT', data)
+        self.rows_written += rows.shape[0]
+
+    def close(self) -> None:
+        """Flush the compressor and finish the file."""
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG has {self.rows_written} rows, expected {self.height}")
+        self._write_chunk(b'IDAT', self._compressor.flush())
+        self._write_chunk(b'IEND', b'')
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return False
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        return False
@@ -122,7 +122,7 @@ def main():
         # Run database health checks and auto-fix critical issues
         startup_health_check()
         
-        # Check if BOORU_PRIORITY changed and auto-apply if needed
+        # Check if BOORU_PRIORITY changed; the web server applies it in the background
         logger.info("Checking for priority changes...")
         check_and_apply_priority_changes()
         
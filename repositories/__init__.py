@@ -8,12 +8,17 @@ models.py to improve maintainability and testability.
 from .pool_repository import (
     create_pool,
     get_all_pools,
+    get_pool,
     get_pool_details,
+    get_pool_images_page,
     add_image_to_pool,
+    add_images_to_pool,
     remove_image_from_pool,
     delete_pool,
     update_pool,
     reorder_pool_images,
+    move_pool_images,
+    renormalize_pool_order,
     search_pools,
     get_pools_for_image,
     search_images_by_pool,
@@ -23,6 +28,7 @@ from .delta_tracker import (
     record_tag_delta,
     compute_tag_deltas,
     apply_tag_deltas,
+    replay_image_deltas,
     get_image_deltas,
     clear_all_deltas,
     clear_deltas_for_image,
@@ -34,6 +40,10 @@ from .tag_repository import (
     get_all_tags_sorted,
     recategorize_misplaced_tags,
     rebuild_categorized_tags_from_relations,
+    rebuild_categorized_tags_for_images,
+    rebuild_categorized_tags_in_transaction,
+    mark_categorized_tags_dirty,
+    rebuild_dirty_categorized_tags,
     add_implication,
     get_implications_for_tag,
     apply_implications_for_image,
@@ -56,12 +66,17 @@ __all__ = [
     # Pool repository
     'create_pool',
     'get_all_pools',
+    'get_pool',
     'get_pool_details',
+    'get_pool_images_page',
     'add_image_to_pool',
+    'add_images_to_pool',
     'remove_image_from_pool',
     'delete_pool',
     'update_pool',
     'reorder_pool_images',
+    'move_pool_images',
+    'renormalize_pool_order',
     'search_pools',
     'get_pools_for_image',
     'search_images_by_pool',
@@ -69,6 +84,7 @@ __all__ = [
     'record_tag_delta',
     'compute_tag_deltas',
     'apply_tag_deltas',
+    'replay_image_deltas',
     'get_image_deltas',
     'clear_all_deltas',
     'clear_deltas_for_image',
@@ -78,6 +94,10 @@ __all__ = [
     'get_all_tags_sorted',
     'recategorize_misplaced_tags',
     'rebuild_categorized_tags_from_relations',
+    'rebuild_categorized_tags_for_images',
+    'rebuild_categorized_tags_in_transaction',
+    'mark_categorized_tags_dirty',
+    'rebuild_dirty_categorized_tags',
     'add_implication',
     'get_implications_for_tag',
     'apply_implications_for_image',
@@ -8,8 +8,10 @@ Extracted from models.py to improve code organization and separation of concerns
 """
 
 import json
+import config
 from database import get_db_connection
-from functools import lru_cache
+from core.image_details_cache import ImageDetailsCache
+from events.cache_events import register_cache_invalidation_callback, register_image_invalidation_callback
 
 # ============================================================================
 # STATISTICS QUERIES
@@ -84,49 +86,124 @@ def get_all_images_with_tags():
         return [dict(row) for row in conn.execute(query).fetchall()]
 
 
+def get_all_image_ids():
+    """Return every image ID in ascending order as a compact int array."""
+    from array import array
+    with get_db_connection() as conn:
+        return array('i', (row[0] for row in conn.execute("SELECT id FROM images ORDER BY id")))
+
+
+def get_images_with_tags_by_ids(image_ids):
+    """
+    Get filepath and concatenated tags for specific images.
+
+    Returns:
+        dict: image id -> {'id', 'filepath', 'tags'} (missing IDs are absent)
+    """
+    image_ids = list(image_ids)
+    if not image_ids:
+        return {}
+    with get_db_connection() as conn:
+        placeholders = ','.join('?' * len(image_ids))
+        query = f"""
+        SELECT i.id, i.filepath, COALESCE(GROUP_CONCAT(t.name, ' '), '') as tags
+        FROM images i
+        LEFT JOIN image_tags it ON i.id = it.image_id
+        LEFT JOIN tags t ON it.tag_id = t.id
+        WHERE i.id IN ({placeholders})
+        GROUP BY i.id
+        """
+        return {row['id']: dict(row) for row in conn.execute(query, image_ids).fetchall()}
+
+
+def get_image_ids_for_filepaths(filepaths):
+    """Map filepaths to image IDs (filepaths not in the database are absent)."""
+    filepaths = list(filepaths)
+    found = {}
+    with get_db_connection() as conn:
+        for start in range(0, len(filepaths), 900):
+            chunk = filepaths[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT filepath, id FROM images WHERE filepath IN ({placeholders})", chunk
+            ).fetchall()
+            found.update((row['filepath'], row['id']) for row in rows)
+    return found
+
+
 def get_all_filepaths():
     """Returns a set of all filepaths in the database."""
     with get_db_connection() as conn:
         return {row['filepath'] for row in conn.execute("SELECT filepath FROM images").fetchall()}
 
-@lru_cache(maxsize=10000)
+_details_cache = ImageDetailsCache(config.IMAGE_DETAILS_CACHE_MB * 1024 * 1024)
+
+
 def get_image_details(filepath):
-    """Get detailed information about a specific image including all tags and metadata."""
-    with get_db_connection() as conn:
-        query = """
-        SELECT
-            i.*,
-            (SELECT COALESCE(GROUP_CONCAT(t.name, ' '), '') FROM tags t JOIN image_tags it ON t.id = it.tag_id WHERE it.image_id = i.id) as all_tags,
-            rm.data as raw_metadata
-        FROM images i
-        LEFT JOIN raw_metadata rm ON i.id = rm.image_id
-        WHERE i.filepath = ?
-        """
-        details = conn.execute(query, (filepath,)).fetchone()
+    """Get detailed information about a specific image including all tags and metadata.
+
+    Rows come from a byte-bounded cache (see core.image_details_cache); every
+    call returns a new dict, so callers may modify it.
+    """
+    row = _details_cache.get(filepath)
+    if row is None:
+        with get_db_connection() as conn:
+            query = """
+            SELECT
+                i.*,
+                (SELECT COALESCE(GROUP_CONCAT(t.name, ' '), '') FROM tags t JOIN image_tags it ON t.id = it.tag_id WHERE it.image_id = i.id) as all_tags,
+                rm.data as raw_metadata
+            FROM images i
+            LEFT JOIN raw_metadata rm ON i.id = rm.image_id
+            WHERE i.filepath = ?
+            """
+            details = conn.execute(query, (filepath,)).fetchone()
         if not details:
             return None
+        row = dict(details)
+        _details_cache.put(filepath, row)
+        row = dict(row)
+
+    details_dict = row
+    if details_dict.get('raw_metadata'):
+        details_dict['raw_metadata'] = json.loads(details_dict['raw_metadata'])
+
+    # Ensure tag fields are strings (not None) for backward compatibility
+    for key in ['tags_character', 'tags_copyright', 'tags_artist', 'tags_species', 'tags_meta', 'tags_general']:
+        if details_dict.get(key) is None:
+            details_dict[key] = ''
+
+    # If no active_source set but we have metadata, determine it
+    if not details_dict.get('active_source') and details_dict.get('raw_metadata'):
+        metadata = details_dict['raw_metadata']
+        sources = metadata.get('sources', {})
+        if 'danbooru' in sources:
+            details_dict['active_source'] = 'danbooru'
+        elif 'e621' in sources:
+            details_dict['active_source'] = 'e621'
+        elif sources:
+            details_dict['active_source'] = list(sources.keys())[0]
 
-        details_dict = dict(details)
-        if details_dict.get('raw_metadata'):
-            details_dict['raw_metadata'] = json.loads(details_dict['raw_metadata'])
+    return details_dict
 
-        # Ensure tag fields are strings (not None) for backward compatibility
-        for key in ['tags_character', 'tags_copyright', 'tags_artist', 'tags_species', 'tags_meta', 'tags_general']:
-            if details_dict.get(key) is None:
-                details_dict[key] = ''
 
-        # If no active_source set but we have metadata, determine it
-        if not details_dict.get('active_source') and details_dict.get('raw_metadata'):
-            metadata = details_dict['raw_metadata']
-            sources = metadata.get('sources', {})
-            if 'danbooru' in sources:
-                details_dict['active_source'] = 'danbooru'
-            elif 'e621' in sources:
-                details_dict['active_source'] = 'e621'
-            elif sources:
-                details_dict['active_source'] = list(sources.keys())[0]
+def invalidate_image_details(filepaths=(), md5s=()):
+    """Drop cached details for specific images."""
+    _details_cache.invalidate(filepaths, md5s)
 
-        return details_dict
+
+def clear_image_details_cache():
+    """Drop all cached image details."""
+    _details_cache.clear()
+
+
+def get_image_details_cache_stats():
+    """Entry count, byte size, hit/miss and eviction counters of the details cache."""
+    return _details_cache.stats()
+
+
+register_image_invalidation_callback(invalidate_image_details)
+register_cache_invalidation_callback(clear_image_details_cache)
 
 
 def get_image_details_with_merged_tags(filepath, merge_local_predictions=True):
@@ -176,6 +253,57 @@ def delete_image(filepath):
         return False
 
 
+def delete_images_by_filepaths(filepaths, chunk_size=500, progress_callback=None):
+    """
+    Delete many images and their related rows, one transaction per chunk.
+
+    Child rows (tags, sources, raw metadata, pools, relations, duplicate
+    pairs, similarity cache, predictions, favourites) go through ON DELETE
+    CASCADE and the FTS delete trigger. Tag deltas are dropped for MD5s that
+    no longer belong to any image.
+
+    Args:
+        filepaths: Paths relative to the images directory
+        chunk_size: Images deleted per transaction
+        progress_callback: Optional callable(done, total), called per chunk
+
+    Returns:
+        List of dicts (id, filepath, md5) for the rows that were deleted
+    """
+    filepaths = list(dict.fromkeys(filepaths))
+    deleted = []
+    total = len(filepaths)
+
+    for start in range(0, total, chunk_size):
+        chunk = filepaths[start:start + chunk_size]
+        placeholders = ','.join('?' * len(chunk))
+        with get_db_connection() as conn:
+            rows = [dict(row) for row in conn.execute(
+                f"SELECT id, filepath, md5 FROM images WHERE filepath IN ({placeholders})", chunk
+            ).fetchall()]
+            if rows:
+                ids = [row['id'] for row in rows]
+                conn.execute(
+                    f"DELETE FROM images WHERE id IN ({','.join('?' * len(ids))})", ids
+                )
+                md5s = [row['md5'] for row in rows if row['md5']]
+                if md5s:
+                    md5_placeholders = ','.join('?' * len(md5s))
+                    conn.execute(
+                        f"""DELETE FROM tag_deltas
+                            WHERE image_md5 IN ({md5_placeholders})
+                              AND image_md5 NOT IN (SELECT md5 FROM images WHERE md5 IN ({md5_placeholders}))""",
+                        md5s + md5s
+                    )
+            conn.commit()
+        deleted.extend(rows)
+
+        if progress_callback:
+            progress_callback(min(start + chunk_size, total), total)
+
+    return deleted
+
+
 def update_image_dimensions(filepath, width, height):
     """Update the original dimensions of an image."""
     try:
@@ -524,10 +652,14 @@ def search_images_by_multiple_sources(source_names):
 # IMAGE INSERTION
 # ============================================================================
 
-def add_image_with_metadata(image_info, source_names, categorized_tags, raw_metadata_dict):
+def add_image_with_metadata(image_info, source_names, categorized_tags, raw_metadata_dict, commit=True):
     """
     Adds a new image and all its metadata to the database in a single transaction.
     Returns True on success, False on failure (including duplicate MD5 race condition).
+
+    With commit=False the caller owns an open transaction (batched ingest):
+    the image is written inside a savepoint that is rolled back on failure,
+    and nothing is committed here.
     """
     import sqlite3
     import config
@@ -543,9 +675,18 @@ def add_image_with_metadata(image_info, source_names, categorized_tags, raw_meta
         print(f"Database policy: refusing Pixiv-only insert for {image_info.get('filepath')}")
         return False
 
-    try:
-        with get_db_connection() as conn:
+    def _abort():
+        if commit:
+            conn.rollback() # Ensure transaction is rolled back
+        else:
+            conn.execute("ROLLBACK TO add_image")
+            conn.execute("RELEASE add_image")
+
+    with get_db_connection() as conn:
+        try:
             cursor = conn.cursor()
+            if not commit:
+                cursor.execute("SAVEPOINT add_image")
 
             # Determine active_source based on priority
             # Check if this image should use merged source (passed via image_info)
@@ -683,21 +824,23 @@ def add_image_with_metadata(image_info, source_names, categorized_tags, raw_meta
                 image_id
             ))
 
-            conn.commit()
+            if commit:
+                conn.commit()
+            else:
+                cursor.execute("RELEASE add_image")
             return True
-    except sqlite3.IntegrityError as e:
-        conn.rollback() # Ensure transaction is rolled back
-        if "UNIQUE constraint failed: images.md5" in str(e):
-            print(f"Race condition: MD5 {image_info['md5']} was inserted by another process. Treating as duplicate.")
-            return False
-        else:
-            conn.rollback() # Ensure transaction is rolled back
-            print(f"Database integrity error adding image {image_info['filepath']}: {e}")
+        except sqlite3.IntegrityError as e:
+            _abort()
+            if "UNIQUE constraint failed: images.md5" in str(e):
+                print(f"Race condition: MD5 {image_info['md5']} was inserted by another process. Treating as duplicate.")
+                return False
+            else:
+                print(f"Database integrity error adding image {image_info['filepath']}: {e}")
+                return False
+        except Exception as e:
+            _abort()
+            print(f"Database error adding image {image_info['filepath']}: {e}")
             return False
-    except Exception as e:
-        conn.rollback() # Ensure transaction is rolled back
-        print(f"Database error adding image {image_info['filepath']}: {e}")
-        return False
 
 
 def get_tags_with_extended_categories(tag_names):
@@ -162,89 +162,136 @@ def apply_tag_deltas():
         bool: True if successful, False otherwise
 
     Process:
-        1. Fetch all deltas from tag_deltas table
-        2. For each delta, find the image by MD5
-        3. Get or create the tag
-        4. Apply the operation (add or remove)
-        5. Rebuild categorized tags
+        1. Collapse tag_deltas to the final operation per (md5, tag) into a temp table
+        2. Resolve image IDs by joining on MD5
+        3. Create missing tags and sync categories in one statement each
+        4. Apply all adds/removes with bulk INSERT OR IGNORE / DELETE
+        5. Rebuild categorized tags for the touched images only
     """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            # Get all deltas grouped by image
-            cursor.execute("""
-                SELECT image_md5, tag_name, tag_category, operation
-                FROM tag_deltas
-                ORDER BY image_md5, timestamp
-            """)
-
-            deltas = cursor.fetchall()
-            delta_count = len(deltas)
+            cursor.execute("SELECT COUNT(*) as count FROM tag_deltas")
+            delta_count = cursor.fetchone()['count']
 
             if delta_count == 0:
                 print("No tag deltas to apply.")
                 return True
 
             print(f"Applying {delta_count} tag deltas...")
-            applied = 0
 
-            for delta in deltas:
-                md5 = delta['image_md5']
-                tag_name = delta['tag_name']
-                tag_category = delta['tag_category']
-                operation = delta['operation']
+            # Latest delta per (md5, tag) wins, matching the old in-order replay
+            cursor.execute("DROP TABLE IF EXISTS temp.delta_replay")
+            cursor.execute("""
+                CREATE TEMP TABLE delta_replay AS
+                SELECT ranked.image_md5, ranked.tag_name, ranked.tag_category,
+                       ranked.operation, ranked.seq,
+                       i.id AS image_id, NULL AS tag_id
+                FROM (
+                    SELECT image_md5, tag_name, tag_category, operation,
+                           ROW_NUMBER() OVER (
+                               ORDER BY image_md5, timestamp, id
+                           ) AS seq,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY image_md5, tag_name
+                               ORDER BY timestamp DESC, id DESC
+                           ) AS rn
+                    FROM tag_deltas
+                ) ranked
+                LEFT JOIN images i ON i.md5 = ranked.image_md5
+                WHERE ranked.rn = 1
+            """)
 
-                # Get image_id from MD5
-                cursor.execute("SELECT id FROM images WHERE md5 = ?", (md5,))
-                img_result = cursor.fetchone()
+            cursor.execute("""
+                SELECT COUNT(*) as count, COUNT(DISTINCT image_md5) as images
+                FROM delta_replay WHERE image_id IS NULL
+            """)
+            missing = cursor.fetchone()
+            if missing['count']:
+                print(f"Warning: {missing['images']} images not found, skipping {missing['count']} deltas")
+            cursor.execute("DELETE FROM delta_replay WHERE image_id IS NULL")
 
-                if not img_result:
-                    print(f"Warning: Image with MD5 {md5} not found, skipping delta for tag '{tag_name}'")
-                    continue
+            # Create tags that don't exist yet (only adds need a tag row)
+            cursor.execute("""
+                INSERT OR IGNORE INTO tags (name, category)
+                SELECT tag_name, category FROM (
+                    SELECT tag_name, COALESCE(tag_category, 'general') AS category, MAX(seq)
+                    FROM delta_replay
+                    WHERE operation = 'add'
+                    GROUP BY tag_name
+                )
+            """)
 
-                image_id = img_result['id']
+            cursor.execute("""
+                UPDATE delta_replay
+                SET tag_id = (SELECT t.id FROM tags t WHERE t.name = delta_replay.tag_name)
+            """)
+            cursor.execute("CREATE INDEX temp.idx_delta_replay_tag ON delta_replay(tag_id)")
+
+            # Sync tag categories from the most recent delta that names one.
+            # Images carrying a recategorized tag need their columns rebuilt too.
+            cursor.execute("DROP TABLE IF EXISTS temp.delta_categories")
+            cursor.execute("""
+                CREATE TEMP TABLE delta_categories AS
+                SELECT d.tag_id, d.tag_category AS category
+                FROM delta_replay d
+                JOIN (
+                    SELECT tag_id, MAX(seq) AS seq
+                    FROM delta_replay
+                    WHERE tag_id IS NOT NULL AND tag_category IS NOT NULL AND tag_category != ''
+                    GROUP BY tag_id
+                ) latest ON latest.tag_id = d.tag_id AND latest.seq = d.seq
+            """)
+            cursor.execute("""
+                SELECT dc.tag_id FROM delta_categories dc
+                JOIN tags t ON t.id = dc.tag_id
+                WHERE t.category IS NOT dc.category
+            """)
+            recategorized_tag_ids = [row['tag_id'] for row in cursor.fetchall()]
+            cursor.execute("""
+                UPDATE tags
+                SET category = (SELECT dc.category FROM delta_categories dc WHERE dc.tag_id = tags.id)
+                WHERE id IN (SELECT tag_id FROM delta_categories)
+                  AND category IS NOT (SELECT dc.category FROM delta_categories dc WHERE dc.tag_id = tags.id)
+            """)
 
-                # Get or create the tag
-                cursor.execute("SELECT id FROM tags WHERE name = ?", (tag_name,))
-                tag_result = cursor.fetchone()
+            cursor.execute("""
+                INSERT OR IGNORE INTO image_tags (image_id, tag_id)
+                SELECT image_id, tag_id FROM delta_replay
+                WHERE operation = 'add' AND tag_id IS NOT NULL
+            """)
+            added = cursor.rowcount
 
-                if tag_result:
-                    tag_id = tag_result['id']
-                    # Update category if needed
-                    if tag_category:
-                        cursor.execute("UPDATE tags SET category = ? WHERE id = ?", (tag_category, tag_id))
-                else:
-                    # Create new tag
-                    cursor.execute(
-                        "INSERT INTO tags (name, category) VALUES (?, ?)",
-                        (tag_name, tag_category or 'general')
-                    )
-                    tag_id = cursor.lastrowid
+            cursor.execute("""
+                DELETE FROM image_tags
+                WHERE (image_id, tag_id) IN (
+                    SELECT image_id, tag_id FROM delta_replay
+                    WHERE operation = 'remove' AND tag_id IS NOT NULL
+                )
+            """)
+            removed = cursor.rowcount
 
-                if operation == 'add':
-                    # Add tag to image
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO image_tags (image_id, tag_id) VALUES (?, ?)",
-                        (image_id, tag_id)
-                    )
-                    applied += 1
+            cursor.execute("SELECT DISTINCT image_id FROM delta_replay")
+            touched_image_ids = {row['image_id'] for row in cursor.fetchall()}
 
-                elif operation == 'remove':
-                    # Remove tag from image
-                    cursor.execute(
-                        "DELETE FROM image_tags WHERE image_id = ? AND tag_id = ?",
-                        (image_id, tag_id)
-                    )
-                    applied += 1
+            if recategorized_tag_ids:
+                placeholders = ','.join('?' * len(recategorized_tag_ids))
+                cursor.execute(
+                    f"SELECT DISTINCT image_id FROM image_tags WHERE tag_id IN ({placeholders})",
+                    recategorized_tag_ids
+                )
+                touched_image_ids.update(row['image_id'] for row in cursor.fetchall())
 
+            cursor.execute("DROP TABLE IF EXISTS temp.delta_categories")
+            cursor.execute("DROP TABLE IF EXISTS temp.delta_replay")
             conn.commit()
-            print(f"Successfully applied {applied} tag deltas.")
+            print(f"Successfully applied tag deltas ({added} added, {removed} removed).")
 
-            from database.models import rebuild_categorized_tags_from_relations
-            rebuild_categorized_tags_from_relations()
+        from repositories.tag_repository import rebuild_categorized_tags_for_images
+        rebuild_categorized_tags_for_images(touched_image_ids)
 
-            return True
+        return True
 
     except Exception as e:
         print(f"Error applying tag deltas: {e}")
@@ -253,6 +300,50 @@ def apply_tag_deltas():
         return False
 
 
+def replay_image_deltas(cursor, image_id, md5):
+    """
+    Re-apply one image's recorded deltas on the caller's cursor, without committing.
+
+    Per-image counterpart of apply_tag_deltas() for code that rewrites a
+    single image's tags: the latest delta per tag wins, added tags are
+    created if missing (existing tags keep their category).
+
+    Args:
+        cursor: Cursor of the connection rewriting the image's tags
+        image_id: Image ID
+        md5: Image MD5 the deltas are recorded under
+
+    Returns:
+        int: Number of deltas applied
+    """
+    cursor.execute("""
+        SELECT tag_name, tag_category, operation
+        FROM tag_deltas
+        WHERE image_md5 = ?
+        ORDER BY timestamp, id
+    """, (md5,))
+    latest = {}
+    for row in cursor.fetchall():
+        latest[row['tag_name']] = (row['operation'], row['tag_category'])
+
+    for tag_name, (operation, tag_category) in latest.items():
+        if operation == 'add':
+            cursor.execute(
+                "INSERT OR IGNORE INTO tags (name, category) VALUES (?, ?)",
+                (tag_name, tag_category or 'general')
+            )
+            cursor.execute("""
+                INSERT OR IGNORE INTO image_tags (image_id, tag_id)
+                SELECT ?, id FROM tags WHERE name = ?
+            """, (image_id, tag_name))
+        else:
+            cursor.execute("""
+                DELETE FROM image_tags
+                WHERE image_id = ? AND tag_id = (SELECT id FROM tags WHERE name = ?)
+            """, (image_id, tag_name))
+    return len(latest)
+
+
 def get_image_deltas(filepath):
     """
     Get all tag deltas for a specific image.
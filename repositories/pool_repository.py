@@ -6,10 +6,26 @@ Handles all pool-related database operations:
 - Pool membership (adding/removing images)
 - Pool searching and querying
 - Image-pool relationships
+
+Ordering: pool_images.sort_order is a sparse key, spaced ORDER_GAP apart.
+An image moved between two neighbours gets a key between theirs, so a move
+writes only the moved rows. When a gap runs out the pool is renumbered
+(renormalize_pool_order); moves report when that is due soon so callers can
+run it in the background. Positions exposed to callers are 1-indexed ranks,
+not keys.
 """
 
 from database import get_db_connection
 
+# Distance between consecutive sort keys after (re)numbering
+ORDER_GAP = 1024
+
+# Moves leaving neighbouring keys closer than this ask for a renumber
+_RENORMALIZE_BELOW = 4
+
+# Largest IN (...) list per statement
+_CHUNK = 500
+
 
 def create_pool(name, description=""):
     """Create a new pool.
@@ -32,10 +48,31 @@ def get_all_pools():
     """Get a list of all pools.
 
     Returns:
-        list[dict]: List of pool dictionaries with id, name, description
+        list[dict]: List of pool dictionaries with id, name, description, image_count
     """
     with get_db_connection() as conn:
-        return [dict(row) for row in conn.execute("SELECT * FROM pools ORDER BY name ASC").fetchall()]
+        query = """
+        SELECT p.*, COUNT(pi.image_id) as image_count
+        FROM pools p
+        LEFT JOIN pool_images pi ON p.id = pi.pool_id
+        GROUP BY p.id
+        ORDER BY p.name ASC
+        """
+        return [dict(row) for row in conn.execute(query).fetchall()]
+
+
+def get_pool(pool_id):
+    """Get a single pool without its images.
+
+    Args:
+        pool_id (int): Pool ID
+
+    Returns:
+        dict | None: Pool with id, name, description, or None if it doesn't exist
+    """
+    with get_db_connection() as conn:
+        pool = conn.execute("SELECT * FROM pools WHERE id = ?", (pool_id,)).fetchone()
+        return dict(pool) if pool else None
 
 
 def get_pool_details(pool_id):
@@ -59,12 +96,82 @@ def get_pool_details(pool_id):
         FROM images i
         JOIN pool_images pi ON i.id = pi.image_id
         WHERE pi.pool_id = ?
-        ORDER BY pi.sort_order ASC
+        ORDER BY pi.sort_order ASC, pi.image_id ASC
         """
         images = [dict(row) for row in conn.execute(images_query, (pool_id,)).fetchall()]
         return {"pool": dict(pool), "images": images}
 
 
+def get_pool_images_page(pool_id, limit=100, cursor=None):
+    """Get one page of a pool's images in order, using keyset pagination.
+
+    Args:
+        pool_id (int): Pool ID
+        limit (int): Maximum images per page
+        cursor (str, optional): next_cursor of the previous page
+
+    Returns:
+        dict | None: None if the pool doesn't exist, otherwise
+            - images: list of dicts with image_id, filepath, md5, sort_order, position
+            - next_cursor: cursor for the following page, or None on the last page
+            - total: number of images in the pool
+    """
+    after_key, after_id = _parse_cursor(cursor)
+    with get_db_connection() as conn:
+        if not conn.execute("SELECT 1 FROM pools WHERE id = ?", (pool_id,)).fetchone():
+            return None
+        total = conn.execute(
+            "SELECT COUNT(*) FROM pool_images WHERE pool_id = ?", (pool_id,)
+        ).fetchone()[0]
+
+        if after_id is None:
+            offset = 0
+            rows = conn.execute("""
+                SELECT pi.image_id, i.filepath, i.md5, pi.sort_order
+                FROM pool_images pi
+                JOIN images i ON i.id = pi.image_id
+                WHERE pi.pool_id = ?
+                ORDER BY pi.sort_order, pi.image_id
+                LIMIT ?
+            """, (pool_id, limit + 1)).fetchall()
+        else:
+            # Rank of the first row on this page (index-only count)
+            offset = conn.execute("""
+                SELECT COUNT(*) FROM pool_images
+                WHERE pool_id = ? AND (sort_order, image_id) <= (?, ?)
+            """, (pool_id, after_key, after_id)).fetchone()[0]
+            rows = conn.execute("""
+                SELECT pi.image_id, i.filepath, i.md5, pi.sort_order
+                FROM pool_images pi
+                JOIN images i ON i.id = pi.image_id
+                WHERE pi.pool_id = ? AND (pi.sort_order, pi.image_id) > (?, ?)
+                ORDER BY pi.sort_order, pi.image_id
+                LIMIT ?
+            """, (pool_id, after_key, after_id, limit + 1)).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    images = [
+        dict(row, position=offset + index + 1)
+        for index, row in enumerate(rows)
+    ]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = f"{rows[-1]['sort_order']}:{rows[-1]['image_id']}"
+    return {"images": images, "next_cursor": next_cursor, "total": total}
+
+
+def _parse_cursor(cursor):
+    """Split a 'sort_order:image_id' page cursor. (None, None) for the first page."""
+    if not cursor:
+        return None, None
+    try:
+        key, image_id = str(cursor).split(':', 1)
+        return int(key), int(image_id)
+    except ValueError:
+        raise ValueError(f"Invalid pool page cursor: {cursor}")
+
+
 def add_image_to_pool(pool_id, image_id):
     """Add an image to a pool.
 
@@ -74,20 +181,52 @@ def add_image_to_pool(pool_id, image_id):
 
     Note:
         Uses INSERT OR IGNORE to prevent duplicate entries.
-        Automatically assigns the next sort_order value.
+        Automatically appends the image after the current last one.
     """
     with get_db_connection() as conn:
         cursor = conn.cursor()
         # Get the next sort order
         cursor.execute("SELECT MAX(sort_order) FROM pool_images WHERE pool_id = ?", (pool_id,))
         max_order = cursor.fetchone()[0]
-        next_order = (max_order or 0) + 1
+        next_order = (max_order or 0) + ORDER_GAP
 
         cursor.execute("INSERT OR IGNORE INTO pool_images (pool_id, image_id, sort_order) VALUES (?, ?, ?)",
                        (pool_id, image_id, next_order))
         conn.commit()
 
 
+def add_images_to_pool(pool_id, image_ids, position=None):
+    """Add several images to a pool at a position, keeping their given order.
+
+    Args:
+        pool_id (int): Pool ID
+        image_ids (list[int]): Image IDs in the order they should appear
+        position (int, optional): 1-indexed position of the first added image;
+            None (or past the end) appends
+
+    Returns:
+        dict: added (number of new members), renormalize (True if the pool
+            should be renumbered soon, see renormalize_pool_order)
+
+    Note:
+        Images already in the pool are left where they are.
+    """
+    image_ids = list(dict.fromkeys(int(image_id) for image_id in image_ids))
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        existing = _existing_members(cursor, pool_id, image_ids)
+        new_ids = [image_id for image_id in image_ids if image_id not in existing]
+        if not new_ids:
+            return {"added": 0, "renormalize": False}
+        cursor.executemany(
+            "INSERT INTO pool_images (pool_id, image_id, sort_order) VALUES (?, ?, NULL)",
+            [(pool_id, image_id) for image_id in new_ids]
+        )
+        tight = _place(cursor, pool_id, new_ids, position)
+        conn.commit()
+    return {"added": len(new_ids), "renormalize": tight}
+
+
 def remove_image_from_pool(pool_id, image_id):
     """Remove an image from a pool.
 
@@ -144,44 +283,153 @@ def reorder_pool_images(pool_id, image_id, new_position):
     Args:
         pool_id (int): Pool ID
         image_id (int): Image ID to reorder
-        new_position (int): New sort order position (1-indexed)
+        new_position (int): New position (1-indexed)
+
+    Returns:
+        dict: See move_pool_images()
 
     Note:
-        Automatically adjusts sort_order of other images in the pool.
-        If new_position equals current position, no changes are made.
+        Only the moved row is written unless the pool has to be renumbered.
     """
+    return move_pool_images(pool_id, [image_id], new_position)
+
+
+def move_pool_images(pool_id, image_ids, position):
+    """Move several pool images, as one block in the given order, to a position.
+
+    Args:
+        pool_id (int): Pool ID
+        image_ids (list[int]): Member image IDs in the order they should appear
+        position (int): 1-indexed position of the first moved image in the
+            resulting order; values past the end move the block to the end
+
+    Returns:
+        dict: moved (number of images moved), renormalize (True if the pool
+            should be renumbered soon, see renormalize_pool_order)
+    """
+    image_ids = list(dict.fromkeys(int(image_id) for image_id in image_ids))
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        # Get current position
-        cursor.execute("SELECT sort_order FROM pool_images WHERE pool_id = ? AND image_id = ?", (pool_id, image_id))
-        result = cursor.fetchone()
-        if not result:
-            return
-
-        old_position = result[0]
-        if old_position == new_position:
-            return
-
-        # Shift other images
-        if new_position < old_position:
-            # Moving up: increment sort_order for images in between
-            cursor.execute("""
-                UPDATE pool_images
-                SET sort_order = sort_order + 1
-                WHERE pool_id = ? AND sort_order >= ? AND sort_order < ?
-            """, (pool_id, new_position, old_position))
-        else:
-            # Moving down: decrement sort_order for images in between
-            cursor.execute("""
-                UPDATE pool_images
-                SET sort_order = sort_order - 1
-                WHERE pool_id = ? AND sort_order > ? AND sort_order <= ?
-            """, (pool_id, old_position, new_position))
-
-        # Set new position for the moved image
-        cursor.execute("UPDATE pool_images SET sort_order = ? WHERE pool_id = ? AND image_id = ?",
-                       (new_position, pool_id, image_id))
+        existing = _existing_members(cursor, pool_id, image_ids)
+        image_ids = [image_id for image_id in image_ids if image_id in existing]
+        if not image_ids:
+            return {"moved": 0, "renormalize": False}
+        tight = _place(cursor, pool_id, image_ids, position)
         conn.commit()
+    return {"moved": len(image_ids), "renormalize": tight}
+
+
+def renormalize_pool_order(pool_id):
+    """Respace a pool's sort keys ORDER_GAP apart, keeping the current order.
+
+    Only rows whose key changes are written. Safe to run in the background.
+
+    Args:
+        pool_id (int): Pool ID
+
+    Returns:
+        int: Number of rows rewritten
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        ordered = [row[0] for row in cursor.execute(
+            "SELECT image_id FROM pool_images WHERE pool_id = ? ORDER BY sort_order, image_id",
+            (pool_id,)
+        ).fetchall()]
+        changed = _renumber(cursor, pool_id, ordered)
+        conn.commit()
+    return changed
+
+
+def _existing_members(cursor, pool_id, image_ids):
+    found = set()
+    for start in range(0, len(image_ids), _CHUNK):
+        chunk = image_ids[start:start + _CHUNK]
+        placeholders = ','.join('?' * len(chunk))
+        found.update(row[0] for row in cursor.execute(
+            f"SELECT image_id FROM pool_images WHERE pool_id = ? AND image_id IN ({placeholders})",
+            [pool_id] + chunk
+        ).fetchall())
+    return found
+
+
+def _renumber(cursor, pool_id, ordered_ids):
+    """Give ordered_ids keys ORDER_GAP, 2*ORDER_GAP, ... writing only changed rows."""
+    current = dict(cursor.execute(
+        "SELECT image_id, sort_order FROM pool_images WHERE pool_id = ?", (pool_id,)
+    ).fetchall())
+    updates = [
+        ((index + 1) * ORDER_GAP, pool_id, image_id)
+        for index, image_id in enumerate(ordered_ids)
+        if current.get(image_id) != (index + 1) * ORDER_GAP
+    ]
+    cursor.executemany(
+        "UPDATE pool_images SET sort_order = ? WHERE pool_id = ? AND image_id = ?", updates
+    )
+    return len(updates)
+
+
+def _place(cursor, pool_id, image_ids, position):
+    """Give image_ids consecutive keys at a 1-indexed position among the other rows.
+
+    Writes only image_ids while the neighbouring keys leave room; otherwise
+    renumbers the whole pool. Returns True if the remaining gap is small
+    enough that the pool should be renumbered soon.
+    """
+    moving = set(image_ids)
+
+    # Neighbours among the rows that stay put; very large blocks are simply
+    # renumbered below
+    if len(image_ids) <= _CHUNK:
+        exclude = ','.join('?' * len(image_ids))
+
+        def others(order, limit, offset=0):
+            return [row[1] for row in cursor.execute(f"""
+                SELECT image_id, sort_order FROM pool_images
+                WHERE pool_id = ? AND sort_order IS NOT NULL AND image_id NOT IN ({exclude})
+                ORDER BY sort_order {order}, image_id {order}
+                LIMIT ? OFFSET ?
+            """, [pool_id] + list(image_ids) + [limit, offset]).fetchall()]
+
+        if position is not None and position < 1:
+            position = 1
+        window = others('ASC', 2, position - 2) if position is not None and position > 1 else []
+        if position == 1:
+            first = others('ASC', 1)
+            prev_key, next_key = None, (first[0] if first else None)
+        elif window:
+            prev_key = window[0]
+            next_key = window[1] if len(window) > 1 else None
+        else:
+            # Append (no position, or past the end)
+            last = others('DESC', 1)
+            prev_key, next_key = (last[0] if last else None), None
+
+        count = len(image_ids)
+        if prev_key is None and next_key is None:
+            prev_key = 0
+        if prev_key is None:
+            prev_key = next_key - ORDER_GAP * (count + 1)
+        if next_key is None:
+            next_key = prev_key + ORDER_GAP * (count + 1)
+        step = (next_key - prev_key) // (count + 1)
+        if step >= 1:
+            cursor.executemany(
+                "UPDATE pool_images SET sort_order = ? WHERE pool_id = ? AND image_id = ?",
+                [(prev_key + step * (index + 1), pool_id, image_id)
+                 for index, image_id in enumerate(image_ids)]
+            )
+            return step < _RENORMALIZE_BELOW
+
+    # No room between the neighbours, or a very large block: renumber
+    ordered = [row[0] for row in cursor.execute(
+        "SELECT image_id FROM pool_images WHERE pool_id = ? ORDER BY sort_order, image_id",
+        (pool_id,)
+    ).fetchall() if row[0] not in moving]
+    index = len(ordered) if position is None else min(max(position, 1) - 1, len(ordered))
+    ordered[index:index] = image_ids
+    _renumber(cursor, pool_id, ordered)
+    return False
 
 
 def search_pools(search_term):
@@ -242,7 +490,7 @@ def search_images_by_pool(pool_name):
         JOIN pool_images pi ON i.id = pi.image_id
         JOIN pools p ON pi.pool_id = p.id
         WHERE LOWER(p.name) LIKE LOWER(?)
-        ORDER BY pi.sort_order ASC
+        ORDER BY pi.sort_order ASC, pi.image_id ASC
         """
         search_pattern = f"%{pool_name}%"
         return [dict(row) for row in conn.execute(query, (search_pattern,)).fetchall()]
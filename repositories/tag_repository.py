@@ -31,11 +31,9 @@ def get_tag_counts():
 def reload_tag_counts():
     """Reload just the tag counts without reloading all image data."""
     # Import inside function to avoid circular import
+    # (cache_manager keys counts by tag ID and feeds the tag index)
     from core import cache_manager
-    with cache_manager.data_lock:
-        with get_db_connection() as conn:
-            tag_counts_query = "SELECT name, COUNT(DISTINCT image_id) FROM tags JOIN image_tags ON tags.id = image_tags.tag_id GROUP BY name"
-            cache_manager.tag_counts = {row['name']: row['COUNT(DISTINCT image_id)'] for row in conn.execute(tag_counts_query).fetchall()}
+    cache_manager.reload_tag_counts()
 
 
 def get_all_tags_sorted():
@@ -53,7 +51,10 @@ def get_all_tags_sorted():
 
 def search_tags(query=None, category=None, limit=100, offset=0, hide_orphaned=True):
     """
-    Search for tags with pagination and filtering using SQL.
+    Search for tags with pagination and filtering.
+
+    Served from the in-memory tag index (core.tag_index) with cached post
+    counts, so no aggregate over image_tags runs per request.
     
     Args:
         query: Search string (partial match)
@@ -65,62 +66,15 @@ def search_tags(query=None, category=None, limit=100, offset=0, hide_orphaned=Tr
     Returns:
         Tuple (tags, total_count)
     """
-    with get_db_connection() as conn:
-        sql_parts = ["""
-            SELECT t.name, t.category, COUNT(it.image_id) as count
-            FROM tags t
-            LEFT JOIN image_tags it ON t.id = it.tag_id
-        """]
-        
-        where_clauses = []
-        params = []
-        
-        if query:
-            where_clauses.append("LOWER(t.name) LIKE ?")
-            params.append(f"%{query.lower()}%")
-            
-        if category and category != 'all':
-            where_clauses.append("t.category = ?")
-            params.append(category)
-            
-        if where_clauses:
-            sql_parts.append("WHERE " + " AND ".join(where_clauses))
-            
-        sql_parts.append("GROUP BY t.id")
-        
-        if hide_orphaned:
-            sql_parts.append("HAVING COUNT(it.image_id) > 0")
-            
-        sql_parts.append("ORDER BY t.name ASC")
-        sql_parts.append("LIMIT ? OFFSET ?")
-        params.extend([limit, offset])
-        
-        full_query = " ".join(sql_parts)
-        
-        # Get total count for pagination
-        if hide_orphaned:
-            # For count with hide_orphaned, we need to use the same subquery logic
-            count_sql_parts = ["""SELECT COUNT(*) FROM (
-                SELECT t.id
-                FROM tags t
-                LEFT JOIN image_tags it ON t.id = it.tag_id
-            """]
-            if where_clauses:
-                count_sql_parts.append("WHERE " + " AND ".join(where_clauses))
-            count_sql_parts.append("GROUP BY t.id HAVING COUNT(it.image_id) > 0)")
-            count_query = " ".join(count_sql_parts)
-            total = conn.execute(count_query, params[:-2]).fetchone()[0]
-        else:
-            count_sql_parts = ["SELECT COUNT(*) FROM tags t"]
-            if where_clauses:
-                count_sql_parts.append("WHERE " + " AND ".join(where_clauses))
-            count_query = " ".join(count_sql_parts)
-            # Use params excluding limit and offset for count query
-            total = conn.execute(count_query, params[:-2]).fetchone()[0]
-        
-        tags = [dict(row) for row in conn.execute(full_query, params).fetchall()]
-        
-        return tags, total
+    from core.tag_index import get_tag_index
+
+    return get_tag_index().list_tags(
+        query=query or '',
+        category=category if category and category != 'all' else None,
+        limit=limit,
+        offset=offset,
+        min_count=1 if hide_orphaned else 0
+    )
 
 
 # ============================================================================
@@ -218,6 +172,9 @@ def recategorize_misplaced_tags():
 
             old_tag_id = old_tag['id']
 
+            # Every image carrying the old tag ends up with a renamed/moved tag
+            mark_categorized_tags_dirty(cur, [old_tag_id])
+
             # Check if the new tag already exists
             cur.execute("SELECT id FROM tags WHERE name = ?", (new_name,))
             new_tag = cur.fetchone()
@@ -272,19 +229,22 @@ def recategorize_misplaced_tags():
             print(f"Normalized {rating_changes} rating tags")
 
         # Find all general tags that should be recategorized
-        cur.execute("SELECT DISTINCT name FROM tags WHERE category = 'general'")
-        general_tags = [row['name'] for row in cur.fetchall()]
+        cur.execute("SELECT id, name FROM tags WHERE category = 'general'")
+        general_tags = [(row['id'], row['name']) for row in cur.fetchall()]
 
         changes = 0
-        for tag_name in tqdm(general_tags, desc="Checking tags"):
+        changed_tag_ids = []
+        for tag_id, tag_name in tqdm(general_tags, desc="Checking tags"):
             for category, tag_set in known_categorized.items():
                 if tag_name in tag_set:
                     # Found a match - update this tag's category
                     cur.execute("UPDATE tags SET category = ? WHERE name = ? AND category = 'general'",
                                (category, tag_name))
+                    changed_tag_ids.append(tag_id)
                     changes += 1
                     break
 
+        mark_categorized_tags_dirty(cur, changed_tag_ids)
         conn.commit()
 
     total_changes = changes + rating_changes
@@ -306,6 +266,11 @@ def rebuild_categorized_tags_from_relations():
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
+        # Everything is about to be rebuilt, so pending dirty marks are covered.
+        # Marks recorded after this point stay queued for the next drain.
+        cursor.execute("DELETE FROM categorized_tags_dirty")
+        conn.commit()
+
         # Get all images
         cursor.execute("SELECT id FROM images")
         images = cursor.fetchall()
@@ -334,6 +299,7 @@ def rebuild_categorized_tags_from_relations():
             tags_by_image[image_id][category] = tags
 
         updated_count = 0
+        changed_count = 0
         updates_batch = []
 
         for image_row in tqdm(images, desc="Updating Images"):
@@ -355,37 +321,208 @@ def rebuild_categorized_tags_from_relations():
 
             # Commit in batches to avoid holding locks too long
             if len(updates_batch) >= BATCH_SIZE:
-                cursor.executemany("""
-                    UPDATE images SET
-                        tags_character = ?,
-                        tags_copyright = ?,
-                        tags_artist = ?,
-                        tags_species = ?,
-                        tags_meta = ?,
-                        tags_general = ?
-                    WHERE id = ?
-                """, updates_batch)
+                changed_count += _write_categorized_tags(cursor, updates_batch)
                 conn.commit()
                 updates_batch = []
 
         # Commit remaining batch
         if updates_batch:
-            cursor.executemany("""
-                UPDATE images SET
-                    tags_character = ?,
-                    tags_copyright = ?,
-                    tags_artist = ?,
-                    tags_species = ?,
-                    tags_meta = ?,
-                    tags_general = ?
-                WHERE id = ?
-            """, updates_batch)
+            changed_count += _write_categorized_tags(cursor, updates_batch)
+            conn.commit()
+
+    print(f"Successfully updated categorized tags for {updated_count} images ({changed_count} changed).")
+    return updated_count
+
+
+def rebuild_categorized_tags_for_images(image_ids, clear_dirty=False):
+    """
+    Rebuild the categorized tag columns for a specific set of images only.
+
+    Same result as rebuild_categorized_tags_from_relations() for the given
+    rows, but the GROUP_CONCAT and UPDATE are restricted to those images so
+    callers that touched a handful of images don't pay for a full-table pass.
+
+    Rows whose tag text is unchanged are left alone, so FTS is only touched for
+    images that actually changed.
+
+    Args:
+        image_ids: Iterable of image IDs to rebuild
+        clear_dirty: If True, also remove the images from categorized_tags_dirty
+                     in the same transaction as their rebuild
+
+    Returns:
+        int: Number of images processed
+    """
+    import config
+
+    image_ids = sorted({int(image_id) for image_id in image_ids if image_id is not None})
+    if not image_ids:
+        return 0
+
+    # Keep each IN (...) list well under SQLite's bound-parameter limit
+    BATCH_SIZE = min(config.DB_BATCH_SIZE * 5, 500)
+    updated_count = 0
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        for start in range(0, len(image_ids), BATCH_SIZE):
+            batch_ids = image_ids[start:start + BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch_ids))
+
+            rebuild_categorized_tags_in_transaction(cursor, batch_ids)
+            if clear_dirty:
+                cursor.execute(
+                    f"DELETE FROM categorized_tags_dirty WHERE image_id IN ({placeholders})",
+                    batch_ids
+                )
             conn.commit()
+            updated_count += len(batch_ids)
 
-    print(f"Successfully updated categorized tags for {updated_count} images.")
     return updated_count
 
 
+def rebuild_categorized_tags_in_transaction(cursor, image_ids):
+    """
+    Rebuild the categorized tag columns for up to a few hundred images on the
+    caller's cursor, without committing.
+
+    Lets a caller rewrite an image's tags and its cached columns in one
+    transaction, so readers never see one without the other.
+
+    Args:
+        cursor: Cursor of the connection making the tag change
+        image_ids: List of image IDs (keep it under SQLite's parameter limit)
+
+    Returns:
+        int: Number of rows actually updated
+    """
+    image_ids = list(image_ids)
+    if not image_ids:
+        return 0
+    placeholders = ','.join('?' * len(image_ids))
+    cursor.execute(f"""
+        SELECT it.image_id, t.category, GROUP_CONCAT(t.name, ' ') as tags
+        FROM image_tags it
+        JOIN tags t ON it.tag_id = t.id
+        WHERE it.image_id IN ({placeholders})
+        GROUP BY it.image_id, t.category
+    """, image_ids)
+
+    tags_by_image = {image_id: {} for image_id in image_ids}
+    for row in cursor.fetchall():
+        tags_by_image[row['image_id']][row['category']] = row['tags']
+
+    return _write_categorized_tags(cursor, [
+        (
+            categorized_tags.get('character'),
+            categorized_tags.get('copyright'),
+            categorized_tags.get('artist'),
+            categorized_tags.get('species'),
+            categorized_tags.get('meta'),
+            categorized_tags.get('general'),
+            image_id
+        )
+        for image_id, categorized_tags in tags_by_image.items()
+    ])
+
+
+def _write_categorized_tags(cursor, updates_batch):
+    """
+    Write (character, copyright, artist, species, meta, general, image_id) rows
+    to the images table, skipping rows whose columns are already identical.
+
+    Unchanged rows are filtered in the WHERE clause so the images_fts_update
+    trigger only fires for images whose tag text actually changed.
+
+    Returns:
+        int: Number of rows actually updated
+    """
+    cursor.executemany("""
+        UPDATE images SET
+            tags_character = ?1,
+            tags_copyright = ?2,
+            tags_artist = ?3,
+            tags_species = ?4,
+            tags_meta = ?5,
+            tags_general = ?6
+        WHERE id = ?7
+          AND (tags_character IS NOT ?1
+               OR tags_copyright IS NOT ?2
+               OR tags_artist IS NOT ?3
+               OR tags_species IS NOT ?4
+               OR tags_meta IS NOT ?5
+               OR tags_general IS NOT ?6)
+    """, updates_batch)
+    return max(cursor.rowcount, 0)
+
+
+def mark_categorized_tags_dirty(cursor, tag_ids):
+    """
+    Queue every image carrying one of the given tags for a categorized column rebuild.
+
+    Runs on the caller's cursor and does not commit, so the dirty marks land in
+    the same transaction as the tag change that caused them. Drain the queue
+    with rebuild_dirty_categorized_tags().
+
+    Args:
+        cursor: Cursor of the connection making the tag change
+        tag_ids: Iterable of tag IDs whose name or category changed
+
+    Returns:
+        int: Number of images newly marked dirty
+    """
+    tag_ids = list({int(tag_id) for tag_id in tag_ids if tag_id is not None})
+    marked = 0
+
+    for start in range(0, len(tag_ids), 500):
+        batch_ids = tag_ids[start:start + 500]
+        placeholders = ','.join('?' * len(batch_ids))
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO categorized_tags_dirty (image_id)
+            SELECT DISTINCT image_id FROM image_tags WHERE tag_id IN ({placeholders})
+        """, batch_ids)
+        marked += cursor.rowcount
+
+    return marked
+
+
+def rebuild_dirty_categorized_tags():
+    """
+    Drain the categorized_tags_dirty queue, rebuilding only the queued images.
+
+    Works through the queue in batches, each rebuilt and removed from the queue
+    in its own transaction, so a large recategorization never holds the write
+    lock for the whole library and an interrupted drain resumes where it stopped.
+
+    Returns:
+        int: Number of images rebuilt
+    """
+    import config
+
+    BATCH_SIZE = min(config.DB_BATCH_SIZE * 5, 500)
+    rebuilt = 0
+    last_id = 0
+
+    while True:
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                "SELECT image_id FROM categorized_tags_dirty WHERE image_id > ? ORDER BY image_id LIMIT ?",
+                (last_id, BATCH_SIZE)
+            ).fetchall()
+
+        if not rows:
+            break
+
+        batch_ids = [row['image_id'] for row in rows]
+        rebuilt += rebuild_categorized_tags_for_images(batch_ids, clear_dirty=True)
+        last_id = batch_ids[-1]
+
+    if rebuilt:
+        print(f"Rebuilt categorized tags for {rebuilt} dirty images.")
+    return rebuilt
+
+
 # ============================================================================
 # TAG IMPLICATIONS
 # ============================================================================
@@ -4,12 +4,15 @@ API endpoints for animation playback.
 Serves frames from zip animations and provides animation metadata.
 """
 
-from quart import request, jsonify, send_file, Response
+from quart import request, jsonify, Response
 from . import api_blueprint
 from services import zip_animation_service
 from database import models
 from utils import api_handler
-import os
+import asyncio
+
+# Frame URLs are keyed by the zip's MD5, so a frame never changes
+FRAME_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 @api_blueprint.route('/animation/metadata/<path:filepath>')
@@ -44,8 +47,8 @@ async def get_animation_metadata(filepath):
             "is_animated": filepath.lower().endswith(('.gif', '.webp', '.apng'))
         }
     
-    # Get zip animation metadata
-    metadata = zip_animation_service.get_animation_metadata(md5)
+    # Get zip animation metadata (indexes the zip on first access if needed)
+    metadata = await asyncio.to_thread(zip_animation_service.get_animation_metadata, md5)
     if not metadata:
         raise ValueError(f"Animation metadata not found for: {filepath}")
     
@@ -76,30 +79,21 @@ async def get_animation_frame(md5, frame_index):
         frame_index: Zero-based frame index
     
     Returns:
-        The frame image file
+        The frame image, read from disk or straight from the zip
     """
-    frame_path = zip_animation_service.get_frame_path(md5, frame_index)
-    
-    if not frame_path or not os.path.exists(frame_path):
+    etag = zip_animation_service.frame_etag(md5, frame_index)
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": FRAME_CACHE_CONTROL})
+
+    frame = await asyncio.to_thread(zip_animation_service.read_frame, md5, frame_index)
+    if frame is None:
         return Response("Frame not found", status=404)
-    
-    # Determine content type from extension
-    ext = os.path.splitext(frame_path)[1].lower()
-    content_types = {
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.gif': 'image/gif',
-        '.webp': 'image/webp',
-        '.bmp': 'image/bmp'
-    }
-    content_type = content_types.get(ext, 'application/octet-stream')
-    
-    return await send_file(
-        frame_path,
-        mimetype=content_type,
-        cache_timeout=86400  # Cache for 24 hours
-    )
+
+    data, content_type = frame
+    return Response(data, mimetype=content_type, headers={
+        "ETag": f'"{etag}"',
+        "Cache-Control": FRAME_CACHE_CONTROL
+    })
 
 
 @api_blueprint.route('/animation/frames/<md5>')
@@ -115,7 +109,7 @@ async def get_all_frame_urls(md5):
     Returns:
         JSON with list of frame URLs
     """
-    metadata = zip_animation_service.get_animation_metadata(md5)
+    metadata = await asyncio.to_thread(zip_animation_service.get_animation_metadata, md5)
     if not metadata:
         raise ValueError(f"Animation not found for MD5: {md5}")
     
@@ -59,6 +59,9 @@ async def get_duplicate_review_queue():
     Paginated queue from the pre-computed cache.
 
     GET /api/duplicate-review/queue?threshold=5&offset=0&limit=50
+
+    Pass the previous page's ``next_cursor`` as ``cursor`` to page by
+    keyset instead of offset.
     """
     threshold = request.args.get('threshold', 5, type=int)
     offset = request.args.get('offset', 0, type=int)
@@ -66,6 +69,7 @@ async def get_duplicate_review_queue():
     suggestion_lower = request.args.get('suggestion_lower', None, type=float)
     suggestion_upper = request.args.get('suggestion_upper', None, type=float)
     queue_mode = request.args.get('queue_mode', 'distance', type=str)
+    cursor = request.args.get('cursor', None, type=str)
 
     result = await asyncio.to_thread(
         duplicate_review_service.get_duplicate_queue,
@@ -75,6 +79,7 @@ async def get_duplicate_review_queue():
         suggestion_lower=suggestion_lower,
         suggestion_upper=suggestion_upper,
         queue_mode=queue_mode,
+        cursor=cursor,
     )
     return result
 
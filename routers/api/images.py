@@ -1,4 +1,4 @@
-from quart import request, jsonify, send_file, make_response
+from quart import Response, request, jsonify, make_response
 from . import api_blueprint
 from services import image_service, tag_service
 from services.switch_source_db import switch_metadata_source_db, merge_all_sources
@@ -7,8 +7,11 @@ import config
 from utils import api_handler
 from utils.file_utils import normalize_image_path
 from utils.request_helpers import require_json_body
+from utils.background_task_helpers import start_background_task
+from utils.zip_stream import iterate_in_thread
 from utils.validation import validate_string, validate_positive_integer, validate_enum
 import asyncio
+import json
 
 
 def _no_cache(response):
@@ -47,26 +50,49 @@ async def delete_image():
 @api_blueprint.route('/delete_images_bulk', methods=['POST'])
 @api_handler()
 async def delete_images_bulk():
-    """Delete multiple images in bulk."""
+    """Delete multiple images in bulk (as a background task when 'background' is set)."""
     data = await require_json_body(request)
+    if data.get('background'):
+        from services import deletion_service
+        filepaths = image_service.get_bulk_delete_filepaths(data)
+        return await start_background_task(
+            deletion_service.run_delete_images_task,
+            f"Deleting {len(filepaths)} images in background",
+            task_id_prefix="bulk_delete",
+            filepaths=filepaths,
+        )
     return await asyncio.to_thread(image_service.delete_images_bulk_service, data)
 
 @api_blueprint.route('/download_images_bulk', methods=['POST'])
 @api_handler()
 async def download_images_bulk():
-    """Download multiple images as a zip file."""
-    data = await require_json_body(request)
+    """
+    Download multiple images as a zip file, streamed while it is built.
+
+    Accepts a JSON body, or a form post with 'filepaths' as a JSON array so
+    the browser can save the stream straight to disk.
+    """
+    if request.is_json:
+        data = await require_json_body(request)
+    else:
+        form = await request.form
+        try:
+            data = {'filepaths': json.loads(form.get('filepaths', '[]'))}
+        except ValueError:
+            raise ValueError("filepaths must be a JSON array")
     result = await asyncio.to_thread(image_service.prepare_bulk_download, data)
-    
+
     if isinstance(result, tuple):
         return jsonify(result[0]), result[1]
-        
-    return await send_file(
-        result,
+
+    response = Response(
+        iterate_in_thread(result),
         mimetype='application/zip',
-        as_attachment=True,
-        attachment_filename='images.zip'
+        headers={'Content-Disposition': 'attachment; filename="images.zip"'}
     )
+    # Large selections take longer than the default response timeout
+    response.timeout = None
+    return response
 
 @api_blueprint.route('/retry_tagging', methods=['POST'])
 @api_handler()
@@ -1,10 +1,47 @@
+import asyncio
+
 from quart import request, jsonify
 from . import api_blueprint
+import config
 from database import models
 from utils import api_handler
-from utils.file_utils import normalize_image_path
+from utils.file_utils import normalize_image_path, get_thumbnail_paths
 from utils.validation import validate_string
 
+# Background renumbering tasks, kept referenced until they finish
+_renormalize_tasks = set()
+
+
+def _schedule_renormalize(pool_id, result):
+    """Renumber a pool's sort keys in the background when a move asked for it."""
+    if not result.get("renormalize"):
+        return
+    task = asyncio.create_task(asyncio.to_thread(models.renormalize_pool_order, pool_id))
+    _renormalize_tasks.add(task)
+    task.add_done_callback(_renormalize_tasks.discard)
+
+
+async def _image_ids_for(data):
+    """Resolve the 'filepaths' list of a request body to image IDs, keeping order."""
+    filepaths = data.get('filepaths')
+    if not isinstance(filepaths, list) or not filepaths:
+        raise ValueError("filepaths must be a non-empty list")
+    filepaths = [normalize_image_path(str(fp)) for fp in filepaths]
+    found = await asyncio.to_thread(models.get_image_ids_for_filepaths, filepaths)
+    missing = [fp for fp in filepaths if fp not in found]
+    if missing:
+        raise FileNotFoundError(f"Image not found: {missing[0]}")
+    return [found[fp] for fp in filepaths]
+
+
+def _optional_position(data):
+    from utils.validation import validate_integer
+
+    position = data.get('position')
+    if position is None:
+        return None
+    return validate_integer(position, 'position', min_value=1)
+
 @api_blueprint.route('/pools/create', methods=['POST'])
 @api_handler()
 async def create_pool():
@@ -107,6 +144,7 @@ async def reorder_pool(pool_id):
 
     if new_position is None:
         raise ValueError("Position is required")
+    new_position = _optional_position(data)
 
     # Get image ID from filepath
     image_data = models.get_image_details(filepath)
@@ -114,9 +152,65 @@ async def reorder_pool(pool_id):
         raise FileNotFoundError("Image not found")
 
     image_id = image_data['id']
-    models.reorder_pool_images(pool_id, image_id, new_position)
+    result = models.reorder_pool_images(pool_id, image_id, new_position)
+    _schedule_renormalize(pool_id, result)
     return {"message": "Pool reordered successfully."}
 
+@api_blueprint.route('/pools/<int:pool_id>/move', methods=['POST'])
+@api_handler()
+async def move_pool_images(pool_id: int):
+    """Move several images, as one block in the given order, to a position."""
+    data = await request.get_json()
+    if not data:
+        raise ValueError("Request body is required")
+
+    position = _optional_position(data)
+    if position is None:
+        raise ValueError("Position is required")
+    image_ids = await _image_ids_for(data)
+
+    result = await asyncio.to_thread(models.move_pool_images, pool_id, image_ids, position)
+    _schedule_renormalize(pool_id, result)
+    return {"moved": result["moved"], "message": f"Moved {result['moved']} images."}
+
+@api_blueprint.route('/pools/<int:pool_id>/add_images', methods=['POST'])
+@api_handler()
+async def add_images_to_pool(pool_id: int):
+    """Add several images to a pool, appended or at a position."""
+    data = await request.get_json()
+    if not data:
+        raise ValueError("Request body is required")
+
+    position = _optional_position(data)
+    image_ids = await _image_ids_for(data)
+
+    result = await asyncio.to_thread(models.add_images_to_pool, pool_id, image_ids, position)
+    _schedule_renormalize(pool_id, result)
+    return {"added": result["added"], "message": f"Added {result['added']} images to pool."}
+
+@api_blueprint.route('/pools/<int:pool_id>/images', methods=['GET'])
+@api_handler()
+async def get_pool_images(pool_id: int):
+    """Get one page of a pool's images in order (keyset pagination)."""
+    from utils.validation import validate_integer
+
+    limit = validate_integer(
+        request.args.get('limit', config.IMAGES_PER_PAGE), 'limit', min_value=1, max_value=500
+    )
+    cursor = request.args.get('cursor') or None
+
+    page = await asyncio.to_thread(models.get_pool_images_page, pool_id, limit, cursor)
+    if page is None:
+        raise FileNotFoundError("Pool not found")
+
+    paths = [f"images/{img['filepath']}" for img in page['images']]
+    thumbs = await asyncio.to_thread(get_thumbnail_paths, paths)
+    images = [
+        {"path": path, "thumb": thumb, "position": img['position']}
+        for img, path, thumb in zip(page['images'], paths, thumbs)
+    ]
+    return {"images": images, "next_cursor": page['next_cursor'], "total": page['total']}
+
 @api_blueprint.route('/pools/for_image', methods=['GET'])
 @api_handler()
 async def get_pools_for_image():
@@ -137,8 +231,4 @@ async def get_pools_for_image():
 async def get_all_pools():
     """Get all pools with image counts."""
     pools = models.get_all_pools()
-    # Add image counts
-    for pool in pools:
-        pool_details = models.get_pool_details(pool['id'])
-        pool['image_count'] = len(pool_details['images']) if pool_details else 0
     return {"pools": pools}
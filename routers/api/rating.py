@@ -264,7 +264,9 @@ async def api_set_rating():
     result = rating_inference.set_image_rating(image_id, rating, source='user')
 
     from core.cache_manager import trigger_cache_reload_async
+    from services.homepage_cache import invalidate_image_ids
     trigger_cache_reload_async()  # Reload in-memory cache after rating change
+    invalidate_image_ids([image_id])
 
     return {
         'status': 'success',
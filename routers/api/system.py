@@ -77,8 +77,10 @@ async def system_logs():
 @api_blueprint.route('/system/scan', methods=['POST'])
 @api_handler()
 async def trigger_scan():
-    """Scan for new images and process them."""
-    return await start_background_task(system_service.scan_and_process_task, "Scan started in background")
+    """Scan for new images and process them ("full": true re-hashes every untracked file)."""
+    data = (await request.get_json(silent=True)) or {}
+    full_rescan = bool(data.get("full", False))
+    return await start_background_task(system_service.scan_and_process_task, "Scan started in background", full_rescan=full_rescan)
 
 @api_blueprint.route('/system/rebuild', methods=['POST'])
 @api_handler()
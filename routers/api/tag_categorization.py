@@ -1,3 +1,5 @@
+import asyncio
+
 from quart import request, jsonify, Response
 from . import api_blueprint
 from services import tag_categorization_service as tag_cat
@@ -50,11 +52,8 @@ async def api_set_tag_category():
     if category and category not in tag_cat.TAG_CATEGORIES:
         raise ValueError(f"Invalid category. Must be one of: {', '.join(tag_cat.TAG_CATEGORIES)}")
 
-    result = tag_cat.set_tag_category(tag_name, category)
-
-    # Reload data to update in-memory cache (async to avoid blocking)
-    from core.cache_manager import trigger_cache_reload_async
-    trigger_cache_reload_async()
+    # Updates the affected images and caches itself
+    result = await asyncio.to_thread(tag_cat.set_tag_category, tag_name, category)
 
     return result
 
@@ -88,11 +87,7 @@ async def api_bulk_categorize():
     # Convert to list of tuples
     cat_tuples = [(item['tag_name'], item['category']) for item in categorizations]
 
-    result = tag_cat.bulk_categorize_tags(cat_tuples)
-
-    # Reload data to update in-memory cache (async to avoid blocking)
-    from core.cache_manager import trigger_cache_reload_async
-    trigger_cache_reload_async()
+    result = await asyncio.to_thread(tag_cat.bulk_categorize_tags, cat_tuples)
 
     return result
 
@@ -145,11 +140,9 @@ async def api_import_categorizations():
     if mode not in ['merge', 'overwrite', 'update']:
         raise ValueError("Invalid mode. Must be one of: merge, overwrite, update")
 
-    stats = tag_cat.import_tag_categorizations(data, mode=mode, create_missing=create_missing)
-
-    # Reload data to update in-memory cache (async to avoid blocking)
-    from core.cache_manager import trigger_cache_reload_async
-    trigger_cache_reload_async()
+    stats = await asyncio.to_thread(
+        tag_cat.import_tag_categorizations, data, mode=mode, create_missing=create_missing
+    )
 
     return stats
 
@@ -158,11 +151,7 @@ async def api_import_categorizations():
 @api_handler()
 async def api_sync_base_categories():
     """Sync base categories from extended categories."""
-    stats = tag_cat.sync_base_categories_from_extended()
-
-    # Reload data to update in-memory cache (async to avoid blocking)
-    from core.cache_manager import trigger_cache_reload_async
-    trigger_cache_reload_async()
+    stats = await asyncio.to_thread(tag_cat.sync_base_categories_from_extended)
 
     return stats
 
@@ -23,29 +23,60 @@ async def get_upscaler_status():
 @api_blueprint.route('/upscale/progress')
 @api_handler()
 async def get_upscale_progress():
-    """Get progress of an active upscale job."""
+    """Get progress of an active or queued upscale job."""
+    import asyncio
     from services.upscaler_service import get_upscale_progress
+    from services import upscale_queue_service
     
     filepath = validate_string(request.args.get('filepath'), 'filepath', min_length=1)
     filepath = normalize_image_path(filepath)
     progress = get_upscale_progress(filepath)
-    
-    if not progress:
-        # If not in progress, check if it's already done
-        from services.upscaler_service import check_upscale_exists, get_upscale_url
-        if check_upscale_exists(filepath):
-            return {
-                'status': 'completed',
-                'percentage': 100,
-                'upscaled_url': get_upscale_url(filepath)
-            }
-        
+    if progress:
+        return progress
+
+    # The job may be waiting in the queue or running in another app process
+    job = await asyncio.to_thread(upscale_queue_service.get_job_for_filepath, filepath)
+    if job and job['status'] in ('queued', 'running'):
+        return {
+            'status': 'queued' if job['status'] == 'queued' else 'processing',
+            'percentage': job['percentage'],
+            'message': job.get('message') or ('Queued' if job['status'] == 'queued' else ''),
+            'current': job['tiles_done'],
+            'total': job['tiles_total'],
+            'position': job.get('position'),
+            'eta_seconds': job.get('eta_seconds'),
+        }
+    if job and job['status'] == 'failed':
         return {
-            'status': 'idle',
-            'percentage': 0
+            'status': 'failed',
+            'percentage': 0,
+            'error': job.get('error') or 'Upscale failed',
+        }
+
+    # If not in progress, check if it's already done
+    from services.upscaler_service import check_upscale_exists, get_upscale_url
+    if check_upscale_exists(filepath):
+        return {
+            'status': 'completed',
+            'percentage': 100,
+            'upscaled_url': get_upscale_url(filepath)
         }
     
-    return progress
+    return {
+        'status': 'idle',
+        'percentage': 0
+    }
+
+
+@api_blueprint.route('/upscale/queue')
+@api_handler()
+async def get_upscale_queue():
+    """Queue depth, running jobs with progress, and ETA in one call."""
+    import asyncio
+    from services import upscale_queue_service
+
+    limit = request.args.get('limit', 20, type=int)
+    return await asyncio.to_thread(upscale_queue_service.get_queue_status, max(1, min(limit, 200)))
 
 
 @api_blueprint.route('/upscale/check')
@@ -91,8 +122,16 @@ async def check_upscale():
 @api_blueprint.route('/upscale', methods=['POST'])
 @api_handler()
 async def upscale_image():
-    """Upscale an image using RealESRGAN."""
-    from services.upscaler_service import upscale_image as do_upscale
+    """
+    Queue an upscale using RealESRGAN.
+
+    By default waits up to UPSCALER_WAIT_TIMEOUT_SECONDS for the job and
+    returns the upscale result. If the job is still queued or running then,
+    or with ``"wait": false``, the job is returned (with queue position and
+    ETA when queued) for the client to follow via /upscale/progress.
+    """
+    import asyncio
+    from services import upscale_queue_service
     
     if not config.UPSCALER_ENABLED:
         raise ValueError("Upscaler is disabled. Enable UPSCALER_ENABLED in .env to use this feature.")
@@ -105,11 +144,24 @@ async def upscale_image():
         raise ValueError("Animated images and videos (.gif, .apng, .mp4, .webm) cannot be upscaled.")
 
     force = data.get('force', False)
-
-    result = await do_upscale(filepath, force=force)
-    
-    if not result['success'] and result['error'] != 'Already upscaled':
-        raise ValueError(result['error'])
+    wait = data.get('wait', True)
+    priority = int(data.get('priority', upscale_queue_service.INTERACTIVE_PRIORITY))
+
+    job = await asyncio.to_thread(
+        upscale_queue_service.enqueue_upscale, filepath, priority=priority, force=force
+    )
+    if not wait:
+        return job
+
+    if job['id'] is not None:
+        job = await upscale_queue_service.wait_for_job(job['id'], timeout=config.UPSCALER_WAIT_TIMEOUT_SECONDS)
+        if job['status'] not in ('completed', 'failed'):
+            queued = await asyncio.to_thread(upscale_queue_service.get_job_for_filepath, filepath)
+            return queued or job
+
+    result = job.get('result') or {'success': False, 'error': job.get('error') or 'Upscale failed'}
+    if not result['success'] and result.get('error') != 'Already upscaled':
+        raise ValueError(result.get('error'))
     
     return result
 
@@ -3,24 +3,15 @@ Image detail and viewing routes.
 """
 
 from quart import render_template, make_response
+import asyncio
 import config
 from database import models
-from services import query_service
-from services.tag_display_service import prepare_tags_for_display
+from services import query_service, image_detail_service
 from utils import get_thumbnail_path
 from utils.file_utils import normalize_image_path
 from utils.decorators import login_required
 
 
-def _as_bool(value, default=False):
-    """Normalize bool-like config values from YAML/env sources."""
-    if value is None:
-        return default
-    if isinstance(value, bool):
-        return value
-    return str(value).lower() in ('true', '1', 'yes')
-
-
 def register_routes(blueprint):
     """Register image detail routes on the given blueprint."""
     
@@ -28,72 +19,21 @@ def register_routes(blueprint):
     @login_required
     async def show_image(filepath):
         lookup_path = normalize_image_path(filepath)
-        
-        # Use the merged tags function to include high-confidence local tagger predictions
-        from repositories.data_access import get_image_details_with_merged_tags
-        from repositories import relations_repository
-        from services import upscaler_service
-        
-        data = get_image_details_with_merged_tags(lookup_path)
-        if not data:
-            return "Image not found", 404
-
-        # Check for upscaled version
-        upscaled_image_url = upscaler_service.get_upscale_url(lookup_path)
 
-        # REMOVED: stats = query_service.get_enhanced_stats()
-        # Stats are now lazy-loaded via API endpoint for instant page rendering
-
-        # Prepare all tag-related data using the tag display service
-        tag_data = prepare_tags_for_display(data)
+        # All DB and filesystem lookups run in worker threads, concurrently
+        page = await image_detail_service.get_image_page_data(lookup_path)
+        if not page:
+            return "Image not found", 404
 
-        # REMOVED: Family images and similar images queries
-        # These are now lazy-loaded via API endpoint for instant page rendering
-        # The main image can start loading while these are fetched asynchronously
+        data = page['data']
+        tag_data = page['tag_data']
 
-        # REMOVED: tag_deltas = models.get_image_deltas(lookup_path)
-        # Tag deltas are now lazy-loaded via API endpoint
+        # Stats, family/similar images, tag deltas and pools are lazy-loaded
+        # via API endpoints so the main image can start loading immediately
 
         # Get thumbnail path for progressive loading
         thumbnail_path = get_thumbnail_path(filepath)
 
-        # Get sidebar config fresh (not cached module-level values) so changes take effect without restart
-        from services.config_service import load_config
-        config_yml = load_config()
-        sidebar_sources = str(config_yml.get('SIMILAR_SIDEBAR_SOURCES', 'both')).lower()
-        sidebar_show_chips = _as_bool(
-            config_yml.get('SIMILAR_SIDEBAR_SHOW_CHIPS', True),
-            getattr(config, 'SIMILAR_SIDEBAR_SHOW_CHIPS', True),
-        )
-
-        show_copy_tags_button = _as_bool(
-            config_yml.get('IMAGE_TOOLBAR_SHOW_COPY_TAGS', getattr(config, 'IMAGE_TOOLBAR_SHOW_COPY_TAGS', True)),
-            getattr(config, 'IMAGE_TOOLBAR_SHOW_COPY_TAGS', True),
-        )
-        show_tag_similar_button = _as_bool(
-            config_yml.get('IMAGE_TOOLBAR_SHOW_TAG_SIMILAR', getattr(config, 'IMAGE_TOOLBAR_SHOW_TAG_SIMILAR', True)),
-            getattr(config, 'IMAGE_TOOLBAR_SHOW_TAG_SIMILAR', True),
-        )
-        show_visual_similar_button = _as_bool(
-            config_yml.get('IMAGE_TOOLBAR_SHOW_VISUAL_SIMILAR', getattr(config, 'IMAGE_TOOLBAR_SHOW_VISUAL_SIMILAR', True)),
-            getattr(config, 'IMAGE_TOOLBAR_SHOW_VISUAL_SIMILAR', True),
-        )
-        show_raw_data_button = _as_bool(
-            config_yml.get('IMAGE_TOOLBAR_SHOW_RAW_DATA', getattr(config, 'IMAGE_TOOLBAR_SHOW_RAW_DATA', False)),
-            getattr(config, 'IMAGE_TOOLBAR_SHOW_RAW_DATA', False),
-        )
-        show_pools_controls = _as_bool(
-            config_yml.get('IMAGE_PAGE_SHOW_POOLS', getattr(config, 'IMAGE_PAGE_SHOW_POOLS', True)),
-            getattr(config, 'IMAGE_PAGE_SHOW_POOLS', True),
-        )
-
-        # Information panel default: collapsed unless INFORMATION_PANEL_DEFAULT_VISIBLE is True
-        ip_visible = _as_bool(
-            config_yml.get('INFORMATION_PANEL_DEFAULT_VISIBLE', getattr(config, 'INFORMATION_PANEL_DEFAULT_VISIBLE', False)),
-            getattr(config, 'INFORMATION_PANEL_DEFAULT_VISIBLE', False),
-        )
-        information_panel_default_collapsed = not ip_visible
-
         html = await render_template(
             'image.html',
             filepath=filepath,
@@ -102,8 +42,7 @@ def register_routes(blueprint):
             categorized_tags=tag_data['categorized_tags'],
             extended_grouped_tags=tag_data['extended_grouped_tags'],
             metadata=data.get('raw_metadata'),
-            # REMOVED: family_images, related_images, stats, tag_deltas, image_pools
-            # These are now loaded asynchronously via API for instant page rendering
+            # These are loaded asynchronously via API for instant page rendering
             family_images=[],  # Loaded via JS from /api/image/.../similar
             related_images=[],  # Loaded via JS from /api/image/.../similar
             stats=None,  # Loaded via JS from /api/image/.../stats
@@ -112,18 +51,11 @@ def register_routes(blueprint):
             app_name=config.APP_NAME,
             tag_deltas=[],  # Loaded via JS from /api/image/.../deltas
             merged_general_tags=tag_data['merged_general_tags'],  # Pass to template for potential styling
-            upscaled_image_url=upscaled_image_url,
+            upscaled_image_url=page['upscaled_image_url'],
             image_pools=[],  # Loaded via JS from /api/image/.../pools
             implied_tag_names=tag_data['implied_tag_names'],  # Tags implied by implication rules
-            similar_sidebar_sources=sidebar_sources,
-            similar_sidebar_show_chips=sidebar_show_chips,
-            show_copy_tags_button=show_copy_tags_button,
-            show_tag_similar_button=show_tag_similar_button,
-            show_visual_similar_button=show_visual_similar_button,
-            show_raw_data_button=show_raw_data_button,
-            show_pools_controls=show_pools_controls,
-            information_panel_default_collapsed=information_panel_default_collapsed,
-            image_relations=relations_repository.get_editable_relations_for_image(data['id']) if data.get('id') else [],
+            image_relations=page['relations'],
+            **page['settings'],
         )
         
         # Add cache-busting headers for dynamic content
@@ -133,8 +65,7 @@ def register_routes(blueprint):
         response.headers['Expires'] = '0'
         
         # Add ETag based on upscale status for automatic cache invalidation
-        etag = upscaler_service.get_upscale_etag(lookup_path)
-        response.headers['ETag'] = etag
+        response.headers['ETag'] = page['etag']
         
         return response
 
@@ -150,14 +81,16 @@ def register_routes(blueprint):
         exclude_family = True  # Default to excluding family
         
         # Get visually similar images
-        similar_images = similarity_service.find_similar_images(
-            lookup_path,
-            threshold=threshold,
-            limit=100,
-            exclude_family=exclude_family
+        similar_images, stats = await asyncio.gather(
+            asyncio.to_thread(
+                similarity_service.find_similar_images,
+                lookup_path,
+                threshold=threshold,
+                limit=100,
+                exclude_family=exclude_family
+            ),
+            asyncio.to_thread(query_service.get_enhanced_stats),
         )
-        
-        stats = query_service.get_enhanced_stats()
         thumbnail_path = get_thumbnail_path(filepath)
         
         html = await render_template(
@@ -182,12 +115,14 @@ def register_routes(blueprint):
     @login_required
     async def show_raw_data(filepath):
         lookup_path = normalize_image_path(filepath)
-        data = models.get_image_details(lookup_path)
+        data, stats = await asyncio.gather(
+            asyncio.to_thread(models.get_image_details, lookup_path),
+            asyncio.to_thread(query_service.get_enhanced_stats),
+        )
         if not data or not data.get('raw_metadata'):
             return "Raw metadata not found", 404
 
         raw_metadata = data.get('raw_metadata')
-        stats = query_service.get_enhanced_stats()
 
         html = await render_template(
             'raw_data.html',
@@ -6,7 +6,7 @@ from quart import render_template, request, redirect, url_for, flash
 import config
 from database import models
 from services import query_service
-from utils import get_thumbnail_path
+from utils import get_thumbnail_paths
 from utils.decorators import login_required
 
 
@@ -23,10 +23,6 @@ def register_routes(blueprint):
             pools = models.search_pools(search_query)
         else:
             pools = models.get_all_pools()
-            # Add image counts to pools
-            for pool in pools:
-                pool_details = models.get_pool_details(pool['id'])
-                pool['image_count'] = len(pool_details['images']) if pool_details else 0
 
         return await render_template(
             'pools.html',
@@ -40,27 +36,31 @@ def register_routes(blueprint):
     @blueprint.route('/pool/<int:pool_id>')
     @login_required
     async def view_pool(pool_id):
-        pool_details = models.get_pool_details(pool_id)
-        if not pool_details:
+        pool = models.get_pool(pool_id)
+        if not pool:
             await flash('Pool not found.', 'error')
             return redirect(url_for('main.pools_list'))
 
         stats = query_service.get_enhanced_stats()
 
-        # Transform images for display
+        # First page only; the rest is fetched from /api/pools/<id>/images
+        page = models.get_pool_images_page(pool_id, limit=config.IMAGES_PER_PAGE)
+        paths = [f"images/{img['filepath']}" for img in page['images']]
         images_to_show = [
             {
-                "path": f"images/{img['filepath']}",
-                "thumb": get_thumbnail_path(f"images/{img['filepath']}"),
-                "sort_order": img['sort_order']
+                "path": path,
+                "thumb": thumb,
+                "position": img['position']
             }
-            for img in pool_details['images']
+            for img, path, thumb in zip(page['images'], paths, get_thumbnail_paths(paths))
         ]
 
         return await render_template(
             'pool.html',
-            pool=pool_details['pool'],
+            pool=pool,
             images=images_to_show,
+            total_images=page['total'],
+            next_cursor=page['next_cursor'],
             stats=stats,
             query='',
             random_tags=[],
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Decode-Once Analysis Benchmark
+
+Compares per-image CPU time of the separate artifact paths (pHash, colorhash,
+semantic model input and thumbnail each decoding the file) against a single
+analyze_image() call producing all of them, and reports how far the hashes
+drift when JPEG draft decoding is used.
+
+The semantic step is measured up to the model input (decode + bicubic resize),
+which is the part the ML worker repeats per file; inference itself is the same
+in both paths and is not included.
+
+Usage:
+    # Benchmark images from the database (default 50)
+    python scripts/benchmark_image_analysis.py
+
+    # Benchmark a directory of files
+    python scripts/benchmark_image_analysis.py --dir /path/to/images --limit 200
+
+    # Without JPEG draft decoding (exact full-resolution decode)
+    python scripts/benchmark_image_analysis.py --no-draft
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import config
+from services.similarity import hashing
+from services.similarity.analysis import analyze_image, _flatten_on_white
+from services.processing.thumbnail_generator import encode_thumbnail
+
+
+def collect_files(directory, limit):
+    """Still images from a directory, or from the images table."""
+    extensions = config.SUPPORTED_IMAGE_EXTENSIONS
+    files = []
+    if directory:
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if name.lower().endswith(extensions):
+                    files.append(os.path.join(root, name))
+                    if len(files) >= limit:
+                        return files
+        return files
+
+    from database import get_db_connection
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT filepath FROM images ORDER BY RANDOM()").fetchall()
+    for row in rows:
+        path = os.path.join(config.IMAGE_DIRECTORY, row['filepath'])
+        if path.lower().endswith(extensions) and os.path.exists(path):
+            files.append(path)
+            if len(files) >= limit:
+                break
+    return files
+
+
+def separate_calls(path):
+    """Current behaviour: every artifact opens and decodes the file itself."""
+    phash = hashing.compute_phash(path)
+    colorhash = hashing.compute_colorhash(path)
+
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        img.resize((config.SEMANTIC_IMAGE_SIZE, config.SEMANTIC_IMAGE_SIZE), Image.Resampling.BICUBIC).tobytes()
+
+    with Image.open(path) as img:
+        thumb = _flatten_on_white(img)
+        thumb.thumbnail((config.THUMB_SIZE, config.THUMB_SIZE), Image.Resampling.LANCZOS)
+        encode_thumbnail(thumb)
+    return phash, colorhash
+
+
+def single_pass(path):
+    analysis = analyze_image(
+        path,
+        semantic_size=config.SEMANTIC_IMAGE_SIZE,
+        thumb_size=config.THUMB_SIZE,
+    )
+    if analysis is None:
+        return None, None
+    encode_thumbnail(analysis.thumbnail)
+    return analysis.phash, analysis.colorhash
+
+
+def cpu_time(fn, path):
+    start = time.process_time()
+    result = fn(path)
+    return time.process_time() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark decode-once image analysis")
+    parser.add_argument('--dir', help="Directory of images (default: images from the database)")
+    parser.add_argument('--limit', type=int, default=50, help="Number of images (default 50)")
+    parser.add_argument('--no-draft', action='store_true', help="Disable JPEG draft decoding")
+    args = parser.parse_args()
+
+    if args.no_draft:
+        config.ANALYSIS_JPEG_DRAFT = False
+
+    files = collect_files(args.dir, args.limit)
+    if not files:
+        print("No images found.")
+        return 1
+
+    separate_times, single_times, phash_drift, colorhash_changed = [], [], [], 0
+    for path in files:
+        t_sep, (phash_a, chash_a) = cpu_time(separate_calls, path)
+        t_one, (phash_b, chash_b) = cpu_time(single_pass, path)
+        if not phash_a or not phash_b:
+            continue
+        separate_times.append(t_sep)
+        single_times.append(t_one)
+        phash_drift.append(hashing.hamming_distance(phash_a, phash_b))
+        colorhash_changed += chash_a != chash_b
+
+    n = len(single_times)
+    if not n:
+        print("No decodable images.")
+        return 1
+
+    sep_ms = statistics.mean(separate_times) * 1000
+    one_ms = statistics.mean(single_times) * 1000
+    print(f"Images:            {n} (JPEG draft {'on' if config.ANALYSIS_JPEG_DRAFT else 'off'})")
+    print(f"Separate calls:    {sep_ms:.1f} ms CPU/image (median {statistics.median(separate_times) * 1000:.1f})")
+    print(f"Single pass:       {one_ms:.1f} ms CPU/image (median {statistics.median(single_times) * 1000:.1f})")
+    print(f"Speedup:           {sep_ms / one_ms:.2f}x")
+    print(f"pHash drift:       mean {statistics.mean(phash_drift):.2f} bits, max {max(phash_drift)} of {config.PHASH_BITS}")
+    print(f"Colorhash changed: {colorhash_changed}/{n}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Backfill Work Queue
+
+Persistent state for the hash/embedding/thumbnail backfill run by
+similarity_service.generate_missing_hashes(). One row per (image, artifact)
+lives in the ``backfill_tasks`` table with status pending, running, done or
+failed, so:
+
+- an interrupted run resumes where it stopped (stale running rows are
+  requeued on the next run)
+- a failed artifact is retried after an exponential backoff and given up on
+  after ``BACKFILL_MAX_ATTEMPTS``, instead of being re-selected every loop;
+  the next run resets given-up tasks with retry_failed()
+- claiming a batch walks ``idx_backfill_tasks_claim`` and costs O(batch),
+  independent of library size
+
+seed() is incremental. Hash rows come from the phash/colorhash NULL index;
+similarity.db is only consulted for images the queue has not seen yet.
+Thumbnails are not scanned for here (that needs a stat per file); the
+missing-thumbnail health check enqueues them.
+"""
+
+import logging
+import os
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+from database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS = ('phash', 'colorhash', 'embedding', 'thumbnail')
+
+# A running task not finished within this long belongs to a dead run
+_STALE_SECONDS = 600.0
+
+# Identifies tasks claimed by this process
+_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Largest IN (...) list per statement
+_CHUNK = 900
+
+
+# ============================================================================
+# Seeding
+# ============================================================================
+
+def _seed_hashes(conn, now: float) -> int:
+    """Queue images whose phash/colorhash is NULL; re-open done rows whose hash was cleared."""
+    queued = 0
+    for artifact in ('phash', 'colorhash'):
+        cur = conn.execute(
+            f"""INSERT INTO backfill_tasks (image_id, artifact, status, updated_at)
+                SELECT id, '{artifact}', 'pending', ? FROM images WHERE {artifact} IS NULL
+                ON CONFLICT(image_id, artifact) DO UPDATE
+                SET status = 'pending', attempts = 0, next_attempt_at = 0,
+                    last_error = NULL, updated_at = excluded.updated_at
+                WHERE backfill_tasks.status = 'done'""",
+            (now,),
+        )
+        queued += cur.rowcount
+    return queued
+
+
+def _seed_embeddings(conn, now: float) -> int:
+    """Record embedding state for images the queue does not track yet."""
+    from services import similarity_db
+
+    # similarity.db was reset or replaced: re-check everything marked done
+    done = conn.execute(
+        "SELECT COUNT(*) FROM backfill_tasks WHERE artifact = 'embedding' AND status = 'done'"
+    ).fetchone()[0]
+    if done > similarity_db.count_embeddings():
+        conn.execute("DELETE FROM backfill_tasks WHERE artifact = 'embedding' AND status = 'done'")
+
+    untracked = [row[0] for row in conn.execute(
+        """SELECT id FROM images
+           WHERE NOT EXISTS (
+               SELECT 1 FROM backfill_tasks b
+               WHERE b.image_id = images.id AND b.artifact = 'embedding'
+           )"""
+    ).fetchall()]
+
+    queued = 0
+    for start in range(0, len(untracked), _CHUNK):
+        chunk = untracked[start:start + _CHUNK]
+        embedded = set(similarity_db.get_existing_embedding_ids(chunk))
+        conn.executemany(
+            """INSERT OR IGNORE INTO backfill_tasks (image_id, artifact, status, updated_at)
+               VALUES (?, 'embedding', ?, ?)""",
+            [(image_id, 'done' if image_id in embedded else 'pending', now) for image_id in chunk],
+        )
+        queued += len(chunk) - len(embedded)
+    return queued
+
+
+def seed(include_embeddings: bool = True) -> int:
+    """
+    Bring the queue up to date with missing hashes (and embeddings).
+
+    Returns:
+        Number of tasks newly queued as pending
+    """
+    now = time.time()
+    with get_db_connection() as conn:
+        queued = _seed_hashes(conn, now)
+        if include_embeddings:
+            queued += _seed_embeddings(conn, now)
+        conn.commit()
+    if queued:
+        logger.info(f"Queued {queued} backfill task(s)")
+    return queued
+
+
+def enqueue(image_ids: Iterable[int], artifacts: Iterable[str]) -> int:
+    """
+    Queue artifacts for (re)generation, resetting done or failed rows.
+
+    Returns:
+        Number of rows queued
+    """
+    now = time.time()
+    rows = [(image_id, artifact, now) for image_id in image_ids for artifact in artifacts]
+    if not rows:
+        return 0
+    with get_db_connection() as conn:
+        conn.executemany(
+            """INSERT INTO backfill_tasks (image_id, artifact, status, updated_at)
+               VALUES (?, ?, 'pending', ?)
+               ON CONFLICT(image_id, artifact) DO UPDATE
+               SET status = 'pending', attempts = 0, next_attempt_at = 0,
+                   last_error = NULL, updated_at = excluded.updated_at
+               WHERE backfill_tasks.status != 'running'""",
+            rows,
+        )
+        conn.commit()
+    return len(rows)
+
+
+# ============================================================================
+# Claiming
+# ============================================================================
+
+def requeue_stale() -> int:
+    """Put tasks left running by an interrupted run back in the queue."""
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            """UPDATE backfill_tasks
+               SET status = 'pending', worker_id = NULL
+               WHERE status = 'running' AND (claimed_at IS NULL OR claimed_at < ?)""",
+            (time.time() - _STALE_SECONDS,),
+        )
+        requeued = cur.rowcount
+        conn.commit()
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted backfill task(s)")
+    return requeued
+
+
+def _artifact_filter(artifacts: Optional[Iterable[str]]) -> Tuple[str, list]:
+    if artifacts is None:
+        return "", []
+    artifacts = list(artifacts)
+    return f"AND artifact IN ({','.join('?' * len(artifacts))})", artifacts
+
+
+def count_due(artifacts: Optional[Iterable[str]] = None) -> int:
+    """Number of pending tasks whose backoff has elapsed."""
+    clause, params = _artifact_filter(artifacts)
+    with get_db_connection() as conn:
+        return conn.execute(
+            f"""SELECT COUNT(*) FROM backfill_tasks
+                WHERE status = 'pending' AND next_attempt_at <= ? {clause}""",
+            [time.time()] + params,
+        ).fetchone()[0]
+
+
+def claim(limit: int, artifacts: Optional[Iterable[str]] = None) -> Dict[int, List[str]]:
+    """
+    Atomically move up to ``limit`` due tasks to running.
+
+    Args:
+        limit: Maximum number of tasks
+        artifacts: Only claim these artifact types (default: all)
+
+    Returns:
+        {image_id: [artifact, ...]}, empty when nothing is due
+    """
+    clause, params = _artifact_filter(artifacts)
+    now = time.time()
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"""UPDATE backfill_tasks
+                SET status = 'running', worker_id = ?, claimed_at = ?, updated_at = ?
+                WHERE rowid IN (
+                    SELECT rowid FROM backfill_tasks
+                    WHERE status = 'pending' AND next_attempt_at <= ? {clause}
+                    ORDER BY next_attempt_at, image_id DESC
+                    LIMIT ?
+                )
+                RETURNING image_id, artifact""",
+            [_WORKER_ID, now, now, now] + params + [limit],
+        ).fetchall()
+        conn.commit()
+
+    claimed: Dict[int, List[str]] = {}
+    for image_id, artifact in rows:
+        claimed.setdefault(image_id, []).append(artifact)
+    return claimed
+
+
+# ============================================================================
+# Completion
+# ============================================================================
+
+def complete(tasks: Iterable[Tuple[int, str]]) -> None:
+    """Mark (image_id, artifact) tasks done."""
+    now = time.time()
+    rows = [(now, image_id, artifact) for image_id, artifact in tasks]
+    if not rows:
+        return
+    with get_db_connection() as conn:
+        conn.executemany(
+            """UPDATE backfill_tasks
+               SET status = 'done', last_error = NULL, worker_id = NULL, updated_at = ?
+               WHERE image_id = ? AND artifact = ?""",
+            rows,
+        )
+        conn.commit()
+
+
+def fail(tasks: Iterable[Tuple[int, str, str]]) -> None:
+    """
+    Record failed (image_id, artifact, error) tasks.
+
+    Each is retried after RETRY_BASE * 2^attempts seconds (capped at
+    RETRY_MAX) until BACKFILL_MAX_ATTEMPTS, then marked failed.
+    """
+    now = time.time()
+    rows = [
+        (config.BACKFILL_MAX_ATTEMPTS, now, config.BACKFILL_RETRY_MAX_SECONDS,
+         config.BACKFILL_RETRY_BASE_SECONDS, (error or '')[:500], now, image_id, artifact)
+        for image_id, artifact, error in tasks
+    ]
+    if not rows:
+        return
+    with get_db_connection() as conn:
+        conn.executemany(
+            """UPDATE backfill_tasks
+               SET status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                   next_attempt_at = ? + MIN(?, ? * (1 << MIN(attempts, 30))),
+                   attempts = attempts + 1,
+                   last_error = ?, worker_id = NULL, updated_at = ?
+               WHERE image_id = ? AND artifact = ?""",
+            rows,
+        )
+        conn.commit()
+
+
+def retry_failed(artifacts: Optional[Iterable[str]] = None) -> int:
+    """Give failed tasks a fresh set of attempts. Returns the number reset."""
+    clause, params = _artifact_filter(artifacts)
+    with get_db_connection() as conn:
+        cur = conn.execute(
+            f"""UPDATE backfill_tasks
+                SET status = 'pending', attempts = 0, next_attempt_at = 0, updated_at = ?
+                WHERE status = 'failed' {clause}""",
+            [time.time()] + params,
+        )
+        reset = cur.rowcount
+        conn.commit()
+    return reset
+
+
+def get_stats() -> Dict[str, Dict[str, int]]:
+    """Task counts per artifact and status."""
+    stats = {artifact: {'pending': 0, 'running': 0, 'done': 0, 'failed': 0} for artifact in ARTIFACTS}
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT artifact, status, COUNT(*) FROM backfill_tasks GROUP BY artifact, status"
+        ).fetchall()
+    for artifact, status, count in rows:
+        stats.setdefault(artifact, {})[status] = count
+    return stats
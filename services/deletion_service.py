@@ -0,0 +1,170 @@
+"""
+Bulk Image Deletion
+
+One deletion path for user selections and orphan cleanup:
+
+1. Database rows are deleted set-based, one transaction per chunk
+   (models.delete_images_by_filepaths); related rows follow via cascades.
+   Embeddings in similarity.db are removed in the same chunked way.
+2. In-memory caches (image list, details cache, homepage pool, tag counts)
+   are updated once for the whole set, and the images' cached duplicate
+   preview planes are dropped.
+3. Image, thumbnail and upscaled files are unlinked afterwards on a small
+   thread pool.
+
+Large selections run as a background task with progress
+(run_delete_images_task).
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from database import models
+from utils.file_utils import get_bucketed_thumbnail_path_on_disk
+from utils.logging_config import get_logger
+
+logger = get_logger('Deletion')
+
+# Images per database transaction
+_DB_CHUNK_SIZE = 500
+
+# Threads unlinking files
+_UNLINK_WORKERS = 8
+
+
+def _remove_file(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _delete_files(filepath: str) -> bool:
+    """Unlink an image, its thumbnail and its upscaled version. True if anything was removed."""
+    from services.upscaler_service import delete_upscaled_image
+
+    image_deleted = _remove_file(os.path.join("static/images", filepath))
+    thumb_deleted = _remove_file(get_bucketed_thumbnail_path_on_disk(filepath))
+    try:
+        delete_upscaled_image(filepath)
+    except Exception as e:
+        logger.warning(f"Failed to delete upscaled image for {filepath}: {e}")
+    return image_deleted or thumb_deleted
+
+
+def delete_images(filepaths: Iterable[str], delete_files: bool = True,
+                  progress_callback: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, Any]:
+    """
+    Delete images from the database, the caches and (optionally) disk.
+
+    Args:
+        filepaths: Paths relative to the images directory
+        delete_files: Also unlink the image, thumbnail and upscaled files
+        progress_callback: Optional callable(current, total, message)
+
+    Returns:
+        Dict with total, deleted, failed and errors (per-filepath messages)
+    """
+    from core.cache_manager import remove_images_from_cache, invalidate_tag_cache
+    from services import duplicate_preview_cache, similarity_db
+
+    filepaths = list(dict.fromkeys(filepaths))
+    total = len(filepaths)
+    results = {"total": total, "deleted": 0, "failed": 0, "errors": []}
+    if not filepaths:
+        return results
+
+    def report(current, message):
+        if progress_callback:
+            progress_callback(current, total, message)
+
+    # With files to unlink, the database phase is the first half of the progress bar
+    def report_db(done, _total):
+        report(done // 2 if delete_files else done, "Removing database records...")
+
+    # 1. Database
+    started = time.time()
+    rows = models.delete_images_by_filepaths(
+        filepaths,
+        chunk_size=_DB_CHUNK_SIZE,
+        progress_callback=report_db,
+    )
+    image_ids = [row['id'] for row in rows]
+    if image_ids:
+        try:
+            similarity_db.delete_embeddings(image_ids)
+        except Exception as e:
+            logger.warning(f"Failed to delete embeddings: {e}")
+
+    # 2. Caches, once for the whole set
+    db_deleted = {row['filepath'] for row in rows}
+    if db_deleted:
+        remove_images_from_cache(
+            db_deleted,
+            md5s=[row['md5'] for row in rows if row['md5']],
+            image_ids=image_ids,
+        )
+        invalidate_tag_cache()
+        try:
+            duplicate_preview_cache.invalidate_previews(image_ids)
+        except Exception as e:
+            logger.warning(f"Failed to drop duplicate previews: {e}")
+    logger.info(f"Removed {len(db_deleted)} image records in {time.time() - started:.2f}s")
+
+    # 3. Files
+    files_deleted = set()
+    errored = set()
+    if delete_files:
+        done = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=_UNLINK_WORKERS,
+                                                   thread_name_prefix="delete") as executor:
+            futures = {executor.submit(_delete_files, fp): fp for fp in filepaths}
+            for future in concurrent.futures.as_completed(futures):
+                filepath = futures[future]
+                done += 1
+                try:
+                    if future.result():
+                        files_deleted.add(filepath)
+                except Exception as e:
+                    errored.add(filepath)
+                    results["errors"].append(f"{filepath}: {e}")
+                if done % 50 == 0:
+                    report((total + done) // 2, "Deleting files...")
+
+    for filepath in filepaths:
+        if filepath in db_deleted or filepath in files_deleted:
+            results["deleted"] += 1
+        else:
+            results["failed"] += 1
+            if filepath not in errored:
+                results["errors"].append(f"{filepath}: Not found in database or filesystem")
+
+    report(total, "Complete")
+    return results
+
+
+async def run_delete_images_task(task_id: str, manager, filepaths=None, delete_files: bool = True) -> Dict[str, Any]:
+    """Background task wrapper for delete_images() with progress updates."""
+    loop = asyncio.get_running_loop()
+    last_update = 0.0
+
+    def progress_callback(current, total, message):
+        nonlocal last_update
+        now = time.time()
+        if now - last_update > 0.2 or current >= total:
+            last_update = now
+            asyncio.run_coroutine_threadsafe(
+                manager.update_progress(task_id, current, total, message), loop
+            )
+
+    await manager.update_progress(task_id, 0, len(filepaths or []), "Deleting images...")
+    results = await asyncio.to_thread(delete_images, filepaths or [], delete_files, progress_callback)
+    return {
+        "status": "success" if results["failed"] == 0 else "partial",
+        "message": f"Deleted {results['deleted']} of {results['total']} images",
+        "results": results,
+    }
@@ -0,0 +1,219 @@
+"""
+Duplicate Preview Cache
+
+Persistent per-image store of the normalized preview planes used by the
+duplicate-review visual diff (aspect-fit RGB, blurred gray, alpha).
+
+Each image is decoded and normalized once and written to
+``<DUPLICATE_PREVIEW_CACHE_DIR>/<shard>/<image_id>_<mtime_ns>.npy`` as a
+uint8 (size, size, 5) array. Reads are memory-mapped, so every suggestion
+worker (thread or process) shares the OS page cache instead of re-decoding
+the same preview for each pair it appears in. The mtime in the filename
+invalidates entries automatically when a thumbnail is regenerated.
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+import config
+
+# Planes stored per pixel: R, G, B, gray, alpha
+PREVIEW_PLANES = 5
+
+# Striped locks so two threads never decode the same image concurrently
+_build_locks = [threading.Lock() for _ in range(64)]
+
+# Running entry count / byte size, adjusted on every write and removal. Other
+# processes share the directory, so the totals are re-read from disk at most
+# once per _STATS_RESCAN_SECONDS.
+_STATS_RESCAN_SECONDS = 300.0
+_stats_lock = threading.Lock()
+_stats = {'entries': 0, 'size_bytes': 0}
+_stats_scanned_at = None
+
+
+def _cache_dir() -> str:
+    return config.DUPLICATE_PREVIEW_CACHE_DIR
+
+
+def _entry_path(image_id: int, mtime: float) -> str:
+    return os.path.join(_cache_dir(), _shard(image_id), f"{image_id}_{int(mtime * 1e9)}.npy")
+
+
+def _shard(image_id: int) -> str:
+    return f"{image_id % 256:02x}"
+
+
+def _account(entries: int, size_bytes: int) -> None:
+    with _stats_lock:
+        _stats['entries'] = max(0, _stats['entries'] + entries)
+        _stats['size_bytes'] = max(0, _stats['size_bytes'] + size_bytes)
+
+
+def _remove_entry(path: str) -> bool:
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+    except OSError:
+        return False
+    _account(-1, -size)
+    return True
+
+
+def _remove_stale_entries(image_id: int, keep_path: Optional[str] = None) -> None:
+    for stale in glob.glob(os.path.join(_cache_dir(), _shard(image_id), f"{image_id}_*.npy")):
+        if stale != keep_path:
+            _remove_entry(stale)
+
+
+def _read_entry(path: str) -> Optional[np.ndarray]:
+    try:
+        planes = np.load(path, mmap_mode='r')
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    if planes.ndim != 3 or planes.shape[2] != PREVIEW_PLANES or planes.dtype != np.uint8:
+        return None
+    return planes
+
+
+def _write_entry(path: str, planes: np.ndarray) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, planes)
+    try:
+        replaced = os.path.getsize(path)
+    except OSError:
+        replaced = None
+    os.replace(tmp_path, path)
+    size = os.path.getsize(path)
+    if replaced is None:
+        _account(1, size)
+    else:
+        _account(0, size - replaced)
+
+
+def get_preview_planes(
+    image_id: Optional[int],
+    path: str,
+    mtime: float,
+    build: Callable[[str], np.ndarray],
+) -> np.ndarray:
+    """
+    Return the normalized preview planes for an image, building them on a miss.
+
+    Args:
+        image_id: Image ID (None skips the persistent cache)
+        path: Preview file the planes are derived from
+        mtime: Modification time of ``path``; part of the cache key
+        build: Callable that decodes ``path`` into a uint8 (size, size, 5) array
+
+    Returns:
+        uint8 array of shape (size, size, 5), memory-mapped on a cache hit
+    """
+    if image_id is None:
+        return build(path)
+
+    entry_path = _entry_path(image_id, mtime)
+    planes = _read_entry(entry_path)
+    if planes is not None:
+        return planes
+
+    with _build_locks[image_id % len(_build_locks)]:
+        # Another thread may have built it while we waited
+        planes = _read_entry(entry_path)
+        if planes is not None:
+            return planes
+
+        planes = build(path)
+        try:
+            _write_entry(entry_path, planes)
+            _remove_stale_entries(image_id, keep_path=entry_path)
+        except OSError as e:
+            print(f"[DuplicatePreviewCache] Could not persist preview for image {image_id}: {e}")
+        return planes
+
+
+def invalidate_preview(image_id: int) -> None:
+    """Drop any cached preview planes for an image."""
+    _remove_stale_entries(image_id)
+
+
+def invalidate_previews(image_ids: Iterable[int]) -> int:
+    """
+    Drop cached preview planes for many images, listing each shard once.
+
+    Returns:
+        int: Number of cache files removed
+    """
+    by_shard = {}
+    for image_id in image_ids:
+        by_shard.setdefault(_shard(image_id), set()).add(str(image_id))
+
+    removed = 0
+    for shard, ids in by_shard.items():
+        shard_dir = os.path.join(_cache_dir(), shard)
+        try:
+            names = os.listdir(shard_dir)
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith('.npy') and name.split('_', 1)[0] in ids:
+                removed += _remove_entry(os.path.join(shard_dir, name))
+    return removed
+
+
+def prune_preview_cache(valid_image_ids: Iterable[int]) -> int:
+    """
+    Delete cached previews for images that no longer exist.
+
+    Args:
+        valid_image_ids: IDs of images currently in the database
+
+    Returns:
+        int: Number of cache files removed
+    """
+    valid = set(valid_image_ids)
+    removed = 0
+    for entry in glob.glob(os.path.join(_cache_dir(), '*', '*.npy')):
+        try:
+            image_id = int(os.path.basename(entry).split('_', 1)[0])
+        except ValueError:
+            continue
+        if image_id not in valid:
+            removed += _remove_entry(entry)
+    return removed
+
+
+def get_preview_cache_stats(refresh: bool = False) -> dict:
+    """
+    Return entry count and on-disk size of the preview cache.
+
+    Served from the running counters; the cache directory is only scanned on
+    first use, every _STATS_RESCAN_SECONDS, or when ``refresh`` is set.
+    """
+    global _stats_scanned_at
+    with _stats_lock:
+        stale = (refresh or _stats_scanned_at is None
+                 or time.monotonic() - _stats_scanned_at > _STATS_RESCAN_SECONDS)
+        if not stale:
+            return dict(_stats)
+
+    entries = glob.glob(os.path.join(_cache_dir(), '*', '*.npy'))
+    size = 0
+    for entry in entries:
+        try:
+            size += os.path.getsize(entry)
+        except OSError:
+            pass
+
+    with _stats_lock:
+        _stats['entries'] = len(entries)
+        _stats['size_bytes'] = size
+        _stats_scanned_at = time.monotonic()
+        return dict(_stats)
@@ -9,6 +9,7 @@ pagination and filters by the user's chosen threshold.
 import os
 import time
 import asyncio
+import base64
 import json
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
@@ -21,6 +22,7 @@ from database import get_db_connection
 from services.similarity.hashing import hamming_distance
 from services.image_service import delete_image_service
 from repositories import relations_repository
+from services import duplicate_preview_cache
 from utils import get_thumbnail_path
 
 
@@ -42,6 +44,18 @@ _SUGGESTION_MP_THRESHOLD = 100
 _LOW_VISUAL_SIGNAL_GUARD = 0.02
 _LOW_BLOB_RATIO_GUARD = 0.0025
 
+# Keyset sort order per queue mode; image ids make every key unique
+_QUEUE_KEY_COLUMNS = {
+    'distance': ('dp.distance', 'dp.image_id_a', 'dp.image_id_b'),
+    'likely_duplicates': ('dps.signal', 'dp.distance', 'dp.image_id_a', 'dp.image_id_b'),
+    'duplicate_first': ('dps.signal', 'dp.distance', 'dp.image_id_a', 'dp.image_id_b'),
+    'duplicate_hunt': (
+        'dps.signal', 'dps.largest_blob_ratio', 'dps.peak_blob_contrast',
+        'dps.changed_ratio', 'dp.distance', 'dps.mean_abs_diff',
+        'dp.image_id_a', 'dp.image_id_b',
+    ),
+}
+
 
 def _init_scan_worker(ids: List[int], hashes: List[int]):
     """Initializer for each pool worker — stores shared readonly data."""
@@ -410,6 +424,12 @@ def compute_duplicate_pair_suggestions(
         })
 
     rows = _compute_duplicate_pair_suggestions_rows(payloads, progress_callback)
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM images")
+        existing_ids = [row['id'] for row in cur.fetchall()]
+    duplicate_preview_cache.prune_preview_cache(existing_ids)
+
     with get_db_connection() as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM duplicate_pair_suggestions")
@@ -512,28 +532,21 @@ def get_duplicate_queue(
     suggestion_lower: Optional[float] = None,
     suggestion_upper: Optional[float] = None,
     queue_mode: str = 'distance',
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Read from duplicate_pairs cache, filter by threshold, exclude
     already-reviewed pairs, enrich with metadata, and paginate.
 
-    Filtering is done at the SQL level via NOT EXISTS so that LIMIT/OFFSET
-    paginate correctly over only the unreviewed pairs.
+    Reviewed pairs are excluded via the trigger-maintained
+    ``duplicate_pairs.reviewed`` flag, and totals come from the
+    ``duplicate_queue_counts`` cache, so neither probes image_relations.
+    When ``cursor`` (the ``next_cursor`` of the previous page) is given the
+    page is fetched by keyset instead of OFFSET, which keeps deep pages as
+    cheap as the first one.
 
-    Returns dict with 'pairs', 'total', 'offset', 'limit'.
+    Returns dict with 'pairs', 'total', 'offset', 'limit', 'next_cursor'.
     """
-    # Subquery that matches any relation between the two images.
-    # duplicate_pairs always stores (min_id, max_id).  image_relations
-    # normalises sibling/non_duplicate the same way, but parent_child
-    # preserves direction — so we check both orderings.
-    _NOT_REVIEWED = """
-        NOT EXISTS (
-            SELECT 1 FROM image_relations ir
-            WHERE (ir.image_id_a = dp.image_id_a AND ir.image_id_b = dp.image_id_b)
-               OR (ir.image_id_a = dp.image_id_b AND ir.image_id_b = dp.image_id_a)
-        )
-    """
-
     lower_bound, upper_bound = _coerce_suggestion_bounds(
         suggestion_lower,
         suggestion_upper,
@@ -551,128 +564,102 @@ def get_duplicate_queue(
         if not scan_threshold:
             scan_threshold = max(config.PHASH_BITS // 4, 1)
 
-        cur.execute("SELECT COUNT(*) as cnt FROM duplicate_pair_suggestions")
-        suggestion_cached_pairs = cur.fetchone()['cnt']
-        suggestion_cache_ready = suggestion_cached_pairs > 0 and suggestion_cached_pairs >= _count_duplicate_pairs(cur)
+        suggestion_cached_pairs = _cached_queue_count(
+            conn, 'suggestions', "SELECT COUNT(*) FROM duplicate_pair_suggestions",
+        )
+        suggestion_cache_ready = (
+            suggestion_cached_pairs > 0
+            and suggestion_cached_pairs >= _count_duplicate_pairs(conn)
+        )
+
+        if normalized_mode != 'distance' and not suggestion_cache_ready:
+            return {
+                'pairs': [],
+                'total': 0,
+                'offset': offset,
+                'limit': limit,
+                'next_cursor': None,
+                'phash_bits': config.PHASH_BITS,
+                'scan_threshold': scan_threshold,
+                'queue_mode': normalized_mode,
+                'raw_total': 0,
+                'suggestion_cache_ready': False,
+                'suggestion_thresholds': {
+                    'lower': lower_bound,
+                    'upper': upper_bound,
+                    'defaults': {
+                        'lower': _SUGGESTION_LOWER_BOUND,
+                        'upper': _SUGGESTION_UPPER_BOUND,
+                    },
+                },
+            }
+
+        key_columns = _QUEUE_KEY_COLUMNS[normalized_mode]
+        where_clause = "dp.reviewed = 0 AND dp.distance <= ?"
+        where_params: List[Any] = [threshold]
+        count_key = f"{normalized_mode}:{threshold}"
 
         if normalized_mode == 'distance':
-            cur.execute(
-                f"SELECT COUNT(*) as cnt FROM duplicate_pairs dp"
-                f" WHERE dp.distance <= ? AND {_NOT_REVIEWED}",
-                (threshold,),
+            join_clause = (
+                "LEFT JOIN duplicate_pair_suggestions dps"
+                " ON dps.image_id_a = dp.image_id_a AND dps.image_id_b = dp.image_id_b"
             )
-            total_unreviewed = cur.fetchone()['cnt']
-
-            if suggestion_cache_ready:
-                cur.execute(
-                    f"""SELECT dp.image_id_a, dp.image_id_b, dp.distance,
-                               dps.signal, dps.visual_signal, dps.metadata_adjustment,
-                               dps.mean_abs_diff, dps.changed_ratio, dps.largest_blob_ratio,
-                               dps.blob_count, dps.peak_blob_contrast, dps.mask_mismatch,
-                               dps.pixel_ratio, dps.filesize_ratio, dps.tag_gap_ratio
-                        FROM duplicate_pairs dp
-                        LEFT JOIN duplicate_pair_suggestions dps
-                          ON dps.image_id_a = dp.image_id_a AND dps.image_id_b = dp.image_id_b
-                        WHERE dp.distance <= ? AND {_NOT_REVIEWED}
-                        ORDER BY dp.distance ASC
-                        LIMIT ? OFFSET ?""",
-                    (threshold, limit, offset),
-                )
-            else:
-                cur.execute(
-                    f"""SELECT dp.image_id_a, dp.image_id_b, dp.distance
-                        FROM duplicate_pairs dp
-                        WHERE dp.distance <= ? AND {_NOT_REVIEWED}
-                        ORDER BY dp.distance ASC
-                        LIMIT ? OFFSET ?""",
-                    (threshold, limit, offset),
-                )
-            rows = cur.fetchall()
+            count_from = "FROM duplicate_pairs dp"
         else:
-            if not suggestion_cache_ready:
-                return {
-                    'pairs': [],
-                    'total': 0,
-                    'offset': offset,
-                    'limit': limit,
-                    'phash_bits': config.PHASH_BITS,
-                    'scan_threshold': scan_threshold,
-                    'queue_mode': normalized_mode,
-                    'raw_total': 0,
-                    'suggestion_cache_ready': False,
-                    'suggestion_thresholds': {
-                        'lower': lower_bound,
-                        'upper': upper_bound,
-                        'defaults': {
-                            'lower': _SUGGESTION_LOWER_BOUND,
-                            'upper': _SUGGESTION_UPPER_BOUND,
-                        },
-                    },
-                }
-
-            filter_clause = ""
-            order_clause = ""
-            count_params: List[Any] = [threshold]
-            select_params: List[Any] = [threshold]
+            join_clause = (
+                "JOIN duplicate_pair_suggestions dps"
+                " ON dps.image_id_a = dp.image_id_a AND dps.image_id_b = dp.image_id_b"
+            )
+            count_from = f"FROM duplicate_pairs dp {join_clause}"
             if normalized_mode == 'likely_duplicates':
-                filter_clause = "AND dps.signal <= ?"
-                count_params.append(lower_bound)
-                select_params.append(lower_bound)
-                order_clause = "ORDER BY dps.signal ASC, dp.distance ASC"
-            elif normalized_mode == 'duplicate_hunt':
-                select_params.extend([lower_bound, upper_bound])
-                order_clause = """
-                    ORDER BY
-                        CASE
-                            WHEN dps.signal <= ? THEN 0
-                            WHEN dps.signal < ? THEN 1
-                            ELSE 2
-                        END ASC,
-                        dps.signal ASC,
-                        dps.largest_blob_ratio ASC,
-                        dps.peak_blob_contrast ASC,
-                        dps.changed_ratio ASC,
-                        dp.distance ASC,
-                        dps.mean_abs_diff ASC
-                """
+                where_clause += " AND dps.signal <= ?"
+                where_params.append(lower_bound)
+                count_key += f":{lower_bound}"
             else:
-                select_params.extend([lower_bound, upper_bound])
-                order_clause = """
-                    ORDER BY
-                        CASE
-                            WHEN dps.signal <= ? THEN 0
-                            WHEN dps.signal < ? THEN 1
-                            ELSE 2
-                        END ASC,
-                        dps.signal ASC,
-                        dp.distance ASC
-                """
-
-            cur.execute(
-                f"""SELECT COUNT(*) as cnt
-                    FROM duplicate_pairs dp
-                    JOIN duplicate_pair_suggestions dps
-                      ON dps.image_id_a = dp.image_id_a AND dps.image_id_b = dp.image_id_b
-                    WHERE dp.distance <= ? AND {_NOT_REVIEWED} {filter_clause}""",
-                tuple(count_params),
-            )
-            total_unreviewed = cur.fetchone()['cnt']
-
-            cur.execute(
-                f"""SELECT dp.image_id_a, dp.image_id_b, dp.distance,
-                           dps.signal, dps.visual_signal, dps.metadata_adjustment,
-                           dps.mean_abs_diff, dps.changed_ratio, dps.largest_blob_ratio,
-                           dps.blob_count, dps.peak_blob_contrast, dps.mask_mismatch,
-                           dps.pixel_ratio, dps.filesize_ratio, dps.tag_gap_ratio
-                    FROM duplicate_pairs dp
-                    JOIN duplicate_pair_suggestions dps
-                      ON dps.image_id_a = dp.image_id_a AND dps.image_id_b = dp.image_id_b
-                    WHERE dp.distance <= ? AND {_NOT_REVIEWED} {filter_clause}
-                    {order_clause}
-                    LIMIT ? OFFSET ?""",
-                tuple(select_params + [limit, offset]),
-            )
-            rows = cur.fetchall()
+                # duplicate_first / duplicate_hunt bucket pairs by signal
+                # against the bounds, but the buckets are monotonic in signal
+                # so ordering by signal alone yields the same sequence.
+                count_key = f"suggested:{threshold}"
+
+        total_unreviewed = _cached_queue_count(
+            conn,
+            count_key,
+            f"SELECT COUNT(*) {count_from} WHERE {where_clause}",
+            tuple(where_params),
+        )
+
+        select_params = list(where_params)
+        key_values = _decode_queue_cursor(cursor, len(key_columns))
+        if key_values is not None:
+            where_clause += f" AND ({', '.join(key_columns)}) > ({', '.join('?' for _ in key_columns)})"
+            select_params.extend(key_values)
+            page_clause = "LIMIT ?"
+            select_params.append(limit)
+        else:
+            page_clause = "LIMIT ? OFFSET ?"
+            select_params.extend([limit, offset])
+
+        cur.execute(
+            f"""SELECT dp.image_id_a, dp.image_id_b, dp.distance,
+                       dps.signal, dps.visual_signal, dps.metadata_adjustment,
+                       dps.mean_abs_diff, dps.changed_ratio, dps.largest_blob_ratio,
+                       dps.blob_count, dps.peak_blob_contrast, dps.mask_mismatch,
+                       dps.pixel_ratio, dps.filesize_ratio, dps.tag_gap_ratio
+                FROM duplicate_pairs dp
+                {join_clause}
+                WHERE {where_clause}
+                ORDER BY {', '.join(f'{col} ASC' for col in key_columns)}
+                {page_clause}""",
+            tuple(select_params),
+        )
+        rows = cur.fetchall()
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        next_cursor = _encode_queue_cursor(
+            [last[col.split('.', 1)[1]] for col in key_columns]
+        )
 
     pairs = []
     for row in rows:
@@ -701,6 +688,7 @@ def get_duplicate_queue(
         'total': total_visible,
         'offset': offset,
         'limit': limit,
+        'next_cursor': next_cursor,
         'phash_bits': config.PHASH_BITS,
         'scan_threshold': scan_threshold,
         'queue_mode': normalized_mode,
@@ -812,10 +800,52 @@ def _normalize_queue_mode(queue_mode: str) -> str:
     return queue_mode if queue_mode in allowed_modes else 'distance'
 
 
-def _count_duplicate_pairs(cur) -> int:
+def _count_duplicate_pairs(conn) -> int:
     """Return total pair count in duplicate_pairs for cache readiness checks."""
-    cur.execute("SELECT COUNT(*) as cnt FROM duplicate_pairs")
-    return cur.fetchone()['cnt']
+    return _cached_queue_count(conn, 'pairs', "SELECT COUNT(*) FROM duplicate_pairs")
+
+
+def _cached_queue_count(conn, cache_key: str, count_sql: str, params: Tuple = ()) -> int:
+    """
+    Return a queue total from duplicate_queue_counts, computing it on a miss.
+
+    The triggers on duplicate_pairs, duplicate_pair_suggestions and
+    image_relations clear the table on every write, so a hit is always
+    current.  The miss path counts and stores in a single statement so a
+    concurrent invalidation can't be overwritten with a stale total.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT total FROM duplicate_queue_counts WHERE cache_key = ?", (cache_key,))
+    row = cur.fetchone()
+    if row:
+        return row['total']
+
+    cur.execute(
+        f"INSERT OR REPLACE INTO duplicate_queue_counts (cache_key, total) SELECT ?, ({count_sql})",
+        (cache_key, *params),
+    )
+    conn.commit()
+    cur.execute("SELECT total FROM duplicate_queue_counts WHERE cache_key = ?", (cache_key,))
+    return cur.fetchone()['total']
+
+
+def _encode_queue_cursor(values: List[Any]) -> str:
+    """Pack a row's sort-key values into an opaque URL-safe cursor."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_queue_cursor(cursor: Optional[str], width: int) -> Optional[List[Any]]:
+    """Unpack a cursor from _encode_queue_cursor; None if absent or malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != width:
+        return None
+    return values
 
 
 def _get_cached_suggestion_payload(row: Any) -> Optional[Dict[str, Any]]:
@@ -1034,13 +1064,13 @@ def _compute_pair_visual_metrics(
     if not path_a or not path_b:
         return {'available': False, 'reason': 'missing_preview'}
 
-    ordered_paths = sorted(
-        [(path_a, mtime_a), (path_b, mtime_b)],
+    ordered_previews = sorted(
+        [(path_a, mtime_a, image_a.get('id')), (path_b, mtime_b, image_b.get('id'))],
         key=lambda item: item[0],
     )
-    (path_1, mtime_1), (path_2, mtime_2) = ordered_paths
+    (path_1, mtime_1, id_1), (path_2, mtime_2, id_2) = ordered_previews
 
-    return _compute_pair_visual_metrics_cached(path_1, mtime_1, path_2, mtime_2)
+    return _compute_pair_visual_metrics_cached(path_1, mtime_1, id_1, path_2, mtime_2, id_2)
 
 
 def _resolve_preview_path(image: Dict[str, Any]) -> Tuple[Optional[str], float]:
@@ -1059,15 +1089,15 @@ def _resolve_preview_path(image: Dict[str, Any]) -> Tuple[Optional[str], float]:
 def _compute_pair_visual_metrics_cached(
     path_a: str,
     mtime_a: float,
+    image_id_a: Optional[int],
     path_b: str,
     mtime_b: float,
+    image_id_b: Optional[int],
 ) -> Dict[str, Any]:
     """Cached visual-diff metrics derived from normalized preview images."""
-    del mtime_a, mtime_b
-
     try:
-        rgb_a, gray_a, mask_a = _load_visual_diff_arrays(path_a)
-        rgb_b, gray_b, mask_b = _load_visual_diff_arrays(path_b)
+        rgb_a, gray_a, mask_a = _get_visual_diff_arrays(image_id_a, path_a, mtime_a)
+        rgb_b, gray_b, mask_b = _get_visual_diff_arrays(image_id_b, path_b, mtime_b)
     except (FileNotFoundError, OSError, UnidentifiedImageError):
         return {'available': False, 'reason': 'image_load_failed'}
     except Exception:
@@ -1112,8 +1142,31 @@ def _compute_pair_visual_metrics_cached(
     }
 
 
-def _load_visual_diff_arrays(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-    """Load and aspect-fit an image preview for overlay-style visual diff metrics."""
+def _get_visual_diff_arrays(
+    image_id: Optional[int],
+    path: str,
+    mtime: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Normalized preview arrays for an image, decoded at most once per preview file."""
+    planes = duplicate_preview_cache.get_preview_planes(
+        image_id, path, mtime, _load_visual_diff_planes
+    )
+    return _split_visual_diff_planes(planes)
+
+
+def _split_visual_diff_planes(planes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert stored uint8 (size, size, 5) planes to float RGB, gray and alpha arrays."""
+    scaled = planes.astype(np.float32) / 255.0
+    return scaled[:, :, :3], scaled[:, :, 3], scaled[:, :, 4]
+
+
+def _load_visual_diff_planes(path: str) -> np.ndarray:
+    """
+    Load and aspect-fit an image preview for overlay-style visual diff metrics.
+
+    Returns uint8 (size, size, 5) planes: RGB, gray, alpha. Every plane comes out of an 8-bit Pillow image, so storing them as uint8
+    loses nothing against the float arrays the diff metrics work on.
+    """
     with Image.open(path) as img:
         img = ImageOps.exif_transpose(img)
         rgba = img.convert('RGBA')
@@ -1134,16 +1187,16 @@ def _load_visual_diff_arrays(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndar
         )
         fitted.paste(contained, offset, contained)
 
-        alpha = np.asarray(fitted.getchannel('A'), dtype=np.float32) / 255.0
+        alpha = np.asarray(fitted.getchannel('A'), dtype=np.uint8)
         background = Image.new('RGB', fitted.size, (255, 255, 255))
         background.paste(fitted, mask=fitted.getchannel('A'))
 
         gray = background.convert('L').filter(ImageFilter.GaussianBlur(radius=0.4))
-        return (
-            np.asarray(background, dtype=np.float32) / 255.0,
-            np.asarray(gray, dtype=np.float32) / 255.0,
+        return np.dstack((
+            np.asarray(background, dtype=np.uint8),
+            np.asarray(gray, dtype=np.uint8),
             alpha,
-        )
+        ))
 
 
 def _remove_diff_speckles(change_mask: np.ndarray) -> np.ndarray:
@@ -162,7 +162,7 @@ def check_missing_thumbnails(auto_fix=False, progress_callback=None):
         with get_db_connection() as conn:
             cursor = conn.cursor()
             # Include md5 for zip animation thumbnail generation
-            cursor.execute("SELECT filepath, md5 FROM images")
+            cursor.execute("SELECT id, filepath, md5 FROM images")
             all_images = cursor.fetchall()
 
         missing = []
@@ -175,7 +175,7 @@ def check_missing_thumbnails(auto_fix=False, progress_callback=None):
 
             if not os.path.exists(thumb_path):
                 # Store both filepath and md5 for zip animations
-                missing.append({'filepath': filepath, 'md5': image['md5']})
+                missing.append({'id': image['id'], 'filepath': filepath, 'md5': image['md5']})
 
         result.issues_found = len(missing)
 
@@ -185,6 +185,12 @@ def check_missing_thumbnails(auto_fix=False, progress_callback=None):
 
         result.add_message(f"Found {result.issues_found} images without thumbnails")
 
+        if not auto_fix:
+            # Picked up by the next hash generation run
+            from services import backfill_queue
+            backfill_queue.enqueue([item['id'] for item in missing], ['thumbnail'])
+            result.add_message("Queued for the next hash generation run")
+
         if auto_fix:
             from services.processing.thumbnail_generator import ensure_thumbnail
             total = len(missing)
@@ -485,6 +491,119 @@ def check_merged_images_missing_tags(auto_fix=True):
     return result
 
 
+def check_tag_usage_counts(auto_fix=True):
+    """
+    Check that tags.usage_count matches image_tags.
+    The image_tags triggers keep it current, so drift means rows were
+    changed with INSERT OR REPLACE or with the triggers missing.
+    If auto_fix=True, recounts the affected tags.
+    """
+    result = HealthCheckResult("Tag usage counts")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) FROM tags
+                WHERE usage_count != (SELECT COUNT(*) FROM image_tags WHERE image_tags.tag_id = tags.id)
+            """)
+            result.issues_found = cursor.fetchone()[0]
+
+        if result.issues_found == 0:
+            result.add_message("All tag usage counts are current")
+            return result
+
+        result.add_message(f"Found {result.issues_found} tags with a stale usage count")
+
+        if auto_fix:
+            from database import recount_tag_usage
+            from core.cache_manager import reload_tag_counts
+
+            result.issues_fixed = recount_tag_usage()
+            reload_tag_counts()
+            result.add_message(f"Recounted {result.issues_fixed} tags")
+
+    except Exception as e:
+        result.add_error(f"Error during check: {str(e)}")
+
+    return result
+
+
+def check_tag_category_counts(auto_fix=True):
+    """
+    Check that tag_category_counts matches the tags table.
+    The tags triggers keep it current, so drift means the table was edited
+    with the triggers missing.
+    If auto_fix=True, rebuilds it.
+    """
+    from database.core import _tag_category_group
+
+    result = HealthCheckResult("Tag categorization counts")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                WITH actual(extended_category, status, used, tag_count) AS (
+                    SELECT {_tag_category_group('tags')}, COUNT(*) FROM tags GROUP BY 1, 2, 3
+                ),
+                stored AS (
+                    SELECT extended_category, status, used, tag_count FROM tag_category_counts
+                    WHERE tag_count != 0
+                )
+                SELECT (SELECT COUNT(*) FROM (SELECT * FROM actual EXCEPT SELECT * FROM stored))
+                     + (SELECT COUNT(*) FROM (SELECT * FROM stored EXCEPT SELECT * FROM actual))
+            """)
+            result.issues_found = cursor.fetchone()[0]
+
+        if result.issues_found == 0:
+            result.add_message("Tag categorization counts are current")
+            return result
+
+        result.add_message(f"Found {result.issues_found} stale tag categorization count(s)")
+
+        if auto_fix:
+            from database import rebuild_tag_category_counts
+
+            rebuild_tag_category_counts()
+            result.issues_fixed = result.issues_found
+            result.add_message("Rebuilt tag categorization counts")
+
+    except Exception as e:
+        result.add_error(f"Error during check: {str(e)}")
+
+    return result
+
+
+def cleanup_expired_metadata_lookups(auto_fix=True):
+    """
+    Remove booru MD5 lookup cache entries that are past their TTL.
+    If auto_fix=True, deletes them.
+    """
+    result = HealthCheckResult("Expired metadata lookups")
+
+    try:
+        import time
+        now = time.time()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) FROM metadata_lookup_cache
+                WHERE fetched_at < CASE WHEN found THEN ? ELSE ? END
+            """, (now - config.METADATA_LOOKUP_CACHE_TTL, now - config.METADATA_LOOKUP_NEGATIVE_TTL))
+            result.issues_found = cursor.fetchone()[0]
+
+        if result.issues_found and auto_fix:
+            from services.processing.lookup_cache import purge_expired_lookups
+            result.issues_fixed = purge_expired_lookups()
+            result.add_message(f"Removed {result.issues_fixed} expired lookup cache entries")
+
+    except Exception as e:
+        result.add_error(f"Error during check: {str(e)}")
+
+    return result
+
+
 def run_all_health_checks(auto_fix=True, include_thumbnails=False, include_tag_deltas=True):
     """
     Run all database health checks.
@@ -504,6 +623,9 @@ def run_all_health_checks(auto_fix=True, include_thumbnails=False, include_tag_d
         check_active_source_priority(auto_fix),
         check_orphaned_image_sources(auto_fix),
         check_merged_images_missing_tags(auto_fix),
+        check_tag_usage_counts(auto_fix),
+        check_tag_category_counts(auto_fix),
+        cleanup_expired_metadata_lookups(auto_fix),
     ]
 
     if include_tag_deltas:
@@ -5,82 +5,116 @@ Pre-assembles randomized homepage image sets in the background so the
 gallery route can serve them instantly without any per-request DB/IO work.
 
 Architecture:
-  - A background daemon thread maintains a buffer of ready-to-serve pages.
-  - Each page is a random sample of IMAGES_PER_PAGE images, fully formatted
-    with path, thumbnail path, and tag strings.
-  - The home() route pops a page from the buffer (instant).
-  - The background thread refills the buffer automatically.
-  - On cache invalidation (image add/delete), the buffer is flushed and
-    the underlying image list is refreshed.
+  - The pool is a compact, sorted int array of every image ID. Random pages
+    are sampled from it, so no query materializes all images and their tags.
+  - Only the sampled rows are hydrated (filepath + tag string) with one
+    ``id IN (...)`` query per page.
+  - A background daemon thread keeps a buffer of ready-to-serve pages.
+  - The gallery pops a page from the buffer (instant) and the background
+    thread refills it.
+  - When an image changes (deleted, re-rated, retagged) only the buffered
+    pages containing it are dropped. A full invalidation rebuilds the pool.
 """
 
+import bisect
 import random
 import threading
 import time
+from array import array
 from collections import deque
 
 import config
 from database import models
-from core.cache_manager import get_image_tags_as_string
+from events.cache_events import register_cache_invalidation_callback
 from utils import get_thumbnail_path
 
 # Buffer size: how many pre-assembled pages to keep ready
 _BUFFER_SIZE = 3
 
 # Internal state
-_buffer = deque(maxlen=_BUFFER_SIZE)
-_all_images = None          # Cached result of get_all_images_with_tags()
-_all_images_lock = threading.Lock()
+_buffer = deque(maxlen=_BUFFER_SIZE)  # (page, total, image ids, filepaths)
+_pool = None                # Sorted array('i') of image IDs
+_pool_lock = threading.RLock()
 _buffer_event = threading.Event()  # Signals the producer to wake up
 _started = False
 _start_lock = threading.Lock()
 
 
-def _refresh_image_list():
-    """Fetch the full image list from the database."""
-    global _all_images
-    with _all_images_lock:
-        _all_images = models.get_all_images_with_tags()
-    return _all_images
+def _get_pool():
+    """Return the image ID pool, loading it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = models.get_all_image_ids()
+        return _pool
 
 
-def _build_page(images_list):
-    """Build one ready-to-serve homepage from a list of all images."""
-    page_size = config.IMAGES_PER_PAGE
-    count = min(page_size, len(images_list))
-    if count == 0:
-        return [], 0
+def _pool_discard(image_id):
+    with _pool_lock:
+        if _pool is None:
+            return
+        i = bisect.bisect_left(_pool, image_id)
+        if i < len(_pool) and _pool[i] == image_id:
+            del _pool[i]
+
+
+def _pool_add(image_id):
+    with _pool_lock:
+        if _pool is None:
+            return
+        i = bisect.bisect_left(_pool, image_id)
+        if i == len(_pool) or _pool[i] != image_id:
+            _pool.insert(i, image_id)
+
+
+def _build_page(page_size=None):
+    """
+    Build one ready-to-serve homepage by sampling the ID pool.
+
+    Returns:
+        Tuple (page, total, image ids, filepaths)
+    """
+    page_size = page_size or config.IMAGES_PER_PAGE
+    with _pool_lock:
+        pool = _get_pool()
+        total = len(pool)
+        count = min(page_size, total)
+        if count == 0:
+            return [], 0, frozenset(), frozenset()
+        sample_ids = [pool[i] for i in random.sample(range(total), count)]
+
+    rows = models.get_images_with_tags_by_ids(sample_ids)
 
-    sample = random.sample(images_list, count)
-    page = [
-        {
+    # IDs deleted behind our back: drop them from the pool
+    for image_id in sample_ids:
+        if image_id not in rows:
+            _pool_discard(image_id)
+
+    page = []
+    for image_id in sample_ids:
+        img = rows.get(image_id)
+        if img is None:
+            continue
+        page.append({
             "path": f"images/{img['filepath']}",
             "thumb": get_thumbnail_path(f"images/{img['filepath']}"),
-            "tags": get_image_tags_as_string(img),
-        }
-        for img in sample
-    ]
-    return page, len(images_list)
+            "tags": img['tags'],
+        })
+    filepaths = frozenset(rows[i]['filepath'] for i in rows)
+    return page, total, frozenset(rows), filepaths
 
 
 def _producer_loop():
     """Background thread that keeps the buffer full."""
-    global _all_images
-
     while True:
         # Wait until buffer needs filling (or we're signaled to wake)
         _buffer_event.wait(timeout=5.0)
         _buffer_event.clear()
 
         try:
-            # Ensure we have an image list
-            if _all_images is None:
-                _refresh_image_list()
-
             # Fill buffer up to capacity
-            while len(_buffer) < _BUFFER_SIZE and _all_images:
-                page, total = _build_page(_all_images)
-                _buffer.append((page, total))
+            while len(_buffer) < _BUFFER_SIZE and len(_get_pool()):
+                _buffer.append(_build_page())
 
         except Exception as e:
             print(f"[HomepageCache] Producer error: {e}")
@@ -100,45 +134,127 @@ def _ensure_started():
         _started = True
 
 
-def get_homepage_images():
+def get_homepage_images(page_size=None):
     """
     Get a pre-assembled homepage image set.
 
+    Args:
+        page_size: Images per page; buffered pages are only used for the
+                   default IMAGES_PER_PAGE.
+
     Returns:
         Tuple of (images_list, total_count) ready for template rendering.
         Each image dict has 'path', 'thumb', 'tags' keys.
     """
     _ensure_started()
 
-    # Try to pop a pre-built page
-    try:
-        page, total = _buffer.popleft()
-        # Signal producer to refill
-        _buffer_event.set()
-        return page, total
-    except IndexError:
-        pass
-
-    # Cold start: build one synchronously
-    images = _all_images
-    if images is None:
-        images = _refresh_image_list()
+    if not page_size or page_size == config.IMAGES_PER_PAGE:
+        # Try to pop a pre-built page
+        try:
+            page, total, _, _ = _buffer.popleft()
+            # Signal producer to refill
+            _buffer_event.set()
+            return page, total
+        except IndexError:
+            pass
 
-    page, total = _build_page(images)
+    # Cold start (or non-default size): build one synchronously
+    page, total, _, _ = _build_page(page_size)
 
     # Signal producer to start filling
     _buffer_event.set()
     return page, total
 
 
+def invalidate_images(filepaths):
+    """
+    Drop buffered pages that contain any of the given images (call after an
+    image is deleted, re-rated or retagged) and sync their pool membership.
+
+    Args:
+        filepaths: Image paths relative to the images directory
+    """
+    filepaths = set(filepaths)
+    if not filepaths:
+        return
+
+    existing = models.get_image_ids_for_filepaths(filepaths)
+
+    with _pool_lock:
+        stale_ids = set()
+        kept = []
+        for entry in list(_buffer):
+            _, _, ids, paths = entry
+            if paths & filepaths:
+                # Remember IDs of pages that held a now-missing image
+                stale_ids.update(ids)
+            else:
+                kept.append(entry)
+        _buffer.clear()
+        _buffer.extend(kept)
+
+        for image_id in existing.values():
+            _pool_add(image_id)
+
+    if stale_ids:
+        # Any image from a dropped page that no longer exists leaves the pool
+        still_there = models.get_images_with_tags_by_ids(stale_ids)
+        for image_id in stale_ids - set(still_there):
+            _pool_discard(image_id)
+
+    _buffer_event.set()
+
+
+def invalidate_image_ids(image_ids):
+    """Like invalidate_images(), for callers that only know image IDs."""
+    image_ids = set(image_ids)
+    if not image_ids:
+        return
+    with _pool_lock:
+        kept = [entry for entry in _buffer if not (entry[2] & image_ids)]
+        _buffer.clear()
+        _buffer.extend(kept)
+    _buffer_event.set()
+
+
+def add_image_ids(image_ids):
+    """Add newly ingested images to the pool (buffered pages stay valid)."""
+    with _pool_lock:
+        for image_id in image_ids:
+            _pool_add(image_id)
+    _buffer_event.set()
+
+
+def remove_image_ids(image_ids):
+    """
+    Forget deleted images: drop buffered pages holding any of them and filter
+    them out of the pool in one pass (bulk deletes).
+    """
+    global _pool
+    image_ids = set(image_ids)
+    if not image_ids:
+        return
+    with _pool_lock:
+        kept = [entry for entry in _buffer if not (entry[2] & image_ids)]
+        _buffer.clear()
+        _buffer.extend(kept)
+        if _pool is not None:
+            _pool = array('i', (i for i in _pool if i not in image_ids))
+    _buffer_event.set()
+
+
 def invalidate():
     """
-    Invalidate the hot cache (call after image add/delete).
-    Flushes the buffer and refreshes the image list on next access.
+    Invalidate the hot cache (call after bulk changes).
+    Flushes the buffer and reloads the ID pool on next access.
     """
-    global _all_images
-    with _all_images_lock:
-        _all_images = None
-    _buffer.clear()
+    global _pool
+    with _pool_lock:
+        _pool = None
+        _buffer.clear()
     # Wake producer to rebuild
     _buffer_event.set()
+
+
+# A full data reload (upload, scan, rebuild) reloads the pool as well
+register_cache_invalidation_callback(invalidate)
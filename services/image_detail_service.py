@@ -0,0 +1,96 @@
+"""
+Image detail page data assembly.
+
+Everything the /view page needs (details with merged tags, tag display data,
+relations, upscale URL/ETag and the toolbar settings from config.yml) is
+gathered here, off the event loop. Independent lookups run concurrently in
+worker threads:
+
+    details  |  upscale info  |  page settings
+        -> tag display data  |  relations     (need the image ID)
+
+so a slow query delays only this page, not every request on the worker.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import config
+
+
+def _as_bool(value, default=False):
+    """Normalize bool-like config values from YAML/env sources."""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('true', '1', 'yes')
+
+
+def _setting(config_yml, key, default):
+    """Bool setting from config.yml, falling back to config.py, then default."""
+    fallback = getattr(config, key, default)
+    return _as_bool(config_yml.get(key, fallback), fallback)
+
+
+def get_page_settings() -> Dict[str, Any]:
+    """
+    Sidebar and toolbar settings for the image page.
+
+    Read from config.yml on each call (load_config is cached until saved) so
+    changes take effect without a restart.
+    """
+    from services.config_service import load_config
+    config_yml = load_config()
+    return {
+        'similar_sidebar_sources': str(config_yml.get('SIMILAR_SIDEBAR_SOURCES', 'both')).lower(),
+        'similar_sidebar_show_chips': _setting(config_yml, 'SIMILAR_SIDEBAR_SHOW_CHIPS', True),
+        'show_copy_tags_button': _setting(config_yml, 'IMAGE_TOOLBAR_SHOW_COPY_TAGS', True),
+        'show_tag_similar_button': _setting(config_yml, 'IMAGE_TOOLBAR_SHOW_TAG_SIMILAR', True),
+        'show_visual_similar_button': _setting(config_yml, 'IMAGE_TOOLBAR_SHOW_VISUAL_SIMILAR', True),
+        'show_raw_data_button': _setting(config_yml, 'IMAGE_TOOLBAR_SHOW_RAW_DATA', False),
+        'show_pools_controls': _setting(config_yml, 'IMAGE_PAGE_SHOW_POOLS', True),
+        # Information panel default: collapsed unless INFORMATION_PANEL_DEFAULT_VISIBLE is True
+        'information_panel_default_collapsed': not _setting(config_yml, 'INFORMATION_PANEL_DEFAULT_VISIBLE', False),
+    }
+
+
+async def get_image_page_data(lookup_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Gather all data for the image detail page.
+
+    Args:
+        lookup_path: Image path relative to the images directory
+
+    Returns:
+        Dict with 'data', 'tag_data', 'relations', 'upscaled_image_url',
+        'etag' and 'settings', or None if the image is not in the database.
+    """
+    from repositories.data_access import get_image_details_with_merged_tags
+    from repositories import relations_repository
+    from services import upscaler_service
+    from services.tag_display_service import prepare_tags_for_display
+
+    data, (upscaled_image_url, etag), settings = await asyncio.gather(
+        asyncio.to_thread(get_image_details_with_merged_tags, lookup_path),
+        asyncio.to_thread(upscaler_service.get_upscale_info, lookup_path),
+        asyncio.to_thread(get_page_settings),
+    )
+    if not data:
+        return None
+
+    image_id = data.get('id')
+    tag_data, relations = await asyncio.gather(
+        asyncio.to_thread(prepare_tags_for_display, data),
+        asyncio.to_thread(relations_repository.get_editable_relations_for_image, image_id)
+        if image_id else asyncio.sleep(0, result=[]),
+    )
+
+    return {
+        'data': data,
+        'tag_data': tag_data,
+        'relations': relations,
+        'upscaled_image_url': upscaled_image_url,
+        'etag': etag,
+        'settings': settings,
+    }
@@ -11,7 +11,7 @@ from utils.tag_extraction import (
     merge_tag_sources,
     deduplicate_categorized_tags
 )
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional
 import os
 import json
 import random
@@ -26,6 +26,19 @@ def get_images_for_api(search_query: str, page: int, per_page: Optional[int] = N
     page = max(page, 1)
     per_page = per_page or config.IMAGES_PER_PAGE
 
+    if not (search_query or '').strip():
+        # Default gallery is a random sample; serve it from the homepage hot cache
+        from services import homepage_cache
+        images_page, total_results = homepage_cache.get_homepage_images(per_page)
+        total_pages = (total_results + per_page - 1) // per_page
+        return {
+            "images": images_page,
+            "page": page,
+            "total_pages": total_pages,
+            "total_results": total_results,
+            "has_more": page < total_pages
+        }
+
     # Use the same search logic as the main page for consistency
     search_results, should_shuffle = query_service.perform_search(search_query)
 
@@ -72,7 +85,11 @@ def delete_image_service(data: Dict[str, Any]) -> Dict[str, Any]:
 
     try:
         # First, remove the database entry.
+        image_id = models.get_image_ids_for_filepaths([filepath]).get(filepath)
         db_success = models.delete_image(filepath)
+        if image_id is not None:
+            from services import duplicate_preview_cache
+            duplicate_preview_cache.invalidate_preview(image_id)
         print(f"[DELETE] Database deletion result: {db_success}")
         if not db_success:
             # This isn't a fatal error; the file might still exist on disk without a DB entry.
@@ -127,75 +144,31 @@ def delete_image_service(data: Dict[str, Any]) -> Dict[str, Any]:
         # Re-raise so api_handler can catch it and return 500
         raise e
 
-def delete_images_bulk_service(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Service to delete multiple images at once."""
-    from utils.validation import validate_list_of_integers, validate_string
-    
+def get_bulk_delete_filepaths(data: Dict[str, Any]) -> List[str]:
+    """Validate a bulk delete request and return paths relative to the images directory."""
+    from utils.validation import validate_string
+
     # Validate filepaths parameter
     filepaths = data.get('filepaths', [])
     if not filepaths or not isinstance(filepaths, list):
         raise ValueError("filepaths array is required")
-    
+
     # Validate each filepath is a string
     for i, filepath in enumerate(filepaths):
         if not isinstance(filepath, str):
             raise ValueError(f"filepaths[{i}] must be a string")
         validate_string(filepath, f"filepaths[{i}]", min_length=1)
 
-    results = {
-        "total": len(filepaths),
-        "deleted": 0,
-        "failed": 0,
-        "errors": []
-    }
-
-    for filepath in filepaths:
-        # The filepath from the frontend is 'images/folder/image.jpg'
-        # We need the path relative to the 'static/images' directory
-        clean_filepath = normalize_image_path(filepath)
+    # The filepath from the frontend is 'images/folder/image.jpg'
+    # We need the path relative to the 'static/images' directory
+    return [normalize_image_path(filepath) for filepath in filepaths]
 
-        try:
-            # Remove from database
-            db_success = models.delete_image(clean_filepath)
-
-            # Construct file paths
-            full_image_path = os.path.join("static/images", clean_filepath)
-            thumb_path = get_bucketed_thumbnail_path_on_disk(clean_filepath)
-
-            # Delete files
-            image_deleted = False
-            thumb_deleted = False
-
-            if os.path.exists(full_image_path):
-                os.remove(full_image_path)
-                image_deleted = True
-
-            if os.path.exists(thumb_path):
-                os.remove(thumb_path)
-                thumb_deleted = True
-
-            # Update cache
-            if db_success or image_deleted or thumb_deleted:
-                from core.cache_manager import remove_image_from_cache
-                remove_image_from_cache(clean_filepath)
-                # Remove upscaled version if it exists
-                from services.upscaler_service import delete_upscaled_image
-                delete_upscaled_image(clean_filepath)
-                
-                results["deleted"] += 1
-            else:
-                results["failed"] += 1
-                results["errors"].append(f"{clean_filepath}: Not found in database or filesystem")
 
-        except Exception as e:
-            results["failed"] += 1
-            results["errors"].append(f"{clean_filepath}: {str(e)}")
-            print(f"Error deleting image {clean_filepath}: {e}")
+def delete_images_bulk_service(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Service to delete multiple images at once."""
+    from services.deletion_service import delete_images
 
-    # Reload tag counts once after all deletions
-    if results["deleted"] > 0:
-        from core.cache_manager import invalidate_tag_cache
-        invalidate_tag_cache()
+    results = delete_images(get_bulk_delete_filepaths(data))
 
     return {
         "status": "success" if results["failed"] == 0 else "partial",
@@ -203,66 +176,52 @@ def delete_images_bulk_service(data: Dict[str, Any]) -> Dict[str, Any]:
         "results": results
     }
 
-def prepare_bulk_download(data: Dict[str, Any]) -> Tuple[Any, int]:
-    """Prepare a zip file of multiple images."""
-    import zipfile
-    import io
+def prepare_bulk_download(data: Dict[str, Any]) -> Any:
+    """
+    Prepare a streamed zip of multiple images.
+
+    Returns:
+        An iterator of archive chunks (see utils.zip_stream.iter_zip), or an
+        (error dict, 404) tuple when none of the files exist.
+    """
     from utils.validation import validate_string
-    
+    from utils.zip_stream import ArcnameAllocator, iter_zip
+
     filepaths = data.get('filepaths', [])
 
     if not filepaths or not isinstance(filepaths, list):
         raise ValueError("filepaths array is required")
-    
+
     # Validate each filepath is a string
     for i, filepath in enumerate(filepaths):
         if not isinstance(filepath, str):
             raise ValueError(f"filepaths[{i}] must be a string")
         validate_string(filepath, f"filepaths[{i}]", min_length=1)
 
-    # Create a zip file in memory
-    zip_buffer = io.BytesIO()
-    
-    files_added = 0
+    entries = []
     errors = []
+    arcnames = ArcnameAllocator()
 
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for filepath in filepaths:
-            # The filepath from the frontend is 'images/folder/image.jpg'
-            # We need the path relative to the 'static/images' directory
-            clean_filepath = normalize_image_path(filepath)
-            full_image_path = os.path.join("static/images", clean_filepath)
+    for filepath in filepaths:
+        # The filepath from the frontend is 'images/folder/image.jpg'
+        # We need the path relative to the 'static/images' directory
+        clean_filepath = normalize_image_path(filepath)
+        full_image_path = os.path.join("static/images", clean_filepath)
 
-            try:
-                if os.path.exists(full_image_path):
-                    # Add file to zip with just the basename to avoid nested folders
-                    arcname = os.path.basename(clean_filepath)
-                    
-                    # Handle duplicate filenames by appending a counter
-                    counter = 1
-                    original_arcname = arcname
-                    while arcname in zip_file.namelist():
-                        name, ext = os.path.splitext(original_arcname)
-                        arcname = f"{name}_{counter}{ext}"
-                        counter += 1
-                    
-                    zip_file.write(full_image_path, arcname)
-                    files_added += 1
-                else:
-                    errors.append(f"{clean_filepath}: File not found")
-            except Exception as e:
-                errors.append(f"{clean_filepath}: {str(e)}")
+        if os.path.isfile(full_image_path):
+            # Just the basename to avoid nested folders; duplicates get a counter
+            entries.append((full_image_path, arcnames.allocate(os.path.basename(clean_filepath))))
+        else:
+            errors.append(f"{clean_filepath}: File not found")
 
     # Check if any files were added
-    if files_added == 0:
+    if not entries:
         return {
             "error": "No valid images found",
             "errors": errors
         }, 404
 
-    # Seek to the beginning of the buffer
-    zip_buffer.seek(0)
-    return zip_buffer
+    return iter_zip(entries)
 
 def retry_tagging_service(data):
     """Service to retry tagging for an image that was previously tagged with local_tagger."""
@@ -608,11 +567,19 @@ async def _process_bulk_retry_tagging_task(task_id: str, task_manager, skip_loca
 
     await task_manager.update_progress(task_id, 0, total, f"Starting bulk retry for {total} images ({mode})")
 
+    lookup_batch = max(1, config.METADATA_LOOKUP_BATCH_SIZE)
+
     for idx, image in enumerate(local_tagged_images, 1):
         filepath = image['filepath']
         md5 = image['md5']
         image_id = image['id']
 
+        # Look up the next batch of MD5s in a few multi-hash requests; the
+        # per-image search_all_sources() calls below then hit the lookup cache
+        if not pixiv_only and (idx - 1) % lookup_batch == 0:
+            batch_md5s = [row['md5'] for row in local_tagged_images[idx - 1:idx - 1 + lookup_batch]]
+            await asyncio.to_thread(processing.search_all_sources_batch, batch_md5s)
+
         # Update progress every 10 images or on first/last
         if idx == 1 or idx == total or idx % 10 == 0:
             await task_manager.update_progress(
@@ -328,10 +328,13 @@ def find_unprocessed_images():
     Finds image files on disk that are not in the database.
     Also checks for MD5 duplicates and removes them automatically,
     but only if the file is not currently being processed by another thread.
+
+    MD5s come from the scan manifest, so files unchanged since the last scan
+    (same size, mtime and inode) are not read again, and known hashes are
+    looked up with one query per chunk.
     """
     import config
-    import hashlib
-    from database import get_db_connection
+    from services import scan_manifest
     from .processing.locks import acquire_processing_lock, release_processing_lock
     
     db_filepaths = models.get_all_filepaths()
@@ -341,50 +344,53 @@ def find_unprocessed_images():
 
     image_dir = os.path.abspath(config.IMAGE_DIRECTORY)
 
-    # Check configured image directory
-    for root, _, files in os.walk(image_dir):
-        for file in files:
-            if file.lower().endswith(config.SUPPORTED_MEDIA_EXTENSIONS):
-                filepath = os.path.join(root, file)
-                rel_path = os.path.relpath(filepath, image_dir).replace('\\', '/')
-                
-                if rel_path not in db_filepaths:
-                    # Filepath not in DB - but check if MD5 already exists (duplicate file)
-                    try:
-                        with open(filepath, 'rb') as f:
-                            md5 = hashlib.md5(f.read()).hexdigest()
-                        
-                        with get_db_connection() as conn:
-                            row = conn.execute('SELECT filepath FROM images WHERE md5 = ?', (md5,)).fetchone()
-                            if row:
-                                # Before deleting, check if another thread is actively processing this MD5
-                                lock_fd, acquired = acquire_processing_lock(md5)
-                                if not acquired:
-                                    # Another thread is actively processing this MD5 — do NOT delete
-                                    logger.debug(f"Skipping duplicate removal for {file} (MD5 {md5}) - currently being processed")
-                                    skipped_in_progress += 1
-                                    continue
-                                
-                                try:
-                                    # Re-verify inside lock that the DB entry still exists
-                                    row = conn.execute('SELECT filepath FROM images WHERE md5 = ?', (md5,)).fetchone()
-                                    if row:
-                                        # This is a duplicate file - same content, different name
-                                        logger.info(f"Auto-removing duplicate: {file} (MD5: {md5}, same as {row['filepath']})")
-                                        add_log(f"Auto-removing duplicate: {file} (same as {os.path.basename(row['filepath'])})", 'warning')
-                                        os.remove(filepath)
-                                        duplicates_removed += 1
-                                    else:
-                                        # DB entry disappeared between checks (another thread deleted it?)
-                                        logger.debug(f"MD5 {md5} no longer in DB after acquiring lock, treating {file} as unprocessed")
-                                        unprocessed_files.append(filepath)
-                                finally:
-                                    release_processing_lock(lock_fd)
-                                continue
-                    except Exception as e:
-                        add_log(f"Error checking MD5 for {file}: {e}", 'error')
-                    
-                    unprocessed_files.append(filepath)
+    # Collect files in the configured image directory that are not in the DB
+    candidates = []
+    for filepath, entry in scan_manifest.walk_media_files(image_dir, config.SUPPORTED_MEDIA_EXTENSIONS):
+        rel_path = os.path.relpath(filepath, image_dir).replace('\\', '/')
+        if rel_path in db_filepaths:
+            continue
+        try:
+            candidates.append((rel_path, filepath, entry.stat()))
+        except OSError as e:
+            add_log(f"Error checking MD5 for {entry.name}: {e}", 'error')
+
+    md5s = scan_manifest.resolve_md5s(candidates) if candidates else {}
+    known = scan_manifest.find_known_md5s(md5s.values()) if md5s else {}
+
+    for rel_path, filepath, _ in candidates:
+        file = os.path.basename(filepath)
+        md5 = md5s.get(rel_path)
+        if md5 is None:
+            add_log(f"Error checking MD5 for {file}: file could not be read", 'error')
+        elif md5 in known:
+            # Filepath not in DB but MD5 is (duplicate file)
+            # Before deleting, check if another thread is actively processing this MD5
+            lock_fd, acquired = acquire_processing_lock(md5)
+            if not acquired:
+                # Another thread is actively processing this MD5 — do NOT delete
+                logger.debug(f"Skipping duplicate removal for {file} (MD5 {md5}) - currently being processed")
+                skipped_in_progress += 1
+                continue
+
+            try:
+                # Re-verify inside lock that the DB entry still exists
+                existing = scan_manifest.find_known_md5s([md5]).get(md5)
+                if existing:
+                    # This is a duplicate file - same content, different name
+                    logger.info(f"Auto-removing duplicate: {file} (MD5: {md5}, same as {existing})")
+                    add_log(f"Auto-removing duplicate: {file} (same as {os.path.basename(existing)})", 'warning')
+                    os.remove(filepath)
+                    duplicates_removed += 1
+                    continue
+                # DB entry disappeared between checks (another thread deleted it?)
+                logger.debug(f"MD5 {md5} no longer in DB after acquiring lock, treating {file} as unprocessed")
+            except Exception as e:
+                add_log(f"Error checking MD5 for {file}: {e}", 'error')
+            finally:
+                release_processing_lock(lock_fd)
+
+        unprocessed_files.append(filepath)
 
     # Check ingest directory (use helper function)
     unprocessed_files.extend(find_ingest_files())
@@ -398,7 +404,7 @@ def find_unprocessed_images():
 
 def run_scan():
     """
-    Finds and processes all new images using parallel workers.
+    Finds and processes all new images through the pipelined ingest.
     Returns (processed_count, attempted_count) so callers can distinguish
     "no files found" from "files found but none processed".
     """
@@ -408,31 +414,15 @@ def run_scan():
     if not unprocessed_files:
         return 0, 0
 
-    add_log(f"Found {len(unprocessed_files)} new images. Starting parallel processing...", 'info')
-
-    # Use global executor if available; otherwise create a one-off executor for this scan.
-    # This allows "Run scan" from the UI to work when the monitor is external or not started.
-    executor = ingest_executor
-    one_off_executor = None
-    if not executor:
-        try:
-            max_workers = getattr(config, 'MAX_WORKERS', 4)
-            if max_workers <= 0:
-                import multiprocessing
-                max_workers = max(1, multiprocessing.cpu_count() - 1)
-            one_off_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="IngestWorker")
-            executor = one_off_executor
-            add_log("Using temporary executor for this scan.", 'info')
-        except Exception as e:
-            add_log(f"Failed to create executor for scan: {e}", 'error')
-            return 0, len(unprocessed_files)
+    add_log(f"Found {len(unprocessed_files)} new images. Starting pipelined processing...", 'info')
 
-    # Submit all files for processing, skipping any already in-progress
-    futures = {}
+    # Claim files for this scan, skipping any already in-progress
+    jobs = []
+    tracked = {}
     skipped = 0
+    abs_ingest = os.path.abspath(config.INGEST_DIRECTORY)
     for filepath in unprocessed_files:
         abs_filepath = os.path.abspath(filepath)
-        abs_ingest = os.path.abspath(config.INGEST_DIRECTORY)
         is_from_ingest = abs_filepath.startswith(abs_ingest)
         
         # Prevent double-submission: check if this file is already queued by watchdog
@@ -443,56 +433,44 @@ def run_scan():
                 continue
             _files_in_progress.add(abs_filepath)
         
-        future = executor.submit(processing.process_image_file, filepath, is_from_ingest)
-        futures[future] = (filepath, abs_filepath)
+        jobs.append((filepath, is_from_ingest))
+        tracked[filepath] = abs_filepath
     
     if skipped > 0:
         logger.info(f"Scan skipped {skipped} file(s) already being processed by watchdog")
         add_log(f"Skipped {skipped} file(s) already being processed", 'info')
 
     processed_count = 0
-    from concurrent.futures import as_completed
-    for future in as_completed(futures):
-        filepath, abs_filepath = futures[future]
-        try:
-            result = future.result()
-            # Handle 3-tuple (success, msg, failure_type) or 2-tuple (success, msg)
-            if isinstance(result, tuple):
-                if len(result) == 3:
-                    success, msg, failure_type = result
+    try:
+        for filepath, result in processing.run_ingest_pipeline(jobs):
+            try:
+                success, msg, failure_type = result
+                if success:
+                    processed_count += 1
+                    add_log(f"Successfully processed: {os.path.basename(filepath)}", 'success')
+                elif failure_type == 'duplicate':
+                    monitor_status["total_skipped_duplicate"] += 1
+                    add_log(f"Skipped duplicate: {os.path.basename(filepath)}", 'warning')
+                elif failure_type == 'race_condition':
+                    monitor_status["total_skipped_race"] += 1
+                    add_log(f"Skipped (already being processed): {os.path.basename(filepath)}", 'info')
                 else:
-                    success, msg = result
-                    failure_type = "unknown"
-            else:
-                success = bool(result)
-                msg = ""
-                failure_type = "unknown"
-            
-            if success:
-                processed_count += 1
-                add_log(f"Successfully processed: {os.path.basename(filepath)}", 'success')
-            elif failure_type == 'duplicate':
-                monitor_status["total_skipped_duplicate"] += 1
-                add_log(f"Skipped duplicate: {os.path.basename(filepath)}", 'warning')
-            elif failure_type == 'race_condition':
-                monitor_status["total_skipped_race"] += 1
-                add_log(f"Skipped (already being processed): {os.path.basename(filepath)}", 'info')
-            else:
-                # Only log real errors
-                monitor_status["total_failed"] += 1
-                add_log(f"Failed to process {os.path.basename(filepath)}: {msg}", 'error')
-        except Exception as e:
-            add_log(f"Error processing {os.path.basename(filepath)}: {e}", 'error')
-        finally:
-            # Release from tracking set
-            with _files_lock:
+                    # Only log real errors
+                    monitor_status["total_failed"] += 1
+                    add_log(f"Failed to process {os.path.basename(filepath)}: {msg}", 'error')
+            finally:
+                # Release from tracking set
+                with _files_lock:
+                    _files_in_progress.discard(tracked.pop(filepath, None))
+    except Exception as e:
+        add_log(f"Ingest pipeline error: {e}", 'error')
+    finally:
+        # Release anything the pipeline did not report back
+        with _files_lock:
+            for abs_filepath in tracked.values():
                 _files_in_progress.discard(abs_filepath)
 
-    if one_off_executor:
-        try:
-            one_off_executor.shutdown(wait=True)
-        except Exception:
-            pass
+    monitor_status["pipeline"] = processing.get_pipeline_stats()
 
     # Note: We don't reload the cache here because the monitor runs in a
     # separate process from the web server. The web server handles its own
@@ -2,14 +2,49 @@
 Priority Monitor - Auto-detect and apply BOORU_PRIORITY changes
 
 This module automatically detects when config.BOORU_PRIORITY changes
-and triggers a database repopulation to apply the new priority.
+and re-tags the images the new priority affects.
+
+Only images with more than one source can change, and only while they use a
+single source (merged images combine every source regardless of priority).
+The re-tag runs as a background job in the web process:
+
+- images are processed in id order, in batches; each batch commits the new
+  tags and the job's checkpoint together, so a restart resumes after the
+  last committed batch
+- an image keeps its old tags until the transaction holding its new tags
+  commits, so the app serves consistent data throughout
+- a lease in config_store keeps several workers from running it at once
+
+The stored priority hash is only updated once the job has finished.
 
 Called automatically on app startup.
 """
 
 import hashlib
 import json
+import os
+import threading
+import time
+import uuid
 from database import get_db_connection
+from utils.logging_config import get_logger
+
+logger = get_logger('Priority')
+
+# config_store keys for the re-tag job
+_PENDING_KEY = 'booru_priority_pending_hash'
+_CURSOR_KEY = 'booru_priority_cursor'
+_LEASE_KEY = 'booru_priority_lease'
+
+# Images per committed batch
+_BATCH_SIZE = 200
+
+# A lease not renewed within this long belongs to a dead process
+_LEASE_SECONDS = 120
+
+_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_job_lock = threading.Lock()
 
 
 def get_priority_hash(priority_list, version=1):
@@ -29,15 +64,12 @@ def get_priority_hash(priority_list, version=1):
     return hashlib.sha256(priority_str.encode()).hexdigest()
 
 
-def get_stored_priority_hash():
-    """Get the stored priority hash from database."""
+def _get_value(key):
+    """Read a config_store value, None if unset."""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT value FROM config_store
-                WHERE key = 'booru_priority_hash'
-            """)
+            cursor.execute("SELECT value FROM config_store WHERE key = ?", (key,))
             result = cursor.fetchone()
             return result['value'] if result else None
     except Exception:
@@ -45,6 +77,11 @@ def get_stored_priority_hash():
         return None
 
 
+def get_stored_priority_hash():
+    """Get the stored priority hash from database."""
+    return _get_value('booru_priority_hash')
+
+
 def store_priority_hash(priority_hash):
     """Store the current priority hash in database."""
     with get_db_connection() as conn:
@@ -72,10 +109,14 @@ def ensure_config_store_table():
 
 def check_and_apply_priority_changes():
     """
-    Check if BOORU_PRIORITY has changed and apply if needed.
+    Check if BOORU_PRIORITY has changed and schedule the re-tag if needed.
+
+    Does not re-tag anything itself: the job is started by
+    start_priority_reapply() once the app is serving. A job interrupted by a
+    restart stays scheduled and resumes from its checkpoint.
 
     Returns:
-        bool: True if priority was changed and applied, False otherwise
+        bool: True if a priority re-tag is pending, False otherwise
     """
     import config
 
@@ -99,8 +140,15 @@ def check_and_apply_priority_changes():
         store_priority_hash(current_hash)
         return False
 
-    # Check if priority changed
-    if current_hash != stored_hash:
+    pending_hash = _get_value(_PENDING_KEY)
+
+    # Unfinished job for the current priority: resume it
+    if pending_hash == current_hash:
+        print(f"🔄 Resuming BOORU_PRIORITY re-tag after image {_get_value(_CURSOR_KEY) or 0}")
+        return True
+
+    # Check if priority changed (or changed again while a job was pending)
+    if current_hash != stored_hash or pending_hash is not None:
         print("\n" + "=" * 70)
         print("🔄 BOORU_PRIORITY has changed!")
         print("=" * 70)
@@ -108,25 +156,213 @@ def check_and_apply_priority_changes():
         print("Current priority:")
         for i, source in enumerate(config.BOORU_PRIORITY, 1):
             print(f"  {i}. {source}")
-        print("\n⚙️  Automatically re-tagging all images...")
+        print("\n⚙️  Re-tagging affected multi-source images in the background...")
         print("   (Manual tag changes will be preserved)\n")
 
-        # Import here to avoid circular dependency
-        from database.models import repopulate_from_database
+        # Start over: images already re-tagged are skipped if still correct
+        with get_db_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO config_store (key, value) VALUES (?, ?)",
+                (_PENDING_KEY, current_hash)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO config_store (key, value) VALUES (?, '0')",
+                (_CURSOR_KEY,)
+            )
+            conn.commit()
+        return True
 
-        # Apply the new priority
-        repopulate_from_database()
+    return False
 
-        # Store the new hash
-        store_priority_hash(current_hash)
 
-        print("\n" + "=" * 70)
-        print("✅ Priority change applied successfully!")
-        print("=" * 70 + "\n")
+# ============================================================================
+# Background re-tag job
+# ============================================================================
+
+def _acquire_lease(conn):
+    """Take or renew the job lease. True if this process holds it."""
+    now = time.time()
+    cur = conn.execute("""
+        INSERT INTO config_store (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        WHERE CAST(substr(value, 1, instr(value, ':') - 1) AS REAL) < ?
+           OR substr(value, instr(value, ':') + 1) = ?
+    """, (_LEASE_KEY, f"{now + _LEASE_SECONDS}:{_WORKER_ID}", now, _WORKER_ID))
+    return cur.rowcount > 0
+
+
+def _next_batch(conn, after_id):
+    """Next images with more than one source, in id order."""
+    return conn.execute("""
+        SELECT i.id, i.filepath, i.md5, i.active_source, rm.data
+        FROM images i
+        JOIN raw_metadata rm ON rm.image_id = i.id
+        WHERE i.id > ?
+          AND (SELECT COUNT(*) FROM image_sources s WHERE s.image_id = i.id) > 1
+        ORDER BY i.id
+        LIMIT ?
+    """, (after_id, _BATCH_SIZE)).fetchall()
+
+
+def _retag_batch(conn, rows):
+    """Re-tag the affected images of one batch. Returns [(filepath, md5)] changed."""
+    from database.models import select_primary_source, retag_image_from_source
+
+    cur = conn.cursor()
+    changed = []
+    # One transaction for the whole batch; savepoints isolate failing images
+    if not conn.in_transaction:
+        cur.execute("BEGIN")
+    for row in rows:
+        # Merged images combine every source; priority does not apply
+        if row['active_source'] == 'merged':
+            continue
+        try:
+            sources = json.loads(row['data']).get('sources', {})
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            continue
+        source_name, source_data = select_primary_source(sources)
+        if not source_data or source_name == row['active_source']:
+            continue
+
+        cur.execute("SAVEPOINT retag_image")
+        try:
+            retag_image_from_source(cur, row['id'], row['md5'], source_name, source_data)
+        except Exception as e:
+            cur.execute("ROLLBACK TO retag_image")
+            logger.warning(f"Failed to re-tag {row['filepath']}: {e}")
+        else:
+            changed.append((row['filepath'], row['md5']))
+        cur.execute("RELEASE retag_image")
+    return changed
+
+
+def _refresh_caches(changed, tags_added):
+    """Update this process's caches for re-tagged images."""
+    from core.cache_manager import reload_images
+    from core.tag_id_cache import reload_tag_id_cache
+    from events.cache_events import trigger_image_invalidation
+    from services import homepage_cache
+
+    if tags_added:
+        reload_tag_id_cache()
+    filepaths = [filepath for filepath, _ in changed]
+    reload_images(filepaths)
+    trigger_image_invalidation(filepaths=filepaths, md5s=[md5 for _, md5 in changed])
+    homepage_cache.invalidate_images(filepaths)
+
+
+def apply_pending_priority_changes(progress_callback=None):
+    """
+    Run (or resume) the scheduled BOORU_PRIORITY re-tag.
 
-        return True
+    Args:
+        progress_callback: Optional callable(processed, total, message)
 
-    return False
+    Returns:
+        int: Number of images re-tagged, or -1 if nothing was pending or
+             another process holds the job
+    """
+    import config
+
+    target_hash = _get_value(_PENDING_KEY)
+    if target_hash is None:
+        return -1
+
+    with get_db_connection() as conn:
+        if not _acquire_lease(conn):
+            conn.commit()
+            logger.info("BOORU_PRIORITY re-tag is running in another process")
+            return -1
+        conn.commit()
+
+    after_id = int(_get_value(_CURSOR_KEY) or 0)
+    retagged = 0
+    started = time.time()
+
+    if config.USE_MERGED_SOURCES_BY_DEFAULT:
+        logger.info("Merged sources are the default; priority changes affect no images")
+    else:
+        with get_db_connection() as conn:
+            total = conn.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT image_id FROM image_sources GROUP BY image_id HAVING COUNT(*) > 1
+                )
+            """).fetchone()[0]
+            processed = conn.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT image_id FROM image_sources WHERE image_id <= ?
+                    GROUP BY image_id HAVING COUNT(*) > 1
+                )
+            """, (after_id,)).fetchone()[0]
+        logger.info(f"Applying BOORU_PRIORITY to {total - processed} multi-source images...")
+
+        while True:
+            with get_db_connection() as conn:
+                rows = _next_batch(conn, after_id)
+                if not rows:
+                    break
+                max_tag_id = conn.execute("SELECT MAX(id) FROM tags").fetchone()[0] or 0
+                changed = _retag_batch(conn, rows)
+                after_id = rows[-1]['id']
+                # Checkpoint in the same transaction as the batch's tags
+                conn.execute(
+                    "UPDATE config_store SET value = ? WHERE key = ?",
+                    (str(after_id), _CURSOR_KEY)
+                )
+                if not _acquire_lease(conn):
+                    conn.rollback()
+                    logger.warning("Lost the BOORU_PRIORITY re-tag lease; stopping")
+                    return retagged
+                tags_added = (conn.execute("SELECT MAX(id) FROM tags").fetchone()[0] or 0) > max_tag_id
+                conn.commit()
+
+            if changed:
+                retagged += len(changed)
+                _refresh_caches(changed, tags_added)
+            processed += len(rows)
+            if progress_callback:
+                progress_callback(processed, total, f"Re-tagged {retagged} images")
+
+    # Only finish the job this run was started for
+    finished = _get_value(_PENDING_KEY) == target_hash
+    with get_db_connection() as conn:
+        if finished:
+            conn.execute(
+                "INSERT OR REPLACE INTO config_store (key, value) VALUES ('booru_priority_hash', ?)",
+                (target_hash,)
+            )
+            conn.execute(
+                "DELETE FROM config_store WHERE key IN (?, ?)",
+                (_PENDING_KEY, _CURSOR_KEY)
+            )
+        conn.execute("DELETE FROM config_store WHERE key = ?", (_LEASE_KEY,))
+        conn.commit()
+
+    if retagged:
+        from core.cache_manager import invalidate_tag_cache
+        invalidate_tag_cache()
+    logger.info(f"✅ BOORU_PRIORITY applied: {retagged} images re-tagged in {time.time() - started:.1f}s")
+    return retagged
+
+
+def start_priority_reapply():
+    """Run a pending re-tag in a background thread (no-op if none is pending)."""
+    if _get_value(_PENDING_KEY) is None:
+        return False
+
+    def _run():
+        if not _job_lock.acquire(blocking=False):
+            return
+        try:
+            apply_pending_priority_changes()
+        except Exception as e:
+            logger.error(f"BOORU_PRIORITY re-tag failed: {e}")
+        finally:
+            _job_lock.release()
+
+    threading.Thread(target=_run, name="priority-reapply", daemon=True).start()
+    return True
 
 
 if __name__ == "__main__":
@@ -5,7 +5,9 @@ This package contains image processing functionality split into focused modules:
 - rate_limiter: SauceNAO API rate limiting
 - locks: File-based locking for concurrent processing
 - metadata_fetchers: Fetching metadata from various sources
-- image_processor: Core image processing logic
+- lookup_cache: Persistent cache of booru MD5 lookup results
+- image_processor: Core image processing logic, split into ingest stages
+- ingest_pipeline: Multi-stage threaded ingest with batched commits
 - thumbnail_generator: Thumbnail generation
 """
 
@@ -15,6 +17,8 @@ from .metadata_fetchers import (
     search_danbooru,
     search_e621,
     search_all_sources,
+    search_all_sources_batch,
+    lookup_md5s,
     search_saucenao,
     fetch_by_post_id,
     fetch_pixiv_metadata,
@@ -29,6 +33,7 @@ from .image_processor import (
     process_image_file,
     is_pixiv_complemented
 )
+from .ingest_pipeline import run_ingest_pipeline, get_pipeline_stats
 from .thumbnail_generator import ensure_thumbnail
 from . import constants
 
@@ -40,6 +45,8 @@ __all__ = [
     'search_danbooru',
     'search_e621',
     'search_all_sources',
+    'search_all_sources_batch',
+    'lookup_md5s',
     'search_saucenao',
     'fetch_by_post_id',
     'fetch_pixiv_metadata',
@@ -51,5 +58,7 @@ __all__ = [
     'extract_tag_data',
     'process_image_file',
     'is_pixiv_complemented',
+    'run_ingest_pipeline',
+    'get_pipeline_stats',
     'ensure_thumbnail',
 ]
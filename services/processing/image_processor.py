@@ -25,7 +25,7 @@ from .metadata_fetchers import (
     extract_pixiv_id_from_filename,
     fetch_pixiv_metadata
 )
-from .thumbnail_generator import ensure_thumbnail
+from .thumbnail_generator import ensure_thumbnail, encode_thumbnail
 from .constants import (
     CHARACTER_THRESHOLD,
     DEFAULT_TAGGER_THRESHOLD,
@@ -242,50 +242,75 @@ def extract_tag_data(data, source):
     }
 
 
-def process_image_file(filepath, move_from_ingest=True):
+# ============================================================================
+# INGEST STAGES
+# ============================================================================
+# process_image_file() runs these stages back to back for one file. The
+# ingest pipeline (ingest_pipeline.py) runs each stage on its own threads
+# with bounded queues in between, and persists many images per transaction.
+
+class IngestItem:
+    """Per-file state carried from one ingest stage to the next."""
+
+    def __init__(self, filepath, move_from_ingest=True):
+        self.filepath = filepath
+        self.move_from_ingest = move_from_ingest
+        self.filename = os.path.basename(filepath)
+        self.md5 = None
+        self.lock_fd = None
+        self.is_video = filepath.lower().endswith(('.mp4', '.webm'))
+        self.is_zip_animation = filepath.lower().endswith('.zip')
+        self.all_results = {}
+        self.saucenao_used = False
+        self.local_tagger_used = False
+        self.hashes = {}
+        self.file_dest = None
+        self.db_path = None
+        self.image_info = None
+        self.categorized_tags = None
+        self.raw_metadata = None
+        # Encoded thumbnail produced during hashing (saved in finalize)
+        self.thumbnail_data = None
+        # (success, message, failure_type) once the outcome is known
+        self.result = None
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def fail(self, msg, failure_type="error"):
+        self.result = (False, msg, failure_type)
+
+
+def stage_hash(item):
     """
-    Process a single image file with unified flow.
-    
-    This is the main entry point for processing images. It handles:
-    1. Pre-flight checks (file exists, MD5 calculation, duplicate detection)
-    2. Metadata fetching (MD5 lookup, SauceNao, local tagger)
-    3. Hash computation (phash, colorhash, embedding - all in one pass)
-    4. File operations (move from ingest if needed)
-    5. Database commit (single transaction)
-    6. Post-processing (thumbnail, cache updates)
-    
-    Args:
-        filepath: Path to the image file
-        move_from_ingest: If True, move file from ingest folder to bucketed structure
-        
-    Returns:
-        Tuple (success, message)
+    Stage 1: pre-flight checks, MD5, processing lock and duplicate detection.
+
+    Leaves item.lock_fd set when the lock was taken; stage_finalize() releases it.
     """
-    from utils.file_utils import ensure_bucket_dir, get_hash_bucket
-    import hashlib
-    
-    # ========== STAGE 1: PRE-FLIGHT CHECKS ==========
+    filepath, filename = item.filepath, item.filename
+
     # Check if file exists (race condition check for concurrent processing)
     if not os.path.exists(filepath):
         msg = f"[Processing] File not found (likely processed by another thread): {filepath}"
         logger.info(msg)
-        return False, msg, "race_condition"
-    
-    filename = os.path.basename(filepath)
+        return item.fail(msg, "race_condition")
+
     logger.info(f"Starting: {filename}")
-    
+
     # Calculate MD5 immediately
     try:
         md5 = get_file_md5(filepath)
         if md5 is None:
             msg = f"[Processing] ERROR: Failed to calculate MD5 for {filename} (File not found or unreadable)"
             logger.error(msg)
-            return False, msg, "error"
+            return item.fail(msg)
     except Exception as e:
         msg = f"[Processing] ERROR: Failed to calculate MD5 for {filename}: {e}"
         logger.error(msg)
-        return False, msg, "error"
-    
+        return item.fail(msg)
+    item.md5 = md5
+
     # Check for duplicate in database (with lock)
     lock_fd, acquired = acquire_processing_lock(md5)
     if not acquired:
@@ -298,540 +323,660 @@ def process_image_file(filepath, move_from_ingest=True):
                 row = conn.execute('SELECT filepath FROM images WHERE md5 = ?', (md5,)).fetchone()
                 if row:
                     existing_filepath = row['filepath']
-            
+
             # Check that we're not deleting the actual canonical file
             if existing_filepath and os.path.abspath(filepath) != os.path.abspath(os.path.join(config.IMAGE_DIRECTORY, existing_filepath)):
                 msg = f"[Processing] Duplicate detected (concurrent): {filename} (same as {os.path.basename(existing_filepath) if existing_filepath else 'existing file'})"
                 logger.info(msg)
-                
+
                 if os.path.exists(filepath):
                     try:
                         os.remove(filepath)
                         print(f"[Processing] Removed duplicate file: {filename}")
                     except Exception as e:
                         print(f"[Processing] WARNING: Could not remove duplicate file {filename}: {e}")
-                
-                return False, msg, "duplicate"
-        
+
+                return item.fail(msg, "duplicate")
+
         # Not a duplicate, genuinely being processed by another thread
         msg = f"[Processing] Skipped: {filename} (already being processed by another thread)"
         logger.debug(msg)
-        return False, msg, "race_condition"
-    
-    try:
-        # Re-check duplicate inside lock
-        if models.md5_exists(md5):
-            existing_filepath = None
-            with get_db_connection() as conn:
-                row = conn.execute('SELECT filepath FROM images WHERE md5 = ?', (md5,)).fetchone()
-                if row:
-                    existing_filepath = row['filepath']
-            
-            msg = f"[Processing] Duplicate detected: {filename} (same as {os.path.basename(existing_filepath) if existing_filepath else 'existing file'})"
-            logger.info(msg)
-
-            # If this is the canonical file already stored in the DB, do not delete it.
-            if existing_filepath:
-                canonical_path = os.path.abspath(os.path.join(config.IMAGE_DIRECTORY, existing_filepath))
-                if os.path.abspath(filepath) == canonical_path:
-                    msg = f"[Processing] Duplicate check hit canonical file, skipping deletion: {filename}"
-                    logger.info(msg)
-                    return False, msg, "duplicate"
-            
-            # Remove duplicate file if it exists (e.g., ingest copy or stray file)
-            if os.path.exists(filepath):
-                try:
-                    os.remove(filepath)
-                    print(f"[Processing] Removed duplicate file: {filename}")
-                except Exception as e:
-                    print(f"[Processing] WARNING: Could not remove duplicate file {filename}: {e}")
-            
-            return False, msg, "duplicate"
-        
-        # ========== STAGE 2: METADATA FETCHING ==========
-        is_video = filepath.lower().endswith(('.mp4', '.webm'))
-        is_zip_animation = filepath.lower().endswith('.zip')
-        
-        # Parallel metadata fetching
-        all_results = search_all_sources(md5)
-        saucenao_used = False
-        local_tagger_used = False
-        
-        if is_zip_animation:
-            # Minimal processing for zip files
-            pass
-        elif is_video:
-            # Video tagging via local tagger
-            local_tagger_result = tag_video_with_frames(filepath)
-            if local_tagger_result:
-                all_results[local_tagger_result['source']] = local_tagger_result['data']
-                local_tagger_used = True
+        return item.fail(msg, "race_condition")
+
+    item.lock_fd = lock_fd
+
+    # Re-check duplicate inside lock
+    if models.md5_exists(md5):
+        existing_filepath = None
+        with get_db_connection() as conn:
+            row = conn.execute('SELECT filepath FROM images WHERE md5 = ?', (md5,)).fetchone()
+            if row:
+                existing_filepath = row['filepath']
+
+        msg = f"[Processing] Duplicate detected: {filename} (same as {os.path.basename(existing_filepath) if existing_filepath else 'existing file'})"
+        logger.info(msg)
+
+        # If this is the canonical file already stored in the DB, do not delete it.
+        if existing_filepath:
+            canonical_path = os.path.abspath(os.path.join(config.IMAGE_DIRECTORY, existing_filepath))
+            if os.path.abspath(filepath) == canonical_path:
+                msg = f"[Processing] Duplicate check hit canonical file, skipping deletion: {filename}"
+                logger.info(msg)
+                return item.fail(msg, "duplicate")
+
+        # Remove duplicate file if it exists (e.g., ingest copy or stray file)
+        if os.path.exists(filepath):
+            try:
+                os.remove(filepath)
+                print(f"[Processing] Removed duplicate file: {filename}")
+            except Exception as e:
+                print(f"[Processing] WARNING: Could not remove duplicate file {filename}: {e}")
+
+        return item.fail(msg, "duplicate")
+
+
+def stage_metadata(item):
+    """Stage 2: online metadata (MD5 lookup, SauceNao, Pixiv). Network-bound."""
+    filepath, filename = item.filepath, item.filename
+
+    # Parallel metadata fetching
+    item.all_results = search_all_sources(item.md5)
+
+    # Videos are tagged from frames; zip animations get minimal processing
+    if item.is_video or item.is_zip_animation or item.all_results:
+        return
+
+    # Try SauceNao if no MD5 match
+    all_results = item.all_results
+    saucenao_resp = search_saucenao(filepath)
+    if saucenao_resp:
+        item.saucenao_used = True
+        if 'results' in saucenao_resp:
+            for r in saucenao_resp.get('results', []):
+                if float(r['header']['similarity']) > SAUCENAO_SIMILARITY_THRESHOLD:
+                    for url in r['data'].get('ext_urls', []):
+                        post_id, source = None, None
+                        # Parse URL to extract source and post ID
+                        # Use startswith for more secure URL matching
+                        if url.startswith('https://danbooru.donmai.us/'):
+                            post_id = url.split('/posts/')[-1].split('?')[0]
+                            source = 'danbooru'
+                        elif url.startswith('https://e621.net/'):
+                            post_id = url.split('/posts/')[-1].split('?')[0]
+                            source = 'e621'
+
+                        if post_id and source:
+                            fetched = fetch_by_post_id(source, post_id)
+                            if fetched:
+                                all_results[fetched['source']] = fetched['data']
+                                break
+                    if all_results:
+                        break
+
+    # Try Pixiv ID extraction
+    if not all_results:
+        pixiv_id = extract_pixiv_id_from_filename(filename)
+        if pixiv_id:
+            pixiv_result = fetch_pixiv_metadata(pixiv_id)
+            if pixiv_result:
+                all_results[pixiv_result['source']] = pixiv_result['data']
+
+
+def stage_tagging(item):
+    """Stage 3: local tagger, zip extraction and similarity hashes. CPU/ML-bound."""
+    filepath, filename, md5 = item.filepath, item.filename, item.md5
+    all_results = item.all_results
+
+    if item.is_zip_animation:
+        # Minimal processing for zip files
+        pass
+    elif item.is_video:
+        # Video tagging via local tagger
+        local_tagger_result = tag_video_with_frames(filepath)
+        if local_tagger_result:
+            all_results[local_tagger_result['source']] = local_tagger_result['data']
+            item.local_tagger_used = True
+        else:
+            # FAIL-FAST: Video tagging failed
+            msg = f"[Processing] ERROR: Video tagging failed for {filename}. File NOT ingested."
+            logger.error(msg)
+            return item.fail(msg)
+    else:
+        # Local tagger logic: run if always-on, no online sources, or Pixiv needs complementation
+        should_run_tagger = False
+        if config.LOCAL_TAGGER_ALWAYS_RUN:
+            should_run_tagger = True
+        elif not all_results:
+            should_run_tagger = True
+        elif 'pixiv' in all_results and not is_pixiv_complemented(all_results):
+            should_run_tagger = True
+            print(f"[Processing] Pixiv metadata found for {filename}; forcing local tagger complementation.")
+
+        if should_run_tagger:
+            lt_res = tag_with_local_tagger(filepath)
+            if lt_res:
+                all_results[lt_res['source']] = lt_res['data']
+                item.local_tagger_used = True
             else:
-                # FAIL-FAST: Video tagging failed
-                msg = f"[Processing] ERROR: Video tagging failed for {filename}. File NOT ingested."
+                # FAIL-FAST: Local tagger was required but failed
+                msg = f"[Processing] ERROR: Local tagger failed for {filename}. File NOT ingested."
                 logger.error(msg)
-                return False, msg, "error"
-        else:
-            # Standard image processing
-            if not all_results:
-                # Try SauceNao if no MD5 match
-                saucenao_resp = search_saucenao(filepath)
-                if saucenao_resp:
-                    saucenao_used = True
-                    if 'results' in saucenao_resp:
-                        for r in saucenao_resp.get('results', []):
-                            if float(r['header']['similarity']) > SAUCENAO_SIMILARITY_THRESHOLD:
-                                for url in r['data'].get('ext_urls', []):
-                                    post_id, source = None, None
-                                    # Parse URL to extract source and post ID
-                                    # Use startswith for more secure URL matching
-                                    if url.startswith('https://danbooru.donmai.us/'):
-                                        post_id = url.split('/posts/')[-1].split('?')[0]
-                                        source = 'danbooru'
-                                    elif url.startswith('https://e621.net/'):
-                                        post_id = url.split('/posts/')[-1].split('?')[0]
-                                        source = 'e621'
-                                    
-                                    if post_id and source:
-                                        fetched = fetch_by_post_id(source, post_id)
-                                        if fetched:
-                                            all_results[fetched['source']] = fetched['data']
-                                            break
-                                if all_results:
-                                    break
-                
-                # Try Pixiv ID extraction
-                if not all_results:
-                    pixiv_id = extract_pixiv_id_from_filename(filename)
-                    if pixiv_id:
-                        pixiv_result = fetch_pixiv_metadata(pixiv_id)
-                        if pixiv_result:
-                            all_results[pixiv_result['source']] = pixiv_result['data']
-            
-            # Local tagger logic: run if always-on, no online sources, or Pixiv needs complementation
-            should_run_tagger = False
-            if config.LOCAL_TAGGER_ALWAYS_RUN:
-                should_run_tagger = True
-            elif not all_results:
-                should_run_tagger = True
-            elif 'pixiv' in all_results and not is_pixiv_complemented(all_results):
-                should_run_tagger = True
-                print(f"[Processing] Pixiv metadata found for {filename}; forcing local tagger complementation.")
-            
-            if should_run_tagger:
-                lt_res = tag_with_local_tagger(filepath)
-                if lt_res:
-                    all_results[lt_res['source']] = lt_res['data']
-                    local_tagger_used = True
-                else:
-                    # FAIL-FAST: Local tagger was required but failed
-                    msg = f"[Processing] ERROR: Local tagger failed for {filename}. File NOT ingested."
-                    logger.error(msg)
-                    return False, msg, "error"
+                return item.fail(msg)
 
-            if 'pixiv' in all_results and not is_pixiv_complemented(all_results):
-                msg = f"[Processing] ERROR: Pixiv metadata for {filename} requires booru or local tagger tags. File NOT ingested."
-                logger.error(msg)
-                return False, msg, "error"
-        
-        # Extract zip animation before hash computation (phash/colorhash/dimensions need frames)
-        if is_zip_animation:
-            from services import zip_animation_service
-            extract_result = zip_animation_service.extract_zip_animation(filepath, md5)
-            if not extract_result:
-                msg = f"[Processing] ERROR: Failed to extract zip animation for {filename}. File NOT ingested."
-                logger.error(msg)
-                return False, msg, "error"
-        
-        # ========== STAGE 3: HASH COMPUTATION (ALL IN ONE PASS) ==========
-        hashes = {}
-        from services import similarity_service
-        
-        # Compute perceptual hash
+        if 'pixiv' in all_results and not is_pixiv_complemented(all_results):
+            msg = f"[Processing] ERROR: Pixiv metadata for {filename} requires booru or local tagger tags. File NOT ingested."
+            logger.error(msg)
+            return item.fail(msg)
+
+    # Extract zip animation before hash computation (phash/colorhash/dimensions need frames)
+    if item.is_zip_animation:
+        from services import zip_animation_service
+        extract_result = zip_animation_service.extract_zip_animation(filepath, md5)
+        if not extract_result:
+            msg = f"[Processing] ERROR: Failed to extract zip animation for {filename}. File NOT ingested."
+            logger.error(msg)
+            return item.fail(msg)
+
+    # ========== HASH COMPUTATION (ALL IN ONE PASS) ==========
+    hashes = item.hashes
+    from services import similarity_service
+
+    # Still images (and the first frame of zip animations) are decoded once
+    # for pHash, colorhash, the embedding input and the thumbnail
+    analysis = None
+    analysis_source = filepath
+    if item.is_zip_animation:
+        from services import zip_animation_service
+        analysis_source = zip_animation_service.get_frame_path(md5, 0)
+    source_ok = bool(analysis_source) and os.path.exists(analysis_source)
+    if not item.is_video and source_ok:
+        analysis = similarity_service.analyze_image(
+            analysis_source,
+            semantic_size=config.SEMANTIC_IMAGE_SIZE if similarity_service.SEMANTIC_AVAILABLE else None,
+            thumb_size=config.THUMB_SIZE,
+        )
+
+    # Compute perceptual hash
+    if analysis:
+        phash = analysis.phash
+    else:
         phash = similarity_service.compute_phash_for_file(filepath, md5)
-        if phash:
-            hashes['phash'] = phash
+    if phash:
+        hashes['phash'] = phash
+    else:
+        # FAIL-FAST: Hash computation is required
+        msg = f"[Processing] ERROR: Failed to compute perceptual hash for {filename}. File NOT ingested."
+        logger.error(msg)
+        return item.fail(msg)
+
+    # Compute color hash
+    if analysis:
+        colorhash = analysis.colorhash
+    else:
+        colorhash = similarity_service.compute_colorhash_for_file(filepath)
+    if colorhash:
+        hashes['colorhash'] = colorhash
+    # Note: colorhash failure is not fatal, phash is sufficient
+
+    if analysis and analysis.thumbnail is not None:
+        try:
+            item.thumbnail_data = encode_thumbnail(analysis.thumbnail)
+        except Exception as e:
+            logger.warning(f"Thumbnail encode failed for {filename}, will regenerate: {e}")
+
+    # Compute semantic embedding if available
+    if similarity_service.SEMANTIC_AVAILABLE:
+        engine = similarity_service.get_semantic_engine()
+        if not engine.load_model():
+            # FAIL-FAST: Similarity is enabled but model failed to load
+            print(f"[Processing] ERROR: Failed to load similarity model for {filename}. File NOT ingested.")
+            return item.fail("Failed to load similarity model")
+        # For zip animations use first frame path (ML Worker expects an image file)
+        embedding_path = analysis_source if item.is_zip_animation and source_ok else filepath
+        embedding = engine.get_embedding(
+            embedding_path,
+            pixels=analysis.semantic_pixels if analysis else None,
+        )
+        if embedding is not None:
+            hashes['embedding'] = embedding
         else:
-            # FAIL-FAST: Hash computation is required
-            msg = f"[Processing] ERROR: Failed to compute perceptual hash for {filename}. File NOT ingested."
+            # FAIL-FAST: Similarity is enabled but embedding failed
+            msg = f"[Processing] ERROR: Failed to compute similarity embedding for {filename}. File NOT ingested."
             logger.error(msg)
-            return False, msg, "error"
-        
-        # Compute color hash
-        colorhash = similarity_service.compute_colorhash_for_file(filepath)
-        if colorhash:
-            hashes['colorhash'] = colorhash
-        # Note: colorhash failure is not fatal, phash is sufficient
-        
-        # Compute semantic embedding if available
-        if similarity_service.SEMANTIC_AVAILABLE:
-            engine = similarity_service.get_semantic_engine()
-            if not engine.load_model():
-                # FAIL-FAST: Similarity is enabled but model failed to load
-                print(f"[Processing] ERROR: Failed to load similarity model for {filename}. File NOT ingested.")
-                return False, "Failed to load similarity model", "error"
-            # For zip animations use first frame path (ML Worker expects an image file)
-            embedding_path = filepath
-            if is_zip_animation:
-                first_frame = zip_animation_service.get_frame_path(md5, 0)
-                if first_frame and os.path.exists(first_frame):
-                    embedding_path = first_frame
-            embedding = engine.get_embedding(embedding_path)
-            if embedding is not None:
-                hashes['embedding'] = embedding
-            else:
-                # FAIL-FAST: Similarity is enabled but embedding failed
-                msg = f"[Processing] ERROR: Failed to compute similarity embedding for {filename}. File NOT ingested."
-                logger.error(msg)
-                return False, msg, "error"
-        
-        # ========== STAGE 4: FILE OPERATIONS ==========
-        # Determine strict filename (renaming if necessary)
-        # Strategy:
-        # 1. If in subdirectory of ingest: ParentFolder_-_Filename.ext
-        # 2. If in root of ingest: Filename_MD5.ext
-        # 3. If not from ingest (e.g. upload): keep original name
-        
-        final_filename = filename
-        if move_from_ingest:
-            try:
-                abs_ingest = os.path.abspath(config.INGEST_DIRECTORY)
-                abs_filepath = os.path.abspath(filepath)
-                
-                # Check if file is inside ingest directory
-                if abs_filepath.startswith(abs_ingest):
-                    rel_path = os.path.relpath(abs_filepath, abs_ingest)
-                    parent_dir = os.path.dirname(rel_path)
-                    
-                    name_base, name_ext = os.path.splitext(filename)
-                    
-                    if parent_dir and parent_dir != '.':
-                        # Case 1: Subdirectory -> Use immediate parent folder
-                        immediate_parent = os.path.basename(parent_dir)
-                        final_filename = f"{immediate_parent}_-_{filename}"
-                    else:
-                        # Case 2: Root of ingest -> Append MD5
-                        final_filename = f"{name_base}_{md5}{name_ext}"
-                        
-                    print(f"[Processing] Renaming {filename} -> {final_filename}")
-                    
-            except Exception as e:
-                print(f"[Processing] WARNING: Error calculating new filename: {e}")
-                # Fallback to original filename
-                pass
-
-        # Ensure filename fits filesystem limit (e.g. 255 bytes); truncate + hash if too long
-        final_filename = sanitize_filename_for_fs(final_filename)
-
-        file_dest = filepath
-        if move_from_ingest:
-            # Canonical bucket attempt with NEW filename
-            canonical_bucket = get_hash_bucket(final_filename, BUCKET_CHARS)
-            
-            # Find a free filename/bucket
-            attempt = 0
-            target_filename = final_filename
-            final_bucket = canonical_bucket
-            
-            while True:
-                bucket_dir = os.path.join(config.IMAGE_DIRECTORY, final_bucket)
-                os.makedirs(bucket_dir, exist_ok=True)
-                new_path = os.path.join(bucket_dir, target_filename)
-                
-                if os.path.exists(new_path):
-                    # File exists at this path
-                    if get_file_md5(new_path) == md5:
-                        # Same file, remove ingest copy
-                        try:
-                            os.remove(filepath)
-                        except Exception as e:
-                            print(f"[Processing] WARNING: Failed to remove source file {filepath}: {e}")
-                             
-                        file_dest = new_path
-                        print(f"[Processing] File already at destination: {new_path}")
-                        break
-                    else:
-                        # Different file! Collision!
-                        print(f"[Processing] Collision for {target_filename} at bucket {final_bucket}.", 'warning')
-                        
-                        # Strategy: Append MD5 to filename if not already there
-                        name_base, name_ext = os.path.splitext(target_filename)
-                        
-                        # check if md5 is already in the name to avoid infinite appending
-                        if md5 in name_base:
-                             # Fallback to bucket iteration if MD5 is already there
-                             print(f"[Processing] MD5 already in filename, trying alternate bucket...")
-                             attempt += 1
-                             salt = f"_collision_{attempt}"
-                             alt_hash = hashlib.md5((target_filename + salt).encode()).hexdigest()
-                             final_bucket = alt_hash[:BUCKET_CHARS]
-                        else:
-                             # Append MD5 to filename and try again (this changes the canonical bucket)
-                             print(f"[Processing] Appending MD5 to resolve collision...")
-                             target_filename = sanitize_filename_for_fs(
-                                 f"{name_base}_{md5}{name_ext}"
-                             )
-                             # Recalculate bucket for the new filename
-                             final_bucket = get_hash_bucket(target_filename, BUCKET_CHARS)
-                        
-                        if attempt > MAX_COLLISION_ATTEMPTS:
-                            msg = f"[Processing] ERROR: Too many filename collisions for {filename} (gave up after {MAX_COLLISION_ATTEMPTS} attempts)"
-                            logger.error(msg)
-                            return False, msg, "error"
+            return item.fail(msg)
+
+
+def stage_place_file(item):
+    """
+    Stage 4a: move the file into the bucketed image directory and build the
+    database row (tags, rating, dimensions, raw metadata). Disk-bound.
+    """
+    from utils.file_utils import get_hash_bucket
+    import hashlib
+
+    filepath, filename, md5 = item.filepath, item.filename, item.md5
+    all_results = item.all_results
+
+    # Determine strict filename (renaming if necessary)
+    # Strategy:
+    # 1. If in subdirectory of ingest: ParentFolder_-_Filename.ext
+    # 2. If in root of ingest: Filename_MD5.ext
+    # 3. If not from ingest (e.g. upload): keep original name
+
+    final_filename = filename
+    if item.move_from_ingest:
+        try:
+            abs_ingest = os.path.abspath(config.INGEST_DIRECTORY)
+            abs_filepath = os.path.abspath(filepath)
+
+            # Check if file is inside ingest directory
+            if abs_filepath.startswith(abs_ingest):
+                rel_path = os.path.relpath(abs_filepath, abs_ingest)
+                parent_dir = os.path.dirname(rel_path)
+
+                name_base, name_ext = os.path.splitext(filename)
+
+                if parent_dir and parent_dir != '.':
+                    # Case 1: Subdirectory -> Use immediate parent folder
+                    immediate_parent = os.path.basename(parent_dir)
+                    final_filename = f"{immediate_parent}_-_{filename}"
                 else:
-                    # Found a free slot!
+                    # Case 2: Root of ingest -> Append MD5
+                    final_filename = f"{name_base}_{md5}{name_ext}"
+
+                print(f"[Processing] Renaming {filename} -> {final_filename}")
+
+        except Exception as e:
+            print(f"[Processing] WARNING: Error calculating new filename: {e}")
+            # Fallback to original filename
+            pass
+
+    # Ensure filename fits filesystem limit (e.g. 255 bytes); truncate + hash if too long
+    final_filename = sanitize_filename_for_fs(final_filename)
+
+    file_dest = filepath
+    if item.move_from_ingest:
+        # Canonical bucket attempt with NEW filename
+        canonical_bucket = get_hash_bucket(final_filename, BUCKET_CHARS)
+
+        # Find a free filename/bucket
+        attempt = 0
+        target_filename = final_filename
+        final_bucket = canonical_bucket
+
+        while True:
+            bucket_dir = os.path.join(config.IMAGE_DIRECTORY, final_bucket)
+            os.makedirs(bucket_dir, exist_ok=True)
+            new_path = os.path.join(bucket_dir, target_filename)
+
+            if os.path.exists(new_path):
+                # File exists at this path
+                if get_file_md5(new_path) == md5:
+                    # Same file, remove ingest copy
                     try:
-                        shutil.move(filepath, new_path)
-                        file_dest = new_path
-                        print(f"[Processing] Moved to: {new_path}")
-                        break
+                        os.remove(filepath)
                     except Exception as e:
-                        msg = f"[Processing] ERROR: Failed to move file to {new_path}: {e}"
+                        print(f"[Processing] WARNING: Failed to remove source file {filepath}: {e}")
+
+                    file_dest = new_path
+                    print(f"[Processing] File already at destination: {new_path}")
+                    break
+                else:
+                    # Different file! Collision!
+                    print(f"[Processing] Collision for {target_filename} at bucket {final_bucket}.", 'warning')
+
+                    # Strategy: Append MD5 to filename if not already there
+                    name_base, name_ext = os.path.splitext(target_filename)
+
+                    # check if md5 is already in the name to avoid infinite appending
+                    if md5 in name_base:
+                         # Fallback to bucket iteration if MD5 is already there
+                         print(f"[Processing] MD5 already in filename, trying alternate bucket...")
+                         attempt += 1
+                         salt = f"_collision_{attempt}"
+                         alt_hash = hashlib.md5((target_filename + salt).encode()).hexdigest()
+                         final_bucket = alt_hash[:BUCKET_CHARS]
+                    else:
+                         # Append MD5 to filename and try again (this changes the canonical bucket)
+                         print(f"[Processing] Appending MD5 to resolve collision...")
+                         target_filename = sanitize_filename_for_fs(
+                             f"{name_base}_{md5}{name_ext}"
+                         )
+                         # Recalculate bucket for the new filename
+                         final_bucket = get_hash_bucket(target_filename, BUCKET_CHARS)
+
+                    if attempt > MAX_COLLISION_ATTEMPTS:
+                        msg = f"[Processing] ERROR: Too many filename collisions for {filename} (gave up after {MAX_COLLISION_ATTEMPTS} attempts)"
                         logger.error(msg)
-                        return False, msg, "error"
-        
-        db_path = os.path.relpath(file_dest, config.IMAGE_DIRECTORY).replace('\\', '/')
-        
-        # ========== STAGE 5: DATABASE COMMIT ==========
-        # Prepare metadata
-        primary_source_data = None
-        source_name = None
-        priority = config.BOORU_PRIORITY
-        for src in priority:
-            if src in all_results:
-                primary_source_data = all_results[src]
-                source_name = src
-                break
-
-        if not primary_source_data or not source_name:
-            msg = f"[Processing] ERROR: No valid primary source for {filename}. File NOT ingested."
-            logger.error(msg)
-            return False, msg, "error"
-        
-        # Check if we should merge multiple booru sources
-        # Count how many "real" booru sources we have (excluding local_tagger which is AI-generated)
-        booru_sources = [s for s in all_results.keys() if s not in ('local_tagger', 'camie_tagger')]
-        should_merge_sources = (
-            config.USE_MERGED_SOURCES_BY_DEFAULT and
-            len(booru_sources) > 1
-        )
-        
-        if should_merge_sources:
-            # Merge tags from all booru sources
-            from utils.tag_extraction import merge_multiple_tag_sources
-            # Build a dict of only booru sources for merging
-            booru_results = {k: v for k, v in all_results.items() if k in booru_sources}
-            extracted_tags = merge_multiple_tag_sources(booru_results)
-            extracted_tags = deduplicate_categorized_tags(extracted_tags)
-            source_name = 'merged'
-            logger.info(f"Merged tags from sources: {list(booru_results.keys())}")
-        elif source_name == 'pixiv' and 'local_tagger' in all_results:
-            # Merge Pixiv + Local Tagger if needed
-            extracted_tags = extract_tags_from_source(primary_source_data, source_name)
-            local_tagger_tags = extract_tags_from_source(all_results['local_tagger'], 'local_tagger')
-            extracted_tags = merge_tag_sources(
-                extracted_tags,
-                local_tagger_tags,
-                merge_categories=['character', 'copyright', 'species', 'meta', 'general']
-            )
-            extracted_tags = deduplicate_categorized_tags(extracted_tags)
-        else:
-            extracted_tags = extract_tags_from_source(primary_source_data, source_name)
-            extracted_tags = deduplicate_categorized_tags(extracted_tags)
-        
-        categorized_tags = {
-            'character': extracted_tags['tags_character'].split(),
-            'copyright': extracted_tags['tags_copyright'].split(),
-            'artist': extracted_tags['tags_artist'].split(),
-            'species': extracted_tags['tags_species'].split(),
-            'meta': extracted_tags['tags_meta'].split(),
-            'general': extracted_tags['tags_general'].split()
-        }
-        
-        rating, rating_source = extract_rating_from_source(primary_source_data, source_name)
-        
-        parent_id = primary_source_data.get('parent_id') if primary_source_data else None
-        if source_name == 'e621' and primary_source_data:
-            parent_id = primary_source_data.get('relationships', {}).get('parent_id')
-        
-        image_info = {
-            'filepath': db_path,
-            'md5': md5,
-            'post_id': primary_source_data.get('id') if primary_source_data else None,
-            'parent_id': parent_id,
-            'has_children': primary_source_data.get('has_children', False) if primary_source_data else False,
-            'saucenao_lookup': saucenao_used,
-            'rating': rating,
-            'rating_source': rating_source,
-            'image_width': None,
-            'image_height': None,
-        }
-        
-        # Get image dimensions using PIL
-        try:
-            if is_zip_animation:
-                # For zip animations, get dimensions from first frame
-                from services import zip_animation_service
-                first_frame = zip_animation_service.get_frame_path(md5, 0)
-                if first_frame and os.path.exists(first_frame):
-                    with Image.open(first_frame) as img:
-                        image_info['image_width'] = img.width
-                        image_info['image_height'] = img.height
-            elif is_video:
-                # For videos, try to get dimensions using ffprobe
-                ffprobe_path = shutil.which('ffprobe')
-                if ffprobe_path:
-                    result = subprocess.run([
-                        ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
-                        '-show_entries', 'stream=width,height', '-of', 'csv=p=0',
-                        file_dest
-                    ], capture_output=True, text=True)
-                    if result.returncode == 0 and result.stdout.strip():
-                        parts = result.stdout.strip().split(',')
-                        if len(parts) == 2:
-                            image_info['image_width'] = int(parts[0])
-                            image_info['image_height'] = int(parts[1])
+                        return item.fail(msg)
             else:
-                # Regular image - read dimensions with PIL
-                with Image.open(file_dest) as img:
+                # Found a free slot!
+                try:
+                    shutil.move(filepath, new_path)
+                    file_dest = new_path
+                    print(f"[Processing] Moved to: {new_path}")
+                    break
+                except Exception as e:
+                    msg = f"[Processing] ERROR: Failed to move file to {new_path}: {e}"
+                    logger.error(msg)
+                    return item.fail(msg)
+
+    db_path = os.path.relpath(file_dest, config.IMAGE_DIRECTORY).replace('\\', '/')
+    item.file_dest = file_dest
+    item.db_path = db_path
+
+    # Prepare metadata
+    primary_source_data = None
+    source_name = None
+    priority = config.BOORU_PRIORITY
+    for src in priority:
+        if src in all_results:
+            primary_source_data = all_results[src]
+            source_name = src
+            break
+
+    if not primary_source_data or not source_name:
+        msg = f"[Processing] ERROR: No valid primary source for {filename}. File NOT ingested."
+        logger.error(msg)
+        return item.fail(msg)
+
+    # Check if we should merge multiple booru sources
+    # Count how many "real" booru sources we have (excluding local_tagger which is AI-generated)
+    booru_sources = [s for s in all_results.keys() if s not in ('local_tagger', 'camie_tagger')]
+    should_merge_sources = (
+        config.USE_MERGED_SOURCES_BY_DEFAULT and
+        len(booru_sources) > 1
+    )
+
+    if should_merge_sources:
+        # Merge tags from all booru sources
+        from utils.tag_extraction import merge_multiple_tag_sources
+        # Build a dict of only booru sources for merging
+        booru_results = {k: v for k, v in all_results.items() if k in booru_sources}
+        extracted_tags = merge_multiple_tag_sources(booru_results)
+        extracted_tags = deduplicate_categorized_tags(extracted_tags)
+        source_name = 'merged'
+        logger.info(f"Merged tags from sources: {list(booru_results.keys())}")
+    elif source_name == 'pixiv' and 'local_tagger' in all_results:
+        # Merge Pixiv + Local Tagger if needed
+        extracted_tags = extract_tags_from_source(primary_source_data, source_name)
+        local_tagger_tags = extract_tags_from_source(all_results['local_tagger'], 'local_tagger')
+        extracted_tags = merge_tag_sources(
+            extracted_tags,
+            local_tagger_tags,
+            merge_categories=['character', 'copyright', 'species', 'meta', 'general']
+        )
+        extracted_tags = deduplicate_categorized_tags(extracted_tags)
+    else:
+        extracted_tags = extract_tags_from_source(primary_source_data, source_name)
+        extracted_tags = deduplicate_categorized_tags(extracted_tags)
+
+    item.categorized_tags = {
+        'character': extracted_tags['tags_character'].split(),
+        'copyright': extracted_tags['tags_copyright'].split(),
+        'artist': extracted_tags['tags_artist'].split(),
+        'species': extracted_tags['tags_species'].split(),
+        'meta': extracted_tags['tags_meta'].split(),
+        'general': extracted_tags['tags_general'].split()
+    }
+
+    rating, rating_source = extract_rating_from_source(primary_source_data, source_name)
+
+    parent_id = primary_source_data.get('parent_id') if primary_source_data else None
+    if source_name == 'e621' and primary_source_data:
+        parent_id = primary_source_data.get('relationships', {}).get('parent_id')
+
+    image_info = {
+        'filepath': db_path,
+        'md5': md5,
+        'post_id': primary_source_data.get('id') if primary_source_data else None,
+        'parent_id': parent_id,
+        'has_children': primary_source_data.get('has_children', False) if primary_source_data else False,
+        'saucenao_lookup': item.saucenao_used,
+        'rating': rating,
+        'rating_source': rating_source,
+        'image_width': None,
+        'image_height': None,
+    }
+
+    # Get image dimensions using PIL
+    try:
+        if item.is_zip_animation:
+            # For zip animations, get dimensions from first frame
+            from services import zip_animation_service
+            first_frame = zip_animation_service.get_frame_path(md5, 0)
+            if first_frame and os.path.exists(first_frame):
+                with Image.open(first_frame) as img:
                     image_info['image_width'] = img.width
                     image_info['image_height'] = img.height
+        elif item.is_video:
+            # For videos, try to get dimensions using ffprobe
+            ffprobe_path = shutil.which('ffprobe')
+            if ffprobe_path:
+                result = subprocess.run([
+                    ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
+                    '-show_entries', 'stream=width,height', '-of', 'csv=p=0',
+                    file_dest
+                ], capture_output=True, text=True)
+                if result.returncode == 0 and result.stdout.strip():
+                    parts = result.stdout.strip().split(',')
+                    if len(parts) == 2:
+                        image_info['image_width'] = int(parts[0])
+                        image_info['image_height'] = int(parts[1])
+        else:
+            # Regular image - read dimensions with PIL
+            with Image.open(file_dest) as img:
+                image_info['image_width'] = img.width
+                image_info['image_height'] = img.height
+    except Exception as e:
+        print(f"[Processing] WARNING: Could not read dimensions for {filename}: {e}")
+
+    # Add computed hashes to image_info
+    if 'phash' in item.hashes:
+        image_info['phash'] = item.hashes['phash']
+    if 'colorhash' in item.hashes:
+        image_info['colorhash'] = item.hashes['colorhash']
+
+    item.raw_metadata = {
+        "md5": md5,
+        "relative_path": db_path,
+        "saucenao_lookup": item.saucenao_used,
+        "saucenao_response": None,  # Don't save full response to save space
+        "local_tagger_lookup": item.local_tagger_used,
+        "sources": all_results
+    }
+
+    # Mark image_info if it should use merged sources
+    if should_merge_sources:
+        image_info['use_merged_source'] = True
+
+    item.image_info = image_info
+
+
+def persist_items(items):
+    """
+    Stage 4b: insert a batch of prepared images in one transaction.
+
+    Each image gets its own savepoint, so one failed insert (e.g. a duplicate
+    MD5 race) only drops that image from the batch.
+    """
+    pending = [item for item in items if not item.done]
+    if not pending:
+        return
+
+    with get_db_connection() as conn:
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            for item in pending:
+                # Insert into database (only real booru sources in the list)
+                success = models.add_image_with_metadata(
+                    item.image_info,
+                    list(item.all_results.keys()),
+                    item.categorized_tags,
+                    item.raw_metadata,
+                    commit=False
+                )
+                if not success:
+                    msg = f"[Processing] ERROR: Database insert failed for {item.filename}"
+                    logger.error(msg)
+                    item.fail(msg)
+            conn.commit()
         except Exception as e:
-            print(f"[Processing] WARNING: Could not read dimensions for {filename}: {e}")
-        
-        # Add computed hashes to image_info
-        if 'phash' in hashes:
-            image_info['phash'] = hashes['phash']
-        if 'colorhash' in hashes:
-            image_info['colorhash'] = hashes['colorhash']
-        
-        raw_metadata_to_save = {
-            "md5": md5,
-            "relative_path": db_path,
-            "saucenao_lookup": saucenao_used,
-            "saucenao_response": None,  # Don't save full response to save space
-            "local_tagger_lookup": local_tagger_used,
-            "sources": all_results
-        }
-        
-        # Mark image_info if it should use merged sources
-        if should_merge_sources:
-            image_info['use_merged_source'] = True
-        
-        # Insert into database (only real booru sources in the list)
-        success = models.add_image_with_metadata(
-            image_info,
-            list(all_results.keys()),
-            categorized_tags,
-            raw_metadata_to_save
-        )
-        
-        if not success:
-            msg = f"[Processing] ERROR: Database insert failed for {filename}"
-            logger.error(msg)
-            return False, msg, "error"
+            conn.rollback()
+            for item in pending:
+                if not item.done:
+                    msg = f"[Processing] ERROR: Database insert failed for {item.filename}: {e}"
+                    logger.error(msg)
+                    item.fail(msg)
 
-        
-        # ========== STAGE 6: POST-PROCESSING ==========
-        # Create image relations (parent/child/sibling) from booru metadata
-        if image_info.get('parent_id') or image_info.get('post_id'):
-            try:
-                from repositories import relations_repository
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT id FROM images WHERE filepath = ?", (db_path,))
-                    row = cursor.fetchone()
-                    if row:
-                        stats = relations_repository.create_relations_on_ingest(
-                            new_image_id=row['id'],
-                            parent_id=image_info.get('parent_id'),
-                            post_id=image_info.get('post_id'),
-                        )
-                        if stats['parent_found'] or stats['children_found'] or stats['siblings_created']:
-                            logger.info(
-                                f"Relations for {filename}: parent={stats['parent_found']}, "
-                                f"children={stats['children_found']}, siblings={stats['siblings_created']}"
-                            )
-            except Exception as e:
-                # Don't fail ingestion if relation creation fails
-                logger.warning(f"Failed to create relations for {filename}: {e}")
 
-        # Save semantic embedding if computed
-        if 'embedding' in hashes:
-            try:
-                from services import similarity_db
-                # Get image ID
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT id FROM images WHERE filepath = ?", (db_path,))
-                    row = cursor.fetchone()
-                    if row:
-                        similarity_db.save_embedding(row['id'], hashes['embedding'])
-                        
-                        # Compute and cache similarities if cache is enabled
-                        if config.SIMILARITY_CACHE_ENABLED:
-                            try:
-                                from services import similarity_cache
-                                # Queue for background processing to not block ingestion
-                                # For now, do it inline since we're already in a background thread
-                                similarity_cache.compute_and_cache_for_image(
-                                    row['id'],
-                                    similarity_type='blended',
-                                    force=True
-                                )
-                                print(f"[Processing] Cached similarities for {filename}")
-                            except Exception as e:
-                                # Don't fail ingestion if caching fails
-                                print(f"[Processing] WARNING: Failed to cache similarities for {filename}: {e}")
-            except Exception as e:
-                print(f"[Processing] WARNING: Failed to save embedding for {filename}: {e}")
-        
-        # Store tagger predictions if available
-        if 'local_tagger' in all_results:
-            local_data = all_results['local_tagger']
-            all_predictions = local_data.get('all_predictions', [])
-            if all_predictions:
+def stage_finalize(item):
+    """
+    Stage 5: relations, embedding, tagger predictions, thumbnail and
+    implications for a persisted image. Always releases the processing lock.
+    """
+    try:
+        if not item.done:
+            _post_process(item)
+            logger.info(f"Successfully processed: {item.filename}")
+            item.result = (True, "Successfully processed", "success")
+    except Exception as e:
+        msg = f"[Processing] ERROR processing {item.filename}: {e}"
+        logger.error(msg)
+        import traceback
+        traceback.print_exc()
+        item.fail(msg)
+    finally:
+        release_processing_lock(item.lock_fd)
+        item.lock_fd = None
+
+
+def _post_process(item):
+    filename, db_path, md5 = item.filename, item.db_path, item.md5
+    image_info, hashes, all_results = item.image_info, item.hashes, item.all_results
+
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT id FROM images WHERE filepath = ?", (db_path,)).fetchone()
+    image_id = row['id'] if row else None
+
+    # Create image relations (parent/child/sibling) from booru metadata
+    if image_id and (image_info.get('parent_id') or image_info.get('post_id')):
+        try:
+            from repositories import relations_repository
+            stats = relations_repository.create_relations_on_ingest(
+                new_image_id=image_id,
+                parent_id=image_info.get('parent_id'),
+                post_id=image_info.get('post_id'),
+            )
+            if stats['parent_found'] or stats['children_found'] or stats['siblings_created']:
+                logger.info(
+                    f"Relations for {filename}: parent={stats['parent_found']}, "
+                    f"children={stats['children_found']}, siblings={stats['siblings_created']}"
+                )
+        except Exception as e:
+            # Don't fail ingestion if relation creation fails
+            logger.warning(f"Failed to create relations for {filename}: {e}")
+
+    # Save semantic embedding if computed
+    if image_id and 'embedding' in hashes:
+        try:
+            from services import similarity_db
+            similarity_db.save_embedding(image_id, hashes['embedding'])
+
+            # Compute and cache similarities if cache is enabled
+            if config.SIMILARITY_CACHE_ENABLED:
                 try:
-                    from repositories import tagger_predictions_repository
-                    with get_db_connection() as conn:
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT id FROM images WHERE filepath = ?", (db_path,))
-                        row = cursor.fetchone()
-                        if row:
-                            tagger_predictions_repository.store_predictions(
-                                row['id'], 
-                                all_predictions, 
-                                local_data.get('tagger_name')
-                            )
+                    from services import similarity_cache
+                    # Inline: ingest already runs off the request path
+                    similarity_cache.compute_and_cache_for_image(
+                        image_id,
+                        similarity_type='blended',
+                        force=True
+                    )
+                    print(f"[Processing] Cached similarities for {filename}")
                 except Exception as e:
-                    print(f"[Processing] WARNING: Failed to save predictions for {filename}: {e}")
-        
-        # Generate thumbnail
-        # Ensure thumbnail respects the final destination bucket
-        ensure_thumbnail(file_dest, md5=md5)
-        
-        # Apply tag implications if enabled
-        if config.APPLY_IMPLICATIONS_ON_INGEST:
+                    # Don't fail ingestion if caching fails
+                    print(f"[Processing] WARNING: Failed to cache similarities for {filename}: {e}")
+        except Exception as e:
+            print(f"[Processing] WARNING: Failed to save embedding for {filename}: {e}")
+
+    # Store tagger predictions if available
+    if image_id and 'local_tagger' in all_results:
+        local_data = all_results['local_tagger']
+        all_predictions = local_data.get('all_predictions', [])
+        if all_predictions:
             try:
-                from repositories.tag_repository import apply_implications_for_image
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT id FROM images WHERE filepath = ?", (db_path,))
-                    row = cursor.fetchone()
-                    if row:
-                        if apply_implications_for_image(row['id']):
-                            logger.debug(f"Applied tag implications for: {filename}")
+                from repositories import tagger_predictions_repository
+                tagger_predictions_repository.store_predictions(
+                    image_id,
+                    all_predictions,
+                    local_data.get('tagger_name')
+                )
             except Exception as e:
-                logger.warning(f"Failed to apply implications for {filename}: {e}")
-        
-        logger.info(f"Successfully processed: {filename}")
-        return True, "Successfully processed", "success"
-        
+                print(f"[Processing] WARNING: Failed to save predictions for {filename}: {e}")
+
+    # Generate thumbnail
+    # Ensure thumbnail respects the final destination bucket
+    ensure_thumbnail(item.file_dest, md5=md5, thumbnail_data=item.thumbnail_data)
+
+    # Show it on the homepage without waiting for a full cache reload
+    if image_id:
+        from services import homepage_cache
+        homepage_cache.add_image_ids([image_id])
+
+    # Apply tag implications if enabled
+    if image_id and config.APPLY_IMPLICATIONS_ON_INGEST:
+        try:
+            from repositories.tag_repository import apply_implications_for_image
+            if apply_implications_for_image(image_id):
+                logger.debug(f"Applied tag implications for: {filename}")
+        except Exception as e:
+            logger.warning(f"Failed to apply implications for {filename}: {e}")
+
+
+def run_ingest_stage(stage, item):
+    """Run one per-item stage, turning unexpected exceptions into a failure."""
+    if item.done:
+        return
+    try:
+        stage(item)
     except Exception as e:
-        msg = f"[Processing] ERROR processing {filename}: {e}"
+        msg = f"[Processing] ERROR processing {item.filename}: {e}"
         logger.error(msg)
         import traceback
         traceback.print_exc()
-        return False, msg, "error"
+        item.fail(msg)
+
+
+def process_image_file(filepath, move_from_ingest=True):
+    """
+    Process a single image file with unified flow.
+
+    This is the main entry point for processing images. It runs the ingest
+    stages in order for one file:
+    1. Pre-flight checks (file exists, MD5 calculation, duplicate detection)
+    2. Metadata fetching (MD5 lookup, SauceNao, Pixiv)
+    3. Tagging and hash computation (local tagger, phash, colorhash, embedding)
+    4. File operations and database commit (single transaction)
+    5. Post-processing (thumbnail, cache updates)
+
+    For many files at once use ingest_pipeline.run_ingest_pipeline(), which
+    overlaps the stages and groups database commits.
+
+    Args:
+        filepath: Path to the image file
+        move_from_ingest: If True, move file from ingest folder to bucketed structure
+
+    Returns:
+        Tuple (success, message, failure_type)
+    """
+    item = IngestItem(filepath, move_from_ingest)
+    try:
+        for stage in (stage_hash, stage_metadata, stage_tagging, stage_place_file):
+            run_ingest_stage(stage, item)
+        persist_items([item])
     finally:
-        release_processing_lock(lock_fd)
+        # Also releases the processing lock when an earlier stage failed
+        stage_finalize(item)
+    return item.result
@@ -0,0 +1,308 @@
+"""
+Pipelined multi-stage ingest.
+
+Runs the stages of process_image_file() concurrently across many files:
+
+    hash -> metadata -> tagging -> place -> persist -> finalize
+
+Each stage has its own worker threads and reads from a bounded queue, so a
+slow stage (usually metadata lookups or the tagger) applies backpressure
+upstream instead of letting hashed files, held processing locks and decoded
+results pile up in memory. The persist stage is a single thread that inserts
+up to INGEST_PERSIST_BATCH_SIZE images per transaction. Files that fail or
+turn out to be duplicates go straight to finalize, which releases their
+processing lock.
+
+Per-stage counters (items, failures, busy time, throughput) are kept for the
+most recent run and exposed through get_pipeline_stats().
+"""
+
+import queue
+import threading
+import time
+
+import config
+from utils.logging_config import get_logger
+from .image_processor import (
+    IngestItem,
+    stage_hash,
+    stage_metadata,
+    stage_tagging,
+    stage_place_file,
+    persist_items,
+    stage_finalize,
+    run_ingest_stage,
+)
+
+logger = get_logger('IngestPipeline')
+
+# Queue sentinel: tells a stage worker that its input is exhausted
+_DONE = object()
+
+_last_stats = {}
+_last_stats_lock = threading.Lock()
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, count, failed, seconds):
+        with self._lock:
+            self.items += count
+            self.failed += failed
+            self.busy_seconds += seconds
+
+    def as_dict(self, elapsed):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'items': self.items,
+                'failed': self.failed,
+                'busy_seconds': round(self.busy_seconds, 2),
+                'items_per_sec': round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+                'utilization': round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed > 0 else 0.0,
+            }
+
+
+class _Stage:
+    """Worker threads draining one bounded queue into the next."""
+
+    def __init__(self, name, workers, inbox):
+        self.name = name
+        self.workers = max(1, workers)
+        self.inbox = inbox
+        self.stats = StageStats(name, self.workers)
+        self._remaining = self.workers
+        self._remaining_lock = threading.Lock()
+
+    def worker_finished(self):
+        """Return True for the last worker of the stage to exit."""
+        with self._remaining_lock:
+            self._remaining -= 1
+            return self._remaining == 0
+
+
+class IngestPipeline:
+    """
+    One ingest run over a fixed list of files.
+
+    Args:
+        queue_size: Capacity of each inter-stage queue (default INGEST_QUEUE_SIZE)
+        batch_size: Images per persist transaction (default INGEST_PERSIST_BATCH_SIZE)
+    """
+
+    def __init__(self, queue_size=None, batch_size=None):
+        self.queue_size = max(1, queue_size or config.INGEST_QUEUE_SIZE)
+        self.batch_size = max(1, batch_size or config.INGEST_PERSIST_BATCH_SIZE)
+        self.batch_wait = config.INGEST_PERSIST_MAX_WAIT
+
+        tag_workers = config.MAX_WORKERS
+        if tag_workers <= 0:
+            import multiprocessing
+            tag_workers = max(1, multiprocessing.cpu_count() - 1)
+
+        def new_queue():
+            return queue.Queue(maxsize=self.queue_size)
+
+        self._stages = [
+            _Stage('hash', config.INGEST_HASH_WORKERS, new_queue()),
+            _Stage('metadata', config.INGEST_METADATA_WORKERS, new_queue()),
+            _Stage('tagging', tag_workers, new_queue()),
+            _Stage('place', 1, new_queue()),
+            _Stage('persist', 1, new_queue()),
+            _Stage('finalize', config.INGEST_FINALIZE_WORKERS, new_queue()),
+        ]
+        self._finalize = self._stages[-1]
+        self._results = queue.Queue()
+        self._started_at = None
+
+    # ------------------------------------------------------------------
+    # Stage workers
+    # ------------------------------------------------------------------
+
+    def _close_next(self, index):
+        """Send end-of-input to the stage after index."""
+        following = self._stages[index + 1]
+        for _ in range(following.workers):
+            following.inbox.put(_DONE)
+
+    def _forward(self, index, item):
+        if item.done:
+            self._finalize.inbox.put(item)
+        else:
+            self._stages[index + 1].inbox.put(item)
+
+    def _item_worker(self, index, stage_fn):
+        stage = self._stages[index]
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                break
+            started = time.monotonic()
+            run_ingest_stage(stage_fn, item)
+            stage.stats.record(1, 1 if item.done else 0, time.monotonic() - started)
+            self._forward(index, item)
+        if stage.worker_finished():
+            self._close_next(index)
+
+    def _next_batch(self, inbox):
+        """
+        Block for one item, then gather more until the batch is full, the
+        queue stays empty for batch_wait seconds, or input ends.
+
+        Returns:
+            Tuple (items, finished)
+        """
+        first = inbox.get()
+        if first is _DONE:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = inbox.get(timeout=timeout) if timeout > 0 else inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _persist_worker(self, index):
+        stage = self._stages[index]
+        finished = False
+        while not finished:
+            batch, finished = self._next_batch(stage.inbox)
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                persist_items(batch)
+            except Exception as e:
+                logger.error(f"Persist batch of {len(batch)} failed: {e}")
+                for item in batch:
+                    if not item.done:
+                        item.fail(f"[Processing] ERROR: Database insert failed for {item.filename}: {e}")
+            failed = sum(1 for item in batch if item.done)
+            stage.stats.record(len(batch), failed, time.monotonic() - started)
+            for item in batch:
+                self._finalize.inbox.put(item)
+        self._close_next(index)
+
+    def _finalize_worker(self):
+        stage = self._finalize
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                break
+            started = time.monotonic()
+            stage_finalize(item)
+            stage.stats.record(1, 0 if item.result[0] else 1, time.monotonic() - started)
+            self._results.put(item)
+
+    # ------------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------------
+
+    def _feed(self, jobs):
+        inbox = self._stages[0].inbox
+        for filepath, move_from_ingest in jobs:
+            inbox.put(IngestItem(filepath, move_from_ingest))
+        for _ in range(self._stages[0].workers):
+            inbox.put(_DONE)
+
+    def _start_threads(self, jobs):
+        targets = [
+            (self._item_worker, (0, stage_hash)),
+            (self._item_worker, (1, stage_metadata)),
+            (self._item_worker, (2, stage_tagging)),
+            (self._item_worker, (3, stage_place_file)),
+            (self._persist_worker, (4,)),
+        ]
+        threads = [threading.Thread(target=self._feed, args=(jobs,), name="Ingest-feed", daemon=True)]
+        for stage, (target, args) in zip(self._stages, targets):
+            for i in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=target, args=args, name=f"Ingest-{stage.name}-{i}", daemon=True
+                ))
+        for i in range(self._finalize.workers):
+            threads.append(threading.Thread(
+                target=self._finalize_worker, name=f"Ingest-finalize-{i}", daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+    def run(self, jobs):
+        """
+        Process files through the pipeline.
+
+        Args:
+            jobs: List of (filepath, move_from_ingest) tuples
+
+        Yields:
+            Tuple (filepath, (success, message, failure_type)) per file, in
+            completion order. Consume the generator fully.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return
+
+        self._started_at = time.monotonic()
+        self._start_threads(jobs)
+        try:
+            for _ in range(len(jobs)):
+                item = self._results.get()
+                yield item.filepath, item.result
+        finally:
+            stats = self.get_stats()
+            with _last_stats_lock:
+                _last_stats.clear()
+                _last_stats.update(stats)
+            summary = ", ".join(
+                f"{name} {s['items_per_sec']}/s ({int(s['utilization'] * 100)}% busy)"
+                for name, s in stats['stages'].items()
+            )
+            logger.info(f"Ingested {len(jobs)} file(s) in {stats['elapsed_seconds']}s: {summary}")
+
+    def get_stats(self):
+        """Per-stage counters and current queue depths for this run."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'batch_size': self.batch_size,
+            'stages': {
+                stage.name: {**stage.stats.as_dict(elapsed), 'queued': stage.inbox.qsize()}
+                for stage in self._stages
+            },
+        }
+
+
+def run_ingest_pipeline(jobs, queue_size=None, batch_size=None):
+    """
+    Ingest many files with overlapping stages and batched commits.
+
+    Args:
+        jobs: List of (filepath, move_from_ingest) tuples
+        queue_size: Inter-stage queue capacity (default INGEST_QUEUE_SIZE)
+        batch_size: Images per persist transaction (default INGEST_PERSIST_BATCH_SIZE)
+
+    Yields:
+        Tuple (filepath, (success, message, failure_type)) per file
+    """
+    pipeline = IngestPipeline(queue_size=queue_size, batch_size=batch_size)
+    yield from pipeline.run(jobs)
+
+
+def get_pipeline_stats():
+    """Stage counters of the most recent pipeline run (empty before the first)."""
+    with _last_stats_lock:
+        return dict(_last_stats)
@@ -0,0 +1,125 @@
+"""
+Persistent cache of booru MD5 lookups.
+
+One row per (source, md5): the post JSON when the source has the image, or a
+negative entry when the source confirmed it does not. Re-ingesting or retrying
+a folder then only goes to the network for hashes whose entry expired. Hits
+live for METADATA_LOOKUP_CACHE_TTL seconds, misses for
+METADATA_LOOKUP_NEGATIVE_TTL. Network errors are never cached.
+"""
+
+import json
+import time
+from typing import Dict, Iterable, Optional
+
+import config
+from database import get_db_connection
+
+# SQLite's default host-parameter limit is 999; stay well below it
+_QUERY_CHUNK = 500
+
+
+def get_cached_lookups(source: str, md5s: Iterable[str]) -> Dict[str, Optional[dict]]:
+    """
+    Return unexpired cache entries for the given hashes.
+
+    Args:
+        source: Source name ('danbooru', 'e621')
+        md5s: Hashes to look up
+
+    Returns:
+        dict: md5 -> post data, or None for a cached miss. Hashes without a
+        fresh entry are absent.
+    """
+    md5s = list(dict.fromkeys(md5s))
+    if not md5s:
+        return {}
+
+    now = time.time()
+    hit_cutoff = now - config.METADATA_LOOKUP_CACHE_TTL
+    miss_cutoff = now - config.METADATA_LOOKUP_NEGATIVE_TTL
+
+    cached = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for i in range(0, len(md5s), _QUERY_CHUNK):
+            chunk = md5s[i:i + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f"""
+                SELECT md5, found, data FROM metadata_lookup_cache
+                WHERE source = ? AND md5 IN ({placeholders})
+                  AND fetched_at >= CASE WHEN found THEN ? ELSE ? END
+            """, (source, *chunk, hit_cutoff, miss_cutoff))
+            for row in cursor.fetchall():
+                if row['found']:
+                    try:
+                        cached[row['md5']] = json.loads(row['data'])
+                    except (TypeError, ValueError):
+                        continue
+                else:
+                    cached[row['md5']] = None
+    return cached
+
+
+def store_lookups(source: str, results: Dict[str, Optional[dict]]) -> None:
+    """
+    Record lookup outcomes.
+
+    Args:
+        source: Source name ('danbooru', 'e621')
+        results: md5 -> post data, or None when the source has no such post
+    """
+    if not results:
+        return
+
+    now = time.time()
+    rows = [
+        (source, md5, 1 if data is not None else 0,
+         json.dumps(data) if data is not None else None, now)
+        for md5, data in results.items()
+    ]
+    with get_db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO metadata_lookup_cache (source, md5, found, data, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, md5) DO UPDATE SET
+                found = excluded.found,
+                data = excluded.data,
+                fetched_at = excluded.fetched_at
+        """, rows)
+        conn.commit()
+
+
+def purge_expired_lookups() -> int:
+    """
+    Delete expired cache entries.
+
+    Returns:
+        int: Number of entries removed
+    """
+    now = time.time()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM metadata_lookup_cache
+            WHERE fetched_at < CASE WHEN found THEN ? ELSE ? END
+        """, (now - config.METADATA_LOOKUP_CACHE_TTL, now - config.METADATA_LOOKUP_NEGATIVE_TTL))
+        conn.commit()
+        return cursor.rowcount
+
+
+def clear_lookup_cache(source: Optional[str] = None) -> int:
+    """
+    Drop cached lookups, for one source or all of them.
+
+    Returns:
+        int: Number of entries removed
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if source:
+            cursor.execute("DELETE FROM metadata_lookup_cache WHERE source = ?", (source,))
+        else:
+            cursor.execute("DELETE FROM metadata_lookup_cache")
+        conn.commit()
+        return cursor.rowcount
@@ -4,12 +4,15 @@ Metadata fetching from various sources (Danbooru, E621, SauceNAO, Pixiv, etc.).
 
 import os
 import re
+import threading
 import requests
 import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from PIL import Image
 import config
 from .rate_limiter import saucenao_rate_limiter
+from .lookup_cache import get_cached_lookups, store_lookups
 from .constants import (
     DANBOORU_TIMEOUT,
     E621_TIMEOUT,
@@ -32,42 +35,194 @@ SAUCENAO_API_KEY = config.SAUCENAO_API_KEY
 GELBOORU_API_KEY = config.GELBOORU_API_KEY
 GELBOORU_USER_ID = config.GELBOORU_USER_ID
 
+BOORU_USER_AGENT = "ChibiBooru/1.0"
 
-def search_danbooru(md5):
+
+# ============================================================================
+# HTTP SESSIONS
+# ============================================================================
+
+# requests.Session is not documented as thread-safe, so each thread keeps one
+# keep-alive session per source (booru APIs, SauceNAO, Pixiv). The lookup executor below has a fixed set of
+# threads, so those sessions (and their connections) are reused across images.
+_session_state = threading.local()
+
+
+def _get_session(source):
+    sessions = getattr(_session_state, 'sessions', None)
+    if sessions is None:
+        sessions = _session_state.sessions = {}
+    session = sessions.get(source)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['User-Agent'] = BOORU_USER_AGENT
+        sessions[source] = session
+    return session
+
+
+_lookup_executor = None
+_lookup_executor_lock = threading.Lock()
+
+
+def _get_lookup_executor():
+    """Shared pool for booru lookups (one per process instead of one per image)."""
+    global _lookup_executor
+    if _lookup_executor is None:
+        with _lookup_executor_lock:
+            if _lookup_executor is None:
+                _lookup_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='booru-lookup')
+    return _lookup_executor
+
+
+# ============================================================================
+# MD5 LOOKUPS
+# ============================================================================
+
+def _query_danbooru(md5s):
+    """Search Danbooru for a list of hashes; returns the matching posts."""
+    response = _get_session('danbooru').get(
+        f"{config.DANBOORU_API_URL.rstrip('/')}/posts.json",
+        params={'tags': f"md5:{','.join(md5s)}", 'limit': len(md5s)},
+        timeout=DANBOORU_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json() or []
+
+
+def _query_e621(md5s):
+    """Search e621 for a list of hashes; returns the matching posts."""
+    response = _get_session('e621').get(
+        f"{config.E621_API_URL.rstrip('/')}/posts.json",
+        params={'tags': f"md5:{','.join(md5s)}", 'limit': len(md5s)},
+        timeout=E621_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json().get("posts") or []
+
+
+# source -> (query function, extracts the md5 from a returned post)
+_MD5_SOURCES = {
+    'danbooru': (_query_danbooru, lambda post: post.get('md5')),
+    'e621': (_query_e621, lambda post: (post.get('file') or {}).get('md5')),
+}
+
+
+def _fetch_md5s(source, md5s):
+    """
+    Look up hashes on one source over the network.
+
+    Returns:
+        dict: md5 -> post, or None when the source confirmed it has no post.
+        Hashes whose request failed are absent.
+    """
+    query, post_md5 = _MD5_SOURCES[source]
     try:
-        url = f"https://danbooru.donmai.us/posts.json?tags=md5:{md5}"
-        response = requests.get(url, timeout=DANBOORU_TIMEOUT)
-        if response.status_code == 200 and response.json():
-            return {"source": "danbooru", "data": response.json()[0]}
-    except requests.RequestException:
-        return None
-    return None
+        posts = query(md5s)
+    except (requests.RequestException, ValueError, AttributeError) as e:
+        print(f"[{source}] MD5 lookup failed for {len(md5s)} hash(es): {e}")
+        return {}
+
+    if len(md5s) == 1:
+        return {md5s[0]: posts[0] if posts else None}
+
+    results = {md5: None for md5 in md5s}
+    unattributed = False
+    for post in posts:
+        md5 = (post_md5(post) or '').lower()
+        if md5 in results:
+            results[md5] = post
+        else:
+            # Some posts hide their md5 (e.g. restricted on Danbooru), so a miss
+            # in this batch is not conclusive
+            unattributed = True
+
+    if unattributed:
+        for md5 in [m for m, post in results.items() if post is None]:
+            del results[md5]
+            results.update(_fetch_md5s(source, [md5]))
+    return results
+
+
+def lookup_md5s(source, md5s):
+    """
+    Look up hashes on a source, serving known results from the lookup cache.
+
+    Cache misses are queried in batches of METADATA_LOOKUP_BATCH_SIZE hashes
+    per request and the outcomes stored for later rescans.
+
+    Args:
+        source: 'danbooru' or 'e621'
+        md5s: Hashes to look up
+
+    Returns:
+        dict: md5 -> post data, or None when the source has no such post.
+        Hashes whose lookup failed are absent.
+    """
+    md5s = list(dict.fromkeys(m.lower() for m in md5s if m))
+    results = get_cached_lookups(source, md5s)
+    pending = [m for m in md5s if m not in results]
+
+    batch_size = max(1, config.METADATA_LOOKUP_BATCH_SIZE)
+    for i in range(0, len(pending), batch_size):
+        fetched = _fetch_md5s(source, pending[i:i + batch_size])
+        store_lookups(source, fetched)
+        results.update(fetched)
+    return results
+
+
+def search_danbooru(md5):
+    data = lookup_md5s('danbooru', [md5]).get(md5.lower())
+    return {"source": "danbooru", "data": data} if data else None
 
 
 def search_e621(md5):
-    try:
-        headers = {"User-Agent": "ChibiBooru/1.0"}
-        url = f"https://e621.net/posts.json?tags=md5:{md5}"
-        response = requests.get(url, headers=headers, timeout=E621_TIMEOUT)
-        if response.status_code == 200 and response.json()["posts"]:
-            return {"source": "e621", "data": response.json()["posts"][0]}
-    except requests.RequestException:
-        return None
-    return None
+    data = lookup_md5s('e621', [md5]).get(md5.lower())
+    return {"source": "e621", "data": data} if data else None
 
 
 def search_all_sources(md5):
     search_functions = [search_danbooru, search_e621]
     results = {}
-    with ThreadPoolExecutor(max_workers=len(search_functions)) as executor:
-        future_to_func = {executor.submit(func, md5): func for func in search_functions}
-        for future in as_completed(future_to_func):
-            try:
-                result = future.result()
-                if result:
-                    results[result['source']] = result['data']
-            except Exception as e:
-                print(f"Booru search error: {e}")
+    executor = _get_lookup_executor()
+    future_to_func = {executor.submit(func, md5): func for func in search_functions}
+    for future in as_completed(future_to_func):
+        try:
+            result = future.result()
+            if result:
+                results[result['source']] = result['data']
+        except Exception as e:
+            print(f"Booru search error: {e}")
+    return results
+
+
+def search_all_sources_batch(md5s):
+    """
+    Look up many hashes on every MD5 source using batched requests.
+
+    Also warms the lookup cache, so later search_all_sources() calls for the
+    same hashes do not touch the network.
+
+    Returns:
+        dict: md5 -> {source: post data} for hashes found on at least one source
+    """
+    md5s = list(dict.fromkeys(m.lower() for m in md5s if m))
+    results = {}
+    executor = _get_lookup_executor()
+    future_to_source = {
+        executor.submit(lookup_md5s, source, md5s): source
+        for source in _MD5_SOURCES
+    }
+    for future in as_completed(future_to_source):
+        source = future_to_source[future]
+        try:
+            for md5, data in future.result().items():
+                if data:
+                    results.setdefault(md5, {})[source] = data
+        except Exception as e:
+            print(f"Booru batch search error ({source}): {e}")
     return results
 
 
@@ -131,7 +286,7 @@ def search_saucenao(filepath):
         with open(file_to_upload, 'rb') as f:
             files = {'file': f}
             params = {'api_key': SAUCENAO_API_KEY, 'output_type': 2, 'numres': SAUCENAO_NUM_RESULTS}
-            response = requests.post('https://saucenao.com/search.php', files=files, params=params, timeout=SAUCENAO_TIMEOUT)
+            response = _get_session('saucenao').post('https://saucenao.com/search.php', files=files, params=params, timeout=SAUCENAO_TIMEOUT)
             response.raise_for_status()
 
             response_json = response.json()
@@ -188,15 +343,14 @@ def fetch_by_post_id(source, post_id):
             post_id = os.path.basename(post_id).split('?')[0]
 
         if source == "danbooru":
-            url = f"https://danbooru.donmai.us/posts/{post_id}.json"
-            response = requests.get(url, timeout=DANBOORU_TIMEOUT)
+            url = f"{config.DANBOORU_API_URL.rstrip('/')}/posts/{post_id}.json"
+            response = _get_session('danbooru').get(url, timeout=DANBOORU_TIMEOUT)
             response.raise_for_status()
             return {"source": "danbooru", "data": response.json()}
         
         elif source == "e621":
-            headers = {"User-Agent": "ChibiBooru/1.0"}
-            url = f"https://e621.net/posts/{post_id}.json"
-            response = requests.get(url, headers=headers, timeout=E621_TIMEOUT)
+            url = f"{config.E621_API_URL.rstrip('/')}/posts/{post_id}.json"
+            response = _get_session('e621').get(url, timeout=E621_TIMEOUT)
             response.raise_for_status()
             return {"source": "e621", "data": response.json()["post"]}
             
@@ -205,7 +359,7 @@ def fetch_by_post_id(source, post_id):
                 print("Warning: GELBOORU_API_KEY or GELBOORU_USER_ID not set. Gelbooru search may fail.")
             
             url = f"https://gelbooru.com/index.php?page=dapi&s=post&q=index&json=1&id={post_id}&api_key={GELBOORU_API_KEY}&user_id={GELBOORU_USER_ID}"
-            response = requests.get(url, timeout=GELBOORU_TIMEOUT)
+            response = _get_session('gelbooru').get(url, timeout=GELBOORU_TIMEOUT)
             response.raise_for_status()
             data = response.json()
             
@@ -216,7 +370,7 @@ def fetch_by_post_id(source, post_id):
 
         elif source == "yandere":
             url = f"https://yande.re/post.json?tags=id:{post_id}"
-            response = requests.get(url, timeout=YANDERE_TIMEOUT)
+            response = _get_session('yandere').get(url, timeout=YANDERE_TIMEOUT)
             response.raise_for_status()
             data = response.json()
             if data:
@@ -281,7 +435,7 @@ def fetch_pixiv_metadata(pixiv_id):
             "Referer": "https://www.pixiv.net/"
         }
 
-        response = requests.get(url, headers=headers, timeout=PIXIV_TIMEOUT)
+        response = _get_session('pixiv').get(url, headers=headers, timeout=PIXIV_TIMEOUT)
         response.raise_for_status()
         data = response.json()
 
@@ -381,7 +535,7 @@ def download_pixiv_image(pixiv_id, image_url, output_dir="./ingest"):
             "Referer": f"https://www.pixiv.net/artworks/{pixiv_id}"
         }
 
-        response = requests.get(image_url, headers=headers, timeout=PIXIV_DOWNLOAD_TIMEOUT)
+        response = _get_session('pixiv').get(image_url, headers=headers, timeout=PIXIV_DOWNLOAD_TIMEOUT)
         response.raise_for_status()
 
         with open(output_path, 'wb') as f:
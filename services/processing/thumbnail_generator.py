@@ -22,7 +22,15 @@ except ImportError:
     ML_WORKER_AVAILABLE = False
 
 
-def ensure_thumbnail(filepath, image_dir="./static/images", md5=None):
+def encode_thumbnail(image):
+    """Encode a ready thumbnail (PIL image) with the configured WEBP settings."""
+    import io
+    buf = io.BytesIO()
+    image.save(buf, 'WEBP', quality=THUMB_QUALITY, method=6)
+    return buf.getvalue()
+
+
+def ensure_thumbnail(filepath, image_dir="./static/images", md5=None, thumbnail_data=None):
     """
     Create a thumbnail for an image, video, or zip animation.
     Handles both bucketed and legacy flat paths.
@@ -31,6 +39,8 @@ def ensure_thumbnail(filepath, image_dir="./static/images", md5=None):
         filepath: Path to the media file
         image_dir: Base image directory
         md5: Optional MD5 hash (required for zip animations)
+        thumbnail_data: Optional encoded thumbnail (see encode_thumbnail) to
+                        write instead of decoding the file again
     """
     resolved = os.path.abspath(filepath)
     if not os.path.exists(resolved):
@@ -52,6 +62,14 @@ def ensure_thumbnail(filepath, image_dir="./static/images", md5=None):
 
     if not os.path.exists(thumb_path):
         os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+
+        if thumbnail_data:
+            try:
+                with open(thumb_path, 'wb') as f:
+                    f.write(thumbnail_data)
+                return
+            except OSError as e:
+                print(f"[Thumbnail] Writing pre-encoded thumbnail failed for {filename}: {e}")
         
         # Try using ML Worker first
         if ML_WORKER_AVAILABLE:
@@ -89,7 +89,7 @@ def _build_base_sql_query(freetext_filepath_terms):
                    COALESCE(i.tags_general, '') as tags,
                    COALESCE(fts.rank, 0) as rank
             FROM images i
-            LEFT JOIN images_fts fts ON i.filepath = fts.filepath
+            LEFT JOIN images_fts fts ON fts.rowid = i.id
         """
         ]
     return [
@@ -103,7 +103,7 @@ def _build_base_sql_query(freetext_filepath_terms):
                COALESCE(i.tags_general, '') as tags,
                fts.rank
         FROM images_fts fts
-        INNER JOIN images i ON i.filepath = fts.filepath
+        INNER JOIN images i ON i.id = fts.rowid
     """
     ]
 
@@ -138,7 +138,7 @@ def _apply_filters(
     elif fts_query and freetext_filepath_terms:
         # Match FTS OR (filepath LIKE OR tag columns LIKE)
         or_conditions = []
-        fts_subquery = "fts.filepath IN (SELECT filepath FROM images_fts WHERE images_fts MATCH ?)"
+        fts_subquery = "i.id IN (SELECT rowid FROM images_fts WHERE images_fts MATCH ?)"
         or_conditions.append(fts_subquery)
         params.append(fts_query)
 
@@ -372,7 +372,7 @@ def _fts_search(
 
     # Part 1: FTS Search (Prefix/Exact)
     if fts_query:
-        cte_parts.append("SELECT filepath, rank FROM images_fts WHERE images_fts MATCH ?")
+        cte_parts.append("SELECT rowid AS image_id, rank FROM images_fts WHERE images_fts MATCH ?")
         params.append(fts_query)
 
     # Part 2: Substring Search (Partial matches on all tag columns)
@@ -401,7 +401,7 @@ def _fts_search(
         if likes:
             like_clause = " OR ".join(likes)
             # Use 0 as rank for these results (lower priority than FTS exact matches)
-            cte_parts.append(f"SELECT filepath, 0 as rank FROM images WHERE {like_clause}")
+            cte_parts.append(f"SELECT id AS image_id, 0 as rank FROM images WHERE {like_clause}")
 
     if not cte_parts:
         return []
@@ -421,7 +421,7 @@ def _fts_search(
            COALESCE(i.tags_general, '') as tags,
            matches.rank
     FROM matches
-    JOIN images i ON matches.filepath = i.filepath
+    JOIN images i ON matches.image_id = i.id
     """]
     
     where_clauses = []
@@ -658,7 +658,8 @@ def set_image_rating(image_id: int, rating: Optional[str],
 
             # Add rating tag
             cur.execute(
-                "INSERT OR REPLACE INTO image_tags (image_id, tag_id, source) VALUES (?, ?, ?)",
+                """INSERT INTO image_tags (image_id, tag_id, source) VALUES (?, ?, ?)
+                   ON CONFLICT(image_id, tag_id) DO UPDATE SET source = excluded.source""",
                 (image_id, tag_id, source)
             )
 
@@ -671,7 +672,8 @@ def set_image_rating(image_id: int, rating: Optional[str],
             cur.execute("SELECT id FROM tags WHERE name = ?", (source_tag_name,))
             source_tag_id = cur.fetchone()['id']
             cur.execute(
-                "INSERT OR REPLACE INTO image_tags (image_id, tag_id, source) VALUES (?, ?, ?)",
+                """INSERT INTO image_tags (image_id, tag_id, source) VALUES (?, ?, ?)
+                   ON CONFLICT(image_id, tag_id) DO UPDATE SET source = excluded.source""",
                 (image_id, source_tag_id, source)
             )
 
@@ -1,5 +1,5 @@
 from database import models
-from services import processing
+from services import duplicate_preview_cache, processing
 from utils import get_thumbnail_path
 from utils.file_utils import normalize_image_path
 import os
@@ -91,7 +91,10 @@ def saucenao_apply(data: dict) -> dict:
     new_full_path = None
     try:
         # Step 1: Delete the old database entry
+        old_image_id = models.get_image_ids_for_filepaths([original_filepath]).get(original_filepath)
         models.delete_image(original_filepath)
+        if old_image_id is not None:
+            duplicate_preview_cache.invalidate_preview(old_image_id)
 
         # Step 2: Handle the image file
         old_full_path = os.path.join("static/images", original_filepath)
@@ -0,0 +1,144 @@
+# services/scan_manifest.py
+"""
+Persistent scan manifest for the monitor.
+
+The monitor scan has to know the MD5 of every file under IMAGE_DIRECTORY that
+is not in the images table (to spot duplicates of known images). Files that
+stay unprocessed (failed ingests, duplicates waiting for a lock) would
+otherwise be read in full on every pass. The manifest remembers their MD5
+keyed by relative path together with size, mtime and inode; a file whose stat
+still matches is not opened again.
+"""
+
+import os
+
+from database import get_db_connection
+from utils.file_utils import get_file_md5
+from utils.logging_config import get_logger
+
+logger = get_logger('ScanManifest')
+
+# SQLite's default host-parameter limit is 999; stay well below it
+_QUERY_CHUNK = 500
+
+
+def _stat_key(st):
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def load_manifest():
+    """
+    Load the whole manifest.
+
+    Returns:
+        dict: relative path -> ((size, mtime_ns, inode), md5)
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT path, size, mtime_ns, inode, md5 FROM scan_manifest").fetchall()
+    return {row['path']: ((row['size'], row['mtime_ns'], row['inode']), row['md5']) for row in rows}
+
+
+def resolve_md5s(candidates):
+    """
+    Return the MD5 of each candidate file, hashing only new or changed files.
+
+    Also replaces the manifest contents with the candidates, so entries for
+    files that were ingested, moved or deleted drop out.
+
+    Args:
+        candidates: List of (rel_path, abs_path, os.stat_result)
+
+    Returns:
+        dict: rel_path -> md5 (files that could not be read are absent)
+    """
+    manifest = load_manifest()
+    md5s = {}
+    changed = []
+    for rel_path, abs_path, st in candidates:
+        key = _stat_key(st)
+        entry = manifest.get(rel_path)
+        if entry and entry[0] == key:
+            md5s[rel_path] = entry[1]
+            continue
+        md5 = get_file_md5(abs_path)
+        if md5 is None:
+            continue
+        md5s[rel_path] = md5
+        changed.append((rel_path, *key, md5))
+
+    stale = [path for path in manifest if path not in md5s]
+
+    if changed or stale:
+        with get_db_connection() as conn:
+            for i in range(0, len(stale), _QUERY_CHUNK):
+                chunk = stale[i:i + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                conn.execute(f"DELETE FROM scan_manifest WHERE path IN ({placeholders})", chunk)
+            conn.executemany("""
+                INSERT INTO scan_manifest (path, size, mtime_ns, inode, md5)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    inode = excluded.inode,
+                    md5 = excluded.md5
+            """, changed)
+            conn.commit()
+
+    if changed:
+        logger.debug(f"Hashed {len(changed)} new or changed file(s), {len(md5s) - len(changed)} unchanged")
+    return md5s
+
+
+def find_known_md5s(md5s):
+    """
+    Look up which hashes already belong to an image, one query per chunk.
+
+    Args:
+        md5s: Iterable of MD5 hex strings
+
+    Returns:
+        dict: md5 -> filepath of the existing image
+    """
+    md5s = list(set(md5s))
+    known = {}
+    with get_db_connection() as conn:
+        for i in range(0, len(md5s), _QUERY_CHUNK):
+            chunk = md5s[i:i + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(
+                f"SELECT md5, filepath FROM images WHERE md5 IN ({placeholders})", chunk
+            ).fetchall():
+                known[row['md5']] = row['filepath']
+    return known
+
+
+def walk_media_files(base_dir, extensions):
+    """
+    Yield (abs_path, DirEntry) for supported media files under base_dir.
+
+    Uses os.scandir so file types come from the directory listing itself.
+    """
+    stack = [base_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.lower().endswith(extensions) and entry.is_file():
+                            yield entry.path, entry
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Cannot scan {current}: {e}")
+
+
+def clear_manifest():
+    """Forget all manifest entries, forcing a full re-hash on the next scan."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("DELETE FROM scan_manifest")
+        conn.commit()
+        return cursor.rowcount
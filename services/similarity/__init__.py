@@ -18,6 +18,12 @@ from services.similarity.hashing import (
     hash_similarity_score,
 )
 
+# Decode-once analysis
+from services.similarity.analysis import (
+    ImageAnalysis,
+    analyze_image,
+)
+
 # Semantic search
 from services.similarity.semantic import (
     SEMANTIC_AVAILABLE,
@@ -45,6 +51,9 @@ __all__ = [
     'compute_colorhash_for_file',
     'hamming_distance',
     'hash_similarity_score',
+    # Analysis
+    'ImageAnalysis',
+    'analyze_image',
     # Semantic
     'SEMANTIC_AVAILABLE',
     'FAISS_AVAILABLE',
@@ -0,0 +1,142 @@
+"""
+Decode-Once Image Analysis
+
+Hashing, semantic embedding and thumbnailing each used to open and decode
+the same file. analyze_image() decodes a still image once and derives every
+requested artifact from that single bitmap:
+
+- pHash (white-flattened RGB, as compute_phash)
+- colorhash (plain RGB conversion, as compute_colorhash)
+- semantic model input: RGB bytes resized to SEMANTIC_IMAGE_SIZE with bicubic
+  resampling, the same resize the ML worker applies to a file path
+- thumbnail: white-flattened, LANCZOS-fitted to THUMB_SIZE, ready to save
+
+For JPEGs the decoder is asked for a reduced-size draft (DCT scaling) that is
+still at least as large as the biggest artifact needs, which skips most of
+the decode work for large photos. Disable with ANALYSIS_JPEG_DRAFT.
+
+Videos are not handled here; callers keep using the per-artifact helpers.
+"""
+
+import os
+from typing import Optional
+
+import imagehash
+from PIL import Image, ImageFile, UnidentifiedImageError
+
+import config
+
+# pHash resizes to hash_size * 4 before the DCT (imagehash highfreq_factor)
+_PHASH_FACTOR = 4
+
+# Lower bound for draft targets so colorhash bins are computed on a
+# reasonably detailed bitmap even when nothing else needs resolution
+_MIN_DRAFT_SIZE = 256
+
+
+class ImageAnalysis:
+    """Artifacts derived from a single decode of one image."""
+
+    __slots__ = ('phash', 'colorhash', 'semantic_pixels', 'semantic_size',
+                 'thumbnail', 'source_size', 'decoded_size')
+
+    def __init__(self):
+        self.phash: Optional[str] = None
+        self.colorhash: Optional[str] = None
+        self.semantic_pixels: Optional[bytes] = None  # RGB, semantic_size x semantic_size
+        self.semantic_size: Optional[int] = None
+        self.thumbnail: Optional[Image.Image] = None
+        self.source_size = None   # (width, height) of the file
+        self.decoded_size = None  # (width, height) actually decoded
+
+
+def _flatten_on_white(img: Image.Image) -> Image.Image:
+    """RGB copy with transparency composited onto white."""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def _draft_target(phash, colorhash, semantic_size, thumb_size, hash_size):
+    """Smallest square the decoded bitmap must cover for the requested artifacts."""
+    target = _MIN_DRAFT_SIZE if colorhash else 0
+    if phash:
+        target = max(target, hash_size * _PHASH_FACTOR)
+    if semantic_size:
+        target = max(target, semantic_size)
+    if thumb_size:
+        target = max(target, thumb_size)
+    return target
+
+
+def analyze_image(image_path: str, phash: bool = True, colorhash: bool = True,
+                  semantic_size: Optional[int] = None, thumb_size: Optional[int] = None,
+                  hash_size: Optional[int] = None) -> Optional[ImageAnalysis]:
+    """
+    Decode an image once and compute the requested artifacts.
+
+    Args:
+        image_path: Path to a still image (or an extracted animation frame)
+        phash: Compute the perceptual hash
+        colorhash: Compute the color hash
+        semantic_size: Produce semantic model input pixels at this size (None to skip)
+        thumb_size: Produce a thumbnail fitting this box (None to skip)
+        hash_size: pHash size, defaults to config.PHASH_SIZE
+
+    Returns:
+        ImageAnalysis, or None if the file cannot be decoded
+    """
+    if hash_size is None:
+        hash_size = config.PHASH_SIZE
+    # Allow partial loading of truncated images (e.g., incomplete downloads)
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+    result = ImageAnalysis()
+    try:
+        with Image.open(image_path) as img:
+            result.source_size = img.size
+            if config.ANALYSIS_JPEG_DRAFT and img.format == 'JPEG':
+                target = _draft_target(phash, colorhash, semantic_size, thumb_size, hash_size)
+                if target:
+                    img.draft('RGB', (target, target))
+            img.load()
+            result.decoded_size = img.size
+
+            has_alpha = img.mode in ('RGBA', 'LA', 'P')
+            flat = _flatten_on_white(img)
+            # colorhash and the ML worker use a plain RGB conversion
+            plain = img.convert('RGB') if has_alpha else flat
+
+            if phash:
+                result.phash = str(imagehash.phash(flat, hash_size=hash_size))
+            if colorhash:
+                result.colorhash = str(imagehash.colorhash(plain))
+            if semantic_size:
+                resized = plain.resize((semantic_size, semantic_size), Image.Resampling.BICUBIC)
+                result.semantic_pixels = resized.tobytes()
+                result.semantic_size = semantic_size
+            if thumb_size:
+                thumb = flat.copy()
+                thumb.thumbnail((thumb_size, thumb_size), Image.Resampling.LANCZOS)
+                result.thumbnail = thumb
+        return result
+    except UnidentifiedImageError:
+        _log(f"Cannot identify image: {image_path}", "warning")
+        return None
+    except OSError as e:
+        _log(f"OS error reading image {os.path.basename(image_path)}: {e}", "error")
+        return None
+    except Exception as e:
+        _log(f"Error analyzing {image_path}: {e}", "error")
+        return None
+
+
+def _log(message: str, level: str = "info"):
+    from services.similarity.hashing import _log as hashing_log
+    hashing_log(message, level)
@@ -151,7 +151,7 @@ class SemanticBackend:
     def is_available(self) -> bool:
         raise NotImplementedError
         
-    def get_embedding(self, image_path: str, model_path: str):
+    def get_embedding(self, image_path: str, model_path: str, pixels: Optional[bytes] = None):
         raise NotImplementedError
         
     def search_similar(self, query_embedding: List[float], limit: int) -> List[Dict]:
@@ -163,7 +163,7 @@ class MLWorkerSemanticBackend(SemanticBackend):
     def is_available(self) -> bool:
         return ML_WORKER_AVAILABLE
         
-    def get_embedding(self, image_path: str, model_path: str):
+    def get_embedding(self, image_path: str, model_path: str, pixels: Optional[bytes] = None):
         if not ML_WORKER_AVAILABLE:
             return None
         try:
@@ -173,7 +173,8 @@ class MLWorkerSemanticBackend(SemanticBackend):
                 model_path=model_path,
                 model_type=config.SEMANTIC_MODEL_TYPE,
                 image_size=config.SEMANTIC_IMAGE_SIZE,
-                embedding_dim=config.SEMANTIC_EMBEDDING_DIM
+                embedding_dim=config.SEMANTIC_EMBEDDING_DIM,
+                pixels=pixels
             )
             embedding = result['embedding']
             return np.array(embedding, dtype=np.float32)
@@ -214,11 +215,18 @@ class SemanticSearchEngine:
         self.ml_worker_ready = True
         return True
 
-    def get_embedding(self, image_path: str):
-        """Get embedding via backend."""
+    def get_embedding(self, image_path: str, pixels: Optional[bytes] = None):
+        """
+        Get embedding via backend.
+
+        Args:
+            image_path: Image file (also used for logging when pixels are given)
+            pixels: Optional pre-decoded RGB bytes at SEMANTIC_IMAGE_SIZE
+                    (ImageAnalysis.semantic_pixels), skipping a second decode
+        """
         if not self.ml_worker_ready and not self.load_model():
             return None
-        return self._backend.get_embedding(image_path, self.model_path)
+        return self._backend.get_embedding(image_path, self.model_path, pixels)
     
     def search_similar(self, query_embedding: List[float], limit: int) -> List[Dict]:
         """Search via backend."""
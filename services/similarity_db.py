@@ -128,6 +128,37 @@ def get_all_embedding_ids() -> List[int]:
         cursor = conn.execute("SELECT image_id FROM embeddings")
         return [row['image_id'] for row in cursor.fetchall()]
 
+def get_existing_embedding_ids(image_ids: List[int]) -> List[int]:
+    """Return the subset of image_ids that have embeddings."""
+    found = []
+    with get_db_connection() as conn:
+        for start in range(0, len(image_ids), 900):
+            chunk = image_ids[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(
+                f"SELECT image_id FROM embeddings WHERE image_id IN ({placeholders})",
+                chunk
+            )
+            found.extend(row['image_id'] for row in cursor.fetchall())
+    return found
+
+def delete_embeddings(image_ids: List[int]) -> int:
+    """Delete embeddings for the given image IDs. Returns the number removed."""
+    removed = 0
+    with get_db_connection() as conn:
+        for start in range(0, len(image_ids), 900):
+            chunk = image_ids[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(f"DELETE FROM embeddings WHERE image_id IN ({placeholders})", chunk)
+            removed += cursor.rowcount
+        conn.commit()
+    return removed
+
+def count_embeddings() -> int:
+    """Number of stored embeddings."""
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
 # Initialize on import? better to call explicitly
 if not os.path.exists(DB_FILE):
     init_db()
@@ -27,6 +27,7 @@ from services.similarity.hashing import (
     hamming_distance,
     hash_similarity_score,
 )
+from services.similarity.analysis import analyze_image
 from services.similarity.semantic import (
     SEMANTIC_AVAILABLE,
     FAISS_AVAILABLE,
@@ -343,132 +344,133 @@ def find_all_duplicate_groups(threshold: int = 5) -> List[List[Dict]]:
 
 # Worker state management removed - ThreadPoolExecutor shares memory space
 
-def _process_semantic_single(row: dict) -> dict:
+def _compute_embedding(row: dict, full_path: str, pixels: Optional[bytes] = None):
+    """Embed one image with the shared semantic engine (pixels: pre-decoded model input)."""
+    start_time = time.time()
+    # Use global engine (which is thread-safe for inference usually, or we lock if needed, 
+    # but ORT is generally thread safe for independent runs)
+    engine = get_semantic_engine()
+    # Ensure loaded
+    if not engine.ml_worker_ready:
+        # Load explicitly if not loaded (main thread should have loaded it, but self-repair is good)
+        print(f"[Semantic Worker {row['id']}] Loading model (latency expected)...")
+        engine.load_model()
+
+    embedding = engine.get_embedding(full_path, pixels=pixels)
+    duration = time.time() - start_time
+    if embedding is not None:
+        print(f"[Semantic Worker {row['id']}] Processed {row['filepath']} in {duration:.2f}s")
+    else:
+        print(f"[Semantic Worker {row['id']}] Failed to embed {row['filepath']} in {duration:.2f}s")
+    return embedding
+
+
+def _process_backfill_image(row: dict) -> dict:
     """
-    Process a single image for semantic embedding.
-    Designed to run in a THREAD (ProcessPoolExecutor would re-load model).
+    Compute the claimed backfill artifacts of one image in a thread.
+
+    row carries id, filepath and md5 plus 'artifacts', the artifact names
+    claimed for it. Still images are decoded once for all of them.
+
+    Returns:
+        Dict with new_phash / new_colorhash / new_embedding when generated,
+        'done' (artifacts produced) and 'failed' ({artifact: error}).
     """
-    import os
-    # Uses the main process global semantic engine (shared memory)
-    # We don't import _worker_semantic_engine here, we use the module level one via get_semantic_engine or direct
-    # But wait, we are in the same process, so direct access is fine.
-    
-    result = {
-        'id': row['id'],
-        'filepath': row['filepath'],
-        'success': False,
-        'semantic_generated': False,
-        'errors': []
-    }
-    
-    try:
-        start_time = time.time()
-        filepath = row['filepath']
-        
-        # Zip handling
-        full_path = os.path.join("static/images", filepath)
-        if filepath.lower().endswith('.zip'):
-             from utils.file_utils import get_thumbnail_path
-             thumb_rel = get_thumbnail_path(filepath)
-             if thumb_rel != filepath:
-                 full_path = os.path.join("static", thumb_rel)
-
-        if not os.path.exists(full_path):
-            result['errors'].append(f"File not found: {full_path}")
-            return result
+    from services.processing.thumbnail_generator import ensure_thumbnail, encode_thumbnail
 
-        # Use global engine (which is thread-safe for inference usually, or we lock if needed, 
-        # but ORT is generally thread safe for independent runs)
-        engine = get_semantic_engine()
-        # Ensure loaded
-        if not engine.ml_worker_ready:
-            # Load explicitly if not loaded (main thread should have loaded it, but self-repair is good)
-            print(f"[Semantic Worker {row['id']}] Loading model (latency expected)...")
-            engine.load_model()
-            
-        embedding = engine.get_embedding(full_path)
-        duration = time.time() - start_time
-        
-        if embedding is not None:
-             result['new_embedding'] = embedding
-             result['semantic_generated'] = True
-             result['success'] = True
-             print(f"[Semantic Worker {row['id']}] Processed {filepath} in {duration:.2f}s")
-        else:
-             print(f"[Semantic Worker {row['id']}] Failed to embed {filepath} in {duration:.2f}s")
-             
-    except Exception as e:
-        result['errors'].append(f"Semantic error: {e}")
-        print(f"[Semantic Worker {row['id']}] Exception: {e}")
-        
-    return result
+    wanted = set(row['artifacts'])
+    result = {'id': row['id'], 'filepath': row['filepath'], 'done': [], 'failed': {}}
 
+    def fail_remaining(error):
+        for artifact in wanted - set(result['done']) - set(result['failed']):
+            result['failed'][artifact] = error
+
+    filepath = row['filepath']
+    lower = filepath.lower()
+    is_video = lower.endswith(config.SUPPORTED_VIDEO_EXTENSIONS)
+    is_zip = lower.endswith('.zip')
+    source_path = os.path.join("static/images", filepath)
 
-def _process_single_image_threaded(row: dict) -> dict:
-    """
-    Process a single image for hash generation in a thread.
-    This is the threaded version that doesn't need to re-import modules.
-    """
-    import os
-    from utils.file_utils import get_thumbnail_path
-    
-    result = {
-        'id': row['id'],
-        'filepath': row['filepath'],
-        'success': False,
-        'phash_generated': False,
-        'colorhash_generated': False,
-        'semantic_generated': False,
-        'errors': []
-    }
-    
     try:
-        filepath = row['filepath']
-        md5 = row['md5']
-        full_path = os.path.join("static/images", filepath)
-        
-        # Special handling for ZIP files (animations) -> use thumbnail for hash/embedding
-        if filepath.lower().endswith('.zip'):
-             thumb_rel = get_thumbnail_path(filepath)
-             # get_thumbnail_path returns relative path like 'thumbnails/...' or original 'filepath' if not found
-             if thumb_rel != filepath:
-                 # Use the thumbnail instead
-                 full_path = os.path.join("static", thumb_rel)
-        
-        # Check if file exists
-        if not os.path.exists(full_path):
-            result['errors'].append(f"File not found: {full_path}")
+        if not os.path.exists(source_path):
+            fail_remaining(f"File not found: {source_path}")
             return result
 
-        updated_something = False
-        
-        # 1. Compute pHash if missing
-        if not row['phash']:
+        # Zip animations are hashed and embedded from their thumbnail, so it
+        # has to exist first
+        full_path = source_path
+        if is_zip:
+            if 'thumbnail' in wanted:
+                ensure_thumbnail(source_path, md5=row['md5'])
+            thumb_rel = get_thumbnail_path(filepath)
+            if thumb_rel != filepath:
+                full_path = os.path.join("static", thumb_rel)
+                if 'thumbnail' in wanted:
+                    result['done'].append('thumbnail')
+            elif 'thumbnail' in wanted:
+                result['failed']['thumbnail'] = "Thumbnail was not written"
+
+        # Decode still images once for every claimed artifact
+        analysis = None
+        if not is_video:
+            analysis = analyze_image(
+                full_path,
+                phash='phash' in wanted,
+                colorhash='colorhash' in wanted,
+                semantic_size=config.SEMANTIC_IMAGE_SIZE if 'embedding' in wanted else None,
+                thumb_size=config.THUMB_SIZE if 'thumbnail' in wanted and not is_zip else None,
+            )
+            if analysis is None:
+                fail_remaining(f"Cannot decode image: {full_path}")
+                return result
+
+        if 'thumbnail' in wanted and not is_zip:
+            try:
+                thumbnail_data = encode_thumbnail(analysis.thumbnail) if analysis else None
+                ensure_thumbnail(source_path, md5=row['md5'], thumbnail_data=thumbnail_data)
+                if get_thumbnail_path(filepath) != filepath:
+                    result['done'].append('thumbnail')
+                else:
+                    result['failed']['thumbnail'] = "Thumbnail was not written"
+            except Exception as e:
+                result['failed']['thumbnail'] = f"Thumbnail error: {e}"
+
+        if 'phash' in wanted:
             try:
-                phash = compute_phash_for_file(full_path, md5)
+                phash = analysis.phash if analysis else compute_phash_for_file(full_path, row['md5'])
                 if phash:
                     result['new_phash'] = phash
-                    result['phash_generated'] = True
-                    updated_something = True
+                    result['done'].append('phash')
+                else:
+                    result['failed']['phash'] = "pHash could not be computed"
             except Exception as e:
-                result['errors'].append(f"pHash error: {e}")
-        
-        # 2. Compute ColorHash if missing
-        if not row['colorhash']:
+                result['failed']['phash'] = f"pHash error: {e}"
+
+        if 'colorhash' in wanted:
             try:
-                chash = compute_colorhash_for_file(full_path)
+                chash = analysis.colorhash if analysis else compute_colorhash_for_file(full_path)
                 if chash:
                     result['new_colorhash'] = chash
-                    result['colorhash_generated'] = True
-                    updated_something = True
+                    result['done'].append('colorhash')
+                else:
+                    result['failed']['colorhash'] = "ColorHash could not be computed"
             except Exception as e:
-                result['errors'].append(f"ColorHash error: {e}")
+                result['failed']['colorhash'] = f"ColorHash error: {e}"
+
+        if 'embedding' in wanted:
+            try:
+                embedding = _compute_embedding(row, full_path, analysis.semantic_pixels if analysis else None)
+                if embedding is not None:
+                    result['new_embedding'] = embedding
+                    result['done'].append('embedding')
+                else:
+                    result['failed']['embedding'] = "Embedding could not be computed"
+            except Exception as e:
+                result['failed']['embedding'] = f"Semantic error: {e}"
 
-        result['success'] = updated_something
-        
     except Exception as e:
-        result['errors'].append(f"Worker error: {e}")
-        
+        fail_remaining(f"Worker error: {e}")
+
     return result
 
 
@@ -479,34 +481,29 @@ def _bulk_save_hashes(results: List[Dict]):
     if not results:
         return
 
-    try:
-        # Separate semantic updates (custom DB) from main DB updates
-        semantic_updates = []
-        
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            for res in results:
-                # Update main DB hashes
-                if 'new_phash' in res:
-                    cursor.execute("UPDATE images SET phash = ? WHERE id = ?", (res['new_phash'], res['id']))
-                
-                if 'new_colorhash' in res:
-                    cursor.execute("UPDATE images SET colorhash = ? WHERE id = ?", (res['new_colorhash'], res['id']))
-                
-                # Collect semantic embeddings
-                if 'new_embedding' in res:
-                    semantic_updates.append((res['id'], res['new_embedding']))
-            
-            conn.commit()
+    # Separate semantic updates (custom DB) from main DB updates
+    semantic_updates = []
 
-        # Save semantic embeddings if any (these use their own DB/file structure)
-        if semantic_updates:
-            for img_id, embedding in semantic_updates:
-                similarity_db.save_embedding(img_id, embedding)
-                
-    except Exception as e:
-        print(f"[Similarity] Error in bulk save: {e}")
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        for res in results:
+            # Update main DB hashes
+            if 'new_phash' in res:
+                cursor.execute("UPDATE images SET phash = ? WHERE id = ?", (res['new_phash'], res['id']))
+
+            if 'new_colorhash' in res:
+                cursor.execute("UPDATE images SET colorhash = ? WHERE id = ?", (res['new_colorhash'], res['id']))
+
+            # Collect semantic embeddings
+            if 'new_embedding' in res:
+                semantic_updates.append((res['id'], res['new_embedding']))
+
+        conn.commit()
+
+    # Save semantic embeddings if any (these use their own DB/file structure)
+    for img_id, embedding in semantic_updates:
+        similarity_db.save_embedding(img_id, embedding)
 
 
 async def run_hash_generation_task(task_id: str, manager) -> Dict:
@@ -761,189 +758,136 @@ async def run_rehash_all_task(task_id: str, manager) -> Dict:
 
 def generate_missing_hashes(batch_size: int = 100, progress_callback=None) -> Dict:
     """
-    Generate perceptual hashes and semantic embeddings for images that don't have them.
-    Continuously loops until all missing hashes are generated.
-    Uses ThreadPoolExecutor for parallel execution.
-    
+    Generate perceptual hashes, semantic embeddings and queued thumbnails for
+    images that don't have them.
+
+    Work comes from the persistent backfill queue (services.backfill_queue):
+    the queue is seeded incrementally, then due tasks are claimed batch by
+    batch until none are left. Failures are retried on a backoff by later
+    runs; each run gives up-on (failed) tasks a fresh set of attempts, so an
+    ML worker outage does not strand them. The semantic index is rebuilt once at the end, or every
+    BACKFILL_INDEX_REFRESH_SECONDS during a long run.
+
     Args:
-        batch_size: Number of images to process at a time (per chunk)
+        batch_size: Number of tasks to claim at a time
         progress_callback: Optional callback(current, total) for progress updates
-        
+
     Returns:
-        Dictionary with counts of processed, successful, failed
+        Dictionary with counts of processed, successful, failed (per artifact)
     """
     import concurrent.futures
     import multiprocessing
-    
+    from services import backfill_queue
+
     total_stats = {'processed': 0, 'success': 0, 'failed': 0, 'total': 0}
-    
-    # 1. Estimate total missing count for progress reporting
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM images WHERE phash IS NULL OR colorhash IS NULL")
-            missing_visual_count = cursor.fetchone()[0]
-            
-            if SEMANTIC_AVAILABLE:
-                cursor.execute("SELECT id FROM images")
-                all_db_ids = set(row[0] for row in cursor.fetchall())
-                embedded_ids = set(similarity_db.get_all_embedding_ids())
-                missing_semantic_count = len(all_db_ids - embedded_ids)
-            else:
-                missing_semantic_count = 0
-                
-            # Total tasks to process
-            total_stats['total'] = missing_visual_count + missing_semantic_count
-            
-            if total_stats['total'] == 0:
-                 return total_stats
 
-    except Exception as e:
-        print(f"[Similarity] Error estimating total missing hashes: {e}")
-        total_stats['total'] = 1000 # Fallback
-    
-    # Determine number of workers
-    import config
+    artifacts = ['phash', 'colorhash', 'thumbnail']
+    if SEMANTIC_AVAILABLE:
+        artifacts.append('embedding')
+
     try:
-        max_workers = config.MAX_WORKERS
-    except AttributeError:
-        max_workers = 4 # Fallback
-        
+        backfill_queue.requeue_stale()
+        backfill_queue.retry_failed(artifacts)
+        backfill_queue.seed(include_embeddings=SEMANTIC_AVAILABLE)
+        total_stats['total'] = backfill_queue.count_due(artifacts)
+    except Exception as e:
+        print(f"[Similarity] Error preparing backfill queue: {e}")
+        return total_stats
+
+    if total_stats['total'] == 0:
+        return total_stats
+
+    max_workers = config.MAX_WORKERS
     if max_workers <= 0:
         max_workers = max(1, multiprocessing.cpu_count() - 1)
-        
+
     print(f"[Similarity] Starting parallel hash generation with {max_workers} workers. Total to process: {total_stats['total']}")
-    
-    # Track failed IDs to avoid infinite loops
-    failed_ids = set()
-    
-    # Use ThreadPoolExecutor for all hash computation
-    # This avoids the overhead of ProcessPoolExecutor and works better with I/O-bound tasks
+
+    refresh_interval = config.BACKFILL_INDEX_REFRESH_SECONDS
+    last_refresh = time.monotonic()
+    index_dirty = False
+
+    def refresh_index():
+        nonlocal last_refresh, index_dirty
+        print("[Similarity] Rebuilding semantic index with new embeddings...")
+        get_semantic_index().rebuild()
+        last_refresh = time.monotonic()
+        index_dirty = False
+
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="IngestWorker") as executor:
 
         while True:
-            # Fetch candidates that need hashes
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                # Exclude known failures
-                exclude_clause = ""
-                params = [batch_size]
-                if failed_ids:
-                    placeholders = ','.join('?' * len(failed_ids))
-                    exclude_clause = f"AND id NOT IN ({placeholders})"
-                    params = list(failed_ids) + params
-                    
-                cursor.execute(f"""
-                    SELECT id, filepath, md5, phash, colorhash
-                    FROM images
-                    WHERE (phash IS NULL OR colorhash IS NULL)
-                    {exclude_clause}
-                    LIMIT ?
-                """, params)
-                missing_hashes = [dict(row) for row in cursor.fetchall()]
-
-            # Also fetch semantic candidates if available
-            missing_semantic = []
-            
-            if SEMANTIC_AVAILABLE:
-                try:
-                    # Get current state
-                    embedded_ids = set(similarity_db.get_all_embedding_ids())
-                    embedded_ids.update(failed_ids)  # Don't retry failed ones
-                    
-                    # Compute missing IDs efficiently
-                    with get_db_connection() as conn:
-                         cursor = conn.cursor()
-                         cursor.execute("SELECT id FROM images")
-                         all_db_ids = set(row[0] for row in cursor.fetchall())
-                    
-                    # Exclude images already being processed for visual hashes
-                    current_batch_ids = {r['id'] for r in missing_hashes}
-                    
-                    candidates_ids = list(all_db_ids - embedded_ids - current_batch_ids)
-                    candidates_ids.sort(reverse=True)
-                    
-                    target_ids = candidates_ids[:batch_size]
-                    
-                    if target_ids:
-                        target_placeholders = ','.join('?' * len(target_ids))
-                        params = tuple(target_ids)
-                        
-                        with get_db_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute(f"""
-                                SELECT id, filepath, md5, phash, colorhash
-                                FROM images 
-                                WHERE id IN ({target_placeholders})
-                            """, params)
-                            missing_semantic = [dict(row) for row in cursor.fetchall()]
+            claimed = backfill_queue.claim(batch_size, artifacts)
+            if not claimed:
+                break
 
-                except Exception as e:
-                    print(f"[Similarity] Error finding missing semantic: {e}")
+            ids = list(claimed)
+            placeholders = ','.join('?' * len(ids))
+            with get_db_connection() as conn:
+                rows = {
+                    row['id']: dict(row) for row in conn.execute(
+                        f"SELECT id, filepath, md5 FROM images WHERE id IN ({placeholders})", ids
+                    ).fetchall()
+                }
 
-            if not missing_hashes and not missing_semantic:
-                break
-                
-            # Submit all tasks to thread pool
             futures = {}
-            
-            # Submit visual hash tasks
-            for row in missing_hashes:
-                future = executor.submit(_process_single_image_threaded, row)
-                futures[future] = ('visual', row)
-                
-            # Submit semantic tasks
-            for row in missing_semantic:
-                future = executor.submit(_process_semantic_single, row)
-                futures[future] = ('semantic', row)
-            
-            # Collect results
+            for image_id, image_artifacts in claimed.items():
+                row = rows.get(image_id)
+                if row is None:
+                    # Deleted since it was claimed; its tasks went with it
+                    continue
+                row['artifacts'] = image_artifacts
+                futures[executor.submit(_process_backfill_image, row)] = row
+
             results_buffer = []
-            
+            failed_tasks = []
+
             for future in concurrent.futures.as_completed(futures):
-                task_type, row = futures[future]
+                row = futures[future]
                 try:
                     result = future.result()
-                    
-                    total_stats['processed'] += 1
-                    if result['success']:
-                        total_stats['success'] += 1
-                        results_buffer.append(result)
-                    else:
-                        total_stats['failed'] += 1
-                        failed_ids.add(result['id'])
-                    
-                    if result.get('errors'):
-                         error_msg = result['errors'][0]
-                         if "File not found" in error_msg:
-                             # Warning level for missing files (clean_orphans should run)
-                             print(f"[Similarity] Warning: {result['filepath']} - {error_msg}")
-                         else:
-                             print(f"[Similarity] Error processing {result['filepath']}: {error_msg}")
-
-                    if progress_callback:
-                        progress_callback(total_stats['processed'], total_stats['total'])
-                        
                 except Exception as e:
-                    print(f"[Similarity] Exception in {task_type} result: {e}")
-                    total_stats['failed'] += 1
-                    failed_ids.add(row['id'])
+                    result = {'id': row['id'], 'filepath': row['filepath'], 'done': [],
+                              'failed': {a: f"Worker error: {e}" for a in row['artifacts']}}
+
+                total_stats['processed'] += len(row['artifacts'])
+                total_stats['success'] += len(result['done'])
+                total_stats['failed'] += len(result['failed'])
+                if result['done']:
+                    results_buffer.append(result)
+                for artifact, error in result['failed'].items():
+                    failed_tasks.append((row['id'], artifact, error))
+                    if "File not found" in error:
+                        # Warning level for missing files (clean_orphans should run)
+                        print(f"[Similarity] Warning: {row['filepath']} - {error}")
+                    else:
+                        print(f"[Similarity] Error processing {row['filepath']} ({artifact}): {error}")
 
-            # Bulk save
-            if results_buffer:
+                if progress_callback:
+                    progress_callback(min(total_stats['processed'], total_stats['total']), total_stats['total'])
+
+            # Bulk save, then record the outcome in the queue
+            done_tasks = [(r['id'], a) for r in results_buffer for a in r['done']]
+            try:
                 _bulk_save_hashes(results_buffer)
+            except Exception as e:
+                print(f"[Similarity] Error in bulk save: {e}")
+                failed_tasks.extend((image_id, a, f"Save error: {e}") for image_id, a in done_tasks)
+                done_tasks = []
+            backfill_queue.complete(done_tasks)
+            backfill_queue.fail(failed_tasks)
+
+            if results_buffer:
                 print(f"[Similarity] Batch complete. Saved {len(results_buffer)} results.")
-                
-                # Rebuild semantic index if we saved any new embeddings
-                has_new_embeddings = any('new_embedding' in r for r in results_buffer)
-                if has_new_embeddings and SEMANTIC_AVAILABLE:
-                    print("[Similarity] Rebuilding semantic index with new embeddings...")
-                    get_semantic_index().rebuild()
-    
-    return total_stats
+                index_dirty = index_dirty or any('new_embedding' in r for r in results_buffer)
 
+            if index_dirty and refresh_interval > 0 and time.monotonic() - last_refresh >= refresh_interval:
+                refresh_index()
 
+    if index_dirty:
+        refresh_index()
 
+    return total_stats
 
 
 def get_hash_coverage_stats() -> Dict:
@@ -960,11 +904,14 @@ def get_hash_coverage_stats() -> Dict:
         cursor.execute("SELECT COUNT(*) as missing FROM images WHERE phash IS NULL")
         missing = cursor.fetchone()['missing']
     
+    from services import backfill_queue
+
     return {
         'total': total,
         'hashed': hashed,
         'missing': missing,
-        'coverage_percent': round(hashed / total * 100, 1) if total > 0 else 0
+        'coverage_percent': round(hashed / total * 100, 1) if total > 0 else 0,
+        'backfill': backfill_queue.get_stats(),
     }
 
 
@@ -344,8 +344,9 @@ def switch_metadata_source_db(filepath, source_name):
 
                 # Link rating tag to image with appropriate source
                 cursor.execute("""
-                    INSERT OR REPLACE INTO image_tags (image_id, tag_id, source)
+                    INSERT INTO image_tags (image_id, tag_id, source)
                     VALUES (?, ?, ?)
+                    ON CONFLICT(image_id, tag_id) DO UPDATE SET source = excluded.source
                 """, (image_id, tag_id, rating_source))
 
             # *** FIX: Update the cached tag columns in the images table ***
@@ -6,7 +6,7 @@ import config
 import numpy as np
 
 from database import models
-from services import monitor_service, similarity_service
+from services import duplicate_preview_cache, monitor_service, similarity_service
 
 
 def run_find_broken_images() -> Dict[str, Any]:
@@ -282,6 +282,7 @@ async def run_cleanup_broken_images(action: str, image_ids: List[int]) -> Dict[s
                             models.delete_image(filepath)
                             processed += 1
 
+            duplicate_preview_cache.invalidate_previews(image_ids)
             models.load_data_from_db()
             message = f"Moved {processed} broken images back to ingest folder"
 
@@ -318,6 +319,7 @@ async def run_cleanup_broken_images(action: str, image_ids: List[int]) -> Dict[s
                         models.delete_image(filepath)
                         processed += 1
 
+            duplicate_preview_cache.invalidate_previews(image_ids)
             models.load_data_from_db()
             message = f"Permanently deleted {processed} broken images"
 
@@ -1,26 +1,36 @@
+import asyncio
+import time
 from typing import Any, Dict
 
-from database import models
 from utils.deduplication import scan_and_remove_duplicates
 
-from .task_helpers import run_sync_task
 
+def run_deduplicate(dry_run: bool = True, progress_callback=None) -> Dict[str, Any]:
+    """
+    Run the MD5 deduplication scan. Returns dict with status and results.
 
-def run_deduplicate(dry_run: bool = True) -> Dict[str, Any]:
-    """Run MD5 deduplication scan. Returns dict with status and results."""
-    results = scan_and_remove_duplicates(dry_run=dry_run)
-    if not dry_run and results.get("removed", 0) > 0:
-        models.load_data_from_db()
+    progress_callback: Optional callable(current, total, message).
+    Removed images go through the bulk deletion path, which updates the
+    caches itself.
+    """
+    results = scan_and_remove_duplicates(dry_run=dry_run, progress_callback=progress_callback)
     return {"status": "success", "results": results}
 
 
 async def deduplicate_task(task_id, task_manager_instance, *args, **kwargs):
     """Background task wrapper for run_deduplicate."""
+    await task_manager_instance.update_progress(task_id, 0, 100, "Deduplicating...")
     dry_run = kwargs.get("dry_run", True)
-    return await run_sync_task(
-        task_id,
-        task_manager_instance,
-        "Deduplicating...",
-        run_deduplicate,
-        dry_run,
-    )
+    loop = asyncio.get_running_loop()
+    last_update = 0.0
+
+    def progress_callback(current, total, message):
+        nonlocal last_update
+        now = time.time()
+        if now - last_update > 0.2 or (total and current >= total):
+            last_update = now
+            asyncio.run_coroutine_threadsafe(
+                task_manager_instance.update_progress(task_id, current, total, message), loop
+            )
+
+    return await asyncio.to_thread(run_deduplicate, dry_run, progress_callback)
@@ -8,6 +8,7 @@ from .task_helpers import run_sync_task
 def run_reindex_database() -> Dict[str, Any]:
     """Service to optimize the database (VACUUM and REINDEX)."""
     try:
+        from database import rebuild_fts_index
         from database.transaction_helpers import get_db_connection_for_maintenance
         import time
 
@@ -16,7 +17,7 @@ def run_reindex_database() -> Dict[str, Any]:
 
         with get_db_connection_for_maintenance() as conn:
             monitor_service.add_log("Rebuilding FTS index...", "info")
-            conn.execute("INSERT INTO images_fts(images_fts) VALUES('rebuild')")
+            rebuild_fts_index(conn)
 
             monitor_service.add_log("Reindexing standard indexes...", "info")
             conn.execute("REINDEX")
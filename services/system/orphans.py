@@ -8,9 +8,15 @@ from utils.logging_config import get_logger
 logger = get_logger("SystemOrphans")
 
 
-async def run_clean_orphans(dry_run: bool = True) -> Dict[str, Any]:
-    """Service to find and remove database entries for deleted files."""
+async def run_clean_orphans(dry_run: bool = True, progress_callback=None) -> Dict[str, Any]:
+    """
+    Service to find and remove database entries for deleted files.
+
+    progress_callback: Optional callable(current, total, message) for the
+    record deletion.
+    """
     from database import get_db_connection
+    from services.deletion_service import delete_images
 
     loop = asyncio.get_running_loop()
 
@@ -71,10 +77,14 @@ async def run_clean_orphans(dry_run: bool = True) -> Dict[str, Any]:
                 "cleaned": 0,
             }
 
-        cleaned_count = 0
-        for orphan_path in orphans:
-            if models.delete_image(orphan_path):
-                cleaned_count += 1
+        # The files are already gone; only records and caches are removed
+        results = delete_images(orphans, delete_files=False, progress_callback=progress_callback)
+        cleaned_count = results["deleted"]
+
+        if orphaned_tags_count > 0 and cleaned_count == 0:
+            # delete_images() refreshes tag counts itself when it removed anything
+            from core.cache_manager import invalidate_tag_cache
+            invalidate_tag_cache()
 
         if cleaned_count > 0 or orphaned_tags_count > 0:
             logger.info(
@@ -82,9 +92,6 @@ async def run_clean_orphans(dry_run: bool = True) -> Dict[str, Any]:
                     images=cleaned_count, tags=orphaned_tags_count
                 )
             )
-            logger.info("Reloading data to update tag counts...")
-            models.load_data_from_db()
-            logger.info("Tag counts updated after orphan cleanup.")
             message = (
                 "Cleaned {images} orphaned images and {tags} orphaned tag entries. "
                 "Tag counts updated."
@@ -108,4 +115,11 @@ async def clean_orphans_task(task_id, task_manager_instance, *args, **kwargs):
     """Background task wrapper for run_clean_orphans."""
     await task_manager_instance.update_progress(task_id, 0, 100, "Cleaning orphans...")
     dry_run = kwargs.get("dry_run", True)
-    return await run_clean_orphans(dry_run=dry_run)
+    loop = asyncio.get_running_loop()
+
+    def progress_callback(current, total, message):
+        asyncio.run_coroutine_threadsafe(
+            task_manager_instance.update_progress(task_id, current, total, message), loop
+        )
+
+    return await run_clean_orphans(dry_run=dry_run, progress_callback=progress_callback)
@@ -232,6 +232,7 @@ async def recount_tags_task(task_id, task_manager_instance, *args, **kwargs):
 def run_recategorize() -> Dict[str, Any]:
     """Service to recategorize misplaced tags without full rebuild."""
     changes = models.recategorize_misplaced_tags()
+    models.rebuild_dirty_categorized_tags()
     models.load_data_from_db()
     return {
         "status": "success",
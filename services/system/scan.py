@@ -10,8 +10,19 @@ from .task_helpers import run_sync_task
 logger = get_logger("SystemScan")
 
 
-def run_scan_and_process() -> Dict[str, Any]:
-    """Service to find and process new, untracked images."""
+def run_scan_and_process(full_rescan: bool = False) -> Dict[str, Any]:
+    """
+    Service to find and process new, untracked images.
+
+    With full_rescan the scan manifest is cleared first, so every untracked
+    file is hashed again instead of trusting its recorded stat.
+    """
+    if full_rescan:
+        from services import scan_manifest
+
+        cleared = scan_manifest.clear_manifest()
+        logger.info(f"Cleared {cleared} scan manifest entries for a full rescan")
+
     processed_count, attempted_count = monitor_service.run_scan()
 
     logger.info("Checking for orphaned image_tags entries...")
@@ -59,20 +70,19 @@ def run_scan_and_process() -> Dict[str, Any]:
     logger.info(f"Found {len(orphans)} orphaned image records")
 
     if orphans:
+        from services.deletion_service import delete_images
+
         logger.info(f"Cleaning {len(orphans)} orphaned image records...")
-        for orphan_path in orphans:
-            if models.delete_image(orphan_path):
-                cleaned_count += 1
+        # The files are already gone; only records and caches are removed
+        cleaned_count = delete_images(orphans, delete_files=False)["deleted"]
         logger.info(f"Cleaned {cleaned_count} orphaned image records")
     else:
         logger.info("No orphaned image records to clean")
 
-    if cleaned_count > 0 or orphaned_tags_count > 0:
-        logger.info("Reloading data to update tag counts...")
-        from core.cache_manager import load_data_from_db_async
+    if orphaned_tags_count > 0 and cleaned_count == 0:
+        from core.cache_manager import invalidate_tag_cache
 
-        load_data_from_db_async()
-        logger.info("Data reload complete")
+        invalidate_tag_cache()
 
     if processed_count > 0:
         logger.info("New images added. Analyzing database statistics...")
@@ -116,4 +126,5 @@ async def scan_and_process_task(task_id, task_manager_instance, *args, **kwargs)
         task_manager_instance,
         "Scanning and processing...",
         run_scan_and_process,
+        kwargs.get("full_rescan", False),
     )
@@ -2,7 +2,7 @@ import config
 from typing import Any, Dict
 
 from database import models
-from services import monitor_service
+from services import duplicate_preview_cache, monitor_service
 
 
 def validate_secret_string(secret: str) -> Dict[str, Any]:
@@ -20,6 +20,7 @@ def get_system_status() -> Dict[str, Any]:
         Dict containing:
         - monitor: Current monitor service status
         - collection: Total images, unprocessed, tagged, and rated counts
+        - caches: Cache statistics (image details cache, duplicate preview planes)
     """
     from database import get_db_connection
 
@@ -63,6 +64,10 @@ def get_system_status() -> Dict[str, Any]:
             "tagged": tagged_count,
             "rated": rated_count,
         },
+        "caches": {
+            "image_details": models.get_image_details_cache_stats(),
+            "duplicate_previews": duplicate_preview_cache.get_preview_cache_stats(),
+        },
     }
 
 
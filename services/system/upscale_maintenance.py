@@ -1,10 +1,13 @@
+import asyncio
 import os
 from typing import Any, Dict, List, Optional
 
 import config
 from database import get_db_connection
 from services import monitor_service
-from services import upscaler_service
+from services import upscale_queue_service
+
+_POLL_INTERVAL_SECONDS = 2.0
 
 
 def _normalize_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -233,18 +236,10 @@ async def bulk_upscale_small_images_task(task_id, task_manager_instance, setting
     already_upscaled = 0
     error_samples: List[str] = []
 
-    for index, filepath in enumerate(selected_filepaths, 1):
-        await task_manager_instance.update_progress(
-            task_id,
-            index - 1,
-            total,
-            f'Upscaling {index}/{total}',
-            current_item=filepath,
-        )
-
-        result = await upscaler_service.upscale_image(filepath, force=False)
-
-        if result.get('success'):
+    def tally(job: Dict[str, Any]) -> None:
+        nonlocal completed, failed, already_upscaled
+        result = job.get('result') or {}
+        if job['status'] == 'completed':
             if result.get('error') == 'Already upscaled':
                 already_upscaled += 1
             else:
@@ -252,7 +247,39 @@ async def bulk_upscale_small_images_task(task_id, task_manager_instance, setting
         else:
             failed += 1
             if len(error_samples) < 5:
-                error_samples.append(f"{filepath}: {result.get('error', 'Unknown error')}")
+                error_samples.append(f"{job['filepath']}: {job.get('error') or result.get('error', 'Unknown error')}")
+
+    # Queue everything at background priority; interactive upscales from the
+    # image page still jump ahead, and the queue bounds worker concurrency.
+    pending_ids: List[int] = []
+    for filepath in selected_filepaths:
+        try:
+            job = await asyncio.to_thread(upscale_queue_service.enqueue_upscale, filepath, priority=0)
+        except ValueError as e:
+            tally({'status': 'failed', 'filepath': filepath, 'error': str(e)})
+            continue
+        if job['id'] is None:
+            tally(job)
+        else:
+            pending_ids.append(job['id'])
+
+    while pending_ids:
+        await task_manager_instance.update_progress(
+            task_id,
+            total - len(pending_ids),
+            total,
+            f'Upscaling {total - len(pending_ids)}/{total}',
+        )
+        await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+        jobs = await asyncio.to_thread(upscale_queue_service.get_jobs, pending_ids)
+        still_pending = []
+        for job in jobs:
+            if job['status'] in ('completed', 'failed'):
+                tally(job)
+            else:
+                still_pending.append(job['id'])
+        failed += len(pending_ids) - len(jobs)  # removed from the queue meanwhile
+        pending_ids = still_pending
 
     await task_manager_instance.update_progress(task_id, total, total, 'Bulk upscale maintenance complete')
 
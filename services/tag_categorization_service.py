@@ -6,6 +6,7 @@ have a category assigned, showing them by frequency for efficient categorization
 """
 
 from database import get_db_connection
+from repositories.tag_repository import mark_categorized_tags_dirty, rebuild_dirty_categorized_tags
 from typing import List, Dict, Optional, Tuple
 
 
@@ -73,10 +74,135 @@ def get_base_category_from_extended(extended_category: str) -> str:
     return EXTENDED_TO_BASE_CATEGORY_MAP.get(extended_category, 'general')
 
 
+def _base_category_sql(extended_column: str) -> str:
+    """SQL expression for get_base_category_from_extended() over a column."""
+    cases = ' '.join(f"WHEN '{ext}' THEN '{base}'" for ext, base in EXTENDED_TO_BASE_CATEGORY_MAP.items())
+    return f"CASE {extended_column} {cases} ELSE 'general' END"
+
+
+# Images rebuilt by one categorization above which per-image cache entries
+# are dropped wholesale instead of one by one
+_TARGETED_REFRESH_LIMIT = 5000
+
+# Tags whose base category already says everything (no extended category)
+_FULLY_CATEGORIZED = "('character', 'artist', 'copyright', 'species')"
+
+
+def _stage_categorizations(cur, categorizations: Dict[str, Optional[str]]):
+    """Load {tag_name: extended_category} into the connection's staging table."""
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS tag_categorization_staging (
+            name TEXT PRIMARY KEY,
+            extended_category TEXT
+        )
+    """)
+    cur.execute("DELETE FROM tag_categorization_staging")
+    cur.executemany(
+        "INSERT INTO tag_categorization_staging (name, extended_category) VALUES (?, ?)",
+        categorizations.items()
+    )
+
+
+def _apply_staged_categorizations(cur, tag_filter: str = "") -> Tuple[int, List[int]]:
+    """
+    Apply the staged extended categories to existing tags in one statement.
+
+    Same rules as set_tag_category(): a 'general'/'meta' tag also gets the
+    base category of its new extended category, other tags keep theirs.
+    Images carrying a tag whose base category changes are queued for a
+    categorized column rebuild.
+
+    Args:
+        cur: Cursor of the open transaction
+        tag_filter: Extra SQL condition on the tags row (``AND ...``)
+
+    Returns:
+        Tuple (tags updated, IDs of tags whose base category changed)
+    """
+    staged = "(SELECT s.extended_category FROM tag_categorization_staging s WHERE s.name = tags.name)"
+    new_base = f"CASE WHEN {staged} IS NULL THEN tags.category ELSE {_base_category_sql(staged)} END"
+    matched = f"name IN (SELECT name FROM tag_categorization_staging) {tag_filter}"
+
+    cur.execute(f"""
+        SELECT id FROM tags
+        WHERE {matched}
+        AND category IN ('general', 'meta')
+        AND category IS NOT {new_base}
+    """)
+    base_changed = [row['id'] for row in cur.fetchall()]
+    mark_categorized_tags_dirty(cur, base_changed)
+
+    cur.execute(f"""
+        UPDATE tags
+        SET extended_category = {staged},
+            category = CASE WHEN category IN ('general', 'meta') THEN {new_base} ELSE category END
+        WHERE {matched}
+    """)
+    return cur.rowcount, base_changed
+
+
+def _refresh_after_categorization(base_changed: bool = True, tags_created: bool = False) -> int:
+    """
+    Bring derived data back in line after tag category changes.
+
+    Rebuilds the tags_* columns (and through its triggers, FTS) of the images
+    queued in categorized_tags_dirty, drops those images' cached details and
+    homepage pages, and refreshes the tag-level caches. The image list itself
+    only holds tag IDs, so it needs no reload.
+
+    Args:
+        base_changed: A base category changed (the tag index and category
+                      stats are affected); extended-only changes skip those
+        tags_created: New tags were inserted
+
+    Returns:
+        int: Number of images rebuilt
+    """
+    from core.cache_manager import invalidate_tag_cache
+    from core.tag_index import sync_tag_index
+    from events.cache_events import trigger_image_invalidation
+    from repositories.data_access import clear_image_details_cache
+    from services import homepage_cache
+    from services.query.similarity import invalidate_similarity_cache
+    from services.query.stats import get_enhanced_stats
+
+    with get_db_connection() as conn:
+        queued = conn.execute("""
+            SELECT i.filepath, i.md5
+            FROM categorized_tags_dirty d
+            JOIN images i ON i.id = d.image_id
+        """).fetchall()
+
+    rebuilt = rebuild_dirty_categorized_tags()
+
+    if len(queued) > _TARGETED_REFRESH_LIMIT:
+        clear_image_details_cache()
+        homepage_cache.invalidate()
+    elif queued:
+        filepaths = [row['filepath'] for row in queued]
+        trigger_image_invalidation(filepaths=filepaths, md5s=[row['md5'] for row in queued])
+        homepage_cache.invalidate_images(filepaths)
+
+    # Similarity weighting reads base and extended categories
+    invalidate_similarity_cache()
+    if tags_created:
+        invalidate_tag_cache()
+    elif base_changed:
+        # Usage counts and tag IDs are unaffected by a category change
+        sync_tag_index()
+        get_enhanced_stats.cache_clear()
+
+    return rebuilt
+
+
 def get_uncategorized_tags_by_frequency(limit: int = 100, include_simple_categories: bool = True) -> List[Dict]:
     """
     Get uncategorized tags sorted by usage frequency.
 
+    Reads the trigger-maintained tags.usage_count through the partial index
+    idx_tags_uncategorized_usage, so the cost depends on ``limit`` rather
+    than on the size of image_tags.
+
     Args:
         limit: Maximum number of tags to return
         include_simple_categories: If True, also include tags with simple categories
@@ -90,20 +216,13 @@ def get_uncategorized_tags_by_frequency(limit: int = 100, include_simple_categor
 
         # Get tags that need extended categorization (tags without extended_category)
         # Only include 'general' and 'meta' tags - character, artist, copyright, and species
-        # tags don't need extended categories
+        # tags don't need extended categories. Without ANALYZE statistics the
+        # planner prefers the equality indexes and sorts, so name the index.
         cur.execute("""
-            SELECT
-                t.id,
-                t.name,
-                t.category,
-                t.extended_category,
-                COUNT(DISTINCT it.image_id) as usage_count
-            FROM tags t
-            LEFT JOIN image_tags it ON t.id = it.tag_id
-            WHERE t.extended_category IS NULL
-            AND t.category IN ('general', 'meta')
-            GROUP BY t.id, t.name, t.category, t.extended_category
-
+            SELECT id, name, category, usage_count
+            FROM tags INDEXED BY idx_tags_uncategorized_usage
+            WHERE extended_category IS NULL
+            AND category IN ('general', 'meta')
             ORDER BY usage_count DESC
             LIMIT ?
         """, (limit,))
@@ -113,47 +232,25 @@ def get_uncategorized_tags_by_frequency(limit: int = 100, include_simple_categor
         if not tag_rows:
             return []
 
-        # Build tag results
+        # The 3 oldest images per tag. Each lookup reads a 3-row prefix of
+        # idx_image_tags_tag_id instead of ranking every image of the tag.
         tags = []
-        tag_id_to_index = {}
-
-        for idx, row in enumerate(tag_rows):
-            tag_id_to_index[row['id']] = idx
+        for row in tag_rows:
+            cur.execute("""
+                SELECT i.filepath
+                FROM image_tags it
+                JOIN images i ON it.image_id = i.id
+                WHERE it.tag_id = ?
+                ORDER BY it.image_id
+                LIMIT 3
+            """, (row['id'],))
             tags.append({
                 'name': row['name'],
                 'usage_count': row['usage_count'],
-                'sample_images': [],
+                'sample_images': [r['filepath'] for r in cur.fetchall()],
                 'current_category': row['category']
             })
 
-        # Batch fetch sample images for all tags at once (much faster than individual queries)
-        # Using a subquery to get 3 random images per tag
-        tag_ids = [row['id'] for row in tag_rows]
-        placeholders = ','.join('?' for _ in tag_ids)
-
-        # Get sample images in a single query
-        # Use a window function to limit to 3 per tag
-        cur.execute(f"""
-            SELECT tag_id, filepath
-            FROM (
-                SELECT
-                    it.tag_id,
-                    i.filepath,
-                    ROW_NUMBER() OVER (PARTITION BY it.tag_id ORDER BY i.id) as rn
-                FROM image_tags it
-                JOIN images i ON it.image_id = i.id
-                WHERE it.tag_id IN ({placeholders})
-            )
-            WHERE rn <= 3
-        """, tag_ids)
-
-        # Distribute sample images to their respective tags
-        for row in cur.fetchall():
-            tag_id = row['tag_id']
-            if tag_id in tag_id_to_index:
-                idx = tag_id_to_index[tag_id]
-                tags[idx]['sample_images'].append(row['filepath'])
-
         return tags
 
 
@@ -161,74 +258,52 @@ def get_categorization_stats(include_meaningful: bool = True) -> Dict:
     """
     Get statistics about tag categorization status.
 
+    Reads tag_category_counts, which the tags triggers keep current as tags
+    are created, categorized or (un)used, so the cost depends on the number
+    of extended categories rather than on the number of tags.
+
     Args:
-        include_meaningful: If True, include stats for tags actually used in images (slower).
-                          If False, only include basic tag counts (faster).
+        include_meaningful: If True, include stats for tags actually used in images.
+                          If False, report them as 0.
 
     Returns:
         Dict with categorization stats
     """
     with get_db_connection() as conn:
-        cur = conn.cursor()
-
-        # Fast basic stats - only count tags table (no expensive joins)
-        cur.execute("""
-            SELECT
-                COUNT(*) as total_tags,
-                SUM(CASE WHEN extended_category IS NULL AND category IN ('general', 'meta') THEN 1 ELSE 0 END) as extended_uncategorized,
-                SUM(CASE WHEN extended_category IS NOT NULL OR category NOT IN ('general', 'meta') THEN 1 ELSE 0 END) as extended_categorized
-            FROM tags
-        """)
-
-        stats_row = cur.fetchone()
-
-        meaningful_categorized = 0
-        meaningful_uncategorized = 0
-
-        if include_meaningful:
-            # Count "meaningful" tags (tags that are actually used in images)
-            # Use INNER JOIN with GROUP BY on the tags side - this leverages the tag_id index
-            # and avoids the expensive DISTINCT operation in a subquery
-            cur.execute("""
-                SELECT
-                    SUM(CASE
-                        WHEN t.extended_category IS NOT NULL OR t.category NOT IN ('general', 'meta')
-                        THEN 1 ELSE 0
-                    END) as meaningful_categorized,
-                    SUM(CASE
-                        WHEN t.extended_category IS NULL AND t.category IN ('general', 'meta')
-                        THEN 1 ELSE 0
-                    END) as meaningful_uncategorized
-                FROM (
-                    SELECT DISTINCT tag_id FROM image_tags
-                ) it
-                INNER JOIN tags t ON it.tag_id = t.id
-            """)
-
-            meaningful_row = cur.fetchone()
-            meaningful_categorized = meaningful_row['meaningful_categorized'] or 0
-            meaningful_uncategorized = meaningful_row['meaningful_uncategorized'] or 0
-
-        # Get tags by extended category (simple aggregation - no joins needed)
-        cur.execute("""
-            SELECT extended_category, COUNT(*) as count
-            FROM tags
-            WHERE extended_category IS NOT NULL
-            GROUP BY extended_category
-            ORDER BY count DESC
-        """)
-        by_extended_category = {row['extended_category']: row['count'] for row in cur.fetchall()}
+        rows = conn.execute("""
+            SELECT extended_category, status, used, tag_count
+            FROM tag_category_counts
+            WHERE tag_count > 0
+        """).fetchall()
+
+    total_tags = 0
+    counts = {'categorized': 0, 'uncategorized': 0}
+    meaningful = {'categorized': 0, 'uncategorized': 0}
+    by_extended_category = {}
+    for row in rows:
+        total_tags += row['tag_count']
+        if row['status'] in counts:
+            counts[row['status']] += row['tag_count']
+            if row['used']:
+                meaningful[row['status']] += row['tag_count']
+        if row['extended_category']:
+            by_extended_category[row['extended_category']] = (
+                by_extended_category.get(row['extended_category'], 0) + row['tag_count']
+            )
 
-        return {
-            'total_tags': stats_row['total_tags'],
-            'categorized': stats_row['extended_categorized'],
-            'uncategorized': stats_row['extended_uncategorized'],
-            'meaningful_uncategorized': meaningful_uncategorized,
-            'meaningful_categorized': meaningful_categorized,
-            'by_category': by_extended_category,
-            'categories': TAG_CATEGORIES,
-            'extended_categories': EXTENDED_CATEGORIES
-        }
+    if not include_meaningful:
+        meaningful = {'categorized': 0, 'uncategorized': 0}
+
+    return {
+        'total_tags': total_tags,
+        'categorized': counts['categorized'],
+        'uncategorized': counts['uncategorized'],
+        'meaningful_uncategorized': meaningful['uncategorized'],
+        'meaningful_categorized': meaningful['categorized'],
+        'by_category': dict(sorted(by_extended_category.items(), key=lambda item: item[1], reverse=True)),
+        'categories': TAG_CATEGORIES,
+        'extended_categories': EXTENDED_CATEGORIES
+    }
 
 
 def set_tag_category(tag_name: str, category: Optional[str]) -> Dict:
@@ -249,7 +324,7 @@ def set_tag_category(tag_name: str, category: Optional[str]) -> Dict:
         cur = conn.cursor()
 
         # Get old extended category and current base category
-        cur.execute("SELECT extended_category, category FROM tags WHERE name = ?", (tag_name,))
+        cur.execute("SELECT id, extended_category, category FROM tags WHERE name = ?", (tag_name,))
         row = cur.fetchone()
         old_category = row['extended_category'] if row else None
 
@@ -268,6 +343,9 @@ def set_tag_category(tag_name: str, category: Optional[str]) -> Dict:
                 "UPDATE tags SET extended_category = ?, category = ? WHERE name = ?",
                 (category, base_category, tag_name)
             )
+            # Only a base category change affects the images' tags_* columns
+            if base_category != current_base:
+                mark_categorized_tags_dirty(cur, [row['id']])
         else:
             # Keep existing base category, only update extended category
             cur.execute(
@@ -277,49 +355,60 @@ def set_tag_category(tag_name: str, category: Optional[str]) -> Dict:
 
         conn.commit()
 
-        return {
-            'old_category': old_category,
-            'new_category': category
-        }
+    _refresh_after_categorization(base_changed=current_base in ['general', 'meta'] and base_category != current_base)
+
+    return {
+        'old_category': old_category,
+        'new_category': category
+    }
 
 
 def bulk_categorize_tags(categorizations: List[Tuple[str, str]]) -> Dict:
     """
     Categorize multiple tags at once.
 
+    Applies the same rules as set_tag_category() to every tag in one
+    statement, then refreshes the affected images once.
+
     Args:
-        categorizations: List of (tag_name, category) tuples
+        categorizations: List of (tag_name, category) tuples; a later entry
+                         for the same tag wins
 
     Returns:
         Dict with success count and errors
     """
-    with get_db_connection() as conn:
-        cur = conn.cursor()
+    errors = []
+    valid = {}
+    for tag_name, category in categorizations:
+        if category and category not in TAG_CATEGORIES:
+            errors.append(f"{tag_name}: Invalid category '{category}'")
+            continue
+        valid[tag_name] = category or None
+
+    success_count = 0
+    base_changed = []
+    if valid:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            _stage_categorizations(cur, valid)
 
-        success_count = 0
-        errors = []
+            cur.execute("""
+                SELECT s.name FROM tag_categorization_staging s
+                WHERE NOT EXISTS (SELECT 1 FROM tags t WHERE t.name = s.name)
+            """)
+            errors.extend(f"{row['name']}: Tag not found" for row in cur.fetchall())
 
-        for tag_name, category in categorizations:
-            if category and category not in TAG_CATEGORIES:
-                errors.append(f"{tag_name}: Invalid category '{category}'")
-                continue
+            success_count, base_changed = _apply_staged_categorizations(cur)
+            cur.execute("DELETE FROM tag_categorization_staging")
+            conn.commit()
 
-            try:
-                cur.execute(
-                    "UPDATE tags SET category = ? WHERE name = ?",
-                    (category, tag_name)
-                )
-                success_count += 1
-            except Exception as e:
-                errors.append(f"{tag_name}: {str(e)}")
+        _refresh_after_categorization(base_changed=bool(base_changed))
 
-        conn.commit()
-
-        return {
-            'success_count': success_count,
-            'error_count': len(errors),
-            'errors': errors
-        }
+    return {
+        'success_count': success_count,
+        'error_count': len(errors),
+        'errors': errors
+    }
 
 
 def suggest_category_for_tag(tag_name: str) -> Optional[str]:
@@ -398,13 +487,7 @@ def get_tag_details(tag_name: str) -> Dict:
         cur = conn.cursor()
 
         # Get tag info
-        cur.execute("""
-            SELECT t.name, t.category, COUNT(DISTINCT it.image_id) as usage_count
-            FROM tags t
-            LEFT JOIN image_tags it ON t.id = it.tag_id
-            WHERE t.name = ?
-            GROUP BY t.name, t.category
-        """, (tag_name,))
+        cur.execute("SELECT name, category, usage_count FROM tags WHERE name = ?", (tag_name,))
 
         row = cur.fetchone()
         if not row:
@@ -495,6 +578,10 @@ def import_tag_categorizations(data: Dict, mode: str = 'merge', create_missing:
     """
     Import tag categorizations from exported data.
 
+    The whole file is staged in a temporary table and applied with one
+    UPDATE (and one INSERT for missing tags), after which the images whose
+    tags changed base category are rebuilt in a single pass.
+
     Args:
         data: Exported categorization data
         mode: Import mode - 'merge' (keep existing), 'overwrite' (replace all), or 'update' (only update existing)
@@ -515,84 +602,53 @@ def import_tag_categorizations(data: Dict, mode: str = 'merge', create_missing:
         'errors': []
     }
 
+    valid = {}
+    for tag_name, category in tags_data.items():
+        # Validate category
+        if category is not None and category not in TAG_CATEGORIES:
+            stats['errors'].append(f"{tag_name}: Invalid category '{category}'")
+            stats['skipped'] += 1
+            continue
+        valid[tag_name] = category
+
+    if not valid:
+        return stats
+
+    # Don't apply extended categories to character/artist/copyright/species tags,
+    # these are already fully categorized by their base category
+    tag_filter = f"AND (category IS NULL OR category NOT IN {_FULLY_CATEGORIZED})"
+    if mode == 'merge':
+        # Keep existing categorization
+        tag_filter += " AND extended_category IS NULL"
+    elif mode == 'update':
+        # Only update already categorized tags
+        tag_filter += " AND extended_category IS NOT NULL"
+
     with get_db_connection() as conn:
         cur = conn.cursor()
+        _stage_categorizations(cur, valid)
+
+        stats['updated'], base_changed = _apply_staged_categorizations(cur, tag_filter)
+
+        missing_sql = """
+            FROM tag_categorization_staging s
+            WHERE NOT EXISTS (SELECT 1 FROM tags t WHERE t.name = s.name)
+        """
+        if create_missing:
+            cur.execute(f"""
+                INSERT INTO tags (name, category, extended_category)
+                SELECT s.name, {_base_category_sql('s.extended_category')}, s.extended_category
+                {missing_sql}
+            """)
+            stats['created'] = cur.rowcount
 
-        for tag_name, category in tags_data.items():
-            # Validate category
-            if category is not None and category not in TAG_CATEGORIES:
-                stats['errors'].append(f"{tag_name}: Invalid category '{category}'")
-                stats['skipped'] += 1
-                continue
-
-            try:
-                # Check if tag exists
-                cur.execute("SELECT extended_category, category FROM tags WHERE name = ?", (tag_name,))
-                row = cur.fetchone()
-
-                if not row:
-                    if create_missing:
-                        # Create new tag
-                        base_category = get_base_category_from_extended(category) if category else 'general'
-                        
-                        cur.execute(
-                            "INSERT INTO tags (name, category, extended_category) VALUES (?, ?, ?)",
-                            (tag_name, base_category, category)
-                        )
-                        stats['created'] += 1
-                    else:
-                        # Tag doesn't exist and we're not creating it - skip
-                        stats['skipped'] += 1
-                    
-                    continue
-
-                existing_category = row['extended_category']
-                existing_base_category = row['category']
-
-                # Don't apply extended categories to character/artist/copyright/species tags
-                # These are already fully categorized by their base category
-                if existing_base_category in ('character', 'artist', 'copyright', 'species'):
-                    stats['skipped'] += 1
-                    continue
-
-                # Apply import mode logic
-                if mode == 'merge' and existing_category is not None:
-                    # Keep existing categorization
-                    stats['skipped'] += 1
-                    continue
-                elif mode == 'update' and existing_category is None:
-                    # Only update already categorized tags
-                    stats['skipped'] += 1
-                    continue
-
-                # Update the tag with proper base category mapping
-                # Get current base category
-                cur.execute("SELECT category FROM tags WHERE name = ?", (tag_name,))
-                current_base = cur.fetchone()['category']
-
-                # Determine new base category from extended category
-                base_category = get_base_category_from_extended(category) if category else current_base
-
-                # Only update base category if it's currently 'general' or 'meta'
-                # Don't override character, artist, copyright, or species tags
-                if current_base in ['general', 'meta']:
-                    cur.execute(
-                        "UPDATE tags SET extended_category = ?, category = ? WHERE name = ?",
-                        (category, base_category, tag_name)
-                    )
-                else:
-                    cur.execute(
-                        "UPDATE tags SET extended_category = ? WHERE name = ?",
-                        (category, tag_name)
-                    )
-                stats['updated'] += 1
-
-            except Exception as e:
-                stats['errors'].append(f"{tag_name}: {str(e)}")
-                stats['skipped'] += 1
-
+        cur.execute("DELETE FROM tag_categorization_staging")
         conn.commit()
 
+    stats['skipped'] += len(valid) - stats['updated'] - stats['created']
+
+    _refresh_after_categorization(base_changed=bool(base_changed), tags_created=stats['created'] > 0)
+
     return stats
 
 
@@ -620,38 +676,34 @@ def sync_base_categories_from_extended() -> Dict:
         """)
         cleaned = cur.rowcount
 
-        # Get all tags with extended categories (only general and meta now)
+        # Tags with extended categories (only general and meta now)
         cur.execute("""
-            SELECT id, name, category, extended_category
-            FROM tags
+            SELECT COUNT(*) FROM tags
             WHERE extended_category IS NOT NULL
             AND category IN ('general', 'meta')
         """)
+        total_checked = cur.fetchone()[0]
 
-        tags = cur.fetchall()
-        updated = 0
-
-        for tag in tags:
-            tag_id = tag['id']
-            current_base = tag['category']
-            extended_cat = tag['extended_category']
-
-            # Get the correct base category from extended category
-            new_base = get_base_category_from_extended(extended_cat)
-
-            # Only update if it changed
-            if new_base != current_base:
-                cur.execute(
-                    "UPDATE tags SET category = ? WHERE id = ?",
-                    (new_base, tag_id)
-                )
-                updated += 1
-
+        # Correct every base category that disagrees with its extended category
+        new_base = _base_category_sql('extended_category')
+        stale = f"""
+            WHERE extended_category IS NOT NULL
+            AND category IN ('general', 'meta')
+            AND category != {new_base}
+        """
+        cur.execute(f"SELECT id FROM tags {stale}")
+        changed_tag_ids = [row['id'] for row in cur.fetchall()]
+        mark_categorized_tags_dirty(cur, changed_tag_ids)
+
+        cur.execute(f"UPDATE tags SET category = {new_base} {stale}")
+        updated = cur.rowcount
         conn.commit()
 
-        return {
-            'total_checked': len(tags),
-            'updated': updated,
-            'unchanged': len(tags) - updated,
-            'cleaned': cleaned
-        }
+    _refresh_after_categorization(base_changed=bool(changed_tag_ids))
+
+    return {
+        'total_checked': total_checked,
+        'updated': updated,
+        'unchanged': total_checked - updated,
+        'cleaned': cleaned
+    }
@@ -1,6 +1,5 @@
 from quart import jsonify
 from database import models
-from database import get_db_connection
 from utils.file_utils import normalize_image_path
 import traceback
 
@@ -132,20 +131,10 @@ def autocomplete(query: str = ''):
                     "type": "filter"
                 })
 
-    # Get tag categories from database
+    # Ranked prefix/substring matches from the in-memory tag index
     # Exclude dead rating tags that use underscore format (rating_*) instead of colon format (rating:*)
-    with get_db_connection() as conn:
-        cursor = conn.execute("""
-            SELECT t.name, t.category, COUNT(DISTINCT it.image_id) as count
-            FROM tags t
-            LEFT JOIN image_tags it ON t.id = it.tag_id
-            WHERE LOWER(t.name) LIKE ?
-              AND t.name NOT LIKE 'rating\_%' ESCAPE '\\'
-            GROUP BY t.name, t.category
-            ORDER BY count DESC
-            LIMIT 20
-        """, (f"%{search_token}%",))
-        tag_results = cursor.fetchall()
+    from core.tag_index import get_tag_index
+    tag_results = get_tag_index().search(search_token, limit=20, exclude_prefix='rating_')
 
     # Group tags by category
     tag_categories = {}
@@ -157,8 +146,7 @@ def autocomplete(query: str = ''):
         if category not in tag_categories:
             tag_categories[category] = []
 
-        tag_lower = tag_name.lower()
-        is_prefix = tag_lower.startswith(search_token)
+        is_prefix = row['is_prefix']
 
         # If this was a negative search, prepend '-' to the tag and don't use category
         if is_negative_search:
@@ -170,14 +158,17 @@ def autocomplete(query: str = ''):
             final_display = tag_name
             final_category = category
 
-        tag_categories[category].append({
+        item = {
             "tag": final_tag,
             "display": final_display,
             "count": count,
             "category": final_category,
             "type": "tag",
             "is_prefix": is_prefix
-        })
+        }
+        if row['implies'] and not is_negative_search:
+            item["implies"] = row['implies']
+        tag_categories[category].append(item)
 
     # Sort categories by priority and build tag groups
     category_priority = ['character', 'copyright', 'artist', 'species', 'general', 'meta']
@@ -0,0 +1,500 @@
+"""
+Upscale Job Queue
+
+Persistent queue in front of the ML worker upscaler. Jobs live in the
+``upscale_jobs`` table, deduplicated by (md5, model), ordered by priority and
+claimed atomically, so at most ``UPSCALER_QUEUE_SLOTS`` upscales run at once
+across every app process instead of one executor thread per request piling
+up on the worker.
+
+Running jobs heartbeat while they work. A job whose owner stopped
+heartbeating (restart, crash) is put back in the queue, and the ML worker
+resumes it from the tile strips checkpointed under ``UPSCALE_CHECKPOINT_DIR``.
+A job that fails is retried after an exponential backoff, up to
+``_MAX_ATTEMPTS`` attempts; its checkpoint is deleted once it gives up.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import config
+from database import get_db_connection
+from services import upscaler_service
+
+logger = logging.getLogger(__name__)
+
+# Priority used for upscales a user is actively waiting on
+INTERACTIVE_PRIORITY = 10
+
+_TERMINAL_STATUSES = ('completed', 'failed')
+_MAX_ATTEMPTS = 3
+_HEARTBEAT_INTERVAL = 5.0
+_HEARTBEAT_STALE_SECONDS = 30.0
+_PROGRESS_WRITE_INTERVAL = 1.0
+_WAIT_POLL_INTERVAL = 0.5
+
+# Identifies jobs claimed by this process
+_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_dispatcher_task: Optional[asyncio.Task] = None
+_wakeup: Optional[asyncio.Event] = None
+_running: Dict[int, asyncio.Task] = {}
+
+
+# ============================================================================
+# Job records
+# ============================================================================
+
+def _row_to_job(row) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    job = dict(row)
+    job['force'] = bool(job.get('force'))
+    job['result'] = json.loads(job['result']) if job.get('result') else None
+    total = job.get('tiles_total') or 0
+    if job['status'] == 'completed':
+        job['percentage'] = 100
+    elif total > 0:
+        job['percentage'] = round(job['tiles_done'] / total * 100, 1)
+    else:
+        job['percentage'] = 0
+    return job
+
+
+def _checkpoint_dir(md5: str, model_name: str) -> str:
+    return os.path.abspath(os.path.join(config.UPSCALE_CHECKPOINT_DIR, f"{md5}_{model_name}"))
+
+
+def _sweep_checkpoints() -> int:
+    """Delete checkpoint directories that no queued or running job will resume."""
+    try:
+        names = os.listdir(config.UPSCALE_CHECKPOINT_DIR)
+    except OSError:
+        return 0
+
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT md5, model_name FROM upscale_jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+    active = {os.path.basename(_checkpoint_dir(row['md5'], row['model_name'])) for row in rows}
+
+    removed = 0
+    for name in names:
+        path = os.path.join(config.UPSCALE_CHECKPOINT_DIR, name)
+        if name not in active and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} orphaned upscale checkpoint(s)")
+    return removed
+
+
+def _lookup_md5(filepath: str) -> str:
+    """Resolve an image's MD5 from the database, hashing the file as a fallback."""
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT md5 FROM images WHERE filepath = ?", (filepath,)).fetchone()
+    if row and row['md5']:
+        return row['md5']
+
+    from utils.file_utils import get_file_md5
+    for candidate in (filepath, os.path.join(config.IMAGE_DIRECTORY, filepath), f"./static/images/{filepath}"):
+        if os.path.exists(candidate):
+            return get_file_md5(candidate)
+    raise ValueError(f"Original image not found: {filepath}")
+
+
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    """Return a job by ID."""
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT * FROM upscale_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row)
+
+
+def get_jobs(job_ids: List[int]) -> List[Dict[str, Any]]:
+    """Return jobs by ID (missing IDs are skipped)."""
+    if not job_ids:
+        return []
+    placeholders = ','.join('?' for _ in job_ids)
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM upscale_jobs WHERE id IN ({placeholders})", tuple(job_ids)
+        ).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+def get_job_for_filepath(filepath: str) -> Optional[Dict[str, Any]]:
+    """Return the current-model job for an image, with queue position and ETA."""
+    with get_db_connection() as conn:
+        row = conn.execute(
+            """SELECT j.* FROM upscale_jobs j
+               JOIN images i ON i.md5 = j.md5
+               WHERE i.filepath = ? AND j.model_name = ?""",
+            (filepath, config.UPSCALER_MODEL),
+        ).fetchone()
+        job = _row_to_job(row)
+        if job and job['status'] == 'queued':
+            job['position'] = conn.execute(
+                """SELECT COUNT(*) AS ahead FROM upscale_jobs
+                   WHERE status = 'queued'
+                     AND (priority > ? OR (priority = ? AND (enqueued_at, id) < (?, ?)))""",
+                (job['priority'], job['priority'], job['enqueued_at'], job['id']),
+            ).fetchone()['ahead'] + 1
+            average = _average_job_seconds(conn)
+            if average is not None:
+                job['eta_seconds'] = round(job['position'] * average / config.UPSCALER_QUEUE_SLOTS, 1)
+    return job
+
+
+# ============================================================================
+# Enqueue / wait
+# ============================================================================
+
+def enqueue_upscale(filepath: str, priority: int = 0, force: bool = False) -> Dict[str, Any]:
+    """
+    Queue an upscale, merging with any existing job for the same image and model.
+
+    A job that is already queued or running keeps its place (its priority is
+    raised if needed); a finished job is queued again. Without ``force`` an
+    image that already has an upscaled file is reported as completed without
+    touching the queue.
+
+    Args:
+        filepath: Image path relative to the images directory
+        priority: Higher runs first; see INTERACTIVE_PRIORITY
+        force: Re-upscale even if an upscaled file exists
+
+    Returns:
+        Job dict (``id`` is None for the already-upscaled shortcut)
+    """
+    if not force and upscaler_service.check_upscale_exists(filepath):
+        return {
+            'id': None,
+            'filepath': filepath,
+            'status': 'completed',
+            'percentage': 100,
+            'result': {
+                'success': True,
+                'filepath': filepath,
+                'upscaled_path': upscaler_service._find_upscaled_file(filepath),
+                'upscaled_url': upscaler_service.get_upscale_url(filepath),
+                'error': 'Already upscaled',
+            },
+        }
+
+    md5 = _lookup_md5(filepath)
+    model_name = config.UPSCALER_MODEL
+    with get_db_connection() as conn:
+        conn.execute(
+            """INSERT INTO upscale_jobs (md5, model_name, filepath, priority, force, enqueued_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(md5, model_name) DO UPDATE SET
+                   filepath = excluded.filepath,
+                   priority = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                   THEN MAX(upscale_jobs.priority, excluded.priority)
+                                   ELSE excluded.priority END,
+                   force = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                THEN MAX(upscale_jobs.force, excluded.force)
+                                ELSE excluded.force END,
+                   attempts = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                   THEN upscale_jobs.attempts ELSE 0 END,
+                   next_attempt_at = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                          THEN upscale_jobs.next_attempt_at ELSE 0 END,
+                   enqueued_at = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                      THEN upscale_jobs.enqueued_at ELSE excluded.enqueued_at END,
+                   error = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                THEN upscale_jobs.error END,
+                   tiles_done = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                     THEN upscale_jobs.tiles_done ELSE 0 END,
+                   status = CASE WHEN upscale_jobs.status IN ('queued', 'running')
+                                 THEN upscale_jobs.status ELSE 'queued' END""",
+            (md5, model_name, filepath, priority, int(force), time.time()),
+        )
+        row = conn.execute(
+            "SELECT * FROM upscale_jobs WHERE md5 = ? AND model_name = ?",
+            (md5, model_name),
+        ).fetchone()
+        conn.commit()
+
+    _notify_dispatcher()
+    return _row_to_job(row)
+
+
+async def wait_for_job(job_id: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Wait until a job finishes and return its final state.
+
+    Polls the table rather than an in-process future because the job may be
+    claimed by another app process.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        job = await asyncio.to_thread(get_job, job_id)
+        if job is None:
+            raise ValueError(f"Upscale job {job_id} no longer exists")
+        if job['status'] in _TERMINAL_STATUSES:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(_WAIT_POLL_INTERVAL)
+
+
+# ============================================================================
+# Queue status
+# ============================================================================
+
+def _average_job_seconds(conn) -> Optional[float]:
+    """Mean processing time of the most recent real upscales with this model."""
+    row = conn.execute(
+        """SELECT AVG(processing_time) AS avg_time FROM (
+               SELECT processing_time FROM upscale_jobs
+               WHERE status = 'completed' AND model_name = ? AND processing_time IS NOT NULL
+               ORDER BY finished_at DESC
+               LIMIT 20
+           )""",
+        (config.UPSCALER_MODEL,),
+    ).fetchone()
+    return row['avg_time'] if row and row['avg_time'] is not None else None
+
+
+def get_queue_status(limit: int = 20) -> Dict[str, Any]:
+    """
+    Summarize the upscale queue for the UI in one call.
+
+    Returns:
+        Dict with per-status counts, running jobs with progress, the next
+        queued jobs, and an ETA for draining the queue (None until at least
+        one upscale has completed with the current model)
+    """
+    with get_db_connection() as conn:
+        counts = {status: 0 for status in ('queued', 'running', 'completed', 'failed')}
+        for row in conn.execute("SELECT status, COUNT(*) AS cnt FROM upscale_jobs GROUP BY status"):
+            counts[row['status']] = row['cnt']
+
+        running = [
+            _row_to_job(row) for row in conn.execute(
+                "SELECT * FROM upscale_jobs WHERE status = 'running' ORDER BY started_at"
+            )
+        ]
+        queued = [
+            _row_to_job(row) for row in conn.execute(
+                """SELECT * FROM upscale_jobs WHERE status = 'queued'
+                   ORDER BY priority DESC, enqueued_at, id LIMIT ?""",
+                (limit,),
+            )
+        ]
+        average = _average_job_seconds(conn)
+
+    eta_seconds = None
+    if average is not None:
+        remaining_running = sum(1 - job['percentage'] / 100 for job in running)
+        eta_seconds = round((counts['queued'] + remaining_running) * average / config.UPSCALER_QUEUE_SLOTS, 1)
+
+    return {
+        'depth': counts['queued'] + counts['running'],
+        'counts': counts,
+        'slots': config.UPSCALER_QUEUE_SLOTS,
+        'average_seconds': round(average, 2) if average is not None else None,
+        'eta_seconds': eta_seconds,
+        'running': running,
+        'queued': queued,
+    }
+
+
+# ============================================================================
+# Dispatcher
+# ============================================================================
+
+def _claim_next_job() -> Optional[Dict[str, Any]]:
+    """Atomically move the highest-priority queued job to running, if a slot is free."""
+    now = time.time()
+    with get_db_connection() as conn:
+        row = conn.execute(
+            """UPDATE upscale_jobs
+               SET status = 'running', worker_id = ?, started_at = ?, heartbeat_at = ?,
+                   attempts = attempts + 1, message = 'Waiting for ML worker...'
+               WHERE id = (
+                   SELECT id FROM upscale_jobs
+                   WHERE status = 'queued' AND next_attempt_at <= ?
+                   ORDER BY priority DESC, enqueued_at, id LIMIT 1
+               )
+               AND (SELECT COUNT(*) FROM upscale_jobs WHERE status = 'running') < ?
+               RETURNING *""",
+            (_WORKER_ID, now, now, now, config.UPSCALER_QUEUE_SLOTS),
+        ).fetchone()
+        conn.commit()
+    return _row_to_job(row)
+
+
+def _maintain_heartbeats() -> int:
+    """Refresh heartbeats of this process's jobs and requeue abandoned ones."""
+    now = time.time()
+    with get_db_connection() as conn:
+        conn.execute(
+            "UPDATE upscale_jobs SET heartbeat_at = ? WHERE status = 'running' AND worker_id = ?",
+            (now, _WORKER_ID),
+        )
+        cur = conn.execute(
+            """UPDATE upscale_jobs
+               SET status = 'queued', worker_id = NULL,
+                   message = 'Requeued after interruption'
+               WHERE status = 'running'
+                 AND (heartbeat_at IS NULL OR heartbeat_at < ?)""",
+            (now - _HEARTBEAT_STALE_SECONDS,),
+        )
+        requeued = cur.rowcount
+        conn.commit()
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted upscale job(s)")
+    return requeued
+
+
+def _record_progress(job_id: int, current: int, total: int, message: str) -> None:
+    with get_db_connection() as conn:
+        conn.execute(
+            """UPDATE upscale_jobs
+               SET tiles_done = ?, tiles_total = ?, message = ?, heartbeat_at = ?
+               WHERE id = ? AND worker_id = ?""",
+            (current, total, message, time.time(), job_id, _WORKER_ID),
+        )
+        conn.commit()
+
+
+def _finish_job(job: Dict[str, Any], result: Dict[str, Any]) -> None:
+    now = time.time()
+    succeeded = bool(result.get('success'))
+    if succeeded:
+        status = 'completed'
+    elif job['attempts'] < _MAX_ATTEMPTS:
+        status = 'queued'
+    else:
+        status = 'failed'
+
+    # "Already upscaled" returns instantly and would drag the ETA average down
+    processing_time = (
+        result.get('processing_time')
+        if succeeded and result.get('error') != 'Already upscaled'
+        else None
+    )
+
+    # Back off before retrying so a crashing or out-of-memory worker is not hit back-to-back
+    next_attempt_at = 0
+    if status == 'queued':
+        delay = min(config.UPSCALER_RETRY_MAX_SECONDS,
+                    config.UPSCALER_RETRY_BASE_SECONDS * 2 ** (job['attempts'] - 1))
+        next_attempt_at = now + delay
+
+    with get_db_connection() as conn:
+        conn.execute(
+            """UPDATE upscale_jobs
+               SET status = ?, worker_id = NULL, finished_at = ?, processing_time = ?,
+                   next_attempt_at = ?, result = ?, error = ?, message = ?,
+                   tiles_done = CASE WHEN ? THEN tiles_total ELSE tiles_done END
+               WHERE id = ? AND worker_id = ?""",
+            (
+                status, now, processing_time, next_attempt_at,
+                json.dumps(result), result.get('error') if not succeeded else None,
+                'Upscale complete' if succeeded else f"Failed: {result.get('error')}",
+                succeeded, job['id'], _WORKER_ID,
+            ),
+        )
+        conn.commit()
+
+    if status == 'queued':
+        logger.warning(
+            f"Upscale of {job['filepath']} failed (attempt {job['attempts']}/{_MAX_ATTEMPTS}), "
+            f"retrying in {next_attempt_at - now:.0f}s: {result.get('error')}"
+        )
+    elif status == 'failed':
+        # Nothing will resume it; the strips are large uncompressed arrays
+        shutil.rmtree(_checkpoint_dir(job['md5'], job['model_name']), ignore_errors=True)
+
+
+async def _run_job(job: Dict[str, Any]) -> None:
+    last_write = 0.0
+
+    def on_progress(current: int, total: int, message: str) -> None:
+        nonlocal last_write
+        now = time.monotonic()
+        if current < total and now - last_write < _PROGRESS_WRITE_INTERVAL:
+            return
+        last_write = now
+        try:
+            _record_progress(job['id'], current, total, message)
+        except Exception as e:
+            logger.debug(f"Could not record upscale progress for job {job['id']}: {e}")
+
+    try:
+        result = await upscaler_service.upscale_image(
+            job['filepath'],
+            force=job['force'],
+            checkpoint_dir=_checkpoint_dir(job['md5'], job['model_name']),
+            progress_hook=on_progress,
+        )
+    except Exception as e:
+        logger.error(f"Upscale job {job['id']} crashed: {e}", exc_info=True)
+        result = {'success': False, 'filepath': job['filepath'], 'error': str(e)}
+
+    await asyncio.to_thread(_finish_job, job, result)
+
+
+def _on_job_done(job_id: int, _task: asyncio.Task) -> None:
+    _running.pop(job_id, None)
+    _notify_dispatcher()
+
+
+def _notify_dispatcher() -> None:
+    if _wakeup is None or _dispatcher_task is None:
+        return
+    loop = _dispatcher_task.get_loop()
+    if loop.is_closed():
+        return
+    try:
+        if asyncio.get_running_loop() is loop:
+            _wakeup.set()
+            return
+    except RuntimeError:
+        pass
+    loop.call_soon_threadsafe(_wakeup.set)
+
+
+async def _dispatch_loop() -> None:
+    try:
+        await asyncio.to_thread(_sweep_checkpoints)
+    except Exception as e:
+        logger.error(f"Upscale checkpoint sweep failed: {e}", exc_info=True)
+
+    while True:
+        try:
+            await asyncio.to_thread(_maintain_heartbeats)
+            while len(_running) < config.UPSCALER_QUEUE_SLOTS:
+                job = await asyncio.to_thread(_claim_next_job)
+                if job is None:
+                    break
+                logger.info(f"Starting upscale job {job['id']} ({job['filepath']}, priority {job['priority']})")
+                task = asyncio.create_task(_run_job(job))
+                _running[job['id']] = task
+                task.add_done_callback(lambda t, job_id=job['id']: _on_job_done(job_id, t))
+        except Exception as e:
+            logger.error(f"Upscale queue dispatcher error: {e}", exc_info=True)
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=_HEARTBEAT_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_upscale_queue() -> None:
+    """Start this process's queue dispatcher (idempotent; call from the event loop)."""
+    global _dispatcher_task, _wakeup
+    if _dispatcher_task is not None and not _dispatcher_task.done():
+        return
+    _wakeup = asyncio.Event()
+    _dispatcher_task = asyncio.create_task(_dispatch_loop())
+    logger.info(f"Upscale queue dispatcher started ({config.UPSCALER_QUEUE_SLOTS} slot(s))")
@@ -8,7 +8,7 @@ import os
 import asyncio
 import logging
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 import time
 import hashlib
 
@@ -70,7 +70,10 @@ def check_upscale_exists(filepath: str) -> bool:
 
 def get_upscale_url(filepath: str) -> Optional[str]:
     """Get the URL for the upscaled version if it exists (any format)."""
-    actual_path = _find_upscaled_file(filepath)
+    return _upscale_url(_find_upscaled_file(filepath))
+
+
+def _upscale_url(actual_path: Optional[str]) -> Optional[str]:
     if actual_path is None:
         return None
     
@@ -99,8 +102,10 @@ def get_upscale_etag(filepath: str) -> str:
     Generate an ETag for cache invalidation based on upscale status.
     Changes whenever upscale is added/removed.
     """
-    actual_path = _find_upscaled_file(filepath)
-    
+    return _upscale_etag(filepath, _find_upscaled_file(filepath))
+
+
+def _upscale_etag(filepath: str, actual_path: Optional[str]) -> str:
     if actual_path:
         # Include modification time in ETag if upscale exists
         try:
@@ -117,6 +122,17 @@ def get_upscale_etag(filepath: str) -> str:
     return f'"{etag_hash}"'
 
 
+def get_upscale_info(filepath: str) -> Tuple[Optional[str], str]:
+    """
+    Upscale URL and ETag with a single filesystem lookup.
+
+    Returns:
+        Tuple (upscaled_image_url or None, etag)
+    """
+    actual_path = _find_upscaled_file(filepath)
+    return _upscale_url(actual_path), _upscale_etag(filepath, actual_path)
+
+
 # Progress tracking
 # Key: filepath, Value: {status, percentage, message, updated_at}
 active_upscales: Dict[str, Dict] = {}
@@ -126,7 +142,9 @@ def get_upscale_progress(filepath: str) -> Optional[Dict]:
     return active_upscales.get(filepath)
 
 
-async def upscale_image(filepath: str, force: bool = False) -> Dict:
+async def upscale_image(filepath: str, force: bool = False,
+                        checkpoint_dir: Optional[str] = None,
+                        progress_hook: Optional[Callable[[int, int, str], None]] = None) -> Dict:
     """
     Upscale an image using RealESRGAN via ML Worker.
     
@@ -134,6 +152,17 @@ async def upscale_image(filepath: str, force: bool = False) -> Dict:
     - Memory isolation from main process
     - Model is loaded/unloaded as needed
     - Auto-terminates after idle timeout
+
+    Callers should normally go through services.upscale_queue_service so
+    concurrent requests share the bounded worker slots.
+
+    Args:
+        filepath: Image path (relative to images/ or static/)
+        force: Re-upscale even if an upscaled file exists
+        checkpoint_dir: Directory where the worker keeps finished tile
+            strips, letting an interrupted upscale resume
+        progress_hook: Optional (current, total, message) callable, invoked
+            from the worker thread on every progress update
     """
     result = {
         'success': False,
@@ -216,6 +245,8 @@ async def upscale_image(filepath: str, force: bool = False) -> Dict:
                         'total': total,
                         'updated_at': time.time()
                     }
+                if progress_hook:
+                    progress_hook(current, total, message)
             
             return client.upscale_image(
                 image_path=os.path.abspath(source_path),
@@ -228,6 +259,8 @@ async def upscale_image(filepath: str, force: bool = False) -> Dict:
                 allow_cpu_fallback=config.UPSCALER_ALLOW_CPU_FALLBACK,
                 output_format=config.UPSCALER_OUTPUT_FORMAT,
                 output_quality=config.UPSCALER_OUTPUT_QUALITY,
+                tile_batch_size=config.UPSCALER_TILE_BATCH_SIZE,
+                checkpoint_dir=checkpoint_dir,
                 progress_callback=progress_callback
             )
         
@@ -1,24 +1,73 @@
 # services/zip_animation_service.py
 """
 Service for handling zip file animations.
-Zip files containing image sequences are extracted and served as frame-by-frame animations.
+Zip files containing image sequences are served as frame-by-frame animations.
+
+Frames are read straight from the archive. Ingest only reads the zip's
+central directory, writes the frame order to ``animation.json`` and copies
+the first ``ZIP_ANIMATION_PREEXTRACT_FRAMES`` frames to disk (frame 0 is
+what thumbnails, hashing and tagging analyse). Every other frame is read
+from the zip when requested, through a small cache of open archives.
+
+Animations extracted in full by older versions keep working: their
+``animation.json`` has no ``extracted`` count and all frames are on disk.
 """
 
+import io
 import os
+import re
+import threading
 import zipfile
-import tempfile
 import shutil
 import json
+import tempfile
+from collections import OrderedDict
 from PIL import Image
 from typing import Optional, List, Dict, Tuple
 import config
 
-# Directory to store extracted animation frames
+# Directory to store animation indexes and pre-extracted frames
 ANIMATION_FRAMES_DIR = "./static/animations"
 
 # Supported image extensions for animation frames
 FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp')
 
+FRAME_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp'
+}
+
+# Parsed animation.json files kept in memory
+_METADATA_CACHE_SIZE = 256
+
+# Open archives kept for frame reads (each holds a file handle)
+_ARCHIVE_CACHE_SIZE = 8
+
+# Ingest paths remembered until the image row points at the zip
+_ARCHIVE_PATHS_SIZE = 256
+
+_MD5_RE = re.compile(r'^[0-9a-f]{32}$')
+
+_cache_lock = threading.Lock()
+_metadata_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_archive_cache: "OrderedDict[str, _CachedArchive]" = OrderedDict()
+
+# md5 -> zip path seen at ingest, before the image row exists
+_archive_paths: "OrderedDict[str, str]" = OrderedDict()
+
+
+class _CachedArchive:
+    """An open ZipFile shared by readers; closed once evicted and unused."""
+
+    def __init__(self, zf: zipfile.ZipFile):
+        self.zf = zf
+        self.readers = 0
+        self.retired = False
+
 
 def ensure_animations_dir():
     """Ensure the animations directory exists."""
@@ -40,125 +89,350 @@ def is_valid_frame(filename: str) -> bool:
     return filename.lower().endswith(FRAME_EXTENSIONS)
 
 
+def _write_atomic(path: str, data: bytes):
+    # A unique temp name per writer: two requests may index or extract the
+    # same animation at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates 0600; frames are served straight from disk
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _retire(entry: _CachedArchive) -> bool:
+    """Mark an archive evicted (caller holds _cache_lock). True if it can be closed now."""
+    entry.retired = True
+    return entry.readers == 0
+
+
+def _forget(md5: str):
+    """Drop cached metadata and the open archive for an animation."""
+    with _cache_lock:
+        _metadata_cache.pop(md5, None)
+        entry = _archive_cache.pop(md5, None)
+        close = entry is not None and _retire(entry)
+    if close:
+        entry.zf.close()
+
+
+def _frame_size(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    """Width and height from a frame's header."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            return img.size
+    except Exception as e:
+        print(f"[ZipAnimation] Error reading first frame dimensions: {e}")
+        return None, None
+
+
 def extract_zip_animation(zip_filepath: str, md5: str) -> Optional[Dict]:
     """
-    Extract images from a zip file for animation playback using ML Worker.
-    
+    Index a zip animation for playback.
+
+    Reads the archive's central directory, orders the frames, copies the
+    first ZIP_ANIMATION_PREEXTRACT_FRAMES of them to disk and writes
+    animation.json. The remaining frames stay in the archive.
+
     Args:
         zip_filepath: Path to the zip file
         md5: MD5 hash of the zip file (used for storage directory)
-    
+
     Returns:
-        Dictionary with animation metadata, or None if extraction fails
+        Dictionary with animation metadata, or None if indexing fails
     """
     ensure_animations_dir()
-    
+
     try:
-        # Get target directory
         extract_dir = get_animation_dir(md5)
-        
-        # Use ML Worker for extraction
-        from ml_worker.client import get_ml_worker_client
-        client = get_ml_worker_client()
-        
-        # This call blocks until the worker finishes extraction
-        # Since this runs in a thread pool (via ingest_service or similar), it's safe.
-        result = client.extract_animation(
-            zip_path=os.path.abspath(zip_filepath),
-            output_dir=os.path.abspath(extract_dir)
+
+        with zipfile.ZipFile(zip_filepath, 'r') as zf:
+            all_files = zf.namelist()
+            image_files = sorted(
+                (f for f in all_files if is_valid_frame(os.path.basename(f))),
+                key=natural_sort_key
+            )
+            if not image_files:
+                file_list = ", ".join(all_files[:10]) + ("..." if len(all_files) > 10 else "")
+                raise ValueError(
+                    f"No valid image files found in {zip_filepath}. Found {len(all_files)} files: {file_list}. "
+                    f"Supported formats: {', '.join(FRAME_EXTENSIONS)}"
+                )
+
+            # Numbered names keep the frame order on disk
+            frames = [
+                f"frame_{i:05d}{os.path.splitext(name)[1].lower()}"
+                for i, name in enumerate(image_files)
+            ]
+
+            os.makedirs(extract_dir, exist_ok=True)
+            extracted = min(config.ZIP_ANIMATION_PREEXTRACT_FRAMES, len(frames))
+            width, height = None, None
+            for i in range(max(extracted, 1)):
+                data = zf.read(image_files[i])
+                if i == 0:
+                    width, height = _frame_size(data)
+                if i < extracted:
+                    _write_atomic(os.path.join(extract_dir, frames[i]), data)
+
+        metadata = {
+            "frame_count": len(frames),
+            "frames": frames,
+            "width": width,
+            "height": height,
+            "default_fps": 24,
+            "original_files": image_files,
+            "extracted": extracted
+        }
+        _write_atomic(
+            os.path.join(extract_dir, "animation.json"),
+            json.dumps(metadata, indent=2).encode('utf-8')
         )
-        
-        if result:
-            print(f"[ZipAnimation] Extracted {result.get('frame_count')} frames via ML Worker")
-            
-        return result
-            
+
+        _forget(md5)
+        with _cache_lock:
+            _archive_paths[md5] = os.path.abspath(zip_filepath)
+            while len(_archive_paths) > _ARCHIVE_PATHS_SIZE:
+                _archive_paths.popitem(last=False)
+        print(f"[ZipAnimation] Indexed {len(frames)} frames ({extracted} extracted)")
+        return metadata
+
     except Exception as e:
-        print(f"[ZipAnimation] Error extracting {zip_filepath} via ML Worker: {e}")
+        print(f"[ZipAnimation] Error indexing {zip_filepath}: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
+def _archive_path(md5: str) -> Optional[str]:
+    """Locate the zip for an animation: the image row, else the ingest path."""
+    from database import get_db_connection
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT filepath FROM images WHERE md5 = ?", (md5,)).fetchone()
+    if row:
+        # The library copy is authoritative from here on
+        with _cache_lock:
+            _archive_paths.pop(md5, None)
+        path = os.path.join(config.IMAGE_DIRECTORY, row['filepath'])
+        return path if os.path.exists(path) else None
+
+    with _cache_lock:
+        path = _archive_paths.get(md5)
+    return path if path and os.path.exists(path) else None
+
+
+def _acquire_archive(md5: str) -> Optional[_CachedArchive]:
+    """
+    An open archive for the animation, parsed once and kept in an LRU.
+    Pair with _release_archive(); eviction closes the file only after the
+    last reader releases it.
+    """
+    with _cache_lock:
+        entry = _archive_cache.get(md5)
+        if entry is not None:
+            _archive_cache.move_to_end(md5)
+            entry.readers += 1
+            return entry
+
+    path = _archive_path(md5)
+    if not path:
+        return None
+    zf = zipfile.ZipFile(path, 'r')
+
+    to_close = []
+    with _cache_lock:
+        entry = _archive_cache.get(md5)
+        if entry is not None:
+            to_close.append(zf)
+        else:
+            entry = _archive_cache[md5] = _CachedArchive(zf)
+            while len(_archive_cache) > _ARCHIVE_CACHE_SIZE:
+                old = _archive_cache.popitem(last=False)[1]
+                if _retire(old):
+                    to_close.append(old.zf)
+        _archive_cache.move_to_end(md5)
+        entry.readers += 1
+    for old_zf in to_close:
+        old_zf.close()
+    return entry
+
+
+def _release_archive(entry: _CachedArchive):
+    with _cache_lock:
+        entry.readers -= 1
+        close = entry.retired and entry.readers == 0
+    if close:
+        entry.zf.close()
+
+
 def natural_sort_key(s: str) -> List:
     """
     Sort key for natural sorting (handles numeric sequences).
     Example: frame_1, frame_2, frame_10 instead of frame_1, frame_10, frame_2
     """
-    import re
     return [int(text) if text.isdigit() else text.lower()
             for text in re.split(r'(\d+)', s)]
 
 
 def get_animation_metadata(md5: str) -> Optional[Dict]:
     """
-    Get metadata for an extracted animation.
-    
+    Get metadata for an animation.
+
+    Cached in memory after the first read. An animation whose zip is in the
+    library but was never indexed is indexed on first access.
+
     Args:
         md5: MD5 hash of the original zip file
-    
+
     Returns:
         Animation metadata dictionary, or None if not found
     """
-    extract_dir = get_animation_dir(md5)
-    metadata_path = os.path.join(extract_dir, "animation.json")
-    
-    if not os.path.exists(metadata_path):
+    if not _MD5_RE.match(md5 or ''):
         return None
-    
+
+    with _cache_lock:
+        metadata = _metadata_cache.get(md5)
+        if metadata is not None:
+            _metadata_cache.move_to_end(md5)
+            return metadata
+
+    metadata_path = os.path.join(get_animation_dir(md5), "animation.json")
+    if os.path.exists(metadata_path):
+        try:
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+        except Exception as e:
+            print(f"[ZipAnimation] Error reading metadata for {md5}: {e}")
+            return None
+    else:
+        zip_path = _archive_path(md5)
+        metadata = extract_zip_animation(zip_path, md5) if zip_path else None
+        if metadata is None:
+            return None
+
+    with _cache_lock:
+        _metadata_cache[md5] = metadata
+        while len(_metadata_cache) > _METADATA_CACHE_SIZE:
+            _metadata_cache.popitem(last=False)
+    return metadata
+
+
+def frame_etag(md5: str, frame_index: int) -> str:
+    """Entity tag for a frame; frames never change for a given zip MD5."""
+    return f"{md5}-{frame_index}"
+
+
+def read_frame(md5: str, frame_index: int) -> Optional[Tuple[bytes, str]]:
+    """
+    Read one frame's bytes, from disk when extracted, else from the archive.
+
+    Args:
+        md5: MD5 hash of the original zip file
+        frame_index: Zero-based frame index
+
+    Returns:
+        Tuple (frame bytes, content type), or None if not found
+    """
+    metadata = get_animation_metadata(md5)
+    if not metadata:
+        return None
+
+    frames = metadata.get("frames", [])
+    if frame_index < 0 or frame_index >= len(frames):
+        return None
+
+    frame_name = frames[frame_index]
+    content_type = FRAME_CONTENT_TYPES.get(os.path.splitext(frame_name)[1].lower(), 'application/octet-stream')
+
     try:
-        with open(metadata_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"[ZipAnimation] Error reading metadata for {md5}: {e}")
+        with open(os.path.join(get_animation_dir(md5), frame_name), 'rb') as f:
+            return f.read(), content_type
+    except FileNotFoundError:
+        pass
+
+    members = metadata.get("original_files") or []
+    if frame_index >= len(members):
         return None
+    # A second attempt reopens the zip if the cached handle went bad
+    for attempt in range(2):
+        entry = _acquire_archive(md5)
+        if entry is None:
+            return None
+        try:
+            return entry.zf.read(members[frame_index]), content_type
+        except ValueError as e:
+            if attempt:
+                print(f"[ZipAnimation] Error reading frame {frame_index} of {md5}: {e}")
+        except (KeyError, OSError, zipfile.BadZipFile) as e:
+            print(f"[ZipAnimation] Error reading frame {frame_index} of {md5}: {e}")
+            _forget(md5)
+            return None
+        finally:
+            _release_archive(entry)
+        _forget(md5)
+    return None
 
 
 def get_frame_path(md5: str, frame_index: int) -> Optional[str]:
     """
-    Get the file path for a specific frame.
-    
+    Get a file path for a specific frame, for callers that need a file
+    (thumbnails, hashing, tagging). A frame still in the archive is
+    extracted first; playback uses read_frame() instead.
+
     Args:
         md5: MD5 hash of the original zip file
         frame_index: Zero-based frame index
-    
+
     Returns:
         Path to the frame file, or None if not found
     """
     metadata = get_animation_metadata(md5)
     if not metadata:
         return None
-    
+
     frames = metadata.get("frames", [])
     if frame_index < 0 or frame_index >= len(frames):
         return None
-    
-    extract_dir = get_animation_dir(md5)
-    return os.path.join(extract_dir, frames[frame_index])
+
+    frame_path = os.path.join(get_animation_dir(md5), frames[frame_index])
+    if not os.path.exists(frame_path):
+        frame = read_frame(md5, frame_index)
+        if frame is None:
+            return None
+        try:
+            _write_atomic(frame_path, frame[0])
+        except OSError as e:
+            print(f"[ZipAnimation] Error extracting frame {frame_index} of {md5}: {e}")
+            return None
+    return frame_path
 
 
 def get_frame_url(md5: str, frame_index: int) -> Optional[str]:
     """
     Get the URL path for a specific frame (for use in templates/API).
-    
+
     Args:
         md5: MD5 hash of the original zip file
         frame_index: Zero-based frame index
-    
+
     Returns:
         URL path for the frame, or None if not found
     """
     metadata = get_animation_metadata(md5)
     if not metadata:
         return None
-    
-    frames = metadata.get("frames", [])
-    if frame_index < 0 or frame_index >= len(frames):
+
+    if frame_index < 0 or frame_index >= metadata.get("frame_count", 0):
         return None
-    
-    from utils.file_utils import get_hash_bucket
-    bucket = get_hash_bucket(md5)
-    return f"/static/animations/{bucket}/{md5}/{frames[frame_index]}"
+
+    return f"/api/animation/frame/{md5}/{frame_index}"
 
 
 def create_thumbnail_from_animation(md5: str, thumb_dir: str = "./static/thumbnails") -> Optional[str]:
@@ -208,7 +482,7 @@ def create_thumbnail_from_animation(md5: str, thumb_dir: str = "./static/thumbna
 
 def delete_animation_frames(md5: str) -> bool:
     """
-    Delete extracted frames for an animation.
+    Delete the index and extracted frames for an animation.
     
     Args:
         md5: MD5 hash of the original zip file
@@ -217,7 +491,10 @@ def delete_animation_frames(md5: str) -> bool:
         True if deleted successfully, False otherwise
     """
     extract_dir = get_animation_dir(md5)
-    
+    _forget(md5)
+    with _cache_lock:
+        _archive_paths.pop(md5, None)
+
     if not os.path.exists(extract_dir):
         return True
     
@@ -123,57 +123,73 @@ import { showSuccess, showError, showInfo } from './utils/notifications.js';
 
     // Handle Download Selected button
     if (downloadSelectedBtn) {
-        downloadSelectedBtn.addEventListener('click', async function () {
+        downloadSelectedBtn.addEventListener('click', function () {
             if (selectedImages.size === 0) {
                 showInfo('No images selected');
                 return;
             }
 
-            // Update button to show loading state
-            const originalText = downloadSelectedBtn.innerHTML;
-            downloadSelectedBtn.disabled = true;
-            downloadSelectedBtn.innerHTML = '<span class="btn-icon">⏳</span><span class="btn-text">Preparing...</span>';
-
-            try {
-                const response = await fetch('/api/download_images_bulk', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        filepaths: Array.from(selectedImages)
-                    })
+            // Post a form into a hidden iframe: the browser saves the streamed
+            // archive straight to disk instead of buffering it in a blob, and
+            // an error response (JSON) loads into the frame where we can read it.
+            let frame = document.getElementById('bulk-download-frame');
+            if (!frame) {
+                frame = document.createElement('iframe');
+                frame.id = 'bulk-download-frame';
+                frame.name = 'bulk-download-frame';
+                frame.style.display = 'none';
+                frame.addEventListener('load', function () {
+                    try {
+                        const result = JSON.parse(frame.contentDocument.body.textContent);
+                        showError('Error downloading images: ' + (result.error || 'Unknown error'));
+                    } catch (error) {
+                        // Not a JSON error page
+                    }
                 });
-
-                if (response.ok) {
-                    // Get the blob from the response
-                    const blob = await response.blob();
-
-                    // Create a download link
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = `images_${Date.now()}.zip`;
-                    document.body.appendChild(a);
-                    a.click();
-
-                    // Cleanup
-                    window.URL.revokeObjectURL(url);
-                    document.body.removeChild(a);
-                } else {
-                    const result = await response.json();
-                    showError('Error downloading images: ' + (result.error || 'Unknown error'));
-                }
-            } catch (error) {
-                console.error('Error during bulk download:', error);
-                showError('Network error occurred while downloading images');
-            } finally {
-                downloadSelectedBtn.disabled = false;
-                downloadSelectedBtn.innerHTML = originalText;
+                document.body.appendChild(frame);
             }
+
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = '/api/download_images_bulk';
+            form.target = frame.name;
+            form.style.display = 'none';
+
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'filepaths';
+            input.value = JSON.stringify(Array.from(selectedImages));
+            form.appendChild(input);
+
+            document.body.appendChild(form);
+            form.submit();
+            document.body.removeChild(form);
+            showInfo(`Downloading ${selectedImages.size} image${selectedImages.size > 1 ? 's' : ''}...`);
         });
     }
 
+    // Poll a background delete task until it finishes, showing progress on the button
+    async function waitForDeleteTask(taskId) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 500));
+            const response = await fetch(`/api/task_status?task_id=${encodeURIComponent(taskId)}`);
+            if (!response.ok) {
+                throw new Error('Lost track of delete task');
+            }
+            const task = await response.json();
+            if (task.status === 'completed') {
+                return task.result;
+            }
+            if (task.status === 'failed' || task.status === 'cancelled') {
+                showError('Error deleting images: ' + (task.error || task.message || 'Unknown error'));
+                return null;
+            }
+            if (task.total > 0) {
+                deleteSelectedBtn.textContent = `Deleting... ${Math.round(task.progress / task.total * 100)}%`;
+            }
+        }
+    }
+
     // Handle Delete Selected button
     if (deleteSelectedBtn) {
         deleteSelectedBtn.addEventListener('click', async function () {
@@ -199,13 +215,18 @@ import { showSuccess, showError, showInfo } from './utils/notifications.js';
                         'Content-Type': 'application/json'
                     },
                     body: JSON.stringify({
-                        filepaths: Array.from(selectedImages)
+                        filepaths: Array.from(selectedImages),
+                        background: true
                     })
                 });
 
-                const result = await response.json();
+                let result = await response.json();
 
-                if (response.ok) {
+                if (response.ok && result.task_id) {
+                    result = await waitForDeleteTask(result.task_id);
+                }
+
+                if (response.ok && result) {
                     // Remove deleted images from the page
                     selectedImages.forEach(imagePath => {
                         const thumbnail = document.querySelector(`.thumbnail[data-image-path="${imagePath}"]`);
@@ -228,7 +249,7 @@ import { showSuccess, showError, showInfo } from './utils/notifications.js';
 
                     // Reload the page to update the results count
                     window.location.reload();
-                } else {
+                } else if (!response.ok) {
                     showError('Error deleting images: ' + (result.error || 'Unknown error'));
                 }
             } catch (error) {
@@ -25,6 +25,7 @@ const LOW_CONFIDENCE_THRESHOLD = 60;
 let pairs       = [];           // currently loaded page
 let totalPairs  = 0;            // total unreviewed at this threshold
 let pageOffset  = 0;            // current offset in the cache
+let pageCursors = new Map();    // offset -> keyset cursor for that page
 let currentIndex = 0;           // cursor within `pairs`
 let stagedActions = new Map();  // key = "idA-idB"
 let compareMode  = 'side';
@@ -142,7 +143,7 @@ async function triggerSuggestionPrecompute() {
     return api('/api/duplicate-review/precompute-suggestions', { method: 'POST' });
 }
 
-async function fetchQueue(threshold, offset = 0, limit = PAGE_SIZE) {
+async function fetchQueue(threshold, offset = 0, limit = PAGE_SIZE, cursor = null) {
     const params = new URLSearchParams({
         threshold,
         offset,
@@ -151,6 +152,7 @@ async function fetchQueue(threshold, offset = 0, limit = PAGE_SIZE) {
         suggestion_upper: suggestionUpper,
         queue_mode: queueMode
     });
+    if (cursor) params.set('cursor', cursor);
     return api(`/api/duplicate-review/queue?${params.toString()}`);
 }
 
@@ -363,8 +365,11 @@ async function loadPage(offset) {
     isLoading = true;
     showLoadingSpinner(`Loading pairs (threshold ≤ ${threshold})…`);
 
+    if (offset === 0) pageCursors.clear();
+
     try {
-        const data = await fetchQueue(threshold, offset, PAGE_SIZE);
+        const data = await fetchQueue(threshold, offset, PAGE_SIZE, pageCursors.get(offset));
+        if (data.next_cursor) pageCursors.set(offset + PAGE_SIZE, data.next_cursor);
         if (data.phash_bits) phashBits = data.phash_bits;
         if (data.scan_threshold) scanThreshold = data.scan_threshold;
         suggestionCacheReady = data.suggestion_cache_ready !== false;
@@ -668,9 +673,11 @@ async function stageSuggestedVariationsAsSiblings() {
     showLoadingSpinner('Scanning queue for suggested sibling pairs…');
 
     try {
+        let cursor = null;
         for (let offset = 0; ; offset += PAGE_SIZE) {
-            const data = await fetchQueue(threshold, offset, PAGE_SIZE);
+            const data = await fetchQueue(threshold, offset, PAGE_SIZE, cursor);
             const pagePairs = data.pairs || [];
+            cursor = data.next_cursor || null;
             if (pagePairs.length === 0) break;
 
             for (const pair of pagePairs) {
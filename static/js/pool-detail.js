@@ -1,5 +1,6 @@
 // static/js/pool-detail.js
 import { showSuccess, showError, showInfo } from './utils/notifications.js';
+import { encodeImagePath } from './utils/path-utils.js';
 
 document.addEventListener('DOMContentLoaded', () => {
     const modal = document.getElementById('poolModal');
@@ -27,8 +28,80 @@ document.addEventListener('DOMContentLoaded', () => {
             await savePool();
         });
     }
+
+    const loadMoreBtn = document.getElementById('pool-load-more');
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', () => loadMoreImages(loadMoreBtn));
+    }
 });
 
+function createPoolItem(image, poolId) {
+    const item = document.createElement('div');
+    item.className = 'thumbnail skeleton pool-image-item';
+    item.dataset.position = image.position;
+    item.dataset.filepath = image.path;
+
+    const link = document.createElement('a');
+    link.href = `/view/${encodeImagePath(image.path)}`;
+
+    const img = document.createElement('img');
+    const thumbPath = image.thumb.startsWith('thumbnails/') || image.thumb.startsWith('images/')
+        ? image.thumb
+        : `images/${image.thumb}`;
+    img.src = `/static/${encodeImagePath(thumbPath)}`;
+    img.alt = 'Image';
+    img.loading = 'lazy';
+    img.addEventListener('load', () => item.classList.add('has-image'));
+
+    const badge = document.createElement('div');
+    badge.className = 'image-order-badge';
+    badge.textContent = image.position;
+
+    link.append(img, badge);
+
+    const actions = document.createElement('div');
+    actions.className = 'image-actions';
+    const removeBtn = document.createElement('button');
+    removeBtn.className = 'btn-small btn-remove';
+    removeBtn.textContent = 'Remove';
+    removeBtn.addEventListener('click', () => removeFromPool(image.path, poolId));
+    actions.appendChild(removeBtn);
+
+    item.append(link, actions);
+    return item;
+}
+
+async function loadMoreImages(button) {
+    const poolId = button.dataset.poolId;
+    const cursor = button.dataset.nextCursor;
+    const gallery = document.querySelector('.pool-gallery');
+    if (!cursor || !gallery) return;
+
+    button.disabled = true;
+    try {
+        const response = await fetch(`/api/pools/${poolId}/images?cursor=${encodeURIComponent(cursor)}`);
+        const result = await response.json();
+        if (!response.ok) {
+            showError(result.error || 'Failed to load pool images.');
+            return;
+        }
+
+        for (const image of result.images) {
+            gallery.appendChild(createPoolItem(image, poolId));
+        }
+        if (result.next_cursor) {
+            button.dataset.nextCursor = result.next_cursor;
+        } else {
+            button.closest('.load-more-container').remove();
+        }
+    } catch (error) {
+        console.error('Error loading pool images:', error);
+        showError('An error occurred while loading pool images.');
+    } finally {
+        button.disabled = false;
+    }
+}
+
 function editPool(poolId, poolName, poolDescription) {
     const modal = document.getElementById('poolModal');
     const poolIdInput = document.getElementById('poolId');
@@ -639,17 +639,21 @@
                 throw new Error(errorMessage);
             }
 
+            // The server stopped waiting while the job was still queued or running
+            let result = data;
+            if (data.status === 'queued' || data.status === 'running') {
+                result = await waitForQueuedUpscale(currentFilepath);
+            }
+
             hasUpscaled = true;
             showingUpscaled = true;
             upscaleProgress = 100;
 
-            // Show the upscaled image
-            upscaleProgress = 100;
-
             // Show the upscaled image with metadata update
-            showUpscaledImage(data.upscaled_url, data);
+            showUpscaledImage(result.upscaled_url, result);
 
-            showToast(`Upscaled in ${data.processing_time?.toFixed(1) || '?'}s`, 'success');
+            const seconds = result.processing_time?.toFixed(1);
+            showToast(seconds ? `Upscaled in ${seconds}s` : 'Upscaled', 'success');
             if (data.warning?.message) {
                 showToast(data.warning.message, 'warning');
             }
@@ -677,6 +681,25 @@
         }
     }
 
+    /**
+     * Poll a queued upscale until it finishes; resolves with the upscale check data
+     */
+    async function waitForQueuedUpscale(filepath) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            const res = await fetch(`/api/upscale/progress?filepath=${encodeURIComponent(filepath)}`);
+            if (!res.ok) continue;
+            const progress = await res.json();
+            if (progress.status === 'completed') {
+                const checkResponse = await fetch(`/api/upscale/check?filepath=${encodeURIComponent(filepath)}`);
+                return checkResponse.ok ? await checkResponse.json() : progress;
+            }
+            if (progress.status === 'failed' || progress.status === 'idle') {
+                throw new Error(progress.error || 'Upscaling failed');
+            }
+        }
+    }
+
     /**
      * Show the upscaled image using a stacked approach for seamless switching
      */
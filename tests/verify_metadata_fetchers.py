@@ -0,0 +1,143 @@
+"""
+Verify the booru MD5 lookup layer against a local stand-in HTTP server.
+
+Starts an http.server stub that answers Danbooru- and e621-shaped
+/posts.json searches, points DANBOORU_API_URL / E621_API_URL at it and uses
+a throwaway database, then checks that:
+
+1. md5: lookups are batched (one request per METADATA_LOOKUP_BATCH_SIZE hashes)
+2. the keep-alive session is reused (every request arrives on one connection)
+3. cached hits and misses skip the network within their TTL
+
+Run from the repository root:
+    python tests/verify_metadata_fetchers.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from database import core
+
+KNOWN_MD5S = {f"{i:032x}" for i in range(1, 4)}
+
+
+class StubBooruHandler(BaseHTTPRequestHandler):
+    """Answers /danbooru/posts.json and /e621/posts.json md5: searches."""
+
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        source = url.path.strip('/').split('/')[0]
+        tags = parse_qs(url.query).get('tags', [''])[0]
+        md5s = tags[len('md5:'):].split(',') if tags.startswith('md5:') else []
+        self.requests_seen.append({'source': source, 'md5s': md5s, 'port': self.client_address[1]})
+
+        found = [md5 for md5 in md5s if md5 in KNOWN_MD5S]
+        if source == 'danbooru':
+            body = [{'id': i, 'md5': md5, 'tag_string': 'stub'} for i, md5 in enumerate(found, 1)]
+        elif source == 'e621':
+            body = {'posts': [{'id': i, 'file': {'md5': md5}, 'tags': {}} for i, md5 in enumerate(found, 1)]}
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+failures = 0
+
+
+def check(description, condition):
+    global failures
+    print(f"{'PASS' if condition else 'FAILED'}: {description}")
+    if not condition:
+        failures += 1
+
+
+def requests_for(source, since):
+    return [r for r in StubBooruHandler.requests_seen[since:] if r['source'] == source]
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBooruHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        core.DB_FILE = os.path.join(tmp, 'booru.db')
+        core.initialize_database()
+
+        config.DANBOORU_API_URL = f"{base_url}/danbooru"
+        config.E621_API_URL = f"{base_url}/e621"
+        config.METADATA_LOOKUP_BATCH_SIZE = 40
+
+        from services.processing.metadata_fetchers import lookup_md5s
+
+        md5s = [f"{i:032x}" for i in range(1, 7)]
+        seen = StubBooruHandler.requests_seen
+
+        # 1. Batching
+        print("Testing batched md5: lookups...")
+        for source in ('danbooru', 'e621'):
+            start = len(seen)
+            results = lookup_md5s(source, md5s)
+            sent = requests_for(source, start)
+            check(f"{source}: {len(md5s)} hashes sent in one request", len(sent) == 1 and sent[0]['md5s'] == md5s)
+            check(f"{source}: known hashes returned as posts", all(results.get(m) for m in KNOWN_MD5S))
+            check(f"{source}: unknown hashes returned as misses",
+                  all(m in results and results[m] is None for m in md5s if m not in KNOWN_MD5S))
+
+        config.METADATA_LOOKUP_BATCH_SIZE = 2
+        start = len(seen)
+        batched = [f"{i:032x}" for i in range(100, 105)]
+        lookup_md5s('danbooru', batched)
+        check("5 hashes with a batch size of 2 take 3 requests", len(requests_for('danbooru', start)) == 3)
+
+        # 2. Keep-alive
+        print("\nTesting keep-alive session reuse...")
+        ports = {r['port'] for r in requests_for('danbooru', 0)}
+        check(f"{len(requests_for('danbooru', 0))} danbooru requests shared one connection", len(ports) == 1)
+
+        # 3. Lookup cache
+        print("\nTesting the lookup cache...")
+        start = len(seen)
+        cached = lookup_md5s('danbooru', md5s)
+        check("repeat lookup within the TTLs made no requests", len(seen) == start)
+        check("cached hits and misses match the first lookup",
+              all(bool(cached[m]) == (m in KNOWN_MD5S) for m in md5s))
+
+        config.METADATA_LOOKUP_NEGATIVE_TTL = -1
+        start = len(seen)
+        lookup_md5s('danbooru', md5s)
+        sent = requests_for('danbooru', start)
+        misses = [m for m in md5s if m not in KNOWN_MD5S]
+        check("expired misses are re-fetched while hits stay cached",
+              sorted(m for r in sent for m in r['md5s']) == misses)
+
+        core._close_thread_local_connection()
+
+    server.shutdown()
+    print(f"\n{'All checks passed' if not failures else f'{failures} check(s) failed'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from .file_utils import (
     get_thumbnail_path, 
+    get_thumbnail_paths,
     get_file_md5, 
     url_encode_path,
     normalize_image_path,
@@ -37,6 +38,7 @@ from .tag_extraction import (
 
 __all__ = [
     'get_thumbnail_path',
+    'get_thumbnail_paths',
     'get_file_md5',
     'url_encode_path',
     'normalize_image_path',
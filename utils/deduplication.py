@@ -2,37 +2,45 @@
 """
 MD5-based deduplication utility.
 Prevents duplicate images from being processed or downloaded.
+
+The exact-duplicate scan works from the database rather than re-hashing the
+library:
+
+1. Stat every media file under the images directory (directory listing only).
+2. Drop files whose size is unique: they cannot have an exact duplicate.
+3. For the remaining files take the MD5 recorded in ``images.md5`` (or, for
+   files not in the database, in the monitor's scan manifest) and only read
+   a file when that hash is missing or its size/mtime no longer match the
+   stat recorded when it was last verified.
+4. Within each MD5 group keep the oldest database image (lowest id), or the
+   first path when none of the copies is in the database.
+
+Duplicates that are database images are removed through the bulk deletion
+path, which updates the caches once for the whole set.
 """
 
 import os
-import json
-from pathlib import Path
+from collections import defaultdict
+
+import config
 from utils.file_utils import get_file_md5, get_bucketed_thumbnail_path_on_disk
 
-METADATA_DIR = "./metadata"
 STATIC_IMAGES = "./static/images"
 
+# Rows per statement when reading/writing verification stats
+_CHUNK = 500
+
 
 def build_md5_index():
     """
-    Build a mapping of MD5 -> filepath from all existing metadata files.
+    Build a mapping of MD5 -> filepath from the images table.
     Returns dict: {md5: relative_path}
     """
-    md5_index = {}
-    if not os.path.isdir(METADATA_DIR):
-        return md5_index
-    for metadata_file in Path(METADATA_DIR).glob("*.json"):
-        try:
-            with open(metadata_file, "r") as f:
-                metadata = json.load(f)
-            md5 = metadata.get("md5")
-            relative_path = metadata.get("relative_path")
-            if md5 and relative_path:
-                md5_index[md5] = relative_path
-        except Exception as e:
-            print(f"Warning: Could not read {metadata_file}: {e}")
-            continue
-    return md5_index
+    from database import get_db_connection
+
+    with get_db_connection() as conn:
+        rows = conn.execute("SELECT md5, filepath FROM images WHERE md5 IS NOT NULL").fetchall()
+    return {row['md5']: row['filepath'] for row in rows}
 
 
 def is_duplicate(filepath, md5_index=None):
@@ -76,40 +84,168 @@ def remove_duplicate(filepath):
         return False
 
 
-def scan_and_remove_duplicates(dry_run=True):
+def _stat_files(report):
+    """rel_path -> (abs_path, size, mtime_ns, inode) for every media file on disk."""
+    from services.scan_manifest import walk_media_files
+
+    files = {}
+    for abs_path, entry in walk_media_files(STATIC_IMAGES, config.SUPPORTED_MEDIA_EXTENSIONS):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        rel_path = os.path.relpath(abs_path, STATIC_IMAGES).replace(os.sep, '/')
+        files[rel_path] = (abs_path, st.st_size, st.st_mtime_ns, st.st_ino)
+        if len(files) % 5000 == 0:
+            report(0, 0, f"Listing files... ({len(files)})")
+    return files
+
+
+def _load_tracked(paths):
+    """filepath -> row (id, md5, file_size, file_mtime_ns) for the given paths."""
+    from database import get_db_connection
+
+    tracked = {}
+    with get_db_connection() as conn:
+        for i in range(0, len(paths), _CHUNK):
+            chunk = paths[i:i + _CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(
+                f"""SELECT id, filepath, md5, file_size, file_mtime_ns
+                    FROM images WHERE filepath IN ({placeholders})""",
+                chunk,
+            ).fetchall():
+                tracked[row['filepath']] = row
+    return tracked
+
+
+def _save_verified(verified):
+    """Record the stat a tracked file had when its MD5 was confirmed."""
+    from database import get_db_connection
+
+    if not verified:
+        return
+    with get_db_connection() as conn:
+        for i in range(0, len(verified), _CHUNK):
+            conn.executemany(
+                "UPDATE images SET file_size = ?, file_mtime_ns = ? WHERE id = ?",
+                verified[i:i + _CHUNK],
+            )
+            conn.commit()
+
+
+def scan_and_remove_duplicates(dry_run=True, progress_callback=None):
     """
-    Scan all images and remove duplicates based on MD5.
-    Keeps the first occurrence (by metadata file order).
+    Find exact duplicates by MD5 and (unless dry_run) remove them.
+
+    Args:
+        dry_run: Only report what would be removed
+        progress_callback: Optional callable(current, total, message)
+
     Returns: dict: Statistics about duplicates found/removed
     """
-    print("Building MD5 index from metadata...")
-    md5_index = build_md5_index()
+    from services.scan_manifest import load_manifest
+
+    def report(current, total, message):
+        if progress_callback:
+            progress_callback(current, total, message)
+
     print(f"Scanning images in {STATIC_IMAGES}...")
+    report(0, 0, "Listing files...")
+    files = _stat_files(report)
+
+    # Only files sharing a size with another file can be exact duplicates
+    by_size = defaultdict(list)
+    for rel_path, (_, size, _, _) in files.items():
+        by_size[size].append(rel_path)
+    candidates = sorted(path for paths in by_size.values() if len(paths) > 1 for path in paths)
+
+    tracked = _load_tracked(candidates)
+    manifest = load_manifest() if len(tracked) < len(candidates) else {}
+
+    md5s = {}
+    verified = []
+    stale = []
+    hashed = 0
+    total = len(candidates)
+    for done, rel_path in enumerate(candidates, 1):
+        abs_path, size, mtime_ns, inode = files[rel_path]
+        row = tracked.get(rel_path)
+        if row is not None:
+            if row['md5'] and row['file_size'] == size and row['file_mtime_ns'] == mtime_ns:
+                md5s[rel_path] = row['md5']
+            else:
+                md5 = get_file_md5(abs_path)
+                hashed += 1
+                if md5 is None:
+                    continue
+                md5s[rel_path] = md5
+                if md5 == row['md5']:
+                    verified.append((size, mtime_ns, row['id']))
+                else:
+                    stale.append(rel_path)
+        else:
+            entry = manifest.get(rel_path)
+            if entry and entry[0] == (size, mtime_ns, inode):
+                md5s[rel_path] = entry[1]
+            else:
+                md5 = get_file_md5(abs_path)
+                hashed += 1
+                if md5 is None:
+                    continue
+                md5s[rel_path] = md5
+
+        if done % 200 == 0:
+            report(done, total, f"Checking {total} size-matched files...")
+        if len(verified) >= _CHUNK:
+            _save_verified(verified)
+            verified = []
+    _save_verified(verified)
+
+    for rel_path in stale:
+        print(f"Warning: {rel_path} no longer matches its recorded MD5")
+
+    # Group by content; the original is the oldest database image
+    by_md5 = defaultdict(list)
+    for rel_path, md5 in md5s.items():
+        by_md5[md5].append(rel_path)
+
     duplicates_found = []
-    images_scanned = 0
-    for root, _, files in os.walk(STATIC_IMAGES):
-        for file in files:
-            if not file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp', '.mp4')):
-                continue
-            full_path = os.path.join(root, file)
-            rel_path = os.path.relpath(full_path, STATIC_IMAGES)
-            images_scanned += 1
-            is_dup, existing_path, md5 = is_duplicate(full_path, md5_index)
-            if is_dup and existing_path != rel_path:
-                duplicates_found.append({
-                    'duplicate': rel_path,
-                    'original': existing_path,
-                    'md5': md5
-                })
-                if not dry_run:
-                    remove_duplicate(rel_path)
-    
-    # Print report
-    print(f"Scan complete: {images_scanned} images scanned, {len(duplicates_found)} duplicates found.")
-    
+    for md5, paths in by_md5.items():
+        if len(paths) < 2:
+            continue
+        paths.sort(key=lambda p: (tracked[p]['id'] if p in tracked else float('inf'), p))
+        original = paths[0]
+        for path in paths[1:]:
+            duplicates_found.append({
+                'duplicate': path,
+                'original': original,
+                'md5': md5,
+                'in_database': path in tracked,
+            })
+
+    removed = 0
+    if not dry_run and duplicates_found:
+        from services.deletion_service import delete_images
+
+        in_db = [d['duplicate'] for d in duplicates_found if d['in_database']]
+        loose = [d['duplicate'] for d in duplicates_found if not d['in_database']]
+        if in_db:
+            results = delete_images(in_db, delete_files=True, progress_callback=progress_callback)
+            removed += results['deleted']
+        for path in loose:
+            removed += remove_duplicate(path)
+
+    print(f"Scan complete: {len(files)} images scanned, {len(candidates)} size-matched, "
+          f"{hashed} hashed, {len(duplicates_found)} duplicates found.")
+    report(total, total, "Complete")
+
     return {
-        'scanned': images_scanned,
+        'scanned': len(files),
+        'size_matched': len(candidates),
+        'hashed': hashed,
+        'stale_md5': stale,
         'duplicates_found': len(duplicates_found),
         'duplicates': duplicates_found,
-        'removed': 0 if dry_run else len(duplicates_found)
-    }
\ No newline at end of file
+        'removed': removed
+    }
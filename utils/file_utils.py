@@ -5,6 +5,9 @@ from urllib.parse import quote
 # Most filesystems (ext4, XFS, etc.) limit filename length to 255 bytes.
 MAX_FILENAME_BYTES = 240
 
+# Read size for hashing; large reads keep syscall overhead negligible
+HASH_CHUNK_BYTES = 1024 * 1024
+
 
 def sanitize_filename_for_fs(filename, max_bytes=None):
     """
@@ -133,6 +136,43 @@ def get_thumbnail_path(image_path):
     Convert image path to thumbnail path.
     Handles both legacy flat structure and new bucketed structure.
     """
+    return _resolve_thumbnail_path(image_path, lambda rel: os.path.exists(f"static/{rel}"))
+
+
+def get_thumbnail_paths(image_paths):
+    """
+    Resolve thumbnails for many images at once (same result as get_thumbnail_path).
+
+    A thumbnail bucket directory shared by several of the images is listed
+    once instead of stat'ing each candidate file in it.
+
+    Returns:
+        list: Thumbnail paths in the same order as image_paths
+    """
+    image_paths = list(image_paths)
+    shared = {}
+    for image_path in image_paths:
+        filename = os.path.basename(image_path.replace("images/", "", 1))
+        bucket = get_hash_bucket(filename)
+        shared[bucket] = shared.get(bucket, 0) + 1
+    listings = {}
+
+    def exists(rel):
+        directory, name = os.path.split(rel)
+        bucket = os.path.basename(directory)
+        if directory == "thumbnails" or shared.get(bucket, 0) < 2:
+            return os.path.exists(f"static/{rel}")
+        if directory not in listings:
+            try:
+                listings[directory] = set(os.listdir(f"static/{directory}"))
+            except OSError:
+                listings[directory] = set()
+        return name in listings[directory]
+
+    return [_resolve_thumbnail_path(image_path, exists) for image_path in image_paths]
+
+
+def _resolve_thumbnail_path(image_path, exists):
     # Remove "images/" prefix if present
     rel_path = image_path.replace("images/", "", 1)
 
@@ -147,7 +187,7 @@ def get_thumbnail_path(image_path):
     if path_bucket:
          bucketed_thumb = f"thumbnails/{path_bucket}/{thumb_filename}"
          # If the thumbnail exists in this specific bucket, use it
-         if os.path.exists(f"static/{bucketed_thumb}"):
+         if exists(bucketed_thumb):
              return bucketed_thumb
              
          # If we are generating a path for a new image that isn't on disk yet,
@@ -159,12 +199,12 @@ def get_thumbnail_path(image_path):
     # Fall back to canonical bucket based on filename hash
     bucket = get_hash_bucket(filename)
     bucketed_thumb = f"thumbnails/{bucket}/{thumb_filename}"
-    if os.path.exists(f"static/{bucketed_thumb}"):
+    if exists(bucketed_thumb):
         return bucketed_thumb
 
     # Fall back to legacy flat thumbnail path
     legacy_thumb = f"thumbnails/{thumb_filename}"
-    if os.path.exists(f"static/{legacy_thumb}"):
+    if exists(legacy_thumb):
         return legacy_thumb
 
     # Return original image path as last resort
@@ -214,9 +254,14 @@ def get_file_md5(filepath):
             filepath = f"static/{filepath}"
         
         hash_md5 = hashlib.md5()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
+        buffer = bytearray(HASH_CHUNK_BYTES)
+        view = memoryview(buffer)
+        with open(filepath, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hash_md5.update(view[:n])
         return hash_md5.hexdigest()
     except (IOError, OSError):
         return None
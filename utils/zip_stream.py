@@ -0,0 +1,114 @@
+"""
+Streaming ZIP archives.
+
+iter_zip() yields an archive chunk by chunk while it is being written, so a
+response can start sending immediately and memory use stays at one read
+buffer however large the archive gets. Entries are stored, not deflated:
+images, videos and animation zips are already compressed.
+
+The archive is written to a non-seekable sink, so zipfile emits data
+descriptors after each entry and ZIP64 records for large files.
+"""
+
+import asyncio
+import logging
+import os
+import zipfile
+from typing import AsyncIterator, Dict, Iterable, Iterator, Set, Tuple
+
+logger = logging.getLogger('chibibooru.ZipStream')
+
+# Bytes read from a source file per chunk
+CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that buffers output until drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArcnameAllocator:
+    """Unique archive names in O(1) amortized: name.jpg, name_1.jpg, name_2.jpg..."""
+
+    def __init__(self):
+        self._used: Set[str] = set()
+        self._next_suffix: Dict[str, int] = {}
+
+    def allocate(self, name: str) -> str:
+        if name not in self._used:
+            self._used.add(name)
+            return name
+        stem, ext = os.path.splitext(name)
+        counter = self._next_suffix.get(name, 1)
+        candidate = f"{stem}_{counter}{ext}"
+        while candidate in self._used:
+            counter += 1
+            candidate = f"{stem}_{counter}{ext}"
+        self._next_suffix[name] = counter + 1
+        self._used.add(candidate)
+        return candidate
+
+
+def iter_zip(entries: Iterable[Tuple[str, str]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a stored ZIP archive of the given files as it is written.
+
+    Args:
+        entries: (path on disk, name in archive) pairs
+        chunk_size: Bytes read per source file chunk
+
+    Files that disappear before they are reached are skipped.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, arcname in entries:
+            try:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                source = open(path, 'rb')
+            except OSError as e:
+                logger.warning(f"Skipping {path} in archive: {e}")
+                continue
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(zinfo, 'w') as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield sink.drain()
+            data = sink.drain()
+            if data:
+                yield data
+    # Central directory
+    data = sink.drain()
+    if data:
+        yield data
+
+
+async def iterate_in_thread(iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Drive a blocking byte iterator from a worker thread, one chunk at a time."""
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, None)
+        if chunk is None:
+            break
+        if chunk:
+            yield chunk